@@ -6,6 +6,7 @@ from __future__ import annotations
 import collections.abc as cabc
 from collections.abc import Callable, Iterable, Mapping
 from copy import deepcopy
+from dataclasses import dataclass
 from enum import IntEnum, auto
 from itertools import chain
 from typing import Generic, Literal, Protocol, get_args, no_type_check
@@ -22,7 +23,7 @@ from deltakit_circuit._noise_factory import (
     NoiseProfile,
 )
 from deltakit_circuit._noise_layer import NoiseLayer
-from deltakit_circuit._parse_stim import parse_circuit_instruction
+from deltakit_circuit._parse_stim import _intern_qubits, parse_circuit_instruction
 from deltakit_circuit._qubit_identifiers import Coordinate, Qubit, T, U
 from deltakit_circuit._qubit_mapping import default_qubit_mapping
 from deltakit_circuit.gates._abstract_gates import OneQubitMeasurementGate
@@ -36,6 +37,19 @@ class _Comparable(Protocol):  # pylint: disable=too-few-public-methods
         ...
 
 
+@dataclass
+class _StimConversion:
+    """A stim circuit converted from a circuit, with the state of the circuit and
+    the qubit mapping it was converted with."""
+
+    state: tuple
+    default_mapping: bool
+    qubit_mapping: Mapping[Qubit, int]
+    stim_circuit: stim.Circuit
+    # stim circuits converted from each gate and noise layer, by layer version
+    layer_circuits: dict[int, stim.Circuit]
+
+
 class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
     """The deltakit_circuit circuit class. The circuit is implemented as a mutable list
     of layers where each layer is a gate layer, a noise layer, an
@@ -65,6 +79,7 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
         self._layers: list[Layer] = []
         self.iterations = iterations
         self._qubit_uid_type: type | None = None
+        self._stim_conversion: _StimConversion | None = None
         if layers is not None:
             self.append_layers(layers)
 
@@ -232,8 +247,9 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
             layers = tuple(layers)
         elif not isinstance(layers, cabc.Iterable):
             layers = (layers,)
+        layer_types = tuple(LAYERS)
         for layer in layers:
-            if not isinstance(layer, tuple(LAYERS)):
+            if not isinstance(layer, layer_types):
                 msg = f"Layer type is not one of {LAYERS}"
                 raise ValueError(msg)
             if isinstance(layer, Circuit) and layer.iterations == 1:
@@ -243,9 +259,9 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
 
             if (
                 hasattr(layer, "qubits")
-                and self.qubit_uid_type is not None
+                and (qubit_uid_type := self.qubit_uid_type) is not None
                 and not all(
-                    isinstance(qubit.unique_identifier, self.qubit_uid_type)
+                    isinstance(qubit.unique_identifier, qubit_uid_type)
                     for qubit in layer.qubits
                 )
             ):
@@ -475,6 +491,12 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
     ) -> stim.Circuit:
         """Get the equivalent Stim circuit from this deltakit_circuit circuit.
 
+        The conversion is cached until this circuit, its nested circuits or any
+        of their layers are changed, and then only the gate and noise layers which
+        were changed or added are converted again. Changes made directly to the
+        gates or noise channels inside a layer, rather than through the layer, are
+        not detected.
+
         Parameters
         ----------
         qubit_mapping: Mapping[Qubit[T], int] | None, optional
@@ -503,9 +525,7 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
             Y 0
         ''')
         """
-        stim_circuit = stim.Circuit()
-        self.permute_stim_circuit(stim_circuit, qubit_mapping)
-        return stim_circuit
+        return self._cached_stim_circuit(qubit_mapping).copy()
 
     def permute_stim_circuit(
         self,
@@ -526,8 +546,59 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
             mapping should be injective. If not specified, deltakit_circuit will try to
             create a mapping from the qubits specified.
         """
+        stim_circuit += self._cached_stim_circuit(qubit_mapping)
+
+    def _stim_state(self) -> tuple:
+        """Return a value which is equal for two calls only if this circuit and its
+        layers have not been changed in between, used to check whether a cached
+        conversion to stim is still valid."""
+
+        def layer_state(layer: Layer):
+            if isinstance(layer, Circuit):
+                return layer._stim_state()
+            if isinstance(layer, (GateLayer, NoiseLayer)):
+                return layer._version
+            return (layer, layer.tag, getattr(layer, "coordinate", None))
+
+        return (self._iterations, tuple(layer_state(layer) for layer in self._layers))
+
+    def _cached_stim_circuit(
+        self, qubit_mapping: Mapping[Qubit[T], int] | None
+    ) -> stim.Circuit:
+        """Convert this circuit to a Stim circuit, reusing the previous conversion
+        if neither the circuit nor the qubit mapping have changed since. Otherwise,
+        the Stim circuits of the gate and noise layers which have not changed are
+        reused. The returned circuit is cached and must not be modified."""
+        state = self._stim_state()
+        conversion = self._stim_conversion
+        if (
+            conversion is not None
+            and conversion.state == state
+            and (
+                conversion.default_mapping
+                if qubit_mapping is None
+                else qubit_mapping is conversion.qubit_mapping
+                or qubit_mapping == conversion.qubit_mapping
+            )
+        ):
+            return conversion.stim_circuit
+
+        default_mapping = qubit_mapping is None
         if qubit_mapping is None:
             qubit_mapping = default_qubit_mapping(self.qubits)
+        if conversion is not None and (
+            qubit_mapping is conversion.qubit_mapping
+            or qubit_mapping == conversion.qubit_mapping
+        ):
+            # Keep using the same mapping object so that nested circuits can
+            # identify it without comparing it
+            qubit_mapping = conversion.qubit_mapping
+            previous_layer_circuits = conversion.layer_circuits
+        else:
+            qubit_mapping = dict(qubit_mapping)
+            previous_layer_circuits = {}
+
+        layer_circuits = {}
         inner_stim_circuit = stim.Circuit()
         if self.iterations == 1:
             for qubit in self.qubits:
@@ -535,11 +606,24 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
         gate_layers = self.gate_layers()
         last_gate_layer = gate_layers[-1] if gate_layers else None
         for layer in self.layers:
-            layer.permute_stim_circuit(inner_stim_circuit, qubit_mapping)
+            if isinstance(layer, (GateLayer, NoiseLayer)):
+                layer_circuit = previous_layer_circuits.get(layer._version)
+                if layer_circuit is None:
+                    layer_circuit = stim.Circuit()
+                    layer.permute_stim_circuit(layer_circuit, qubit_mapping)
+                layer_circuits[layer._version] = layer_circuit
+                inner_stim_circuit += layer_circuit
+            else:
+                layer.permute_stim_circuit(inner_stim_circuit, qubit_mapping)
             # Append a tick after every gate layer but not after the last one
             if isinstance(layer, GateLayer) and layer is not last_gate_layer:
                 inner_stim_circuit.append("TICK")
-        stim_circuit += self.iterations * inner_stim_circuit
+        stim_circuit = self.iterations * inner_stim_circuit
+
+        self._stim_conversion = _StimConversion(
+            state, default_mapping, qubit_mapping, stim_circuit, layer_circuits
+        )
+        return stim_circuit
 
     def as_detector_error_model(  # noqa: PLR0913
         self,
@@ -625,7 +709,9 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
             ])
         ], iterations=1)
         """
-        qubit_mapping = (
+        # Qubits are shared by all gates and noise channels acting on them, and
+        # with the repeat blocks of the circuit
+        qubit_mapping = _intern_qubits(
             {
                 index: Qubit(Coordinate(*coords), index)
                 for index, coords in stim_circuit.get_final_qubit_coordinates().items()
@@ -645,7 +731,10 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
                 # return the parsed circuit
                 if len(stim_circuit) == 1:
                     return repeated_circuit
-                layers.append(repeated_circuit)
+                if repeated_circuit.iterations == 1:
+                    layers.extend(repeated_circuit.layers)
+                else:
+                    layers.append(repeated_circuit)
             elif isinstance(
                 instruction, stim.CircuitInstruction
             ) and instruction.name not in ("TICK", "QUBIT_COORDS"):
@@ -660,7 +749,14 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
                     layers.extend(circuit_layers)
                 else:
                     layers.append(circuit_layers)
-        return cls(layers)
+        # Qubits of different unique identifier types can only be mixed if the
+        # qubit mapping has qubits of different types, otherwise the layers are
+        # added without checking the qubits in each of them
+        if len({type(qubit.unique_identifier) for qubit in qubit_mapping.values()}) > 1:
+            return cls(layers)
+        circuit = cls()
+        circuit._layers = layers
+        return circuit
 
     def approx_equals(
         self,
@@ -761,6 +857,12 @@ class Circuit(Generic[T]):  # pylint: disable=too-many-public-methods
         circuit_lines.append(f"], iterations={self.iterations})")
         return "\n".join(circuit_lines)
 
+    def __getstate__(self) -> dict:
+        # Cached conversions to stim are not copied or pickled with the circuit
+        state = self.__dict__.copy()
+        state["_stim_conversion"] = None
+        return state
+
     def __copy__(self) -> Circuit:
         """
         Any copy of a circuit is a deep copy
@@ -6,6 +6,7 @@ from __future__ import annotations
 from collections import defaultdict
 from collections.abc import Callable, Iterable, Mapping
 from itertools import chain
+from operator import is_
 from typing import Generic, no_type_check
 
 import stim
@@ -13,7 +14,7 @@ import stim
 from deltakit_circuit._noise_factory import GateReplacementPolicy
 from deltakit_circuit._qubit_identifiers import Qubit, T, U
 from deltakit_circuit._qubit_mapping import default_qubit_mapping
-from deltakit_circuit._stim_identifiers import AppendArguments
+from deltakit_circuit._stim_identifiers import AppendArguments, next_layer_version
 from deltakit_circuit._stim_version_compatibility import is_stim_tag_feature_available
 from deltakit_circuit.gates import MPP, _Gate, _MeasurementGate
 from deltakit_circuit.gates._abstract_gates import (
@@ -48,6 +49,7 @@ class GateLayer(Generic[T]):
         self._qubits: set[Qubit] = set()
         self._non_measurement_gates: list[_NonMeasurementGate] = []
         self._measurement_gates: list[_MeasurementGate] = []
+        self._version = next_layer_version()
         if gates is not None:
             self.add_gates(gates)
 
@@ -81,6 +83,7 @@ class GateLayer(Generic[T]):
         """
 
         gates = (gates,) if isinstance(gates, Gate) else list(gates)
+        self._version = next_layer_version()
         for gate in gates:
             qubits = gate.qubits
             if intersection := self._qubits.intersection(qubits):
@@ -91,6 +94,21 @@ class GateLayer(Generic[T]):
             else:
                 self._non_measurement_gates.append(gate)
 
+    @classmethod
+    def _from_gates_on_distinct_qubits(
+        cls, gates: list[_Gate], qubits: set[Qubit[T]]
+    ) -> GateLayer[T]:
+        """Create a gate layer from gates of a single class without checking each
+        gate for duplicate qubits, given all the qubits that the gates act on and
+        that no two gates act on the same qubit."""
+        layer = cls()
+        if gates and isinstance(gates[0], (OneQubitMeasurementGate, MPP)):
+            layer._measurement_gates = gates
+        else:
+            layer._non_measurement_gates = gates
+        layer._qubits = qubits
+        return layer
+
     def transform_qubits(self, id_mapping: Mapping[T, U]):
         """
         Transform all gates in this gate layer according to the id mapping.
@@ -102,6 +120,7 @@ class GateLayer(Generic[T]):
             A mapping of qubit types to other qubit types
         """
         new_qubits: set[Qubit] = set()
+        self._version = next_layer_version()
         for gate in chain(self._non_measurement_gates, self._measurement_gates):
             # Is maybe dangerous because the mutation happens regardless of
             # whether the error is raised or not
@@ -175,6 +194,7 @@ class GateLayer(Generic[T]):
             are equal to that particular gate will be changed according to the
             associated callable.
         """
+        version, gates = self._version, self.gates
         for gate, gate_generator in replacement_policy.items():
             if isinstance(gate, (OneQubitMeasurementGate, MPP)):
                 if gate in self._measurement_gates:
@@ -190,6 +210,13 @@ class GateLayer(Generic[T]):
                 gate, (OneQubitCliffordGate, OneQubitResetGate, TwoOperandGate)
             ):
                 self._replace_all_non_measurement_types(gate, gate_generator)
+        new_gates = self.gates
+        # Layers in which no gates were replaced keep their version so that their
+        # cached conversions to stim are still used
+        if len(new_gates) == len(gates) and all(map(is_, new_gates, gates)):
+            self._version = version
+        else:
+            self._version = next_layer_version()
 
     def _collect_gates(
         self, qubit_mapping: Mapping[Qubit[T], int]
@@ -299,6 +326,12 @@ class GateLayer(Generic[T]):
             )
         )
 
+    def __setstate__(self, state: dict):
+        # Versions are only unique within a process, so copied and unpickled layers
+        # take a new one.
+        self.__dict__.update(state)
+        self._version = next_layer_version()
+
     def __hash__(self):
         return hash(
             (
@@ -12,7 +12,11 @@ import stim
 
 from deltakit_circuit._qubit_identifiers import Qubit, T, U
 from deltakit_circuit._qubit_mapping import default_qubit_mapping
-from deltakit_circuit._stim_identifiers import AppendArguments, NoiseStimIdentifier
+from deltakit_circuit._stim_identifiers import (
+    AppendArguments,
+    NoiseStimIdentifier,
+    next_layer_version,
+)
 from deltakit_circuit._stim_version_compatibility import is_stim_tag_feature_available
 from deltakit_circuit.noise_channels import (
     Leakage,
@@ -58,6 +62,7 @@ class NoiseLayer(Generic[T]):
     ):
         self._uncorrelated_noise_channels: list[_UncorrelatedNoise | _LeakageNoise] = []
         self._correlated_noise_channels: list[_CorrelatedNoise] = []
+        self._version = next_layer_version()
         if noise_channels is not None:
             self.add_noise_channels(noise_channels)
 
@@ -90,6 +95,7 @@ class NoiseLayer(Generic[T]):
         id_mapping : Mapping[T, U]
             A mapping of qubit types to other qubit types
         """
+        self._version = next_layer_version()
         for noise_channel in chain(
             self._uncorrelated_noise_channels, self._correlated_noise_channels
         ):
@@ -110,6 +116,7 @@ class NoiseLayer(Generic[T]):
             if isinstance(noise_channels, ALL_NOISE_CHANNELS)
             else noise_channels
         )
+        self._version = next_layer_version()
         for noise_channel in noise_channels:
             if isinstance(noise_channel, UNCORRELATED_NOISE_CHANNELS):
                 self._uncorrelated_noise_channels.append(noise_channel)
@@ -260,6 +267,10 @@ class NoiseLayer(Generic[T]):
 
         return True
 
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self._version = next_layer_version()
+
     def __eq__(self, other: object) -> bool:
         return (
             isinstance(other, NoiseLayer)
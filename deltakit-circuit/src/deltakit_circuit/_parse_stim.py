@@ -68,24 +68,51 @@ class InstructionNotImplemented(NotImplementedError):
         super().__init__(f"Parsing of '{instruction}' is not implemented yet.")
 
 
+class _QubitCache(dict[int, Qubit]):
+    """Qubits by their stim index, which creates the qubit for an index missing
+    from the given qubit mapping only once so that all targets on that index share
+    the same qubit."""
+
+    def __missing__(self, index: int) -> Qubit:
+        qubit = self[index] = Qubit(index)
+        return qubit
+
+
+def _intern_qubits(qubit_mapping: Mapping[int, Qubit]) -> _QubitCache:
+    """Return a qubit cache for the given qubit mapping, which is the mapping itself
+    if it is already a qubit cache."""
+    if isinstance(qubit_mapping, _QubitCache):
+        return qubit_mapping
+    return _QubitCache(qubit_mapping)
+
+
 def _classify_pauli_target(
     target: stim.GateTarget, qubit_mapping: Mapping[int, Qubit]
 ) -> _PauliGate | _InvertiblePauliGate:
-    qubit = qubit_mapping.get(target.value, Qubit(target.value))
     if target.is_x_target:
-        if target.is_inverted_result_target:
-            return InvertiblePauliX(qubit, invert=True)
-        return PauliX(qubit)
-    if target.is_y_target:
-        if target.is_inverted_result_target:
-            return InvertiblePauliY(qubit, invert=True)
-        return PauliY(qubit)
-    if target.is_z_target:
-        if target.is_inverted_result_target:
-            return InvertiblePauliZ(qubit, invert=True)
-        return PauliZ(qubit)
-    msg = f"Target: {target} is not a Pauli gate target."
-    raise ValueError(msg)
+        pauli_classes = (PauliX, InvertiblePauliX)
+    elif target.is_y_target:
+        pauli_classes = (PauliY, InvertiblePauliY)
+    elif target.is_z_target:
+        pauli_classes = (PauliZ, InvertiblePauliZ)
+    else:
+        msg = f"Target: {target} is not a Pauli gate target."
+        raise ValueError(msg)
+    pauli_class, invertible_pauli_class = pauli_classes
+    qubit = qubit_mapping[target.value]
+    if target.is_inverted_result_target:
+        return invertible_pauli_class(qubit, invert=True)
+    return pauli_class(qubit)
+
+
+def _instruction_gate_layer(gates: list[_Gate], qubits: list[Qubit]) -> GateLayer:
+    """Create the gate layer for the gates of a single instruction, which act on
+    the given qubits. The gates are only checked one by one for duplicate qubits if
+    some qubit is acted on more than once, in which case an error is raised."""
+    unique_qubits = set(qubits)
+    if len(unique_qubits) == len(qubits):
+        return GateLayer._from_gates_on_distinct_qubits(gates, unique_qubits)
+    return GateLayer(gates)
 
 
 def _parse_single_qubit_gate_instruction(
@@ -94,14 +121,19 @@ def _parse_single_qubit_gate_instruction(
     instruction_tag: str | None,
     qubit_mapping: Mapping[int, Qubit],
 ) -> list[GateLayer]:
-    qubits = (
-        qubit_mapping.get(target.value, Qubit(target.value))
-        for target in instruction_targets
-    )
-    time_steps = group_targets(qubit for qubit in qubits)
+    qubits = [qubit_mapping[target.value] for target in instruction_targets]
+    # Most instructions act on each qubit once, so fit in a single time step
+    unique_qubits = set(qubits)
+    if len(unique_qubits) == len(qubits):
+        return [
+            GateLayer._from_gates_on_distinct_qubits(
+                [gate_class(qubit, tag=instruction_tag) for qubit in unique_qubits],
+                unique_qubits,
+            )
+        ]
     return [
         GateLayer(gate_class(qubit, tag=instruction_tag) for qubit in time_step)
-        for time_step in time_steps
+        for time_step in group_targets(qubits)
     ]
 
 
@@ -112,14 +144,19 @@ def _parse_two_qubit_gate_instruction(
     qubit_mapping: Mapping[int, Qubit],
 ) -> GateLayer:
     targets: list[Qubit | SweepBit | MeasurementRecord] = []
+    qubits: list[Qubit] = []
     for target in instruction_targets:
         if target.is_sweep_bit_target:
             targets.append(SweepBit(target.value))
         elif target.is_measurement_record_target:
             targets.append(MeasurementRecord(target.value))
         else:
-            targets.append(qubit_mapping.get(target.value, Qubit(target.value)))
-    return GateLayer(gate_class.from_consecutive(targets, tag=tag))
+            qubit = qubit_mapping[target.value]
+            targets.append(qubit)
+            qubits.append(qubit)
+    return _instruction_gate_layer(
+        list(gate_class.from_consecutive(targets, tag=tag)), qubits
+    )
 
 
 def _parse_single_qubit_measurement(
@@ -130,15 +167,16 @@ def _parse_single_qubit_measurement(
     qubit_mapping: Mapping[int, Qubit],
 ) -> GateLayer:
     probability = next(iter(instruction_arguments), 0.0)
-    return GateLayer(
+    gates = [
         gate_class(
-            qubit_mapping.get(target.value, Qubit(target.value)),
+            qubit_mapping[target.value],
             probability,
             invert=target.is_inverted_result_target,
             tag=tag,
         )
         for target in instruction_targets
-    )
+    ]
+    return _instruction_gate_layer(gates, [gate.qubit for gate in gates])
 
 
 def _parse_mpp_instruction(
@@ -200,10 +238,7 @@ def _parse_single_qubit_noise_instruction(
     tag: str | None,
     qubit_mapping: Mapping[int, Qubit],
 ) -> NoiseLayer:
-    qubits = (
-        qubit_mapping.get(target.value, Qubit(target.value))
-        for target in instruction_targets
-    )
+    qubits = (qubit_mapping[target.value] for target in instruction_targets)
     return NoiseLayer(noise_class(qubit, probability, tag=tag) for qubit in qubits)
 
 
@@ -213,10 +248,7 @@ def _parse_depolarise_2_noise_instruction(
     tag: str | None,
     qubit_mapping: Mapping[int, Qubit],
 ) -> NoiseLayer:
-    qubits = [
-        qubit_mapping.get(target.value, Qubit(target.value))
-        for target in instruction_targets
-    ]
+    qubits = [qubit_mapping[target.value] for target in instruction_targets]
     return NoiseLayer(Depolarise2.from_consecutive(qubits, probability, tag=tag))
 
 
@@ -226,10 +258,7 @@ def _parse_pauli_channel_1_instruction(
     tag: str | None,
     qubit_mapping: Mapping[int, Qubit],
 ) -> NoiseLayer:
-    qubits = (
-        qubit_mapping.get(target.value, Qubit(target.value))
-        for target in instruction_targets
-    )
+    qubits = (qubit_mapping[target.value] for target in instruction_targets)
     return NoiseLayer(PauliChannel1(qubit, *probabilities, tag=tag) for qubit in qubits)
 
 
@@ -239,10 +268,7 @@ def _parse_pauli_channel_2_instruction(
     tag: str | None,
     qubit_mapping: Mapping[int, Qubit],
 ) -> NoiseLayer:
-    qubits = [
-        qubit_mapping.get(target.value, Qubit(target.value))
-        for target in instruction_targets
-    ]
+    qubits = [qubit_mapping[target.value] for target in instruction_targets]
     return NoiseLayer(PauliChannel2.from_consecutive(qubits, *probabilities, tag=tag))
 
 
@@ -295,6 +321,7 @@ def parse_stim_gate_instruction(
     ValueError
         If the given gate is not a recognised deltakit_circuit gate class.
     """
+    qubit_mapping = _intern_qubits(qubit_mapping)
     if issubclass(
         deltakit_circuit_gate_class, (OneQubitCliffordGate, OneQubitResetGate)
     ):
@@ -360,6 +387,7 @@ def parse_stim_noise_instruction(
     ValueError
         If the type of noise is not a recognised deltakit_circuit noise channel.
     """
+    qubit_mapping = _intern_qubits(qubit_mapping)
     if issubclass(
         deltakit_circuit_noise_class,
         (PauliXError, PauliYError, PauliZError, Depolarise1, Leakage, Relax),
@@ -490,6 +518,7 @@ def parse_circuit_instruction(
     InstructionNotImplemented
         If the instruction cannot be parsed yet.
     """
+    qubit_mapping = _intern_qubits(qubit_mapping)
     instruction_name = instruction.name
     instruction_targets = instruction.targets_copy()
     instruction_arguments = instruction.gate_args_copy()
@@ -1,10 +1,17 @@
 # (c) Copyright Riverlane 2020-2025.
 """Module which provides ways to identify instructions to stim."""
 
+from itertools import count
 from typing import NamedTuple
 
 import stim
 
+# Gate and noise layers take a new version from this whenever they are changed, so
+# that the stim instructions converted from a layer can be reused until it changes.
+# Versions are never shared between layers in a process, so layers copied or
+# unpickled from elsewhere take a new version.
+next_layer_version = count().__next__
+
 
 class NoiseStimIdentifier(NamedTuple):
     """Collection of information which uniquely identifies a noise channel to
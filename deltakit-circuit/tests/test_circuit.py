@@ -1,6 +1,9 @@
 # (c) Copyright Riverlane 2020-2025.
 import contextlib
+import pickle
+from copy import deepcopy
 from itertools import combinations
+from unittest import mock
 
 import pytest
 import stim
@@ -1510,6 +1513,127 @@ class TestStimCircuit:
         assert empty_circuit.as_stim_circuit() == stim.Circuit("MX 0\nMZ 1\nMX 2")
 
 
+class TestStimConversionCache:
+    @pytest.fixture
+    def circuit(self, noiseless_circuit: sp.Circuit) -> sp.Circuit:
+        noiseless_circuit.append_layers(
+            [
+                sp.Detector([sp.MeasurementRecord(-1)], coordinate=(0, 0)),
+                sp.Circuit(
+                    [
+                        sp.GateLayer(sp.gates.RZ(sp.Qubit(i)) for i in range(2)),
+                        sp.GateLayer(sp.gates.MZ(sp.Qubit(i)) for i in range(2)),
+                    ],
+                    iterations=3,
+                ),
+            ]
+        )
+        return noiseless_circuit
+
+    @staticmethod
+    def uncached_stim_circuit(circuit: sp.Circuit) -> stim.Circuit:
+        return sp.Circuit(circuit.layers, circuit.iterations).as_stim_circuit()
+
+    def test_unchanged_circuit_reuses_its_conversion(self, circuit: sp.Circuit):
+        stim_circuit = circuit.as_stim_circuit()
+        cached_circuit = circuit._stim_conversion.stim_circuit
+        assert circuit.as_stim_circuit() == stim_circuit
+        assert circuit._stim_conversion.stim_circuit is cached_circuit
+
+    def test_returned_stim_circuit_can_be_modified(self, circuit: sp.Circuit):
+        stim_circuit = circuit.as_stim_circuit()
+        circuit.as_stim_circuit().append("TICK")
+        assert circuit.as_stim_circuit() == stim_circuit
+
+    @staticmethod
+    def spy_on_gate_layer_conversion():
+        return mock.patch.object(
+            sp.GateLayer,
+            "permute_stim_circuit",
+            autospec=True,
+            side_effect=sp.GateLayer.permute_stim_circuit,
+        )
+
+    def test_applying_gate_noise_only_converts_the_new_noise_layers(
+        self, circuit: sp.Circuit
+    ):
+        circuit.as_stim_circuit()
+        circuit.apply_gate_noise(
+            lambda context: [
+                sp.noise_channels.PauliXError(qubit, 0.1)
+                for qubit in context.gate_layer_qubits(sp.gates.X)
+            ],
+            sp.Circuit.LayerAdjacency.AFTER,
+        )
+        with self.spy_on_gate_layer_conversion() as spy:
+            stim_circuit = circuit.as_stim_circuit()
+        assert spy.call_count == 0
+        assert stim_circuit == self.uncached_stim_circuit(circuit)
+        assert "X_ERROR" in str(stim_circuit)
+
+    def test_replacing_gates_only_converts_the_replaced_layers(
+        self, circuit: sp.Circuit
+    ):
+        circuit.as_stim_circuit()
+        circuit.replace_gates({sp.gates.X: lambda gate: sp.gates.Y(gate.qubit)})
+        with self.spy_on_gate_layer_conversion() as spy:
+            stim_circuit = circuit.as_stim_circuit()
+        assert spy.call_count == 1
+        assert stim_circuit == self.uncached_stim_circuit(circuit)
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda circuit: circuit.layers.append(sp.GateLayer(sp.gates.H(0))),
+            lambda circuit: circuit.layers.pop(0),
+            lambda circuit: setattr(circuit, "iterations", 2),
+            lambda circuit: setattr(circuit.layers[-1], "iterations", 5),
+            lambda circuit: circuit.layers[-1].layers[0].add_gates(sp.gates.RX(5)),
+            lambda circuit: circuit.detectors()[0].transform_coordinates({(0, 0): (1, 1)}),
+            lambda circuit: circuit.transform_qubits({i: i + 1 for i in range(10)}),
+            lambda circuit: circuit.remove_noise(),
+        ],
+    )
+    def test_changed_circuit_is_converted_again(self, circuit: sp.Circuit, change):
+        circuit.apply_gate_noise(
+            lambda context: [
+                sp.noise_channels.PauliZError(qubit, 0.1)
+                for qubit in context.gate_layer_qubits(sp.gates.MZ)
+            ],
+            sp.Circuit.LayerAdjacency.BEFORE,
+        )
+        circuit.as_stim_circuit()
+        change(circuit)
+        assert circuit.as_stim_circuit() == self.uncached_stim_circuit(circuit)
+
+    def test_conversion_with_other_qubit_mapping_is_not_reused(
+        self, circuit: sp.Circuit
+    ):
+        qubit_mapping = {sp.Qubit(i): 9 - i for i in range(10)}
+        circuit.as_stim_circuit()
+        assert circuit.as_stim_circuit(qubit_mapping) == sp.Circuit(
+            circuit.layers
+        ).as_stim_circuit(qubit_mapping)
+        assert circuit.as_stim_circuit() == self.uncached_stim_circuit(circuit)
+
+    def test_copied_circuit_does_not_share_the_conversion(self, circuit: sp.Circuit):
+        circuit.as_stim_circuit()
+        assert deepcopy(circuit)._stim_conversion is None
+        assert pickle.loads(pickle.dumps(circuit))._stim_conversion is None
+
+    def test_layers_made_after_unpickling_are_converted(self):
+        layer = sp.GateLayer(sp.gates.H(0))
+        circuit = pickle.loads(pickle.dumps(sp.Circuit(layer)))
+        circuit.as_stim_circuit()
+        # Layers made in another process can be given the versions of pickled layers
+        with mock.patch(
+            "deltakit_circuit._gate_layer.next_layer_version",
+            return_value=layer._version,
+        ):
+            circuit.append_layers(sp.GateLayer(sp.gates.X(0)))
+        assert circuit.as_stim_circuit() == self.uncached_stim_circuit(circuit)
+
+
 class TestQubitTransforms:
     def test_qubits_in_gate_layers_are_changed_according_to_mapping(self):
         circuit = sp.Circuit(
@@ -3,6 +3,7 @@ import pytest
 import stim
 
 import deltakit_circuit as sp
+from deltakit_circuit._gate_layer import DuplicateQubitError
 from deltakit_circuit._parse_stim import (
     InstructionNotImplemented,
     parse_circuit_instruction,
@@ -116,3 +117,53 @@ def test_parsing_stim_generated_circuits_does_not_raise_an_error(
     stim_generated_circuit,
 ):
     assert sp.Circuit.from_stim_circuit(stim_generated_circuit)
+
+
+def test_gates_and_noise_on_the_same_stim_qubit_share_a_qubit():
+    circuit = sp.Circuit.from_stim_circuit(
+        stim.Circuit("H 0 1\nCX 0 1\nDEPOLARIZE1(0.1) 0\nREPEAT 2 {\nM 0\n}")
+    )
+    hadamard_layer, cnot_layer, noise_layer, repeated_circuit = circuit.layers
+    cnot = cnot_layer.gates[0]
+    assert cnot.control is next(
+        gate.qubit for gate in hadamard_layer.gates if gate.qubit == cnot.control
+    )
+    assert noise_layer.noise_channels[0].qubit is cnot.control
+    assert repeated_circuit.layers[0].gates[0].qubit is cnot.control
+
+
+def test_parsing_instruction_does_not_change_the_qubit_mapping():
+    qubit_mapping = {0: sp.Qubit(sp.Coordinate(0, 0), 0)}
+    parse_circuit_instruction(stim.CircuitInstruction("H", [0, 1]), qubit_mapping)
+    assert qubit_mapping == {0: sp.Qubit(sp.Coordinate(0, 0), 0)}
+
+
+@pytest.mark.parametrize("instruction", ["M 0 1 0", "MX(0.1) 2 !2", "CZ 0 1 1 2"])
+def test_error_is_raised_if_measured_or_two_qubit_gate_qubit_is_repeated(
+    instruction,
+):
+    with pytest.raises(DuplicateQubitError):
+        sp.Circuit.from_stim_circuit(stim.Circuit(instruction))
+
+
+@pytest.mark.parametrize(
+    "stim_circuit",
+    [
+        stim.Circuit("QUBIT_COORDS(0, 0) 0\nH 0 1"),
+        stim.Circuit("QUBIT_COORDS(0, 0) 0\nREPEAT 2 {\nH 1\n}\nH 0"),
+    ],
+)
+def test_error_is_raised_when_parsing_qubits_with_and_without_coordinates(
+    stim_circuit,
+):
+    with pytest.raises(TypeError, match="must be of the same type"):
+        sp.Circuit.from_stim_circuit(stim_circuit)
+
+
+def test_parsing_repeat_block_with_one_repeat_among_other_instructions():
+    stim_circuit = stim.Circuit("H 0\nREPEAT 1 {\nX 0\n}\nREPEAT 2 {\nZ 0\n}")
+    assert sp.Circuit.from_stim_circuit(stim_circuit).layers == [
+        sp.GateLayer(sp.gates.H(0)),
+        sp.GateLayer(sp.gates.X(0)),
+        sp.Circuit(sp.GateLayer(sp.gates.Z(0)), iterations=2),
+    ]
@@ -4,8 +4,11 @@ Sub-package for data formats and converting them to other data types
 """
 
 from deltakit_core.data_formats._b801_parsers import (
+    b8_num_shots,
     b8_to_logical_flip,
+    b8_to_logical_flip_batches,
     b8_to_measurements,
+    b8_to_syndrome_batches,
     b8_to_syndromes,
     logical_flips_to_b8_file,
     parse_01_to_logical_flips,
@@ -20,8 +23,11 @@ from deltakit_core.data_formats._measurements import (
 
 # List only public members in `__all__`.
 __all__ = [
+    "b8_num_shots",
     "b8_to_logical_flip",
+    "b8_to_logical_flip_batches",
     "b8_to_measurements",
+    "b8_to_syndrome_batches",
     "b8_to_syndromes",
     "c64_to_addressed_input_words",
     "logical_flips_to_b8_file",
@@ -5,6 +5,7 @@ from collections.abc import Iterator
 from pathlib import Path
 
 import numpy as np
+import numpy.typing as npt
 
 from deltakit_core.decoding_graphs import Bitstring, OrderedSyndrome
 
@@ -83,6 +84,165 @@ def b8_to_logical_flip(
         )
 
 
+def _b8_to_packed_shots(
+    b8_input: Path | bytes, bits_per_shot: int
+) -> npt.NDArray[np.uint8]:
+    """Return a read-only 2D view of b8 data of shape
+    (number of shots, bytes per shot). When given a path, the file is
+    memory-mapped so shots are only read from disk when accessed.
+    """
+    bytes_per_shot = (bits_per_shot + 7) // 8
+    if isinstance(b8_input, Path):
+        if b8_input.stat().st_size == 0:
+            packed = np.zeros(0, dtype=np.uint8)
+        else:
+            packed = np.memmap(b8_input, dtype=np.uint8, mode="r")
+    else:
+        packed = np.frombuffer(b8_input, dtype=np.uint8)
+    if bytes_per_shot == 0:
+        return packed.reshape(0, 0)
+    if len(packed) % bytes_per_shot != 0:
+        msg = (
+            f"b8 data of {len(packed)} bytes cannot be split into shots of "
+            f"{bytes_per_shot} bytes."
+        )
+        raise ValueError(msg)
+    return packed.reshape(-1, bytes_per_shot)
+
+
+def b8_num_shots(b8_input: Path | bytes, bits_per_shot: int) -> int:
+    """Given a b8 input (either a file path containing b8 data or bytes),
+    and the number of bits in each shot, return the number of shots stored
+    without reading the data.
+
+    Informed by https://github.com/quantumlib/Stim/blob/main/doc/result_formats.md#b8
+    """
+    return len(_b8_to_packed_shots(b8_input, bits_per_shot))
+
+
+def _shot_slice(first_shot: int, num_shots: int | None) -> slice:
+    if first_shot < 0 or (num_shots is not None and num_shots < 0):
+        msg = (
+            f"Shot range starting at {first_shot} of length {num_shots} "
+            "must be non-negative."
+        )
+        raise ValueError(msg)
+    return slice(first_shot, None if num_shots is None else first_shot + num_shots)
+
+
+def _b8_to_batches(
+    b8_input: Path | bytes,
+    bits_per_shot: int,
+    batch_size: int,
+    bit_packed: bool,
+    shots: slice,
+) -> Iterator[npt.NDArray[np.uint8]]:
+    if batch_size < 1:
+        msg = f"Batch size = {batch_size} must be positive."
+        raise ValueError(msg)
+    packed_shots = _b8_to_packed_shots(b8_input, bits_per_shot)[shots]
+    for offset in range(0, len(packed_shots), batch_size):
+        packed_batch = packed_shots[offset : offset + batch_size]
+        if bit_packed:
+            yield np.array(packed_batch)
+        else:
+            yield np.unpackbits(
+                packed_batch, axis=1, count=bits_per_shot, bitorder="little"
+            )
+
+
+def b8_to_syndrome_batches(  # noqa: PLR0913
+    b8_input: Path | bytes,
+    detector_num: int,
+    batch_size: int = 10000,
+    bit_packed: bool = False,
+    *,
+    first_shot: int = 0,
+    num_shots: int | None = None,
+) -> Iterator[npt.NDArray[np.uint8]]:
+    """Given a b8 input (either a file path containing b8 data or bytes),
+    and the number of detectors in each syndrome, return a generator of
+    syndrome batches as arrays. Files are memory-mapped and read one batch at
+    a time, so no per-shot Python objects are created.
+
+    Informed by https://github.com/quantumlib/Stim/blob/main/doc/result_formats.md#b8
+
+    Parameters
+    ----------
+    b8_input : Path | bytes
+        Path to the file containing b8 data or a bytes object that stores
+        b8 data.
+    detector_num : int
+        The number of detectors in each syndrome.
+    batch_size : int, optional
+        Maximum number of shots in each batch, by default 10,000. The last
+        batch may be smaller.
+    bit_packed : bool, optional
+        If True, batches are returned bit-packed in little endian order as
+        arrays of shape (number of shots, ceil(detector_num / 8)), as used by
+        Stim. Otherwise, batches are of shape (number of shots, detector_num)
+        where each element is a 1 or 0. By default False.
+    first_shot : int, optional
+        Index of the first shot to read, by default 0.
+    num_shots : int | None, optional
+        Maximum number of shots to read from `first_shot` onwards. If None,
+        all remaining shots are read. By default None.
+
+    Yields
+    ------
+    npt.NDArray[np.uint8]
+        2D arrays of syndrome bits, one row per shot.
+    """
+    shots = _shot_slice(first_shot, num_shots)
+    return _b8_to_batches(b8_input, detector_num, batch_size, bit_packed, shots)
+
+
+def b8_to_logical_flip_batches(  # noqa: PLR0913
+    b8_input: Path | bytes,
+    num_logicals: int = 1,
+    batch_size: int = 10000,
+    bit_packed: bool = False,
+    *,
+    first_shot: int = 0,
+    num_shots: int | None = None,
+) -> Iterator[npt.NDArray[np.uint8]]:
+    """Given a b8 input (either a file path containing b8 data or bytes),
+    and the number of logicals in each shot, return a generator of logical
+    flip batches as arrays. Files are memory-mapped and read one batch at
+    a time, so no per-shot Python objects are created.
+
+    Informed by https://github.com/quantumlib/Stim/blob/main/doc/result_formats.md#b8
+
+    Parameters
+    ----------
+    b8_input : Path | bytes
+        Path to the file containing b8 data or a bytes object that stores
+        b8 data.
+    num_logicals : int, optional
+        The number of logicals in each shot, by default 1.
+    batch_size : int, optional
+        Maximum number of shots in each batch, by default 10,000. The last
+        batch may be smaller.
+    bit_packed : bool, optional
+        If True, batches are returned bit-packed in little endian order as
+        arrays of shape (number of shots, ceil(num_logicals / 8)), as used by
+        Stim. Otherwise, batches are of shape (number of shots, num_logicals)
+        where each element is a 1 or 0. By default False.
+    first_shot : int, optional
+        Index of the first shot to read, by default 0.
+    num_shots : int | None, optional
+        Maximum number of shots to read from `first_shot` onwards. If None,
+        all remaining shots are read. By default None.
+
+    Yields
+    ------
+    npt.NDArray[np.uint8]
+        2D arrays of logical flips, one row per shot.
+    """
+    shots = _shot_slice(first_shot, num_shots)
+    return _b8_to_batches(b8_input, num_logicals, batch_size, bit_packed, shots)
+
+
 def syndromes_to_b8_file(
     syndrome_b8_out: Path, detector_num: int, syndromes: Iterator[OrderedSyndrome]
 ):
@@ -5,6 +5,10 @@ used by many decoders to define their understanding of the code and noise model
 decoded.
 """
 
+from deltakit_core.decoding_graphs._compiled_graph import (
+    CompiledDecodingGraph,
+    log_likelihood_weights,
+)
 from deltakit_core.decoding_graphs._data_qubits import (
     DecodingEdge,
     DecodingHyperEdge,
@@ -40,10 +44,12 @@ from deltakit_core.decoding_graphs._decoding_graph_tools import (
     worst_case_num_detectors,
 )
 from deltakit_core.decoding_graphs._dem_parsing import (
+    DemArrays,
     DemParser,
     DetectorCounter,
     DetectorRecorder,
     LogicalsInEdges,
+    dem_to_compiled_graph_and_logicals,
     dem_to_decoding_graph_and_logicals,
     dem_to_hypergraph_and_logicals,
     observable_warning,
@@ -66,6 +72,7 @@ from deltakit_core.decoding_graphs._syndromes import (
     DetectorRecord,
     FixedWidthBitstring,
     OrderedSyndrome,
+    SyndromeBatch,
     get_round_words,
 )
 from deltakit_core.decoding_graphs._weighted_graphs import (
@@ -85,11 +92,13 @@ from deltakit_core.decoding_graphs._windowing_utils import (
 __all__ = [
     "AnyEdgeT",
     "Bitstring",
+    "CompiledDecodingGraph",
     "DecodingCode",
     "DecodingEdge",
     "DecodingHyperEdge",
     "DecodingHyperGraph",
     "DecodingHyperMultiGraph",
+    "DemArrays",
     "DemParser",
     "DetectorCounter",
     "DetectorRecord",
@@ -106,12 +115,14 @@ __all__ = [
     "NXLogicals",
     "OrderedDecodingEdges",
     "OrderedSyndrome",
+    "SyndromeBatch",
     "annotate_edges_with_window_ids",
     "change_graph_error_probabilities",
     "compute_graph_distance",
     "compute_graph_distance_for_logical",
     "connect_dangling_to_boundary_hypergraph",
     "decompositions",
+    "dem_to_compiled_graph_and_logicals",
     "dem_to_decoding_graph_and_logicals",
     "dem_to_hypergraph_and_logicals",
     "errors_to_syndrome",
@@ -129,6 +140,7 @@ __all__ = [
     "induce_subhypergraph",
     "inverse_logical_at_boundary",
     "is_single_connected_component",
+    "log_likelihood_weights",
     "nodes_within_radius",
     "observable_warning",
     "parse_explained_dem",
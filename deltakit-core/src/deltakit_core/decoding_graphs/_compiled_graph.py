@@ -0,0 +1,302 @@
+# (c) Copyright Riverlane 2020-2025.
+"""Array-backed view of decoding graphs for fast bulk queries."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+import numpy as np
+import numpy.typing as npt
+
+from deltakit_core.decoding_graphs._syndromes import OrderedSyndrome
+
+if TYPE_CHECKING:
+    from deltakit_core.decoding_graphs._decoding_graph import HyperMultiGraph
+
+
+def _csr_ranges(
+    indptr: npt.NDArray[np.int64], rows: npt.NDArray[np.intp]
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """Positions in the CSR data of all entries in the given rows, along with the
+    position in `rows` of the row each entry belongs to.
+    """
+    counts = (indptr[rows + 1] - indptr[rows]).astype(np.intp)
+    row_of_entry = np.repeat(np.arange(len(rows), dtype=np.intp), counts)
+    offsets = np.arange(counts.sum(), dtype=np.intp) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+    return indptr[rows].astype(np.intp)[row_of_entry] + offsets, row_of_entry
+
+
+@dataclass(frozen=True, eq=False)
+class CompiledDecodingGraph:
+    """Frozen, array-backed view of a decoding graph. Edges are indexed in the
+    order of the graph they were compiled from, and the detectors of each edge are
+    stored in compressed sparse row (CSR) form, so that bulk queries such as
+    building the parity check matrix or computing the syndromes of many errors
+    are done with numpy rather than with Python edge objects.
+
+    Edge data is a snapshot taken when compiling, so later changes to the edge
+    records of the original graph are not reflected.
+
+    Parameters
+    ----------
+    edge_indptr : npt.NDArray[np.int64]
+        Array of length ``num_edges + 1``, where the detectors of edge ``i`` are
+        ``edge_detectors[edge_indptr[i]:edge_indptr[i + 1]]``.
+    edge_detectors : npt.NDArray[np.int32]
+        Sorted detectors of each edge, concatenated.
+    p_err : npt.NDArray[np.float64]
+        Probability of the error mechanism of each edge.
+    weights : npt.NDArray[np.float64]
+        Log-likelihood weight of each edge.
+    nodes : npt.NDArray[np.int32]
+        Sorted nodes of the graph, including those not in any edge.
+    boundaries : npt.NDArray[np.int32]
+        Sorted nodes of the graph that are boundaries, which are never part of a
+        syndrome.
+    """
+
+    edge_indptr: npt.NDArray[np.int64]
+    edge_detectors: npt.NDArray[np.int32]
+    p_err: npt.NDArray[np.float64]
+    weights: npt.NDArray[np.float64]
+    nodes: npt.NDArray[np.int32]
+    boundaries: npt.NDArray[np.int32]
+
+    def __post_init__(self):
+        if len(self.edge_indptr) != len(self.p_err) + 1 or len(self.p_err) != len(
+            self.weights
+        ):
+            msg = (
+                f"Edge pointers of length {len(self.edge_indptr)} do not match "
+                f"{len(self.p_err)} error probabilities and {len(self.weights)} "
+                "weights."
+            )
+            raise ValueError(msg)
+        for array in (
+            self.edge_indptr,
+            self.edge_detectors,
+            self.p_err,
+            self.weights,
+            self.nodes,
+            self.boundaries,
+        ):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_edges(
+        cls,
+        edges: Iterable[Iterable[int]],
+        p_err: Iterable[float],
+        weights: Iterable[float] | None = None,
+        nodes: Iterable[int] = (),
+        boundaries: Iterable[int] = (),
+    ) -> CompiledDecodingGraph:
+        """Compile a graph from the detectors of each edge.
+
+        Parameters
+        ----------
+        edges : Iterable[Iterable[int]]
+            Detectors of each edge.
+        p_err : Iterable[float]
+            Probability of the error mechanism of each edge.
+        weights : Optional[Iterable[float]], optional
+            Log-likelihood weight of each edge, by default None which computes the
+            weights from the error probabilities.
+        nodes : Iterable[int], optional
+            Nodes of the graph in addition to those in edges, by default none.
+        boundaries : Iterable[int], optional
+            Nodes of the graph that are boundaries, by default none.
+
+        Returns
+        -------
+        CompiledDecodingGraph
+        """
+        edge_indptr = [0]
+        edge_detectors: list[int] = []
+        for edge in edges:
+            edge_detectors.extend(sorted(edge))
+            edge_indptr.append(len(edge_detectors))
+        p_err_array = np.fromiter(p_err, dtype=np.float64)
+        weights_array = (
+            log_likelihood_weights(p_err_array)
+            if weights is None
+            else np.fromiter(weights, dtype=np.float64)
+        )
+        detectors = np.asarray(edge_detectors, dtype=np.int32)
+        return cls(
+            edge_indptr=np.asarray(edge_indptr, dtype=np.int64),
+            edge_detectors=detectors,
+            p_err=p_err_array,
+            weights=weights_array,
+            nodes=np.union1d(detectors, np.fromiter(nodes, dtype=np.int32)),
+            boundaries=np.unique(np.fromiter(boundaries, dtype=np.int32)),
+        )
+
+    @classmethod
+    def from_graph(cls, graph: HyperMultiGraph) -> CompiledDecodingGraph:
+        """Compile any decoding graph, including multigraphs, whose edges are
+        identified by an edge together with an integer.
+
+        Parameters
+        ----------
+        graph : HyperMultiGraph
+            Graph to compile.
+
+        Returns
+        -------
+        CompiledDecodingGraph
+        """
+        edge_records = graph.edge_records
+        records = [edge_records[edge] for edge in graph.edges]
+        return cls.from_edges(
+            (edge[0] if isinstance(edge, tuple) else edge for edge in graph.edges),
+            (record.p_err for record in records),
+            (record["weight"] for record in records),
+            nodes=graph.nodes,
+            boundaries=graph.boundaries,
+        )
+
+    @property
+    def num_edges(self) -> int:
+        """Number of edges in the graph."""
+        return len(self.p_err)
+
+    @property
+    def num_detectors(self) -> int:
+        """One more than the largest node of the graph, which is the width of
+        syndromes given by `errors_to_syndromes`."""
+        return int(self.nodes[-1]) + 1 if len(self.nodes) else 0
+
+    @cached_property
+    def _detector_indptr(self) -> npt.NDArray[np.int64]:
+        counts = np.bincount(self.edge_detectors, minlength=self.num_detectors)
+        return np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    @cached_property
+    def _detector_edges(self) -> npt.NDArray[np.int32]:
+        edge_of_entry = np.repeat(
+            np.arange(self.num_edges, dtype=np.int32), np.diff(self.edge_indptr)
+        )
+        return edge_of_entry[np.argsort(self.edge_detectors, kind="stable")]
+
+    @cached_property
+    def _is_boundary(self) -> npt.NDArray[np.bool_]:
+        is_boundary = np.zeros(self.num_detectors, dtype=np.bool_)
+        is_boundary[self.boundaries] = True
+        return is_boundary
+
+    def edge(self, edge_index: int) -> npt.NDArray[np.int32]:
+        """Sorted detectors of the edge with the given index."""
+        return self.edge_detectors[
+            self.edge_indptr[edge_index] : self.edge_indptr[edge_index + 1]
+        ]
+
+    def incident_edges(self, detector: int) -> npt.NDArray[np.int32]:
+        """Indices of the edges incident to the given detector, in increasing
+        order."""
+        if not 0 <= detector < self.num_detectors:
+            return np.empty(0, dtype=np.int32)
+        return self._detector_edges[
+            self._detector_indptr[detector] : self._detector_indptr[detector + 1]
+        ]
+
+    def neighbors(self, detector: int) -> npt.NDArray[np.int32]:
+        """Sorted detectors which share an edge with the given detector."""
+        positions, _ = _csr_ranges(
+            self.edge_indptr, self.incident_edges(detector).astype(np.intp)
+        )
+        neighbours = np.unique(self.edge_detectors[positions])
+        return neighbours[neighbours != detector]
+
+    def to_parity_check_matrix(self) -> npt.NDArray[np.uint8]:
+        """Parity check matrix of size `(len(nodes), num_edges)`. Each column
+        represents an edge and the non-zero entries in that column represent
+        detectors in the edge.
+
+        The nodes in the graph must be contiguous to construct the matrix.
+        """
+        check_matrix = np.zeros((len(self.nodes), self.num_edges), dtype=np.uint8)
+        edge_of_entry = np.repeat(
+            np.arange(self.num_edges, dtype=np.intp), np.diff(self.edge_indptr)
+        )
+        check_matrix[self.edge_detectors, edge_of_entry] = 1
+        return check_matrix
+
+    def error_to_syndrome(self, edge_indices: Iterable[int]) -> OrderedSyndrome:
+        """Return the syndrome of an error on the edges with the given indices.
+
+        Parameters
+        ----------
+        edge_indices : Iterable[int]
+            Indices of the edges which had errors.
+
+        Returns
+        -------
+        OrderedSyndrome
+        """
+        edges = np.fromiter(edge_indices, dtype=np.intp)
+        positions, _ = _csr_ranges(self.edge_indptr, edges)
+        flips = np.bincount(
+            self.edge_detectors[positions], minlength=self.num_detectors
+        )
+        flipped = (flips % 2).astype(np.bool_) & ~self._is_boundary
+        return OrderedSyndrome(np.flatnonzero(flipped).tolist(), enforce_mod_2=False)
+
+    def errors_to_syndromes(self, errors: npt.NDArray) -> npt.NDArray[np.uint8]:
+        """Return the syndromes of a batch of errors.
+
+        Parameters
+        ----------
+        errors : npt.NDArray
+            Boolean or 0/1 array of shape `(number of shots, num_edges)`, where
+            non-zero entries are edges which had errors.
+
+        Returns
+        -------
+        npt.NDArray[np.uint8]
+            Array of shape `(number of shots, num_detectors)` where entry ``(i, d)``
+            is 1 if detector ``d`` is flipped in shot ``i``. Boundaries are never
+            flipped.
+        """
+        errors = np.asarray(errors)
+        if errors.ndim != 2 or errors.shape[1] != self.num_edges:  # noqa: PLR2004
+            msg = (
+                f"Errors of shape {errors.shape} do not have one column for each of "
+                f"the {self.num_edges} edges."
+            )
+            raise ValueError(msg)
+        shots, edges = np.nonzero(errors)
+        positions, entry_shot = _csr_ranges(self.edge_indptr, edges)
+        flat_detectors = (
+            shots[entry_shot].astype(np.int64) * self.num_detectors
+            + self.edge_detectors[positions]
+        )
+        flips = np.bincount(
+            flat_detectors, minlength=len(errors) * self.num_detectors
+        ).reshape(len(errors), self.num_detectors)
+        syndromes = (flips % 2).astype(np.uint8)
+        syndromes[:, self._is_boundary] = 0
+        return syndromes
+
+
+def log_likelihood_weights(p_err: npt.NDArray[np.float64]) -> npt.NDArray[np.float64]:
+    """Vectorised `EdgeRecord.weight`, the log-likelihood weight of each error
+    probability. Probabilities of 0 and 1 have weights of infinity and minus
+    infinity.
+
+    Raises
+    ------
+    ValueError
+        If any probability is not between 0 and 1.
+    """
+    p_err = np.asarray(p_err, dtype=np.float64)
+    if np.any((p_err < 0) | (p_err > 1) | np.isnan(p_err)):
+        msg = "Edge weight undefined for error probabilities outside [0, 1]."
+        raise ValueError(msg)
+    with np.errstate(divide="ignore"):
+        return np.log((1 - p_err) / p_err)
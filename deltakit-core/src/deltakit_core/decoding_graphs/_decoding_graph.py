@@ -25,6 +25,7 @@ import networkx as nx
 import numpy as np
 import numpy.typing as npt
 
+from deltakit_core.decoding_graphs._compiled_graph import CompiledDecodingGraph
 from deltakit_core.decoding_graphs._data_qubits import (
     DecodingEdge,
     DecodingHyperEdge,
@@ -135,7 +136,14 @@ class HyperMultiGraph(ABC, Generic[AnyEdgeT]):
     def detector_is_boundary(self, detector: int) -> bool:
         """Return True if given detector is a boundary, False otherwise."""
 
-    @abstractmethod
+    @cached_property
+    def compiled(self) -> CompiledDecodingGraph:
+        """Frozen, array-backed view of this graph, with edges in the same order
+        as `edges`. It is compiled on first access, so edge records changed after
+        that are not reflected in it.
+        """
+        return CompiledDecodingGraph.from_graph(self)
+
     def to_parity_check_matrix(self) -> npt.NDArray[np.uint8]:
         """Convert the hypergraph to a parity check matrix  of size
         `(len(nodes), len(edges))`. Each column represents an edge and
@@ -143,6 +151,7 @@ class HyperMultiGraph(ABC, Generic[AnyEdgeT]):
 
         The nodes in the graph must be contiguous to construct the matrix.
         """
+        return self.compiled.to_parity_check_matrix()
 
     @abstractmethod
     def error_to_syndrome(self, edges: Iterable[AnyEdgeT]) -> OrderedSyndrome:
@@ -257,24 +266,11 @@ class DecodingHyperMultiGraph(HyperMultiGraph[tuple[DecodingHyperEdge, int]]):
         yield from self._node_to_incident_edges[detector]
 
     def neighbors(self, detector: int) -> Iterator[int]:
-        incident_edges = self.incident_edges(detector)
-        neighbour_nodes = {
-            node
-            for edge, _ in incident_edges
-            for node in edge.vertices
-            if node != detector
-        }
-        yield from neighbour_nodes
+        yield from self.compiled.neighbors(detector).tolist()
 
     def detector_is_boundary(self, detector: int) -> bool:  # noqa: ARG002
         return False
 
-    def to_parity_check_matrix(self) -> npt.NDArray[np.uint8]:
-        check_matrix = np.zeros((len(self.nodes), len(self.edges)), dtype=np.uint8)
-        for edge_index, (edge, _) in enumerate(self.edges):
-            check_matrix[tuple(edge), (edge_index,)] = True
-        return check_matrix
-
     def with_multi_edges_merged(
         self,
         combine_edge_records: Callable[
@@ -427,14 +423,7 @@ class DecodingHyperGraph(HyperMultiGraph[DecodingHyperEdge]):
         yield from self._node_to_incident_edges[detector]
 
     def neighbors(self, detector: int) -> Iterator[int]:
-        incident_edges = self.incident_edges(detector)
-        neighbour_nodes = {
-            node
-            for edge in incident_edges
-            for node in edge.vertices
-            if node != detector
-        }
-        yield from neighbour_nodes
+        yield from self.compiled.neighbors(detector).tolist()
 
     def to_nx_decoding_graph(self) -> NXDecodingGraph:
         """Lower hypergraph to NXDecodingGraph, on the condition that the
@@ -457,12 +446,6 @@ class DecodingHyperGraph(HyperMultiGraph[DecodingHyperEdge]):
             ),
         )
 
-    def to_parity_check_matrix(self) -> npt.NDArray[np.uint8]:
-        check_matrix = np.zeros((len(self.nodes), len(self.edges)), dtype=np.uint8)
-        for edge_index, edge in enumerate(self.edges):
-            check_matrix[tuple(edge), (edge_index,)] = True
-        return check_matrix
-
     def detector_is_boundary(self, detector: int) -> bool:  # noqa: ARG002
         return False
 
@@ -767,12 +750,6 @@ class NXDecodingMultiGraph(NXGraph[_QECNXMG, tuple[DecodingEdge, int]]):
         for detectors in unique_detectors:
             yield from self.get_edges(*detectors)
 
-    def to_parity_check_matrix(self) -> npt.NDArray[np.uint8]:
-        check_matrix = np.zeros((len(self.nodes), len(self.edges)), dtype=np.uint8)
-        for edge_index, (edge, _) in enumerate(self.edges):
-            check_matrix[tuple(edge), (edge_index,)] = True
-        return check_matrix
-
     def with_multi_edges_merged(
         self,
         combine_edge_records: Callable[
@@ -944,12 +921,6 @@ class NXDecodingGraph(NXGraph[_QECNX, DecodingEdge]):
         for edge in self._graph.edges(detector):
             yield DecodingEdge(*edge)
 
-    def to_parity_check_matrix(self) -> npt.NDArray[np.uint8]:
-        check_matrix = np.zeros((len(self.nodes), len(self.edges)), dtype=np.uint8)
-        for edge_index, edge in enumerate(self.edges):
-            check_matrix[tuple(edge), (edge_index,)] = True
-        return check_matrix
-
     def error_to_syndrome(self, edges: Iterable[DecodingEdge]) -> OrderedSyndrome:
         return OrderedSyndrome(
             symptom
@@ -7,11 +7,19 @@ import collections.abc
 import warnings
 from collections import Counter
 from collections.abc import Iterable, Iterator
-from itertools import chain, zip_longest
+from dataclasses import dataclass
+from itertools import chain, pairwise, zip_longest
 from typing import Generic, Protocol, TypeVar, cast
 
+import numpy as np
+import numpy.typing as npt
 import stim
 
+from deltakit_core.decoding_graphs._compiled_graph import (
+    CompiledDecodingGraph,
+    _csr_ranges,
+    log_likelihood_weights,
+)
 from deltakit_core.decoding_graphs._data_qubits import (
     DecodingEdge,
     DecodingHyperEdge,
@@ -261,6 +269,527 @@ class DemParser(Generic[EH, DH]):
                     self._observable_handler(instruction)
 
 
+def _pad_columns(array: npt.NDArray[np.float64], width: int) -> npt.NDArray[np.float64]:
+    """Pad a 2D array with columns of zeros up to the given width."""
+    return np.pad(array, ((0, 0), (0, width - array.shape[1])))
+
+
+@dataclass(frozen=True)
+class _DemBlock:
+    """Error components and detectors of a block of a detector error model, with
+    detectors and coordinates relative to the offsets at the start of the block.
+    Components are stored in compressed sparse row form, and coordinates are
+    padded with zeros to a common width alongside the length of each coordinate.
+    """
+
+    component_lengths: npt.NDArray[np.int64]
+    component_detectors: npt.NDArray[np.int64]
+    component_p_err: npt.NDArray[np.float64]
+    flipped_components: npt.NDArray[np.int64]
+    flipped_observables: npt.NDArray[np.int64]
+    detectors: npt.NDArray[np.int64]
+    coordinates: npt.NDArray[np.float64]
+    coordinate_lengths: npt.NDArray[np.int64]
+    detector_shift: int
+    coordinate_shift: CoordinateOffset
+
+    @classmethod
+    def concatenate(
+        cls,
+        blocks: list[_DemBlock],
+        detector_shift: int,
+        coordinate_shift: CoordinateOffset,
+    ) -> _DemBlock:
+        """Concatenate consecutive blocks whose offsets are already applied."""
+        component_offsets = np.cumsum(
+            [0] + [len(block.component_lengths) for block in blocks[:-1]]
+        )
+        width = max(block.coordinates.shape[1] for block in blocks)
+        return cls(
+            np.concatenate([block.component_lengths for block in blocks]),
+            np.concatenate([block.component_detectors for block in blocks]),
+            np.concatenate([block.component_p_err for block in blocks]),
+            np.concatenate(
+                [
+                    block.flipped_components + offset
+                    for block, offset in zip(blocks, component_offsets, strict=True)
+                ]
+            ),
+            np.concatenate([block.flipped_observables for block in blocks]),
+            np.concatenate([block.detectors for block in blocks]),
+            np.concatenate(
+                [_pad_columns(block.coordinates, width) for block in blocks]
+            ),
+            np.concatenate([block.coordinate_lengths for block in blocks]),
+            detector_shift,
+            coordinate_shift,
+        )
+
+    def repeated(self, repeat_count: int) -> _DemBlock:
+        """The block repeated the given number of times, with the detector and
+        coordinate shifts of the block applied between repetitions."""
+        repetitions = np.arange(repeat_count)
+        num_components = len(self.component_lengths)
+        shift = np.asarray(self.coordinate_shift, dtype=np.float64)
+        width = max(self.coordinates.shape[1], len(shift))
+        detector_offsets = repetitions * self.detector_shift
+        coordinate_offsets = repetitions[:, np.newaxis] * _pad_columns(
+            shift[np.newaxis], width
+        )
+        # Detector coordinates have at least the length of the coordinate offset
+        # once the first shift is applied.
+        coordinate_lengths = np.tile(self.coordinate_lengths, repeat_count)
+        repetition_of_detector = np.repeat(repetitions, len(self.detectors))
+        coordinate_lengths[repetition_of_detector > 0] = np.maximum(
+            coordinate_lengths[repetition_of_detector > 0], len(shift)
+        )
+        return _DemBlock(
+            np.tile(self.component_lengths, repeat_count),
+            np.tile(self.component_detectors, repeat_count)
+            + np.repeat(detector_offsets, len(self.component_detectors)),
+            np.tile(self.component_p_err, repeat_count),
+            np.tile(self.flipped_components, repeat_count)
+            + np.repeat(repetitions * num_components, len(self.flipped_components)),
+            np.tile(self.flipped_observables, repeat_count),
+            np.tile(self.detectors, repeat_count)
+            + np.repeat(detector_offsets, len(self.detectors)),
+            np.tile(_pad_columns(self.coordinates, width), (repeat_count, 1))
+            + np.repeat(coordinate_offsets, len(self.detectors), axis=0),
+            coordinate_lengths,
+            repeat_count * self.detector_shift,
+            CoordinateOffset(repeat_count * value for value in self.coordinate_shift)
+            if repeat_count > 0
+            else CoordinateOffset(),
+        )
+
+    def shifted(
+        self, detector_offset: int, coordinate_offset: CoordinateOffset
+    ) -> _DemBlock:
+        """The block with the given detector and coordinate offsets applied."""
+        width = max(self.coordinates.shape[1], len(coordinate_offset))
+        offset = np.asarray(coordinate_offset, dtype=np.float64)[np.newaxis]
+        return _DemBlock(
+            self.component_lengths,
+            self.component_detectors + detector_offset,
+            self.component_p_err,
+            self.flipped_components,
+            self.flipped_observables,
+            self.detectors + detector_offset,
+            _pad_columns(self.coordinates, width) + _pad_columns(offset, width),
+            np.maximum(self.coordinate_lengths, len(coordinate_offset)),
+            self.detector_shift,
+            self.coordinate_shift,
+        )
+
+
+def _parse_dem_block(detector_error_model: stim.DetectorErrorModel) -> _DemBlock:
+    """Parse the instructions of a detector error model, parsing the body of each
+    repeat block once and repeating its arrays."""
+    blocks: list[_DemBlock] = []
+    component_lengths: list[int] = []
+    component_detectors: list[int] = []
+    component_p_err: list[float] = []
+    flipped_components: list[int] = []
+    flipped_observables: list[int] = []
+    detectors: list[int] = []
+    coordinates: list[tuple[float, ...]] = []
+    detector_offset = 0
+    coordinate_offset = CoordinateOffset()
+
+    def flush_instructions():
+        coordinate_lengths = np.fromiter(
+            map(len, coordinates), dtype=np.int64, count=len(coordinates)
+        )
+        padded_coordinates = np.zeros(
+            (len(coordinates), int(coordinate_lengths.max(initial=0)))
+        )
+        padded_coordinates[
+            np.arange(padded_coordinates.shape[1]) < coordinate_lengths[:, np.newaxis]
+        ] = list(chain.from_iterable(coordinates))
+        blocks.append(
+            _DemBlock(
+                np.array(component_lengths, dtype=np.int64),
+                np.array(component_detectors, dtype=np.int64),
+                np.array(component_p_err, dtype=np.float64),
+                np.array(flipped_components, dtype=np.int64),
+                np.array(flipped_observables, dtype=np.int64),
+                np.array(detectors, dtype=np.int64),
+                padded_coordinates,
+                coordinate_lengths,
+                0,
+                CoordinateOffset(),
+            )
+        )
+        for values in (
+            component_lengths,
+            component_detectors,
+            component_p_err,
+            flipped_components,
+            flipped_observables,
+            detectors,
+            coordinates,
+        ):
+            values.clear()
+
+    for instruction in detector_error_model:
+        if isinstance(instruction, stim.DemRepeatBlock):
+            flush_instructions()
+            body = _parse_dem_block(instruction.body_copy())
+            blocks.append(
+                body.repeated(instruction.repeat_count).shifted(
+                    detector_offset, coordinate_offset
+                )
+            )
+            detector_offset += instruction.repeat_count * body.detector_shift
+            if instruction.repeat_count > 0:
+                coordinate_offset += CoordinateOffset(
+                    instruction.repeat_count * value for value in body.coordinate_shift
+                )
+        elif instruction.type == "error":
+            p_err = instruction.args_copy()[0]
+            length = 0
+            for target in cast(list[stim.DemTarget], instruction.targets_copy()):
+                if target.is_relative_detector_id():
+                    component_detectors.append(detector_offset + target.val)
+                    length += 1
+                elif target.is_logical_observable_id():
+                    flipped_components.append(len(component_lengths))
+                    flipped_observables.append(target.val)
+                elif target.is_separator():
+                    component_lengths.append(length)
+                    component_p_err.append(p_err)
+                    length = 0
+            component_lengths.append(length)
+            component_p_err.append(p_err)
+        elif instruction.type == "shift_detectors":
+            detector_offset += cast(int, instruction.targets_copy()[0])
+            coordinate_offset += instruction.args_copy()
+        elif instruction.type == "detector":
+            coordinate = tuple(coordinate_offset + instruction.args_copy())
+            for target in cast(list[stim.DemTarget], instruction.targets_copy()):
+                detectors.append(detector_offset + target.val)
+                coordinates.append(coordinate)
+        elif instruction.type == "logical_observable":
+            observable_warning(instruction)
+    flush_instructions()
+    return _DemBlock.concatenate(blocks, detector_offset, coordinate_offset)
+
+
+def _merge_components(
+    block: _DemBlock, num_observables: int
+) -> tuple[
+    npt.NDArray[np.int64],
+    npt.NDArray[np.int32],
+    npt.NDArray[np.float64],
+    npt.NDArray[np.bool_],
+]:
+    """Merge error components with the same detectors into edges, in order of
+    first appearance, returning the edges in CSR form, their error probabilities
+    and the observables they flip.
+    """
+    num_components = len(block.component_lengths)
+    component_of_entry = np.repeat(np.arange(num_components), block.component_lengths)
+    # The detectors of each component are a set, so sort them and drop repeats
+    # using keys which combine each component with its detectors.
+    stride = int(block.component_detectors.max(initial=0)) + 1
+    entry_keys = np.sort(component_of_entry * stride + block.component_detectors)
+    entry_keys = entry_keys[np.diff(entry_keys, prepend=-1) != 0]
+    component_of_entry, detectors = np.divmod(entry_keys, stride)
+    lengths = np.bincount(component_of_entry, minlength=num_components)
+    indptr = np.concatenate(([0], np.cumsum(lengths)))
+
+    # Identify components with equal detectors, grouping them by length so that
+    # the detectors of each group form a 2D array whose rows can be compared.
+    edge_of_component = np.empty(num_components, dtype=np.int64)
+    first_components: list[npt.NDArray[np.int64]] = []
+    num_edges = 0
+    for length in np.unique(lengths).tolist():
+        components = np.flatnonzero(lengths == length)
+        rows = np.ascontiguousarray(
+            detectors[indptr[components][:, np.newaxis] + np.arange(length)]
+        )
+        if stride**length <= np.iinfo(np.int64).max:
+            # Rows of few detectors are compared as integers, which sort faster.
+            keys = rows @ stride ** np.arange(length, dtype=np.int64)
+        else:
+            keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * length))).ravel()
+        _, first_index, inverse = np.unique(
+            keys, return_index=True, return_inverse=True
+        )
+        edge_of_component[components] = num_edges + inverse.ravel()
+        first_components.append(components[first_index])
+        num_edges += len(first_index)
+    first_component = np.concatenate(
+        [np.empty(0, dtype=np.int64), *first_components]
+    ).astype(np.int64)
+    edge_order = np.argsort(first_component)
+    edge_rank = np.empty(num_edges, dtype=np.int64)
+    edge_rank[edge_order] = np.arange(num_edges)
+    edge_of_component = edge_rank[edge_of_component]
+    first_component = first_component[edge_order]
+
+    # Combine the probabilities of repeated edges in the order they appear. Each
+    # edge appears at most once in each round, so the rounds are vectorised.
+    components_by_edge = np.argsort(edge_of_component, kind="stable")
+    appearance = np.arange(num_components) - np.repeat(
+        np.searchsorted(edge_of_component[components_by_edge], np.arange(num_edges)),
+        np.bincount(edge_of_component, minlength=num_edges),
+    )
+    components_by_round = components_by_edge[np.argsort(appearance, kind="stable")]
+    round_bounds = np.concatenate(([0], np.cumsum(np.bincount(appearance))))
+    p_err = np.zeros(num_edges)
+    for start, stop in pairwise(round_bounds.tolist()):
+        components = components_by_round[start:stop]
+        edges = edge_of_component[components]
+        new_p_err, old_p_err = block.component_p_err[components], p_err[edges]
+        p_err[edges] = new_p_err * (1 - old_p_err) + old_p_err * (1 - new_p_err)
+
+    observable_flips = np.zeros((num_edges, num_observables), dtype=np.bool_)
+    observable_flips[
+        edge_of_component[block.flipped_components], block.flipped_observables
+    ] = True
+    positions, _ = _csr_ranges(indptr, first_component.astype(np.intp))
+    edge_indptr = np.concatenate(([0], np.cumsum(lengths[first_component])))
+    return (
+        edge_indptr.astype(np.int64),
+        detectors[positions].astype(np.int32),
+        p_err,
+        observable_flips,
+    )
+
+
+@dataclass(frozen=True, eq=False)
+class DemArrays:
+    """Arrays of the edges and detectors of a Stim detector error model, from
+    which decoding graphs are built. Edges are made in the same way as
+    `dem_to_hypergraph_and_logicals`: decomposed errors give an edge for each
+    component and repeated edges are merged into one edge with the combined error
+    probability. Edges are indexed in order of their first appearance in the
+    flattened detector error model.
+
+    Parameters
+    ----------
+    edge_indptr : npt.NDArray[np.int64]
+        Array of length ``num_edges + 1``, where the detectors of edge ``i`` are
+        ``edge_detectors[edge_indptr[i]:edge_indptr[i + 1]]``.
+    edge_detectors : npt.NDArray[np.int32]
+        Sorted detectors of each edge, concatenated.
+    p_err : npt.NDArray[np.float64]
+        Probability of the error mechanism of each edge.
+    observable_flips : npt.NDArray[np.bool_]
+        Array of shape ``(num_edges, num_observables)`` where entry ``(i, j)`` is
+        True if an error on edge ``i`` flips logical observable ``j``.
+    detector_coordinates : npt.NDArray[np.float64]
+        Array of shape ``(num_detectors, n)`` of the coordinates of each detector,
+        including coordinate offsets, where ``n`` is the length of the longest
+        coordinate. Shorter coordinates are padded with NaN.
+    declared_detectors : npt.NDArray[np.bool_]
+        Whether each detector is declared by a ``detector`` instruction.
+    """
+
+    edge_indptr: npt.NDArray[np.int64]
+    edge_detectors: npt.NDArray[np.int32]
+    p_err: npt.NDArray[np.float64]
+    observable_flips: npt.NDArray[np.bool_]
+    detector_coordinates: npt.NDArray[np.float64]
+    declared_detectors: npt.NDArray[np.bool_]
+
+    def __post_init__(self):
+        if len(self.edge_indptr) != len(self.p_err) + 1 or len(self.p_err) != len(
+            self.observable_flips
+        ):
+            msg = (
+                f"Edge pointers of length {len(self.edge_indptr)} do not match "
+                f"{len(self.p_err)} error probabilities and "
+                f"{len(self.observable_flips)} observable flips."
+            )
+            raise ValueError(msg)
+        if len(self.detector_coordinates) != len(self.declared_detectors):
+            msg = (
+                f"{len(self.detector_coordinates)} detector coordinates do not match "
+                f"{len(self.declared_detectors)} detectors."
+            )
+            raise ValueError(msg)
+        for array in (
+            self.edge_indptr,
+            self.edge_detectors,
+            self.p_err,
+            self.observable_flips,
+            self.detector_coordinates,
+            self.declared_detectors,
+        ):
+            array.flags.writeable = False
+
+    @classmethod
+    def from_dem(cls, dem: stim.DetectorErrorModel) -> DemArrays:
+        """Build the arrays of a detector error model in a single pass over its
+        instructions. The body of each repeat block is parsed once and its arrays
+        are repeated with the detector and coordinate offsets of each repetition,
+        rather than parsing the flattened detector error model.
+
+        Parameters
+        ----------
+        dem : stim.DetectorErrorModel
+            Stim detector error model to convert.
+
+        Returns
+        -------
+        DemArrays
+        """
+        block = _parse_dem_block(dem)
+        edge_indptr, edge_detectors, p_err, observable_flips = _merge_components(
+            block, dem.num_observables
+        )
+        # Later declarations of a detector replace earlier ones.
+        _, last_index = np.unique(block.detectors[::-1], return_index=True)
+        declarations = len(block.detectors) - 1 - last_index
+        declared = block.detectors[declarations]
+        width = block.coordinates.shape[1]
+        detector_coordinates = np.full((dem.num_detectors, width), np.nan)
+        detector_coordinates[declared] = np.where(
+            np.arange(width) < block.coordinate_lengths[declarations, np.newaxis],
+            block.coordinates[declarations],
+            np.nan,
+        )
+        declared_detectors = np.zeros(dem.num_detectors, dtype=np.bool_)
+        declared_detectors[declared] = True
+        return cls(
+            edge_indptr=edge_indptr,
+            edge_detectors=edge_detectors,
+            p_err=p_err,
+            observable_flips=observable_flips,
+            detector_coordinates=detector_coordinates,
+            declared_detectors=declared_detectors,
+        )
+
+    @property
+    def num_edges(self) -> int:
+        """Number of edges of the detector error model."""
+        return len(self.p_err)
+
+    @property
+    def num_detectors(self) -> int:
+        """Number of detectors of the detector error model."""
+        return len(self.declared_detectors)
+
+    @property
+    def num_observables(self) -> int:
+        """Number of logical observables of the detector error model."""
+        return self.observable_flips.shape[1]
+
+    def _edges(self) -> list[list[int]]:
+        detectors = self.edge_detectors.tolist()
+        return [
+            detectors[start:stop] for start, stop in pairwise(self.edge_indptr.tolist())
+        ]
+
+    def _detector_records(self) -> dict[int, DetectorRecord]:
+        declared = np.flatnonzero(self.declared_detectors)
+        coordinates = self.detector_coordinates[declared]
+        lengths = (~np.isnan(coordinates)).sum(axis=1)
+        return {
+            detector: DetectorRecord.from_sequence(coordinate[:length])
+            for detector, coordinate, length in zip(
+                declared.tolist(), coordinates.tolist(), lengths.tolist(), strict=True
+            )
+        }
+
+    def to_hypergraph_and_logicals(
+        self,
+    ) -> tuple[DecodingHyperGraph, list[set[DecodingHyperEdge]]]:
+        """Build a `DecodingHyperGraph` from the arrays, along with the edges which
+        affect each logical observable.
+
+        Returns
+        -------
+        Tuple[DecodingHyperGraph, List[Set[DecodingHyperEdge]]]
+        """
+        edges = [DecodingHyperEdge(detectors) for detectors in self._edges()]
+        graph = DecodingHyperGraph(
+            [
+                (edge, EdgeRecord(p_err=p_err))
+                for edge, p_err in zip(edges, self.p_err.tolist(), strict=True)
+            ],
+            self._detector_records(),
+        )
+        return graph, [
+            {edges[edge_index] for edge_index in np.flatnonzero(flips).tolist()}
+            for flips in self.observable_flips.T
+        ]
+
+    def to_decoding_graph_and_logicals(
+        self,
+    ) -> tuple[NXDecodingGraph, list[set[DecodingEdge]]]:
+        """Build a `NXDecodingGraph` from the arrays, along with the edges which
+        affect each logical observable. Edges of degree one are connected to a
+        boundary node with index `num_detectors`, and edges of degree zero are
+        skipped over.
+
+        Returns
+        -------
+        Tuple[NXDecodingGraph, List[Set[DecodingEdge]]]
+
+        Raises
+        ------
+        ValueError
+            If any edge has degree greater than two.
+        """
+        degrees = np.diff(self.edge_indptr)
+        if (max_degree := int(degrees.max(initial=0))) > 2:  # noqa: PLR2004
+            msg = f"Edge of degree {max_degree} cannot be converted to decoding edge."
+            raise ValueError(msg)
+        if (degrees == 0).any():
+            warnings.warn(
+                "Degree 0 edge has been skipped over in graph creation.",
+                UserWarning,
+                stacklevel=2,
+            )
+        boundary = self.num_detectors
+        graph = _QECNX()
+        graph.add_node(boundary, **DetectorRecord((-1, -1), 0))
+        edges: list[DecodingEdge | None] = []
+        for detectors, p_err in zip(self._edges(), self.p_err.tolist(), strict=True):
+            if not detectors:
+                edges.append(None)
+                continue
+            u, v = (detectors[0], boundary) if len(detectors) == 1 else detectors
+            graph.add_edge(u, v, **EdgeRecord(p_err=p_err))
+            edges.append(DecodingEdge(u, v))
+        for detector, record in self._detector_records().items():
+            graph.add_node(detector, **record)
+        return NXDecodingGraph(graph, [boundary]), [
+            {
+                edge
+                for edge_index in np.flatnonzero(flips).tolist()
+                if (edge := edges[edge_index]) is not None
+            }
+            for flips in self.observable_flips.T
+        ]
+
+    def to_compiled_graph_and_logicals(
+        self,
+    ) -> tuple[CompiledDecodingGraph, list[npt.NDArray[np.int32]]]:
+        """Build a `CompiledDecodingGraph` from the arrays, in which every detector
+        is a node, along with the sorted indices of the edges which affect each
+        logical observable.
+
+        Returns
+        -------
+        Tuple[CompiledDecodingGraph, List[npt.NDArray[np.int32]]]
+        """
+        graph = CompiledDecodingGraph(
+            edge_indptr=self.edge_indptr,
+            edge_detectors=self.edge_detectors,
+            p_err=self.p_err,
+            weights=log_likelihood_weights(self.p_err),
+            nodes=np.arange(self.num_detectors, dtype=np.int32),
+            boundaries=np.empty(0, dtype=np.int32),
+        )
+        return graph, [
+            np.flatnonzero(flips).astype(np.int32) for flips in self.observable_flips.T
+        ]
+
+
 def dem_to_hypergraph_and_logicals(
     dem: stim.DetectorErrorModel,
 ) -> tuple[DecodingHyperGraph, list[set[DecodingHyperEdge]]]:
@@ -278,38 +807,33 @@ def dem_to_hypergraph_and_logicals(
         DecodingHyperGraph created from detector error model and a list of
         edges which affect the logical.
     """
-    edge_records: dict[DecodingHyperEdge, EdgeRecord] = {}
-    logicals_affected: list[set[DecodingHyperEdge]] = [
-        set() for _ in range(dem.num_observables)
-    ]
-
-    def error_handler_no_multiedges(error: stim.DemInstruction, detector_offset: int):
-        """Type of error handler for constructing decoding hypergraph and
-        logicals hyperedges which are not multiedges from error instructions."""
-        for vertices, p_err, logicals in collect_edges(error, detector_offset):
-            hyperedge = DecodingHyperEdge(vertices)
-            old_hyperedge_record = edge_records.get(hyperedge)
-            if old_hyperedge_record is not None:
-                p_err = p_err * (  # noqa: PLW2901
-                    1 - old_hyperedge_record.p_err
-                ) + old_hyperedge_record.p_err * (1 - p_err)
-                old_hyperedge_record.p_err = p_err
-            edge_records[hyperedge] = EdgeRecord(p_err=p_err)
-            for logical_index in logicals:
-                logicals_affected[logical_index].add(hyperedge)
-
-    parser = DemParser(
-        error_handler_no_multiedges, DetectorRecorder(), observable_warning
-    )
-    parser.parse(dem)
+    return DemArrays.from_dem(dem).to_hypergraph_and_logicals()
 
-    return (
-        DecodingHyperGraph(
-            list(edge_records.items()),
-            parser.detector_handler.detector_records,
-        ),
-        logicals_affected,
-    )
+
+def dem_to_compiled_graph_and_logicals(
+    dem: stim.DetectorErrorModel,
+) -> tuple[CompiledDecodingGraph, list[npt.NDArray[np.int32]]]:
+    """Convert a Stim detector error model into a `CompiledDecodingGraph` and the
+    indices of the edges which affect each logical observable, without creating
+    Python edge objects.
+
+    Edges are made in the same way as `dem_to_hypergraph_and_logicals`: decomposed
+    errors give an edge for each component and repeated edges are merged into one
+    edge with the combined error probability. Every detector of the detector error
+    model is a node.
+
+    Parameters
+    ----------
+    dem : stim.DetectorErrorModel
+        Stim detector error model to convert.
+
+    Returns
+    -------
+    Tuple[CompiledDecodingGraph, List[npt.NDArray[np.int32]]]
+        Compiled graph of the detector error model and the sorted indices of the
+        edges which affect each logical.
+    """
+    return DemArrays.from_dem(dem).to_compiled_graph_and_logicals()
 
 
 def dem_to_decoding_graph_and_logicals(
@@ -335,64 +859,7 @@ def dem_to_decoding_graph_and_logicals(
         If while parsing the DEM it encounters an edge of degree greater than
         two.
     """
-    boundary = dem.num_detectors
-    graph = _QECNX()
-    graph.add_node(boundary, **DetectorRecord((-1, -1), 0))
-    logicals_affected: list[set[DecodingEdge]] = [
-        set() for _ in range(dem.num_observables)
-    ]
-
-    def error_handler(error: stim.DemInstruction, detector_offset: int):
-        """Type of error handler for constructing decoding graph and
-        logical edges from error instructions."""
-        degree_target = 2
-        for vertices, p_err, logicals in collect_edges(error, detector_offset):
-            if (degree := len(vertices)) == 0:
-                warnings.warn(
-                    "Degree 0 edge has been skipped over in graph creation.",
-                    UserWarning,
-                    stacklevel=2,
-                )
-                continue
-            if degree > degree_target:
-                msg = f"Edge of degree {degree} cannot be converted to decoding edge."
-                raise ValueError(msg)
-
-            u, v = (next(iter(vertices)), boundary) if degree == 1 else tuple(vertices)
-            old_edge_data = (
-                edge_data
-                if (edge_data := graph.get_edge_data(u, v)) is not None
-                else None
-            )
-            if old_edge_data is not None:
-                old_p_err = old_edge_data["p_err"]
-                p_err = p_err * (1 - old_p_err) + old_p_err * (1 - p_err)  # noqa: PLW2901
-
-            edge = DecodingEdge(u, v)
-            edge_record = EdgeRecord(p_err=p_err)
-            graph.add_edge(u, v, **edge_record)
-            for logical_index in logicals:
-                logicals_affected[logical_index].add(edge)
-
-    def detector_handler(
-        detector: stim.DemInstruction,
-        detector_offset: int,
-        coordinate_offset: CoordinateOffset,
-    ):
-        """Type of detector handler for adding coordinate annotated detectors
-        to the decoding graph."""
-        detector_index = (
-            detector_offset + cast(list[stim.DemTarget], detector.targets_copy())[0].val
-        )
-        detector_coordinate = coordinate_offset + detector.args_copy()
-        graph.add_node(
-            detector_index, **DetectorRecord.from_sequence(detector_coordinate)
-        )
-
-    parser = DemParser(error_handler, detector_handler, observable_warning)
-    parser.parse(dem)
-
-    return NXDecodingGraph(graph, [boundary]), logicals_affected
+    return DemArrays.from_dem(dem).to_decoding_graph_and_logicals()
 
 
 class DetectorCounter(ErrorHandler):
@@ -19,6 +19,7 @@ from itertools import chain, repeat
 from typing import Any, Literal, SupportsIndex, cast, overload
 
 import numpy as np
+import numpy.typing as npt
 from typing_extensions import Self
 
 Bit = Literal[0, 1]
@@ -300,6 +301,189 @@ class OrderedSyndrome(Sequence[int], AbstractSet[int]):
         return cls(syndrome)
 
 
+class SyndromeBatch(Sequence[OrderedSyndrome]):
+    """Immutable batch of syndromes over `num_detectors` detectors, stored as a
+    dense array of shape `(shots, num_detectors)` or as a bit-packed array of
+    shape `(shots, ceil(num_detectors / 8))`. The other representation, and the
+    sparse CSR indices of the detection events in each shot, are computed from the
+    stored array when first needed.
+
+    Bit-packed arrays use the little-endian bit order used by Stim, so detector
+    ``d`` is bit ``d % 8`` of byte ``d // 8``. Padding bits are ignored.
+
+    Indexing with an integer gives the syndrome of that shot as an
+    `OrderedSyndrome`, and `np.asarray` gives the dense array.
+
+    Parameters
+    ----------
+    bits : npt.ArrayLike
+        2D array of 0s and 1s, one row for each shot.
+    num_detectors : int, optional
+        Number of detectors in each syndrome. By default, this is the number of
+        columns of `bits` if it is dense, or eight times that if it is bit-packed.
+    bit_packed : bool, optional
+        Whether `bits` is bit-packed, by default False.
+    """
+
+    def __init__(
+        self,
+        bits: npt.ArrayLike,
+        num_detectors: int | None = None,
+        bit_packed: bool = False,
+    ):
+        bits = np.asarray(bits, dtype=np.uint8)
+        if bits.ndim != 2:  # noqa: PLR2004
+            msg = f"Syndrome batches must be 2D arrays, not of shape {bits.shape}."
+            raise ValueError(msg)
+        width = bits.shape[1]
+        if num_detectors is None:
+            num_detectors = 8 * width if bit_packed else width
+        expected_width = -(-num_detectors // 8) if bit_packed else num_detectors
+        if width != expected_width:
+            msg = (
+                f"Array of shape {bits.shape} does not have {expected_width} columns "
+                f"for {num_detectors} detectors."
+            )
+            raise ValueError(msg)
+        padding_bits = -num_detectors % 8
+        if bit_packed and padding_bits and np.any(bits[:, -1] >> (8 - padding_bits)):
+            bits = bits.copy()
+            bits[:, -1] &= 0xFF >> padding_bits
+        self._num_detectors = num_detectors
+        self._bit_packed = bit_packed
+        self._dense: npt.NDArray[np.uint8] | None = None if bit_packed else bits
+        self._packed: npt.NDArray[np.uint8] | None = bits if bit_packed else None
+
+    @classmethod
+    def from_syndromes(
+        cls, syndromes: Iterable[Iterable[int]], num_detectors: int
+    ) -> SyndromeBatch:
+        """Create a batch from syndromes, such as `OrderedSyndrome` objects.
+
+        Parameters
+        ----------
+        syndromes : Iterable[Iterable[int]]
+            Detection events of each shot.
+        num_detectors : int
+            Number of detectors in each syndrome.
+
+        Returns
+        -------
+        SyndromeBatch
+        """
+        detectors = [np.fromiter(syndrome, dtype=np.intp) for syndrome in syndromes]
+        dense = np.zeros((len(detectors), num_detectors), dtype=np.uint8)
+        if detectors:
+            shots = np.repeat(np.arange(len(detectors)), list(map(len, detectors)))
+            dense[shots, np.concatenate(detectors)] = 1
+        return cls(dense)
+
+    @property
+    def num_detectors(self) -> int:
+        """Number of detectors in each syndrome."""
+        return self._num_detectors
+
+    @property
+    def is_bit_packed(self) -> bool:
+        """Whether the batch is stored as a bit-packed array."""
+        return self._bit_packed
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of the dense array of the batch."""
+        return len(self), self._num_detectors
+
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes of the stored array."""
+        return self._stored.nbytes
+
+    @property
+    def _stored(self) -> npt.NDArray[np.uint8]:
+        return self._packed if self._bit_packed else self._dense
+
+    @property
+    def dense(self) -> npt.NDArray[np.uint8]:
+        """Array of shape `(shots, num_detectors)` where entry ``(i, d)`` is 1 if
+        detector ``d`` is flipped in shot ``i``.
+        """
+        if self._dense is None:
+            self._dense = np.unpackbits(
+                self._packed, axis=1, count=self._num_detectors, bitorder="little"
+            )
+        return self._dense
+
+    @property
+    def packed(self) -> npt.NDArray[np.uint8]:
+        """Bit-packed array of shape `(shots, ceil(num_detectors / 8))`, with
+        padding bits set to 0.
+        """
+        if self._packed is None:
+            self._packed = np.packbits(self._dense, axis=1, bitorder="little")
+        return self._packed
+
+    @cached_property
+    def _csr(self) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+        shots, detectors = np.nonzero(self.dense)
+        indptr = np.zeros(len(self) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(shots, minlength=len(self)), out=indptr[1:])
+        return indptr, detectors.astype(np.int64)
+
+    @property
+    def indptr(self) -> npt.NDArray[np.int64]:
+        """CSR index pointer such that the detection events of shot ``i`` are
+        ``indices[indptr[i]:indptr[i + 1]]``.
+        """
+        return self._csr[0]
+
+    @property
+    def indices(self) -> npt.NDArray[np.int64]:
+        """Concatenated, sorted detection events of all shots."""
+        return self._csr[1]
+
+    def __len__(self) -> int:
+        return len(self._stored)
+
+    @overload
+    def __getitem__(self, index: int) -> OrderedSyndrome: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> SyndromeBatch: ...
+
+    def __getitem__(self, index: int | slice) -> OrderedSyndrome | SyndromeBatch:
+        if isinstance(index, slice):
+            return SyndromeBatch(
+                self._stored[index], self._num_detectors, self.is_bit_packed
+            )
+        # Indexing a range normalises negative indices and raises IndexError.
+        shot = range(len(self))[index]
+        start, stop = self.indptr[shot : shot + 2]
+        return OrderedSyndrome(self.indices[start:stop].tolist(), enforce_mod_2=False)
+
+    def __iter__(self) -> Iterator[OrderedSyndrome]:
+        indptr, indices = self._csr
+        detectors = indices.tolist()
+        for start, stop in zip(indptr[:-1].tolist(), indptr[1:].tolist(), strict=True):
+            yield OrderedSyndrome(detectors[start:stop], enforce_mod_2=False)
+
+    def __array__(self, dtype=None, copy=None) -> npt.NDArray:
+        if copy:
+            return self.dense.astype(dtype, copy=True)
+        return self.dense if dtype is None else self.dense.astype(dtype)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, SyndromeBatch)
+            and self._num_detectors == other._num_detectors
+            and np.array_equal(self.dense, other.dense)
+        )
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"SyndromeBatch(shots={len(self)}, num_detectors={self._num_detectors})"
+
+
 class Bitstring:
     """Class which efficiently represents a bitstring."""
 
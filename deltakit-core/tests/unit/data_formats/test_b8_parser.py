@@ -2,12 +2,16 @@
 import tempfile
 from pathlib import Path
 
+import numpy as np
 import pytest
 import stim
 
 from deltakit_core.data_formats import (
+    b8_num_shots,
     b8_to_logical_flip,
+    b8_to_logical_flip_batches,
     b8_to_measurements,
+    b8_to_syndrome_batches,
     b8_to_syndromes,
     logical_flips_to_b8_file,
     parse_01_to_logical_flips,
@@ -201,3 +205,104 @@ class TestB8ReadWriteMethods:
             tmp_b8_out_file.open("rb") as out_handle,
         ):
             assert origin_handle.read() == out_handle.read()
+
+
+class TestB8BatchReadMethods:
+    @pytest.mark.parametrize("batch_size", [1, 7, 100, 10000])
+    def test_syndrome_batches_match_per_shot_syndromes(
+        self, reference_data_dir, batch_size
+    ):
+        example_b8_file = reference_data_dir / "b801" / "detection_events.b8"
+        batches = list(b8_to_syndrome_batches(example_b8_file, 40, batch_size))
+        expected = [
+            syndrome.as_bitstring(40)
+            for syndrome in b8_to_syndromes(example_b8_file, 40)
+        ]
+        assert all(len(batch) <= batch_size for batch in batches)
+        assert all(batch.shape[1] == 40 for batch in batches)
+        np.testing.assert_array_equal(np.concatenate(batches), expected)
+
+    @pytest.mark.parametrize("num_logicals", [1, 2])
+    def test_logical_flip_batches_match_per_shot_logical_flips(
+        self, reference_data_dir, num_logicals
+    ):
+        example_b8_file = reference_data_dir / "b801" / "obs_flips_two_logical.b8"
+        batches = list(b8_to_logical_flip_batches(example_b8_file, num_logicals, 3))
+        expected = list(b8_to_logical_flip(example_b8_file, num_logicals))
+        np.testing.assert_array_equal(np.concatenate(batches), expected)
+
+    def test_bit_packed_syndrome_batches_are_stim_compatible(self, tmp_path):
+        circuit = stim.Circuit.generated(
+            "repetition_code:memory",
+            distance=5,
+            rounds=3,
+            before_round_data_depolarization=0.1,
+        )
+        b8_file = tmp_path / "detectors.b8"
+        circuit.compile_detector_sampler(seed=1).sample_write(
+            shots=50, filepath=str(b8_file), format="b8"
+        )
+        expected = stim.read_shot_data_file(
+            path=str(b8_file),
+            format="b8",
+            num_detectors=circuit.num_detectors,
+            bit_packed=True,
+        )
+        batches = list(
+            b8_to_syndrome_batches(
+                b8_file, circuit.num_detectors, batch_size=16, bit_packed=True
+            )
+        )
+        assert [len(batch) for batch in batches] == [16, 16, 16, 2]
+        np.testing.assert_array_equal(np.concatenate(batches), expected)
+
+    def test_syndrome_batches_from_bytes_match_batches_from_file(
+        self, reference_data_dir
+    ):
+        example_b8_file = reference_data_dir / "b801" / "detection_events.b8"
+        from_bytes = b8_to_syndrome_batches(example_b8_file.read_bytes(), 40, 13)
+        from_file = b8_to_syndrome_batches(example_b8_file, 40, 13)
+        for bytes_batch, file_batch in zip(from_bytes, from_file, strict=True):
+            np.testing.assert_array_equal(bytes_batch, file_batch)
+
+    def test_empty_b8_file_gives_no_batches(self, tmp_path):
+        b8_file = tmp_path / "empty.b8"
+        b8_file.touch()
+        assert list(b8_to_syndrome_batches(b8_file, 40)) == []
+
+    def test_truncated_b8_data_raises_value_error(self):
+        with pytest.raises(ValueError, match="cannot be split into shots"):
+            next(b8_to_syndrome_batches(bytes(7), 40))
+
+    def test_non_positive_batch_size_raises_value_error(self):
+        with pytest.raises(ValueError, match="must be positive"):
+            next(b8_to_syndrome_batches(bytes(10), 40, batch_size=0))
+
+    def test_b8_num_shots_counts_shots_in_file(self, reference_data_dir):
+        example_b8_file = reference_data_dir / "b801" / "detection_events.b8"
+        assert b8_num_shots(example_b8_file, 40) == len(
+            list(b8_to_syndromes(example_b8_file, 40))
+        )
+
+    @pytest.mark.parametrize(
+        ("first_shot", "num_shots"), [(0, 0), (0, 5), (3, 20), (10, None), (10**6, 2)]
+    )
+    def test_syndrome_batches_read_requested_shot_range(
+        self, reference_data_dir, first_shot, num_shots
+    ):
+        example_b8_file = reference_data_dir / "b801" / "detection_events.b8"
+        all_shots = np.concatenate(list(b8_to_syndrome_batches(example_b8_file, 40)))
+        batches = list(
+            b8_to_syndrome_batches(
+                example_b8_file, 40, 4, first_shot=first_shot, num_shots=num_shots
+            )
+        )
+        last_shot = None if num_shots is None else first_shot + num_shots
+        expected = all_shots[first_shot:last_shot]
+        assert sum(len(batch) for batch in batches) == len(expected)
+        if batches:
+            np.testing.assert_array_equal(np.concatenate(batches), expected)
+
+    def test_negative_shot_range_raises_value_error(self):
+        with pytest.raises(ValueError, match="must be non-negative"):
+            b8_to_syndrome_batches(bytes(10), 40, first_shot=-1)
@@ -0,0 +1,173 @@
+# (c) Copyright Riverlane 2020-2025.
+"""Tests for the array-backed view of decoding graphs."""
+
+import numpy as np
+import pytest
+import stim
+
+from deltakit_core.decoding_graphs import (
+    CompiledDecodingGraph,
+    DecodingEdge,
+    DecodingHyperEdge,
+    DecodingHyperGraph,
+    DecodingHyperMultiGraph,
+    EdgeRecord,
+    NXDecodingGraph,
+    NXDecodingMultiGraph,
+    dem_to_compiled_graph_and_logicals,
+    dem_to_hypergraph_and_logicals,
+    log_likelihood_weights,
+)
+
+
+@pytest.fixture
+def hypergraph():
+    return DecodingHyperGraph(
+        [
+            (DecodingHyperEdge((0, 1, 2)), EdgeRecord(0.1)),
+            (DecodingHyperEdge((2, 3)), EdgeRecord(0.2)),
+            (DecodingHyperEdge((3,)), EdgeRecord(0.3)),
+        ]
+    )
+
+
+@pytest.fixture
+def nx_graph():
+    return NXDecodingGraph.from_edge_list(
+        [
+            (DecodingEdge(0, 1), EdgeRecord(0.1)),
+            (DecodingEdge(1, 2), EdgeRecord(0.2)),
+            (DecodingEdge(2, 3), EdgeRecord(0.3)),
+        ],
+        boundaries=[3],
+    )
+
+
+@pytest.fixture
+def rep_code_dem():
+    return stim.Circuit.generated(
+        "repetition_code:memory",
+        distance=5,
+        rounds=5,
+        after_clifford_depolarization=0.01,
+        before_measure_flip_probability=0.02,
+    ).detector_error_model(decompose_errors=True)
+
+
+class TestCompiledDecodingGraph:
+    def test_edges_are_stored_in_graph_order_with_sorted_detectors(self, hypergraph):
+        compiled = hypergraph.compiled
+        for edge_index, edge in enumerate(hypergraph.edges):
+            assert compiled.edge(edge_index).tolist() == sorted(edge)
+        np.testing.assert_allclose(compiled.p_err, [0.1, 0.2, 0.3])
+        np.testing.assert_allclose(
+            compiled.weights,
+            [hypergraph.edge_records[edge].weight for edge in hypergraph.edges],
+        )
+        assert compiled.edge_detectors.dtype == np.int32
+        assert compiled.nodes.dtype == np.int32
+
+    def test_arrays_are_read_only(self, hypergraph):
+        with pytest.raises(ValueError, match="read-only"):
+            hypergraph.compiled.p_err[0] = 0.5
+
+    def test_compiled_view_is_cached(self, hypergraph):
+        assert hypergraph.compiled is hypergraph.compiled
+
+    def test_incident_edges_and_neighbors(self, hypergraph):
+        compiled = hypergraph.compiled
+        assert compiled.incident_edges(2).tolist() == [0, 1]
+        assert compiled.neighbors(2).tolist() == [0, 1, 3]
+        assert compiled.neighbors(3).tolist() == [2]
+        assert compiled.incident_edges(10).tolist() == []
+        assert compiled.neighbors(-1).tolist() == []
+
+    @pytest.mark.parametrize(
+        "graph",
+        [
+            DecodingHyperGraph([(0, 1), (1, 2), (2, 3), (0,)]),
+            DecodingHyperMultiGraph([(0, 1), (0, 1), (1, 2, 3)]),
+            NXDecodingGraph.from_edge_list([(0, 1), (1, 2), (2, 3)]),
+            NXDecodingMultiGraph.from_edge_list([(0, 1), (0, 1), (1, 2)]),
+        ],
+    )
+    def test_parity_check_matrix_matches_edges(self, graph):
+        expected = np.zeros((len(graph.nodes), len(graph.edges)), dtype=np.uint8)
+        for edge_index, edge in enumerate(graph.edges):
+            vertices = edge[0] if isinstance(edge, tuple) else edge
+            expected[list(vertices), edge_index] = 1
+        np.testing.assert_array_equal(graph.to_parity_check_matrix(), expected)
+
+    def test_error_to_syndrome_ignores_boundaries(self, nx_graph):
+        compiled = nx_graph.compiled
+        edge_indices = {edge: i for i, edge in enumerate(nx_graph.edges)}
+        for error in (
+            [DecodingEdge(0, 1)],
+            [DecodingEdge(0, 1), DecodingEdge(1, 2)],
+            [DecodingEdge(2, 3)],
+        ):
+            assert set(
+                compiled.error_to_syndrome(edge_indices[edge] for edge in error)
+            ) == set(nx_graph.error_to_syndrome(error))
+
+    def test_errors_to_syndromes_matches_single_errors(self, nx_graph):
+        compiled = nx_graph.compiled
+        errors = np.random.default_rng(1234).random((50, compiled.num_edges)) < 0.5
+        syndromes = compiled.errors_to_syndromes(errors)
+        assert syndromes.shape == (50, compiled.num_detectors)
+        for error, syndrome in zip(errors, syndromes, strict=True):
+            expected = compiled.error_to_syndrome(np.flatnonzero(error))
+            assert np.flatnonzero(syndrome).tolist() == sorted(expected)
+
+    def test_errors_to_syndromes_with_wrong_number_of_edges_raises_value_error(
+        self, hypergraph
+    ):
+        with pytest.raises(ValueError, match="one column for each of the 3 edges"):
+            hypergraph.compiled.errors_to_syndromes(np.zeros((2, 4), dtype=np.uint8))
+
+    def test_mismatched_arrays_raise_value_error(self):
+        with pytest.raises(ValueError, match="do not match"):
+            CompiledDecodingGraph.from_edges([(0, 1)], [0.1, 0.2])
+
+
+def test_log_likelihood_weights_match_edge_records():
+    p_err = [0.0, 0.1, 0.5, 1.0]
+    np.testing.assert_array_equal(
+        log_likelihood_weights(np.array(p_err)),
+        [EdgeRecord(p).weight for p in p_err],
+    )
+
+
+def test_log_likelihood_weights_outside_unit_interval_raise_value_error():
+    with pytest.raises(ValueError, match="outside"):
+        log_likelihood_weights(np.array([1.5]))
+
+
+def test_dem_to_compiled_graph_matches_hypergraph(rep_code_dem):
+    hypergraph, logicals = dem_to_hypergraph_and_logicals(rep_code_dem)
+    compiled, compiled_logicals = dem_to_compiled_graph_and_logicals(rep_code_dem)
+    compiled_edges = {
+        DecodingHyperEdge(compiled.edge(i).tolist()): i
+        for i in range(compiled.num_edges)
+    }
+    assert set(compiled_edges) == set(hypergraph.edges)
+    for edge, edge_index in compiled_edges.items():
+        assert compiled.p_err[edge_index] == pytest.approx(
+            hypergraph.edge_records[edge].p_err
+        )
+    assert compiled.nodes.tolist() == list(range(rep_code_dem.num_detectors))
+    assert [{compiled_edges[edge] for edge in logical} for logical in logicals] == [
+        set(logical.tolist()) for logical in compiled_logicals
+    ]
+
+
+def test_dem_to_compiled_graph_merges_repeated_edges():
+    dem = stim.DetectorErrorModel("""
+        error(0.1) D0 D1
+        error(0.2) D1 D0 L0
+        error(0.3) D1 ^ D2
+    """)
+    compiled, logicals = dem_to_compiled_graph_and_logicals(dem)
+    assert compiled.num_edges == 3
+    np.testing.assert_allclose(compiled.p_err, [0.1 * 0.8 + 0.9 * 0.2, 0.3, 0.3])
+    assert [logical.tolist() for logical in logicals] == [[0]]
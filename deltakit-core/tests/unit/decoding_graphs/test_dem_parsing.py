@@ -3,12 +3,15 @@ from collections.abc import Iterable
 from itertools import chain
 from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 import stim
 from pytest_mock import MockerFixture
 
 from deltakit_core.decoding_graphs import (
+    DecodingEdge,
     DecodingHyperEdge,
+    DemArrays,
     DemParser,
     DetectorRecord,
     DetectorRecorder,
@@ -544,3 +547,156 @@ class TestLogicalsInEdges:
             logical.issubset(parser.error_handler.edges)
             for logical in parser.error_handler.logicals
         )
+
+
+class TestDemArrays:
+    @pytest.fixture(
+        params=[
+            "repetition_code:memory",
+            "surface_code:rotated_memory_z",
+            "color_code:memory_xyz",
+        ]
+    )
+    def circuit_dem(self, request) -> stim.DetectorErrorModel:
+        return stim.Circuit.generated(
+            request.param,
+            distance=3,
+            rounds=4,
+            after_clifford_depolarization=0.01,
+            before_measure_flip_probability=0.02,
+        ).detector_error_model(decompose_errors=True)
+
+    @pytest.fixture
+    def repeat_dem(self) -> stim.DetectorErrorModel:
+        return stim.DetectorErrorModel("""
+            error(0.1) D0 D1 L0
+            detector(0, 0) D0
+            repeat 2 {
+                error(0.2) D0 ^ D1 D0 L1
+                detector(1, 0, 2) D1
+                shift_detectors(0, 1) 2
+            }
+            error(0.3) D0 D1
+            detector(5) D1
+        """)
+
+    def test_arrays_of_repeat_blocks_match_flattened_dem(self, circuit_dem):
+        arrays = DemArrays.from_dem(circuit_dem)
+        flattened_arrays = DemArrays.from_dem(circuit_dem.flattened())
+        for field in (
+            "edge_indptr",
+            "edge_detectors",
+            "p_err",
+            "observable_flips",
+            "detector_coordinates",
+            "declared_detectors",
+        ):
+            np.testing.assert_array_equal(
+                getattr(arrays, field), getattr(flattened_arrays, field)
+            )
+
+    def test_edges_are_merged_in_order_of_first_appearance(self, repeat_dem):
+        arrays = DemArrays.from_dem(repeat_dem)
+        assert arrays.edge_indptr.tolist() == [0, 2, 3, 4, 6, 8]
+        assert arrays.edge_detectors.tolist() == [0, 1, 0, 2, 2, 3, 4, 5]
+        np.testing.assert_allclose(
+            arrays.p_err, [0.2 * 0.9 + 0.1 * 0.8, 0.2, 0.2, 0.2, 0.3]
+        )
+        assert arrays.observable_flips.tolist() == [
+            [True, True],
+            [False, False],
+            [False, False],
+            [False, True],
+            [False, False],
+        ]
+
+    def test_repeated_edges_combine_error_probabilities(self):
+        arrays = DemArrays.from_dem(
+            stim.DetectorErrorModel("""
+                repeat 3 {
+                    error(0.1) D0 D1
+                }
+                error(0.2) D1 D0 L0
+            """)
+        )
+        p_err = 0.1
+        for new_p_err in (0.1, 0.1, 0.2):
+            p_err = new_p_err * (1 - p_err) + p_err * (1 - new_p_err)
+        assert arrays.p_err.tolist() == [p_err]
+        assert arrays.observable_flips.tolist() == [[True]]
+
+    def test_detector_coordinates_include_coordinate_offsets(self, repeat_dem):
+        arrays = DemArrays.from_dem(repeat_dem)
+        np.testing.assert_array_equal(
+            arrays.detector_coordinates,
+            [
+                [0, 0, np.nan],
+                [1, 0, 2],
+                [np.nan, np.nan, np.nan],
+                [1, 1, 2],
+                [np.nan, np.nan, np.nan],
+                [5, 2, np.nan],
+            ],
+        )
+        assert arrays.declared_detectors.tolist() == [
+            True,
+            True,
+            False,
+            True,
+            False,
+            True,
+        ]
+
+    def test_hypergraph_has_edges_and_detector_records_of_dem(self, repeat_dem):
+        graph, logicals = DemArrays.from_dem(repeat_dem).to_hypergraph_and_logicals()
+        assert graph.edges == [
+            DecodingHyperEdge({0, 1}),
+            DecodingHyperEdge({0}),
+            DecodingHyperEdge({2}),
+            DecodingHyperEdge({2, 3}),
+            DecodingHyperEdge({4, 5}),
+        ]
+        assert graph.detector_records == {
+            0: DetectorRecord((0,), 0),
+            1: DetectorRecord((1, 0), 2),
+            3: DetectorRecord((1, 1), 2),
+            5: DetectorRecord((5,), 2),
+        }
+        assert logicals == [
+            {DecodingHyperEdge({0, 1})},
+            {DecodingHyperEdge({0, 1}), DecodingHyperEdge({2, 3})},
+        ]
+
+    def test_decoding_graph_connects_degree_one_edges_to_boundary(self, repeat_dem):
+        graph, logicals = DemArrays.from_dem(
+            repeat_dem
+        ).to_decoding_graph_and_logicals()
+        assert graph.edges == [
+            DecodingEdge(0, 6),
+            DecodingEdge(2, 6),
+            DecodingEdge(0, 1),
+            DecodingEdge(2, 3),
+            DecodingEdge(4, 5),
+        ]
+        assert graph.boundaries == frozenset({6})
+        assert graph.edge_records[DecodingEdge(0, 1)].p_err == pytest.approx(0.26)
+        assert logicals == [
+            {DecodingEdge(0, 1)},
+            {DecodingEdge(0, 1), DecodingEdge(2, 3)},
+        ]
+
+    def test_decoding_graph_raises_for_edges_of_degree_above_two(self):
+        arrays = DemArrays.from_dem(stim.DetectorErrorModel("error(0.1) D0 D1 D2"))
+        with pytest.raises(ValueError, match="Edge of degree 3"):
+            arrays.to_decoding_graph_and_logicals()
+
+    def test_warning_is_raised_for_logical_observable_instructions(self):
+        with pytest.warns(
+            UserWarning, match="Isolated logical observables L1 declared in DEM file."
+        ):
+            DemArrays.from_dem(stim.DetectorErrorModel("logical_observable L1"))
+
+    def test_arrays_are_read_only(self, repeat_dem):
+        arrays = DemArrays.from_dem(repeat_dem)
+        with pytest.raises(ValueError, match="read-only"):
+            arrays.p_err[0] = 0.5
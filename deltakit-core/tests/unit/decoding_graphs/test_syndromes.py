@@ -11,6 +11,7 @@ from deltakit_core.decoding_graphs import (
     DetectorRecord,
     FixedWidthBitstring,
     OrderedSyndrome,
+    SyndromeBatch,
     get_round_words,
 )
 from deltakit_core.decoding_graphs._syndromes import Bit
@@ -241,6 +242,71 @@ class TestOrderedSyndrome:
         assert herald_flags == expected_herald_events
 
 
+class TestSyndromeBatch:
+    """Tests for batches of syndromes."""
+
+    @pytest.fixture
+    def dense(self):
+        return (np.random.default_rng(1234).random((20, 13)) < 0.3).astype(np.uint8)
+
+    def test_packed_and_dense_batches_are_equal(self, dense):
+        packed = np.packbits(dense, axis=1, bitorder="little")
+        dense_batch = SyndromeBatch(dense)
+        packed_batch = SyndromeBatch(packed, 13, bit_packed=True)
+        assert packed_batch.is_bit_packed
+        assert not dense_batch.is_bit_packed
+        assert dense_batch == packed_batch
+        np.testing.assert_array_equal(packed_batch.dense, dense)
+        np.testing.assert_array_equal(dense_batch.packed, packed)
+        assert packed_batch.shape == dense_batch.shape == (20, 13)
+        assert packed_batch.nbytes == packed.nbytes
+
+    def test_padding_bits_are_ignored(self):
+        batch = SyndromeBatch(
+            np.array([[0xFF, 0xFF]], dtype=np.uint8), 10, bit_packed=True
+        )
+        assert batch.packed.tolist() == [[0xFF, 0x03]]
+        assert batch[0] == OrderedSyndrome(range(10))
+
+    def test_shots_are_ordered_syndromes(self, dense):
+        batch = SyndromeBatch(dense)
+        expected = [OrderedSyndrome.from_bitstring(row) for row in dense]
+        assert list(batch) == expected
+        assert [batch[i] for i in range(-len(batch), len(batch))] == expected * 2
+        for shot, syndrome in enumerate(expected):
+            start, stop = batch.indptr[shot], batch.indptr[shot + 1]
+            assert batch.indices[start:stop].tolist() == list(syndrome)
+
+    def test_from_syndromes_round_trips(self, dense):
+        batch = SyndromeBatch(dense)
+        assert SyndromeBatch.from_syndromes(batch, 13) == batch
+        assert len(SyndromeBatch.from_syndromes([], 13)) == 0
+
+    def test_slicing_keeps_representation(self, dense):
+        batch = SyndromeBatch(
+            np.packbits(dense, axis=1, bitorder="little"), 13, bit_packed=True
+        )
+        sliced = batch[5:10]
+        assert sliced.is_bit_packed
+        np.testing.assert_array_equal(np.asarray(sliced), dense[5:10])
+
+    def test_index_out_of_range_raises_index_error(self, dense):
+        with pytest.raises(IndexError):
+            SyndromeBatch(dense)[20]
+
+    @pytest.mark.parametrize(
+        ("bits", "num_detectors", "bit_packed"),
+        [
+            (np.zeros(5), None, False),
+            (np.zeros((2, 5)), 4, False),
+            (np.zeros((2, 2)), 17, True),
+        ],
+    )
+    def test_wrong_shape_raises_value_error(self, bits, num_detectors, bit_packed):
+        with pytest.raises(ValueError, match="shape"):
+            SyndromeBatch(bits, num_detectors, bit_packed)
+
+
 class TestBitstringCreation:
     def test_error_is_raised_bitstring_given_negative_number(self):
         with pytest.raises(ValueError, match=r"Bitstring cannot be a negative value."):
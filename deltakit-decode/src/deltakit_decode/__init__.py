@@ -4,6 +4,7 @@
 import importlib.metadata
 
 from deltakit_decode._mwpm_decoder import PyMatchingDecoder
+from deltakit_decode._sliding_window_decoder import SlidingWindowDecoder
 
 # It looks like these were intended to be separate, public modules.
 # For now, import them as such. This can be reconsidered during API review.
@@ -19,6 +19,7 @@ from deltakit_core.decoding_graphs import (
     NXDecodingGraph,
     OrderedDecodingEdges,
     OrderedSyndrome,
+    SyndromeBatch,
 )
 
 from deltakit_decode.utils import make_logger
@@ -70,16 +71,17 @@ class DecoderProtocol(Protocol):
 
     @abstractmethod
     def decode_batch_to_full_correction(
-        self, syndrome_batch: npt.NDArray[np.uint8]
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
     ) -> npt.NDArray[np.uint8]:
         """Decodes a batch of syndrome bitstrings to full correction.
 
         Parameters
         ----------
-        syndrome_batch : np.ndarray
+        syndrome_batch : Union[np.ndarray, SyndromeBatch]
             Syndrome  to decode. 2D Array of shape
             (number of shots, number of syndromes). Each element is a 1
-            or 0.
+            or 0. Decoders should also accept a `SyndromeBatch`, which
+            `np.asarray` converts to such an array.
 
 
         Returns
@@ -92,16 +94,17 @@ class DecoderProtocol(Protocol):
 
     @abstractmethod
     def decode_batch_to_logical_flip(
-        self, syndrome_batch: npt.NDArray[np.uint8]
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
     ) -> npt.NDArray[np.uint8]:
         """Decodes a batch of syndrome bitstrings to logical flips.
 
         Parameters
         ----------
-        syndrome_batch : np.ndarray
+        syndrome_batch : Union[np.ndarray, SyndromeBatch]
             Syndrome  to decode. 2D Array of shape
             (number of shots, number of syndromes). Each element is a 1
-            or 0.
+            or 0. Decoders should also accept a `SyndromeBatch`, which
+            `np.asarray` converts to such an array.
 
 
         Returns
@@ -166,30 +169,30 @@ class GraphDecoder(DecoderProtocol, ABC, Generic[GraphT]):
         """Decode to full correction returning OrderedDecodingEdges object"""
 
     def decode_batch_to_full_correction(
-        self, syndrome_batch: npt.NDArray[np.uint8]
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
     ) -> npt.NDArray[np.uint8]:
+        if not isinstance(syndrome_batch, SyndromeBatch):
+            syndrome_batch = SyndromeBatch(syndrome_batch)
         return np.asarray(
             [
                 np.asarray(
-                    self.decode_to_full_correction(
-                        OrderedSyndrome.from_bitstring(s)
-                    ).as_bitstring(self.decoding_graph.edges),
+                    self.decode_to_full_correction(syndrome).as_bitstring(
+                        self.decoding_graph.edges),
                     dtype=np.uint8,
                 )
-                for s in syndrome_batch
+                for syndrome in syndrome_batch
             ]
         )
 
     def decode_batch_to_logical_flip(
-        self, syndrome_batch: npt.NDArray[np.uint8]
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
     ) -> npt.NDArray[np.uint8]:
+        if not isinstance(syndrome_batch, SyndromeBatch):
+            syndrome_batch = SyndromeBatch(syndrome_batch)
         return np.asarray(
             [
-                np.asarray(
-                    self.decode_to_logical_flip(OrderedSyndrome.from_bitstring(s)),
-                    dtype=np.uint8,
-                )
-                for s in syndrome_batch
+                np.asarray(self.decode_to_logical_flip(syndrome), dtype=np.uint8)
+                for syndrome in syndrome_batch
             ]
         )
 
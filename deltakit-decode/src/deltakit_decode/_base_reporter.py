@@ -3,7 +3,8 @@ from __future__ import annotations
 
 import logging
 from abc import abstractmethod
-from contextlib import AbstractContextManager
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager
 from math import sqrt
 from time import time_ns
 from typing import Any
@@ -18,6 +19,11 @@ class BaseReporter(AbstractContextManager):
     the execution of decoders. They store and aggregate various metrics
     about the decoder that is running.
 
+    Reporters that implement `enter_batch` and `exit_batch` support batches of
+    shots, and are run around the decoding of each batch rather than each shot.
+    Decoder managers only decode in batches when all of their reporters support
+    batches.
+
     Parameters
     ----------
     lvl : int, optional
@@ -47,10 +53,45 @@ class BaseReporter(AbstractContextManager):
         msg = "Reporter concatenation not defined!"
         raise ValueError(msg)
 
+    def enter_batch(self, batch_size: int):
+        """Start reporting on the decoding of a batch of `batch_size` shots, in
+        place of entering the reporter for each shot.
+        """
+        msg = f"{self} does not support batches of shots."
+        raise NotImplementedError(msg)
+
+    def exit_batch(self, batch_size: int):
+        """Finish reporting on the decoding of a batch of `batch_size` shots, in
+        place of exiting the reporter for each shot.
+        """
+        msg = f"{self} does not support batches of shots."
+        raise NotImplementedError(msg)
+
+    @property
+    def supports_batches(self) -> bool:
+        """Whether this reporter implements `enter_batch` and `exit_batch`."""
+        return (type(self).enter_batch is not BaseReporter.enter_batch
+                and type(self).exit_batch is not BaseReporter.exit_batch)
+
+    @contextmanager
+    def batch(self, batch_size: int) -> Iterator[Self]:
+        """Context manager to report on the decoding of a batch of `batch_size`
+        shots.
+        """
+        self.enter_batch(batch_size)
+        try:
+            yield self
+        finally:
+            self.exit_batch(batch_size)
+
 
 class TimingReporter(BaseReporter):
     """Simple reporter that records the total amount
     of time spent decoding, in nanoseconds.
+
+    Batches of shots are supported, with each shot in a batch taken to have the
+    mean time of the batch. The standard error then only includes the variation
+    between batches.
     """
 
     def __init__(self, lvl: int = logging.ERROR):
@@ -75,16 +116,29 @@ class TimingReporter(BaseReporter):
 
     def __exit__(self, exc_type, exc_value, traceback):
         self._end_time = time_ns()
-        last_shot_wall_ns = self._end_time - self._start_time
-        if self._shots > 0:
-            # here this is the old shot count, so this is true except on the first shot
-            xn_minus_oldmean = last_shot_wall_ns - self._sum_wall_ns / self._shots
-        else:
-            xn_minus_oldmean = 0
-        self._sum_wall_ns += last_shot_wall_ns
-        self._shots += 1
-        xn_minus_newmean = last_shot_wall_ns - self._sum_wall_ns / self._shots
-        self._sum_of_square_deviations += xn_minus_oldmean * xn_minus_newmean
+        self._add_shots(1, self._end_time - self._start_time, 0)
+
+    def enter_batch(self, batch_size: int):  # noqa: ARG002
+        self._start_time = time_ns()
+
+    def exit_batch(self, batch_size: int):
+        self._end_time = time_ns()
+        self._add_shots(batch_size, self._end_time - self._start_time, 0)
+
+    def _add_shots(self, shots: int, sum_wall_ns: int,
+                   sum_of_square_deviations: float):
+        """Add the aggregates of further shots, using the parallel Welford's
+        algorithm formula.
+        """
+        if shots == 0:
+            return
+        total_shots = self._shots + shots
+        delta = sum_wall_ns / shots - self.avg_wall_ns
+        self._sum_of_square_deviations += (sum_of_square_deviations
+                                           + delta**2 * self._shots * shots
+                                           / total_shots)
+        self._sum_wall_ns += sum_wall_ns
+        self._shots = total_shots
 
     def reset_reporter(self):
         self._sum_wall_ns = 0
@@ -116,14 +170,7 @@ class TimingReporter(BaseReporter):
 
     def __iadd__(self, other: BaseReporter) -> Self:
         if isinstance(other, TimingReporter):
-            # use parallel Welford's algorithm formula
-            total_shots = self._shots + other._shots
-            delta = other.avg_wall_ns - self.avg_wall_ns
-            self._sum_of_square_deviations = \
-                self._sum_of_square_deviations + \
-                other._sum_of_square_deviations + \
-                delta**2 * self._shots * other._shots / total_shots
-            self._sum_wall_ns += other._sum_wall_ns
-            self._shots = total_shots
+            self._add_shots(other._shots, other._sum_wall_ns,
+                            other._sum_of_square_deviations)
             return self
         return NotImplemented
@@ -1,23 +1,136 @@
 # (c) Copyright Riverlane 2020-2025.
 from __future__ import annotations
 
+import warnings
 from collections.abc import Iterable
+from dataclasses import dataclass, fields, replace
 from functools import cached_property
+from itertools import chain
 
-import networkx as nx
 import numpy as np
+import numpy.typing as npt
 import pymatching
 import stim
 from deltakit_circuit import Circuit
 from deltakit_core.decoding_graphs import (
+    DecodingEdge,
     DecodingHyperEdge,
+    NXDecodingGraph,
     OrderedDecodingEdges,
     OrderedSyndrome,
+    SyndromeBatch,
 )
+from scipy.sparse import csc_matrix
 
 from deltakit_decode._abstract_matching_decoders import GraphDecoder
+from deltakit_decode.utils._build_cache import _cached_build, get_build_cache
 from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
 
+# Edges with a larger absolute weight are not added to matching graphs by PyMatching.
+_MAX_EDGE_WEIGHT = 2**24 - 1
+
+
+@dataclass(frozen=True)
+class _MatchingArrays:
+    """Compact, picklable form of a ``pymatching.Matching``. Matchers can be
+    rebuilt from it in a single call into PyMatching, without going via NetworkX.
+
+    Parameters
+    ----------
+    num_nodes : int
+        Number of nodes in the matching graph, including boundary nodes.
+    num_fault_ids : int
+        Number of fault ids tracked by the matching graph.
+    boundary : tuple[int, ...]
+        Nodes marked as boundary nodes.
+    edges : npt.NDArray[np.int64]
+        Array of shape (number of edges, 2) of the nodes of each edge. Edges to
+        the virtual boundary have -1 as their second node.
+    weights : npt.NDArray[np.float64]
+        Weight of each edge.
+    error_probabilities : npt.NDArray[np.float64]
+        Error probability of each edge, or -1 where it is not set.
+    fault_ids_indptr : npt.NDArray[np.int64]
+        CSR index pointer such that the fault ids of edge ``i`` are
+        ``fault_ids[fault_ids_indptr[i]:fault_ids_indptr[i + 1]]``.
+    fault_ids : npt.NDArray[np.int64]
+        Concatenated fault ids of all edges.
+    """
+
+    num_nodes: int
+    num_fault_ids: int
+    boundary: tuple[int, ...]
+    edges: npt.NDArray[np.int64]
+    weights: npt.NDArray[np.float64]
+    error_probabilities: npt.NDArray[np.float64]
+    fault_ids_indptr: npt.NDArray[np.int64]
+    fault_ids: npt.NDArray[np.int64]
+
+    @classmethod
+    def from_matching(cls, matching: pymatching.Matching) -> _MatchingArrays:
+        """Extract the compact form of an existing matcher."""
+        edge_data = matching.edges()
+        fault_ids = [sorted(data.get("fault_ids", ())) for _, _, data in edge_data]
+        return cls(
+            num_nodes=matching.num_nodes,
+            num_fault_ids=matching.num_fault_ids,
+            boundary=tuple(sorted(matching.boundary)),
+            edges=np.array([(u, -1 if v is None else v) for u, v, _ in edge_data],
+                           dtype=np.int64).reshape(-1, 2),
+            weights=np.array([data["weight"] for _, _, data in edge_data],
+                             dtype=np.float64),
+            error_probabilities=np.array(
+                [data["error_probability"] for _, _, data in edge_data],
+                dtype=np.float64),
+            fault_ids_indptr=np.cumsum([0, *map(len, fault_ids)], dtype=np.int64),
+            fault_ids=np.fromiter((fault_id for ids in fault_ids for fault_id in ids),
+                                  dtype=np.int64),
+        )
+
+    def to_arrays(self) -> dict[str, npt.NDArray]:
+        """Arrays of each field, which can be stored in a `BuildCache`."""
+        return {field.name: np.asarray(getattr(self, field.name))
+                for field in fields(self)}
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, npt.NDArray]) -> _MatchingArrays:
+        """Rebuild the compact form from the arrays given by `to_arrays`."""
+        return cls(
+            num_nodes=int(arrays["num_nodes"]),
+            num_fault_ids=int(arrays["num_fault_ids"]),
+            boundary=tuple(arrays["boundary"].tolist()),
+            edges=arrays["edges"].reshape(-1, 2),
+            weights=arrays["weights"],
+            error_probabilities=arrays["error_probabilities"],
+            fault_ids_indptr=arrays["fault_ids_indptr"],
+            fault_ids=arrays["fault_ids"],
+        )
+
+    def to_matching(self) -> pymatching.Matching:
+        """Build the matcher described by these arrays."""
+        num_edges = len(self.edges)
+        edge_indices = np.repeat(np.arange(num_edges), 2)
+        nodes = self.edges.ravel()
+        in_graph = nodes >= 0
+        check_matrix = csc_matrix(
+            (np.ones(np.count_nonzero(in_graph), dtype=np.uint8),
+             (nodes[in_graph], edge_indices[in_graph])),
+            shape=(self.num_nodes, num_edges))
+        faults_matrix = csc_matrix(
+            (np.ones(len(self.fault_ids), dtype=np.uint8),
+             (self.fault_ids, np.repeat(np.arange(num_edges),
+                                        np.diff(self.fault_ids_indptr)))),
+            shape=(self.num_fault_ids, num_edges))
+        matching = pymatching.Matching.from_check_matrix(
+            check_matrix,
+            weights=self.weights,
+            error_probabilities=self.error_probabilities,
+            faults_matrix=faults_matrix,
+            use_virtual_boundary_node=True)
+        if self.boundary:
+            matching.set_boundary_nodes(set(self.boundary))
+        return matching
+
 
 class PyMatchingDecoder(GraphDecoder):
     """PyMatching decoder for minimum weight perfect matching (MWPM),
@@ -34,62 +147,145 @@ class PyMatchingDecoder(GraphDecoder):
     Notes
     -----
         MWPM relies on contiguous indices for nodes.
+
+        Matchers are built from arrays of the edges of the decoding graph in a
+        single call into PyMatching. The edges are read from the decoding graph
+        once and shared by the matcher for logical flips and the matcher for full
+        corrections, which differ only in the fault ids of each edge.
     """
 
     name = "PyMatching2"
 
-    def _make_matcher(
-        self, fault_edges: Iterable[Iterable[DecodingHyperEdge]]
-    ) -> pymatching.Matching:
-        local_nx: nx.Graph = self.decoding_graph.graph.copy()
-        for fault_id, edges in enumerate(fault_edges):
-            for edge in edges:
-                if "fault_ids" in local_nx.edges[edge]:
-                    local_nx.edges[edge]["fault_ids"].add(fault_id)
-                else:
-                    local_nx.edges[edge]["fault_ids"] = {fault_id}
-        for boundary in self.decoding_graph.boundaries:
-            local_nx.nodes[boundary]["is_boundary"] = True
-        return pymatching.Matching.from_networkx(
-            local_nx, min_num_fault_ids=len(self.logicals)
+    _logical_flip_matcher_arrays: _MatchingArrays | None = None
+    _full_matcher_arrays: _MatchingArrays | None = None
+
+    @cached_property
+    def _matching_graph(self) -> _MatchingArrays:
+        """Matching graph of the decoding graph without any fault ids, with its
+        edges in the order of the edges of the decoding graph."""
+        graph = self.decoding_graph.graph
+        num_edges = graph.number_of_edges()
+        edges = np.fromiter(chain.from_iterable(graph.edges()), dtype=np.int64,
+                            count=2 * num_edges).reshape(-1, 2)
+        weights = np.fromiter((weight for *_, weight
+                               in graph.edges(data="weight", default=1)),
+                              dtype=np.float64, count=num_edges)
+        error_probabilities = np.fromiter(
+            (probability for *_, probability
+             in graph.edges(data="error_probability", default=-1)),
+            dtype=np.float64, count=num_edges)
+        if (num_unmatched := np.count_nonzero(np.abs(weights) > _MAX_EDGE_WEIGHT)):
+            warnings.warn(
+                f"{num_unmatched} edges have weights exceeding the maximum edge "
+                f"weight {_MAX_EDGE_WEIGHT} and have not been added to the matching "
+                "graph.", stacklevel=2)
+        nodes = self.decoding_graph.nodes
+        return _MatchingArrays(
+            num_nodes=max(len(nodes), max(nodes, default=-1) + 1),
+            num_fault_ids=0,
+            boundary=tuple(sorted(self.decoding_graph.boundaries)),
+            edges=edges,
+            weights=weights,
+            error_probabilities=error_probabilities,
+            fault_ids_indptr=np.zeros(num_edges + 1, dtype=np.int64),
+            fault_ids=np.zeros(0, dtype=np.int64),
         )
 
+    @cached_property
+    def _edge_indices(self) -> dict[DecodingEdge, int]:
+        """Index of each edge of the decoding graph."""
+        return {edge: index for index, edge in enumerate(self.decoding_graph.edges)}
+
+    def _matcher_arrays(self, edge_indices: npt.NDArray[np.int64],
+                        fault_ids: npt.NDArray[np.int64]) -> _MatchingArrays:
+        """Arrays of the matcher where the edge ``edge_indices[i]`` of the
+        decoding graph flips the fault ``fault_ids[i]``. Edges with too large a
+        weight are left out, as PyMatching does."""
+        matching_graph = self._matching_graph
+        in_graph = np.abs(matching_graph.weights) <= _MAX_EDGE_WEIGHT
+        edge_faults = np.unique(np.stack([edge_indices, fault_ids], axis=1), axis=0)
+        fault_counts = np.bincount(edge_faults[:, 0], minlength=len(in_graph))
+        edge_faults = edge_faults[in_graph[edge_faults[:, 0]]]
+        return replace(
+            matching_graph,
+            edges=matching_graph.edges[in_graph],
+            weights=matching_graph.weights[in_graph],
+            error_probabilities=matching_graph.error_probabilities[in_graph],
+            num_fault_ids=max(len(self.logicals), int(fault_ids.max(initial=-1)) + 1),
+            fault_ids_indptr=np.concatenate(
+                ([0], np.cumsum(fault_counts[in_graph]))).astype(np.int64),
+            fault_ids=edge_faults[:, 1])
+
+    def _make_matcher_arrays(
+        self, fault_edges: Iterable[Iterable[DecodingHyperEdge]]
+    ) -> _MatchingArrays:
+        """Arrays of the matcher where the edges of ``fault_edges[i]`` flip the
+        fault ``i``."""
+        edge_faults = [(self._edge_indices[edge], fault_id)
+                       for fault_id, edges in enumerate(fault_edges)
+                       for edge in edges]
+        edge_faults = np.array(edge_faults, dtype=np.int64).reshape(-1, 2)
+        return self._matcher_arrays(edge_faults[:, 0], edge_faults[:, 1])
+
     def __str__(self) -> str:
         return "MWPM"
 
     @cached_property
     def _logical_flip_matcher(self) -> pymatching.Matching:
-        return self._make_matcher(self.logicals)
+        if self._logical_flip_matcher_arrays is None:
+            self._logical_flip_matcher_arrays = self._make_matcher_arrays(
+                self.logicals)
+        return self._logical_flip_matcher_arrays.to_matching()
 
     @cached_property
     def _full_matcher(self) -> pymatching.Matching:
-        return self._make_matcher([[edge] for edge in self.decoding_graph.edges])
+        if self._full_matcher_arrays is None:
+            edge_indices = np.arange(len(self.decoding_graph.edges), dtype=np.int64)
+            self._full_matcher_arrays = self._matcher_arrays(edge_indices,
+                                                             edge_indices)
+        return self._full_matcher_arrays.to_matching()
+
+    @cached_property
+    def _num_detectors(self) -> int:
+        """Number of bits in the syndromes given to PyMatching."""
+        return max(self.decoding_graph.nodes) + 1
 
     def decode_to_logical_flip(self, syndrome: OrderedSyndrome) -> tuple[bool, ...]:
-        py_matching_syndrome = syndrome.as_bitstring(max(self.decoding_graph.nodes) + 1)
+        py_matching_syndrome = syndrome.as_bitstring(self._num_detectors)
         corrections = self._logical_flip_matcher.decode(py_matching_syndrome)
         return tuple(bool(corr) for corr in corrections)
 
     def decode_to_full_correction(
             self, syndrome: OrderedSyndrome) -> OrderedDecodingEdges:
 
-        py_matching_syndrome = syndrome.as_bitstring(
-            max(self.decoding_graph.nodes) + 1)
+        py_matching_syndrome = syndrome.as_bitstring(self._num_detectors)
         corrections = self._full_matcher.decode(py_matching_syndrome)
 
         return OrderedDecodingEdges(
             [self.decoding_graph.edges[i] for i in np.nonzero(corrections)[0]]
         )
 
+    @staticmethod
+    def _decode_batch(matcher: pymatching.Matching,
+                      syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
+                      ) -> npt.NDArray[np.uint8]:
+        """Decode a batch with a matcher, passing bit-packed batches to PyMatching
+        without unpacking them when their width matches the matcher.
+        """
+        if (isinstance(syndrome_batch, SyndromeBatch) and syndrome_batch.is_bit_packed
+                and syndrome_batch.packed.shape[1] == -(-matcher.num_detectors // 8)):
+            return matcher.decode_batch(syndrome_batch.packed, bit_packed_shots=True)
+        return matcher.decode_batch(np.asarray(syndrome_batch))
+
     def decode_batch_to_full_correction(
-        self, syndrome_batch: np.ndarray
-    ) -> np.ndarray:
-        return self._full_matcher.decode_batch(syndrome_batch)
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
+    ) -> npt.NDArray[np.uint8]:
+        return self._decode_batch(self._full_matcher, syndrome_batch)
 
     def decode_batch_to_logical_flip(
-        self, syndrome_batch: np.ndarray
-    ) -> np.ndarray:
-        return self._logical_flip_matcher.decode_batch(syndrome_batch)
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
+    ) -> npt.NDArray[np.uint8]:
+        return self._decode_batch(self._logical_flip_matcher, syndrome_batch)
 
     @classmethod
     def construct_decoder_and_stim_circuit(
@@ -98,6 +294,10 @@ class PyMatchingDecoder(GraphDecoder):
         """Helper factory to create a MWPM decoder and the Stim circuit used
         during its construction.
 
+        If a cache is given by `get_build_cache`, the decoding graph and the
+        matcher used for logical flips are loaded from the cache when the same
+        circuit was used before, and stored in it otherwise.
+
         Parameters
         ----------
         circuit : Circuit
@@ -109,12 +309,74 @@ class PyMatchingDecoder(GraphDecoder):
         """
         stim_circuit = circuit.as_stim_circuit()
         graph, logicals, stim_circuit = parse_stim_circuit(stim_circuit)
-        return cls(graph, logicals), stim_circuit
+        decoder = cls(graph, logicals)
+        if get_build_cache() is not None:
+            decoder._logical_flip_matcher_arrays = _cached_build(
+                stim_circuit,
+                lambda: decoder._make_matcher_arrays(decoder.logicals),
+                _MatchingArrays.to_arrays,
+                _MatchingArrays.from_arrays,
+                builder=f"{cls.__name__}.logical_flip_matcher")
+        return decoder, stim_circuit
 
     def __getstate__(self):
+        # PyMatching matchers cannot be pickled, so they are replaced by their
+        # compact array form, which is kept whenever a matcher is built, and rebuilt
+        # from it on first use after unpickling. The logical flip matcher is used
+        # for all logical flip decoding, including in pool workers, so it is always
+        # included to spare each worker from reading the NetworkX graph. The
+        # decoding graph itself is sent as arrays of its edges where possible.
         inner_state = self.__dict__.copy()
-        if "_logical_flip_matcher" in inner_state:
-            del inner_state["_logical_flip_matcher"]
-        if "_full_matcher" in inner_state:
-            del inner_state["_full_matcher"]
+        for name in ("_logical_flip_matcher", "_full_matcher", "_matching_graph",
+                     "_edge_indices"):
+            inner_state.pop(name, None)
+        if self._logical_flip_matcher_arrays is None:
+            inner_state["_logical_flip_matcher_arrays"] = self._make_matcher_arrays(
+                self.logicals)
+        if (graph_arrays := _decoding_graph_to_arrays(self.decoding_graph)) is not None:
+            del inner_state["decoding_graph"]
+            inner_state["_decoding_graph_arrays"] = graph_arrays
         return inner_state
+
+    def __setstate__(self, state):
+        if (graph_arrays := state.pop("_decoding_graph_arrays", None)) is not None:
+            state["decoding_graph"] = _decoding_graph_from_arrays(graph_arrays)
+        self.__dict__.update(state)
+
+
+def _decoding_graph_to_arrays(decoding_graph: NXDecodingGraph) -> dict | None:
+    """Compact form of a decoding graph, with an array of its edges in the order
+    of the NetworkX graph and an array of each edge attribute. None if the graph
+    is not an `NXDecodingGraph`, or if its edges do not all have the same numeric
+    attributes, in which case the graph has no compact form.
+    """
+    if type(decoding_graph) is not NXDecodingGraph:
+        return None
+    graph = decoding_graph.graph
+    edge_data = list(graph.edges(data=True))
+    attributes = edge_data[0][2].keys() if edge_data else ()
+    if not all(data.keys() == attributes
+               and all(isinstance(value, (int, float)) for value in data.values())
+               for *_, data in edge_data):
+        return None
+    return {
+        "detector_records": dict(graph.nodes(data=True)),
+        "boundaries": tuple(decoding_graph.boundaries),
+        "edges": np.array([(u, v) for u, v, _ in edge_data],
+                          dtype=np.int64).reshape(-1, 2),
+        "edge_attributes": {name: np.array([data[name] for *_, data in edge_data])
+                            for name in attributes},
+    }
+
+
+def _decoding_graph_from_arrays(graph_arrays: dict) -> NXDecodingGraph:
+    """Rebuild the decoding graph from the compact form given by
+    `_decoding_graph_to_arrays`, with nodes and edges in the same order."""
+    graph = NXDecodingGraph.base_graph_class()
+    graph.add_nodes_from(graph_arrays["detector_records"].items())
+    edge_attributes = graph_arrays["edge_attributes"]
+    graph.add_edges_from(
+        (u, v, {name: values[index].item()
+                for name, values in edge_attributes.items()})
+        for index, (u, v) in enumerate(graph_arrays["edges"].tolist()))
+    return NXDecodingGraph(graph, graph_arrays["boundaries"])
@@ -0,0 +1,428 @@
+# (c) Copyright Riverlane 2020-2025.
+from __future__ import annotations
+
+import logging
+import warnings
+from collections.abc import Hashable, Iterable, Iterator
+from dataclasses import dataclass
+
+import numpy as np
+import numpy.typing as npt
+from deltakit_core.decoding_graphs import (
+    DecodingHyperEdge,
+    DecodingHyperGraph,
+    DetectorRecord,
+    EdgeRecord,
+    HyperLogicals,
+    NXDecodingGraph,
+    OrderedDecodingEdges,
+    OrderedSyndrome,
+    SyndromeBatch,
+    connect_dangling_to_boundary_hypergraph,
+    induce_subhypergraph,
+    nodes_within_radius,
+    relabel_hypergraph_nodes_contiguously,
+)
+
+from deltakit_decode._abstract_matching_decoders import GraphDecoder
+from deltakit_decode._mwpm_decoder import PyMatchingDecoder
+
+
+@dataclass(frozen=True)
+class _Window:
+    """Position of a window of a `SlidingWindowDecoder`, with the arrays needed to
+    decode it and commit its correction.
+
+    Parameters
+    ----------
+    start_round : int
+        First round of the window.
+    commit_end_round : int
+        Round after the last round of the commit region, from which the next
+        window starts.
+    end_round : int
+        Round after the last round of the window.
+    decoder_key : Hashable
+        Key of the decoder of the window, shared by windows with the same
+        relabelled graph.
+    syndrome_columns : npt.NDArray[np.int64]
+        Column of each detector of the window, in the order of the nodes of its
+        decoder, in the syndromes of the rounds of the window joined together.
+    committed : npt.NDArray[np.int64]
+        Indices of the edges of the decoder of the window that are committed.
+    committed_edges : npt.NDArray[np.int64]
+        Index of each committed edge in the edges of the decoding graph.
+    flipped_detectors : npt.NDArray[np.int64]
+        Detectors after the commit region flipped by committed edges.
+    flips : npt.NDArray[np.float32]
+        Array of shape (number of committed edges, number of flipped detectors)
+        of the detectors flipped by each committed edge.
+    logical_flips : npt.NDArray[np.float32]
+        Array of shape (number of committed edges, number of logicals) of the
+        logicals flipped by each committed edge.
+
+    Notes
+    -----
+        Flips are stored as floats so that corrections are multiplied by them with
+        BLAS, which is exact for the number of edges in a window.
+    """
+
+    start_round: int
+    commit_end_round: int
+    end_round: int
+    decoder_key: Hashable
+    syndrome_columns: npt.NDArray[np.int64]
+    committed: npt.NDArray[np.int64]
+    committed_edges: npt.NDArray[np.int64]
+    flipped_detectors: npt.NDArray[np.int64]
+    flips: npt.NDArray[np.float32]
+    logical_flips: npt.NDArray[np.float32]
+
+
+class SlidingWindowDecoder(GraphDecoder[NXDecodingGraph]):
+    """Decoder for long memory experiments that decodes a window of rounds at a
+    time, sliding forwards through the rounds.
+
+    Each window starts with a commit region of `commit_rounds` rounds, followed by
+    a buffer grown by `buffer_rounds` steps through the decoding graph from the
+    commit region and expanded to whole rounds. Edges leaving the window into
+    later rounds are folded into boundary edges, so defects can be matched
+    towards the future. The window is decoded, and the edges of its correction
+    that touch the commit region are committed: the detectors they flip in later
+    rounds are flipped in the syndrome, and the next window starts after the
+    commit region. The last window commits its whole correction.
+
+    Window graphs are built with the windowing utilities of
+    ``deltakit.core.decoding_graphs`` and relabelled contiguously. Windows with
+    the same relabelled graph, such as those in the middle of a memory experiment
+    which are the same up to a shift in time, share one decoder, so only a few
+    decoders are built however many rounds are decoded.
+
+    Parameters
+    ----------
+    decoding_graph : NXDecodingGraph
+        Decoding graph to decode over, where the time of each detector gives its
+        round.
+    logicals : Tuple[OrderedDecodingEdges, ...]
+        Tuple of reference logicals to keep track of, as a collection of decoding
+        edges.
+    commit_rounds : int
+        Number of rounds committed by each window.
+    buffer_rounds : int
+        Number of rounds the buffer of each window is grown by.
+    window_decoder_class : Type[GraphDecoder], optional
+        Class of decoder to decode each window with, which is constructed from a
+        decoding graph and logicals, by default `PyMatchingDecoder`.
+    lvl : int, optional
+        Logging level to use, by default logging.ERROR.
+    """
+
+    name = "SlidingWindow"
+
+    def __init__(self,
+                 decoding_graph: NXDecodingGraph,
+                 logicals: HyperLogicals,
+                 commit_rounds: int,
+                 buffer_rounds: int,
+                 *,
+                 window_decoder_class: type[GraphDecoder] = PyMatchingDecoder,
+                 lvl: int = logging.ERROR):
+        super().__init__(decoding_graph, logicals, lvl)
+        if commit_rounds < 1:
+            msg = f"Number of commit rounds {commit_rounds} must be at least 1."
+            raise ValueError(msg)
+        if buffer_rounds < 0:
+            msg = f"Number of buffer rounds {buffer_rounds} must not be negative."
+            raise ValueError(msg)
+        self.commit_rounds = commit_rounds
+        self.buffer_rounds = buffer_rounds
+        self.window_decoder_class = window_decoder_class
+
+        boundaries = decoding_graph.boundaries
+        self._edge_indices: dict[DecodingHyperEdge, int] = {}
+        edge_data: list[tuple[DecodingHyperEdge, EdgeRecord]] = []
+        for index, (edge, record) in enumerate(decoding_graph.edge_records.items()):
+            hyperedge = DecodingHyperEdge(edge.vertices - boundaries)
+            if hyperedge.vertices and hyperedge not in self._edge_indices:
+                self._edge_indices[hyperedge] = index
+                edge_data.append((hyperedge, record))
+        self._hypergraph = DecodingHyperGraph(edge_data, detector_records={
+            node: (record if isinstance(record, DetectorRecord)
+                   else DetectorRecord.from_dict(record))
+            for node, record in decoding_graph.detector_records.items()
+            if node not in boundaries})
+
+        detectors = np.array(self._hypergraph.nodes, dtype=np.int64)
+        times = np.array([self._hypergraph.detector_records[node].time
+                          for node in self._hypergraph.nodes])
+        round_times, detector_rounds = np.unique(times, return_inverse=True)
+        order = np.argsort(detector_rounds, kind="stable")
+        # Detectors of each round, in the order their syndrome bits are given to
+        # `decode_stream_to_logical_flip`.
+        self.round_detectors: tuple[npt.NDArray[np.int64], ...] = tuple(np.split(
+            detectors[order],
+            np.cumsum(np.bincount(detector_rounds, minlength=len(round_times)))[:-1]))
+        self._round_of = dict(zip(detectors.tolist(), detector_rounds.tolist()))
+        self._column_of = {
+            detector: column
+            for round_detectors in self.round_detectors
+            for column, detector in enumerate(round_detectors.tolist())}
+        self._edges_by_round: list[list[DecodingHyperEdge]] = [
+            [] for _ in self.round_detectors]
+        for edge in self._hypergraph.edges:
+            self._edges_by_round[min(map(self._round_of.__getitem__, edge))].append(
+                edge)
+        self._logical_edges = [set(logical) for logical in logicals]
+        self._windows: dict[int, _Window] = {}
+        self._window_decoders: dict[Hashable, GraphDecoder] = {}
+
+    def __str__(self) -> str:
+        return f"SlidingWindow({self.commit_rounds}, {self.buffer_rounds})"
+
+    @property
+    def num_rounds(self) -> int:
+        """Number of rounds of the decoding graph."""
+        return len(self.round_detectors)
+
+    @property
+    def num_window_decoders(self) -> int:
+        """Number of decoders built so far for the windows."""
+        return len(self._window_decoders)
+
+    @property
+    def _num_detectors(self) -> int:
+        return max(self.decoding_graph.nodes) + 1
+
+    def _window_nodes(self, start_round: int) -> tuple[set[int], int, int]:
+        """Nodes of the window starting at a round, with the round after its
+        commit region and the round after the window."""
+        commit_end_round = start_round + self.commit_rounds
+        if commit_end_round >= self.num_rounds:
+            end_round = self.num_rounds
+        else:
+            commit_nodes = np.concatenate(
+                self.round_detectors[start_round:commit_end_round]).tolist()
+            grown_nodes = nodes_within_radius(self._hypergraph, commit_nodes,
+                                              self.buffer_rounds)
+            end_round = max(commit_end_round,
+                            *map(self._round_of.__getitem__, grown_nodes)) + 1
+            end_round = min(end_round, self.num_rounds)
+        if end_round == self.num_rounds:
+            commit_end_round = end_round
+        nodes = set(np.concatenate(
+            self.round_detectors[start_round:end_round]).tolist())
+        return nodes, commit_end_round, end_round
+
+    def _window_graph(self, start_round: int, end_round: int, nodes: set[int]
+                      ) -> tuple[DecodingHyperGraph, DecodingHyperGraph]:
+        """Graph of the edges from a window to later rounds, and the graph of the
+        window where edges leaving it are folded into boundary edges. Edges to
+        earlier rounds, which are committed, are left out."""
+        edge_records = self._hypergraph.edge_records
+        region_edges = [(edge, edge_records[edge])
+                        for edges in self._edges_by_round[start_round:end_round]
+                        for edge in edges]
+        region_nodes = nodes.union(*(edge.vertices for edge, _ in region_edges))
+        region = DecodingHyperGraph(region_edges, detector_records={
+            node: self._hypergraph.detector_records[node] for node in region_nodes})
+        return region, connect_dangling_to_boundary_hypergraph(
+            region, induce_subhypergraph(region, nodes))
+
+    def _window_decoder(self, key: Hashable, window_graph: DecodingHyperGraph
+                        ) -> GraphDecoder:
+        if (decoder := self._window_decoders.get(key)) is None:
+            with warnings.catch_warnings():
+                # Logicals are tracked by this decoder from the committed edges.
+                warnings.filterwarnings("ignore", "No logicals are given")
+                decoder = self.window_decoder_class(
+                    window_graph.to_nx_decoding_graph(), ())
+            self._window_decoders[key] = decoder
+        return decoder
+
+    def _window(self, start_round: int) -> _Window:
+        """Window starting at a round, which is built on first use."""
+        if (window := self._windows.get(start_round)) is not None:
+            return window
+        nodes, commit_end_round, end_round = self._window_nodes(start_round)
+        region, window_graph = self._window_graph(start_round, end_round, nodes)
+        relabelled_graph, node_mapping = relabel_hypergraph_nodes_contiguously(
+            window_graph)
+        key = (len(node_mapping), tuple(sorted(
+            (tuple(sorted(edge.vertices)), record.p_err)
+            for edge, record in relabelled_graph.edge_records.items())))
+        decoder = self._window_decoder(key, relabelled_graph)
+        window_nodes = sorted(node_mapping, key=node_mapping.__getitem__)
+
+        committed, committed_edges, flipped = [], [], []
+        for index, edge in enumerate(decoder.decoding_graph.edges):
+            vertices = {window_nodes[node] for node in edge
+                        if node not in decoder.decoding_graph.boundaries}
+            if all(self._round_of[node] >= commit_end_round for node in vertices):
+                continue
+            hyperedge = DecodingHyperEdge(vertices)
+            if hyperedge not in self._edge_indices:
+                # A boundary edge folded from edges leaving the window, which is
+                # committed as the most likely of them.
+                hyperedge = max((edge for edge in region.incident_edges(
+                    next(iter(vertices))) if not edge.vertices <= nodes),
+                    key=lambda edge: region.edge_records[edge].p_err)
+            committed.append(index)
+            committed_edges.append(self._edge_indices[hyperedge])
+            flipped.append([node for node in hyperedge
+                            if self._round_of[node] >= commit_end_round])
+
+        flipped_detectors = np.array(sorted(set().union(*flipped)), dtype=np.int64)
+        flips = np.zeros((len(committed), len(flipped_detectors)), dtype=np.float32)
+        for row, nodes_flipped in enumerate(flipped):
+            flips[row, np.searchsorted(flipped_detectors, nodes_flipped)] = 1
+        decoding_graph_edges = self.decoding_graph.edges
+        logical_flips = np.array(
+            [[decoding_graph_edges[edge] in logical for logical in self._logical_edges]
+             for edge in committed_edges],
+            dtype=np.float32).reshape(len(committed), len(self._logical_edges))
+        round_starts = np.cumsum([0, *map(len, self.round_detectors[
+            start_round:end_round])])
+        syndrome_columns = np.array(
+            [round_starts[self._round_of[node] - start_round] + self._column_of[node]
+             for node in window_nodes], dtype=np.int64)
+
+        window = _Window(
+            start_round=start_round,
+            commit_end_round=commit_end_round,
+            end_round=end_round,
+            decoder_key=key,
+            syndrome_columns=syndrome_columns,
+            committed=np.array(committed, dtype=np.int64),
+            committed_edges=np.array(committed_edges, dtype=np.int64),
+            flipped_detectors=flipped_detectors,
+            flips=flips,
+            logical_flips=logical_flips)
+        self._windows[start_round] = window
+        return window
+
+    def _decode_windows(self, syndrome_rounds: Iterable[npt.ArrayLike]
+                        ) -> Iterator[tuple[_Window, npt.NDArray[np.uint8]]]:
+        """Decode a stream of the syndromes of each round, yielding each window
+        with its committed correction of shape (number of shots, number of
+        committed edges) as soon as its rounds have been read. Only the syndromes
+        of the rounds of the current window are held."""
+        syndrome_rounds = iter(syndrome_rounds)
+        received: dict[int, npt.NDArray[np.uint8]] = {}
+        pending: dict[int, npt.NDArray[np.uint8]] = {}
+        num_read = 0
+        start_round = 0
+        while start_round < self.num_rounds:
+            window = self._window(start_round)
+            for round_index in range(num_read, window.end_round):
+                try:
+                    syndrome = next(syndrome_rounds)
+                except StopIteration:
+                    msg = (f"Syndrome stream ended after {round_index} rounds, "
+                           f"but the decoding graph has {self.num_rounds} rounds.")
+                    raise ValueError(msg) from None
+                syndrome = np.array(syndrome, dtype=np.uint8, ndmin=2)
+                if round_index in pending:
+                    syndrome ^= pending.pop(round_index)
+                received[round_index] = syndrome
+            num_read = max(num_read, window.end_round)
+
+            decoder = self._window_decoders[window.decoder_key]
+            window_syndrome = np.concatenate(
+                [received[round_index]
+                 for round_index in range(start_round, window.end_round)],
+                axis=1)[:, window.syndrome_columns]
+            num_nodes = max(decoder.decoding_graph.nodes, default=-1) + 1
+            window_syndrome = np.pad(
+                window_syndrome, ((0, 0), (0, num_nodes - window_syndrome.shape[1])))
+            correction = decoder.decode_batch_to_full_correction(
+                window_syndrome)[:, window.committed].astype(np.uint8)
+
+            flips = (correction.astype(np.float32) @ window.flips % 2).astype(np.uint8)
+            for detector, detector_flips in zip(window.flipped_detectors.tolist(),
+                                                flips.T):
+                round_index = self._round_of[detector]
+                if round_index in received:
+                    round_syndrome = received[round_index]
+                else:
+                    round_syndrome = pending.setdefault(round_index, np.zeros(
+                        (len(correction), len(self.round_detectors[round_index])),
+                        dtype=np.uint8))
+                round_syndrome[:, self._column_of[detector]] ^= detector_flips
+            yield window, correction
+
+            for round_index in range(start_round, window.commit_end_round):
+                received.pop(round_index, None)
+            start_round = window.commit_end_round
+
+    def _split_rounds(self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
+                      ) -> Iterator[npt.NDArray[np.uint8]]:
+        syndrome_batch = np.asarray(syndrome_batch)
+        for detectors in self.round_detectors:
+            yield syndrome_batch[:, detectors]
+
+    def decode_stream_to_logical_flip(
+        self, syndrome_rounds: Iterable[npt.NDArray[np.uint8]]
+    ) -> npt.NDArray[np.uint8]:
+        """Decode a stream of the syndromes of each round to logical flips. Each
+        window is decoded as soon as the syndromes of its rounds are read, and only
+        the syndromes of the rounds of the current window are held, so memory and
+        latency per round are bounded however many rounds there are.
+
+        Parameters
+        ----------
+        syndrome_rounds : Iterable[npt.NDArray[np.uint8]]
+            Syndromes of each round in order, as arrays of shape (number of shots,
+            number of detectors in the round) with the detectors of each round
+            ordered as in `round_detectors`.
+
+        Returns
+        -------
+        npt.NDArray[np.uint8]
+            2D Array indicating logical flips of shape (number of shots, number
+            of logicals).
+
+        Raises
+        ------
+        ValueError
+            If the stream ends before all rounds are read, or if no windows are
+            decoded, in which case the number of shots is unknown.
+        """
+        logical_flips = None
+        for window, correction in self._decode_windows(syndrome_rounds):
+            window_flips = (correction.astype(np.float32) @ window.logical_flips
+                            % 2).astype(np.uint8)
+            if logical_flips is None:
+                logical_flips = window_flips
+            else:
+                logical_flips ^= window_flips
+        if logical_flips is None:
+            msg = "Syndrome stream gave no windows to decode."
+            raise ValueError(msg)
+        return logical_flips
+
+    def decode_batch_to_logical_flip(
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
+    ) -> npt.NDArray[np.uint8]:
+        return self.decode_stream_to_logical_flip(self._split_rounds(syndrome_batch))
+
+    def decode_batch_to_full_correction(
+        self, syndrome_batch: npt.NDArray[np.uint8] | SyndromeBatch
+    ) -> npt.NDArray[np.uint8]:
+        corrections = np.zeros((len(syndrome_batch), len(self.decoding_graph.edges)),
+                               dtype=np.uint8)
+        for window, correction in self._decode_windows(
+                self._split_rounds(syndrome_batch)):
+            corrections[:, window.committed_edges] ^= correction
+        return corrections
+
+    def decode_to_logical_flip(self, syndrome: OrderedSyndrome) -> tuple[bool, ...]:
+        logical_flips = self.decode_batch_to_logical_flip(
+            np.array([syndrome.as_bitstring(self._num_detectors)], dtype=np.uint8))
+        return tuple(bool(flip) for flip in logical_flips[0])
+
+    def decode_to_full_correction(
+            self, syndrome: OrderedSyndrome) -> OrderedDecodingEdges:
+        correction = self.decode_batch_to_full_correction(
+            np.array([syndrome.as_bitstring(self._num_detectors)], dtype=np.uint8))
+        return OrderedDecodingEdges(
+            [self.decoding_graph.edges[i] for i in np.nonzero(correction[0])[0]])
@@ -9,11 +9,18 @@ from deltakit_decode.analysis._decoding_circuits import run_decoding_on_circuit
 from deltakit_decode.analysis._empirical_decoding_error_distribution import (
     EmpiricalDecodingErrorDistribution,
 )
+from deltakit_decode.analysis._importance_sampling import (
+    ImportanceSamplingAnalysisEngine,
+    ImportanceSamplingComponent,
+    ImportanceSamplingEstimate,
+)
 from deltakit_decode.analysis._matching_decoder_managers import (
     B8DecoderManager,
     GraphDecoderManager,
     StimDecoderManager,
+    StimMultiDecoderManager,
 )
+from deltakit_decode.analysis._pipeline_profiler import PipelineProfiler
 from deltakit_decode.analysis._run_all_analysis_engine import RunAllAnalysisEngine
 
 # List only public members in `__all__`.
@@ -1,7 +1,10 @@
 # (c) Copyright Riverlane 2020-2025.
 from __future__ import annotations
 
+import hashlib
+import os
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from collections.abc import Iterable, Iterator
 from contextlib import ExitStack
 from functools import cached_property, partial
@@ -10,12 +13,18 @@ from typing import Any, Generic, TypeVar
 from uuid import UUID, uuid4
 from warnings import warn
 
+import dill
 from typing_extensions import override
 
 from deltakit_decode._base_reporter import BaseReporter
 from deltakit_decode.analysis._empirical_decoding_error_distribution import (
     EmpiricalDecodingErrorDistribution,
 )
+from deltakit_decode.analysis._pipeline_profiler import (
+    PipelineProfiler,
+    nbytes_of,
+    profile_stage,
+)
 from deltakit_decode.noise_sources._generic_noise_sources import (
     BatchErrorGenerator,
     MonteCarloNoise,
@@ -29,7 +38,41 @@ CorrectionT = TypeVar('CorrectionT')
 BatchErrorT = TypeVar('BatchErrorT')
 BatchCorrectionT = TypeVar('BatchCorrectionT')
 
-mp_dm: DecoderManager | None = None  # pylint: disable=global-statement
+# Decoder managers set up in this process, keyed by their state token. Only the most
+# recently used are kept so that long-lived pools do not accumulate state.
+mp_dms: OrderedDict[UUID, DecoderManager] = OrderedDict()
+MAX_CACHED_PROCESS_MANAGERS = 4
+
+# Results of a worker process, to be merged into the decoder manager of the main process.
+ProcessResults = tuple[EmpiricalDecodingErrorDistribution, list[BaseReporter],
+                       PipelineProfiler | None]
+
+# Attributes that do not affect the work done in worker processes, so are not part of
+# the content hash used to identify cached worker state. This includes error generators
+# cached by the main process, which workers reset and build for themselves.
+_PROCESS_INDEPENDENT_ATTRIBUTES = frozenset({
+    "_mp_token", "_empirical_decoding_error_distribution", "metadata",
+    "batch_error_generator", "error_generator", "_shared_generator",
+    "_logical_edge_indices",
+})
+
+# Attributes that change between runs without changing the decoding problem, such as
+# seeds and reporters. They are not part of the content hash, and are instead sent to
+# worker processes with each task.
+_PROCESS_RUN_ATTRIBUTES = frozenset({
+    "reporters", "profiler", "batch_size", "_seed", "_start_seed", "_next_shot",
+    "_decoder_reporters",
+})
+
+# Workers are probed for cached state in rounds of this many tasks per worker, as tasks
+# are not assigned to particular workers, until each worker has answered or the
+# maximum number of rounds is reached.
+_PROBES_PER_WORKER = 4
+_MAX_PROBE_ROUNDS = 16
+
+
+# Marks the end of the errors of an error generator.
+_END_OF_ERRORS = object()
 
 
 class DecoderManager(ABC):
@@ -56,6 +99,13 @@ class DecoderManager(ABC):
     number_of_observables: int
         The number of observables to track decoding statistics on, by default 1
         which defines the experiment shot/fail counters.
+
+    Attributes
+    ----------
+    profiler : Optional[PipelineProfiler]
+        Profiler to record the time spent in each stage of running shots, including
+        in worker processes, by default None which records nothing. Its results are
+        included in `get_reporter_results`.
     """
 
     def __init__(self,
@@ -69,8 +119,16 @@ class DecoderManager(ABC):
         self._number_of_observables = number_of_observables
         self._empirical_decoding_error_distribution = EmpiricalDecodingErrorDistribution(
             self._number_of_observables)
+        self.profiler: PipelineProfiler | None = None
         self._generate_mp_token()
 
+    @property
+    def _reporters_support_batches(self) -> bool:
+        """Whether all reporters support batches of shots, so that shots can be
+        decoded in batches.
+        """
+        return all(reporter.supports_batches for reporter in self.reporters)
+
     @abstractmethod
     def run_single_shot(self) -> bool:
         """Run a single shot of decoding. Return True if the decoding shot is deemed
@@ -86,8 +144,10 @@ class DecoderManager(ABC):
     def _setup_process(self):
         """Update state/data of process to this decoder manager.
         """
-        global mp_dm  # pylint: disable=global-statement
-        mp_dm = self
+        mp_dms[self._mp_token] = self
+        mp_dms.move_to_end(self._mp_token)
+        while len(mp_dms) > MAX_CACHED_PROCESS_MANAGERS:
+            mp_dms.popitem(last=False)
 
     def _generate_mp_token(self):
         """Generate token used for batch parallelisation. This token is used to verify
@@ -96,7 +156,27 @@ class DecoderManager(ABC):
         """
         self._mp_token = uuid4()
 
-    def configure_pool(self, pool, total_processes: int):
+    def _generate_content_mp_token(self):
+        """Generate a token for batch parallelisation from a hash of the decoding
+        problem of this decoder manager, such as its circuit, noise model and
+        decoders. Decoder managers with the same decoding problem share a token, so
+        worker state set up for one can be reused by the other.
+        """
+        decoding_content = {
+            key: value for key, value in self.__dict__.items()
+            if key not in _PROCESS_INDEPENDENT_ATTRIBUTES | _PROCESS_RUN_ATTRIBUTES}
+        digest = hashlib.sha256(
+            dill.dumps((type(self).__qualname__, decoding_content))).digest()
+        self._mp_token = UUID(bytes=digest[:16])
+
+    def _process_run_state(self) -> dict[str, Any]:
+        """State of this decoder manager that is sent to worker processes with each
+        task, as it may differ from that of a decoder manager with the same token.
+        """
+        return {key: value for key, value in self.__dict__.items()
+                if key in _PROCESS_RUN_ATTRIBUTES}
+
+    def configure_pool(self, pool, total_processes: int, cache_state: bool = False):
         """Configure pool workers to state of this decoder manager.
 
         Parameters
@@ -106,11 +186,51 @@ class DecoderManager(ABC):
         pool : pathos.multiprocessing.ProcessPool
             Pathos pool to use to run shots in parallel. Assumed given pool is already
             configured with decoder manager data.
-
+        cache_state : bool, optional
+            If True, identify the worker state by a hash of its decoding problem and
+            skip sending it to the workers if each of them already holds state for the
+            same decoding problem, for example from an earlier call to
+            `prepare_pool`. By default False, in which case the workers are always
+            sent new state.
         """
-        self._generate_mp_token()
+        if cache_state:
+            self._generate_content_mp_token()
+            # Probe until each worker has answered, and set up all workers if any
+            # has not.
+            has_manager: dict[int, bool] = {}
+            for _ in range(_MAX_PROBE_ROUNDS):
+                has_manager.update(pool.map(
+                    partial(_has_process_manager, self._mp_token),
+                    range(_PROBES_PER_WORKER * total_processes)))
+                if len(has_manager) >= total_processes:
+                    break
+            if len(has_manager) >= total_processes and all(has_manager.values()):
+                return
+        else:
+            self._generate_mp_token()
         pool.map(lambda _: self._setup_process(), range(total_processes))
 
+    def prepare_pool(self, pool, total_processes: int):
+        """Start sending the state of this decoder manager to pool workers, without
+        waiting for it to arrive. This allows the set up of one decoder manager to
+        overlap with another decoding in the same pool. Call `configure_pool` with
+        `cache_state=True` to use the prepared state.
+
+        Parameters
+        ----------
+        total_processes : int
+            The total number of processes within the pool.
+        pool : pathos.multiprocessing.ProcessPool
+            Pathos pool to use to run shots in parallel.
+
+        Returns
+        -------
+        multiprocess.pool.MapResult
+            Result that can be waited on until the workers are prepared.
+        """
+        self._generate_content_mp_token()
+        return pool.amap(lambda _: self._setup_process(), range(total_processes))
+
     @staticmethod
     def clear_pool_manager(pool, total_processes: int):
         """Configure pool workers to state of this decoder manager.
@@ -126,6 +246,20 @@ class DecoderManager(ABC):
         """
         pool.map(lambda _: _clear_process_global_memory(), range(total_processes))
 
+    def remove_from_pool(self, pool, total_processes: int):
+        """Remove the state of this decoder manager from pool workers, leaving the
+        state of any other decoder managers set up in them.
+
+        Parameters
+        ----------
+        total_processes : int
+            The total number of processes within the pool.
+        pool : pathos.multiprocessing.ProcessPool
+            Pathos pool the decoder manager was configured in.
+        """
+        pool.map(partial(_remove_process_manager, self._mp_token),
+                 range(total_processes))
+
     @abstractmethod
     def run_batch_shots_parallel(self,
                                  batch_limit: int | None,
@@ -176,6 +310,28 @@ class DecoderManager(ABC):
         """
         return self.run_batch_shots(batch_limit=batch_limit)
 
+    def _process_results(self) -> ProcessResults:
+        """Get the results of running shots in a worker process, after timing how
+        long they take to pickle if profiling.
+        """
+        results = (self._empirical_decoding_error_distribution, self.reporters,
+                   self.profiler)
+        if self.profiler is not None:
+            with self.profiler.stage("serialisation") as timing:
+                timing.nbytes = len(dill.dumps(results))
+        return results
+
+    def _merge_process_results(self, results: Iterable[ProcessResults]):
+        """Add the results of worker processes to this decoder manager.
+        """
+        with profile_stage(self.profiler, "merge"):
+            for distribution, reporters, profiler in results:
+                self._empirical_decoding_error_distribution += distribution
+                for i, reporter in enumerate(reporters):
+                    self.reporters[i] += reporter
+                if self.profiler is not None and profiler is not None:
+                    self.profiler += profiler
+
     def get_reporter_results(self) -> dict[str, Any]:
         """Get aggregated data from the manager's internal state and all available
         reporters as a dict from string of data identifier to data.
@@ -197,16 +353,55 @@ class DecoderManager(ABC):
                          "using the same key. Only the first reporter information will "
                          "be included in the returned results.",
                          stacklevel=2)
+        if self.profiler is not None:
+            analysis_results.update(self.profiler.get_reported_results())
 
         return analysis_results
 
     def reset(self):
         """Reset all reporters and their aggregations. Reset empirical
-        decoding error distribution.
+        decoding error distribution and the profiler.
         """
         for reporter in self.reporters:
             reporter.reset_reporter()
         self._empirical_decoding_error_distribution.reset()
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    def get_checkpoint(self) -> tuple[EmpiricalDecodingErrorDistribution,
+                                      list[BaseReporter]]:
+        """Get the progress of this decoder manager since the last reset, so that it
+        can later be resumed with `restore_checkpoint`.
+
+        Returns
+        -------
+        Tuple[EmpiricalDecodingErrorDistribution, List[BaseReporter]]
+            The empirical decoding error distribution and the reporters.
+        """
+        return self._empirical_decoding_error_distribution, self.reporters
+
+    def restore_checkpoint(self,
+                           distribution: EmpiricalDecodingErrorDistribution,
+                           reporters: list[BaseReporter]):
+        """Reset this decoder manager and restore progress from a checkpoint
+        returned by `get_checkpoint`, so that later shots continue from it.
+
+        Parameters
+        ----------
+        distribution : EmpiricalDecodingErrorDistribution
+            Empirical decoding error distribution of the checkpoint.
+        reporters : List[BaseReporter]
+            Reporters of the checkpoint, in the same order as this decoder
+            manager's reporters.
+        """
+        if len(reporters) != len(self.reporters):
+            msg = (f"Checkpoint has {len(reporters)} reporters but decoder "
+                   f"manager has {len(self.reporters)} reporters.")
+            raise ValueError(msg)
+        self.reset()
+        self._empirical_decoding_error_distribution += distribution
+        for i, reporter in enumerate(reporters):
+            self.reporters[i] += reporter
 
     @property
     def shots(self) -> int:
@@ -238,21 +433,47 @@ class InvalidGlobalManagerStateError(ValueError):
 def _clear_process_global_memory():
     """Clear process decoder manager data in globals memory.
     """
-    global mp_dm  # pylint: disable=global-statement
-    mp_dm = None
+    mp_dms.clear()
 
 
-def _run_process(state_token: UUID, batch_limit: int | None, jobs: int, job_no: int
-                 ) -> tuple[EmpiricalDecodingErrorDistribution,
-                            list[BaseReporter]]:
+def _remove_process_manager(state_token: UUID, _job_no: int):
+    """Remove the decoder manager with the given token from this process, if it is
+    set up.
+    """
+    mp_dms.pop(state_token, None)
+
+
+def _has_process_manager(state_token: UUID, _job_no: int) -> tuple[int, bool]:
+    """Return the ID of this process and whether a decoder manager with the given
+    token is set up in it.
+    """
+    return os.getpid(), state_token in mp_dms
+
+
+def _get_process_manager(state_token: UUID, run_state: dict[str, Any]
+                         ) -> DecoderManager:
+    """Get the decoder manager with the given token that is set up in this process,
+    updated with the run state of the decoder manager in the main process.
+    """
+    try:
+        decoder_manager = mp_dms[state_token]
+    except KeyError:
+        msg = "Process state not configured with decoder manager."
+        raise InvalidGlobalManagerStateError(msg) from None
+    mp_dms.move_to_end(state_token)
+    decoder_manager.__dict__.update(run_state)
+    return decoder_manager
+
+
+def _run_process(state_token: UUID, run_state: dict[str, Any], batch_limit: int | None,
+                 jobs: int, job_no: int) -> ProcessResults:
     """Run process with persistent decoder manager object stored in process
     globals memory.
     """
-    if isinstance(mp_dm, NoiseModelDecoderManager):
-        result = mp_dm._thread_worker(state_token,  # pylint: disable=protected-access
-                                      batch_limit,
-                                      jobs,
-                                      job_no)
+    decoder_manager = _get_process_manager(state_token, run_state)
+    if isinstance(decoder_manager, NoiseModelDecoderManager):
+        result = decoder_manager._thread_worker(  # pylint: disable=protected-access
+            state_token, batch_limit, jobs, job_no)
     else:
         msg = "Process state not configured with decoder manager."
         raise InvalidGlobalManagerStateError(msg)
@@ -298,9 +519,15 @@ class NoiseModelDecoderManager(DecoderManager,
         self._seed = seed
         self._start_seed = seed
 
+    @property
+    def _shot_reporters(self) -> list[BaseReporter]:
+        """Reporters that are entered around the decoding of each shot.
+        """
+        return self.reporters
+
     def run_single_shot(self) -> bool:
         with ExitStack() as stack:
-            for reporter in self.reporters:
+            for reporter in self._shot_reporters:
                 stack.enter_context(reporter)
             error = self.generate_single_error()
             correction = self._decode_from_error(error)
@@ -320,9 +547,15 @@ class NoiseModelDecoderManager(DecoderManager,
             )
             raise ValueError(msg)
 
-        for error in error_generator:
+        errors = iter(error_generator)
+        while True:
+            with profile_stage(self.profiler, "sampling") as timing:
+                error = next(errors, _END_OF_ERRORS)
+                timing.shots = int(error is not _END_OF_ERRORS)
+            if error is _END_OF_ERRORS:
+                break
             with ExitStack() as stack:
-                for reporter in self.reporters:
+                for reporter in self._shot_reporters:
                     stack.enter_context(reporter)
                 correction = self._decode_from_error(error)
                 self._analyse_correction(error, correction)
@@ -330,9 +563,10 @@ class NoiseModelDecoderManager(DecoderManager,
     def _exec_shots_batch(self,
                           batch_error_generator: BatchErrorGenerator,
                           batch_limit: int):
-        """Executes batches of shots."""
-        if self.reporters:
-            msg = "Can not run batches with reporters!"
+        """Executes batches of shots, with reporters run around the decoding of
+        each batch."""
+        if not self._reporters_support_batches:
+            msg = "Can not run batches with reporters that do not support batches!"
             raise ValueError(msg)
 
         batch_num = int(batch_limit // self.batch_size)
@@ -343,8 +577,13 @@ class NoiseModelDecoderManager(DecoderManager,
             batch_sizes.append(remaining_shots)
 
         for batch_size in batch_sizes:
-            error = batch_error_generator(batch_size)
-            self._decode_batch_from_error(error)
+            with profile_stage(self.profiler, "sampling", batch_size) as timing:
+                error = batch_error_generator(batch_size)
+                timing.nbytes = nbytes_of(error)
+            with ExitStack() as stack:
+                for reporter in self._shot_reporters:
+                    stack.enter_context(reporter.batch(batch_size))
+                self._decode_batch_from_error(error)
 
     def reset(self):
         self._seed = self._start_seed
@@ -352,6 +591,16 @@ class NoiseModelDecoderManager(DecoderManager,
         self.__dict__.pop('error_generator', None)
         super().reset()
 
+    def restore_checkpoint(self,
+                           distribution: EmpiricalDecodingErrorDistribution,
+                           reporters: list[BaseReporter]):
+        super().restore_checkpoint(distribution, reporters)
+        if self._seed is not None:
+            # Move on from the start seed, which worker processes reset to, so that
+            # resumed shots do not repeat those in the checkpoint.
+            self._start_seed += self.shots
+            self._seed = self._start_seed
+
     @cached_property
     def batch_error_generator(self) -> BatchErrorGenerator:
         """Gets and caches batch error generator given the code data."""
@@ -365,7 +614,8 @@ class NoiseModelDecoderManager(DecoderManager,
             self._get_code_data(), seed=self._seed)
 
     def run_batch_shots(self, batch_limit: int | None) -> tuple[int, int]:
-        if batch_limit is not None and batch_limit > 1 and not self.reporters:
+        if batch_limit is not None and batch_limit > 1 and \
+                self._reporters_support_batches:
             self._exec_shots_batch(self.batch_error_generator, batch_limit)
         else:
             self._exec_shots_atomic(self.error_generator, batch_limit)
@@ -395,19 +645,18 @@ class NoiseModelDecoderManager(DecoderManager,
         # Attempt to run batches in parallel. If the pool has caused a process to lose
         # the decoder manager in its globals memory, then reinitialise processes with
         # the decoder manager object and run batches in the same process call.
-        try:
-            partial_worker = partial(_run_process, self._mp_token,
-                                     inner_batch_limit, processes)
-            results = pool.map(partial_worker, range(processes))
-        except InvalidGlobalManagerStateError:
-            partial_worker = partial(self._setup_and_run_process,
-                                     inner_batch_limit, processes)
-            results = pool.map(partial_worker, range(processes))
-
-        for (distr, reporters) in results:
-            self._empirical_decoding_error_distribution += distr
-            for i, reporter in enumerate(reporters):
-                self.reporters[i] += reporter
+        with profile_stage(self.profiler, "parallel_map", task_num):
+            try:
+                partial_worker = partial(_run_process, self._mp_token,
+                                         self._process_run_state(),
+                                         inner_batch_limit, processes)
+                results = pool.map(partial_worker, range(processes))
+            except InvalidGlobalManagerStateError:
+                partial_worker = partial(self._setup_and_run_process,
+                                         inner_batch_limit, processes)
+                results = pool.map(partial_worker, range(processes))
+
+        self._merge_process_results(results)
         if self._seed is not None:
             self._seed += hash(NoiseModelDecoderManager)
         return self.shots, self.fails
@@ -425,36 +674,33 @@ class NoiseModelDecoderManager(DecoderManager,
         return next(self._shared_generator)
 
     def _setup_and_run_process(self, batch_limit: int | None, jobs: int, job_no: int
-                               ) -> tuple[EmpiricalDecodingErrorDistribution,
-                                          list[BaseReporter]]:
+                               ) -> ProcessResults:
         """Setup process globals memory with manager and run thread worker.
         """
-        global mp_dm  # pylint: disable=global-statement
-        mp_dm = self  # pylint: disable=global-statement
+        self._setup_process()
         if job_no < jobs:
             result = self._thread_worker(self._mp_token,
                                          batch_limit,
                                          jobs,
                                          job_no)  # pylint: disable=protected-access
         else:
-            # if job_no surpasses requested number of jobs return empty distribution
-            self.empirical_decoding_error_distribution.reset()
-            result = self._empirical_decoding_error_distribution, self.reporters
+            # if job_no surpasses requested number of jobs return empty results
+            self.reset()
+            result = self._process_results()
         return result
 
     def _thread_worker(self,
                        state_token,
                        batch_limit: int | None,
                        jobs: int, job_no: int
-                       ) -> tuple[EmpiricalDecodingErrorDistribution,
-                                  list[BaseReporter]]:
+                       ) -> ProcessResults:
         if state_token != self._mp_token:
             msg = "Worker decoder manager global has invalid token."
             raise InvalidGlobalManagerStateError(msg)
         self.reset()
 
         seed = self._seed if self._seed is None else self._seed + job_no
-        if batch_limit is not None and not self.reporters:
+        if batch_limit is not None and self._reporters_support_batches:
             batch_error_generator: BatchErrorGenerator
             batch_error_generator, _ = (
                 self._noise_model.build_split_batch_error_generators(
@@ -466,7 +712,7 @@ class NoiseModelDecoderManager(DecoderManager,
                 self._get_code_data(), num_splits=jobs, seed=seed)[job_no]
             self._exec_shots_atomic(error_generator, batch_limit)
 
-        return self._empirical_decoding_error_distribution, self.reporters
+        return self._process_results()
 
     @abstractmethod
     def _get_code_data(self) -> CodeDataT:
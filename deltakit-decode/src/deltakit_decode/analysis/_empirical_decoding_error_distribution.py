@@ -13,7 +13,7 @@ class EmpiricalDecodingErrorDistribution:
     """Data structure for storing data related to decoding events. Stores the
     distribution of failures over logicals. Failures can be represented as integers
     or boolean tuples assumed to be in little endian form, i.e. the lsb is
-    the first item in the tuple.
+    the first item in the tuple. Counts are stored as 64-bit integers.
 
     Parameters
     ----------
@@ -27,8 +27,8 @@ class EmpiricalDecodingErrorDistribution:
         self._distribution_size = 1 << number_of_logicals
         self._shots = 0
         self._fails = 0
-        self._fails_per_logical = np.zeros(number_of_logicals, dtype=np.int32)
-        self._error_distribution = np.zeros(self._distribution_size, dtype=np.uint32)
+        self._fails_per_logical = np.zeros(number_of_logicals, dtype=np.int64)
+        self._error_distribution = np.zeros(self._distribution_size, dtype=np.uint64)
 
     def add_event(self, event: tuple[bool, ...], frequency: int = 1):
         """Adds given tuple to error disitrubtion.
@@ -75,23 +75,20 @@ class EmpiricalDecodingErrorDistribution:
             The target logical flips. True if the homology
             class is 1 (flipped), False if the homology class is 0 (not flipped).
         """
-        logical_parity = sum((1 << i) * int(l_error ^ l_correction)
-                             for i, (l_error, l_correction) in
-                             enumerate(zip(correction, target)))
-        self._error_distribution[logical_parity] += 1
-        self._shots += 1
-        self._fails += int(correction != target)
+        self.add_event(tuple(bool(l_correction ^ l_target) for l_correction, l_target
+                             in zip(correction, target, strict=True)))
 
     def reset(self):
         """Resets all data to empty distribution.
         """
         self._shots = 0
         self._fails = 0
-        self._fails_per_logical = np.zeros(self._number_of_logicals, dtype=np.int32)
-        self._error_distribution = np.zeros(self._distribution_size, dtype=np.uint32)
+        self._fails_per_logical = np.zeros(self._number_of_logicals, dtype=np.int64)
+        self._error_distribution = np.zeros(self._distribution_size, dtype=np.uint64)
 
     def batch_record_errors(self, corrections: npt.NDArray[np.uint8],
-                            target: npt.NDArray[np.uint8]):
+                            target: npt.NDArray[np.uint8],
+                            bit_packed: bool = False):
         """Computes and adds a batch of error events based on batches
         of predicted and target values of the logicals.
 
@@ -99,33 +96,46 @@ class EmpiricalDecodingErrorDistribution:
         ----------
         corrections :  npt.NDArray[np.uint8]
             2D Array indicating predicted corrections of shape
-            (number of shots, number of edges). Each element is a 1
+            (number of shots, number of logicals). Each element is a 1
             or 0. prediction of each logical from the decoder.
 
         target :  npt.NDArray[np.uint8]
             2D Array indicating target homolgies of shape
-            (number of shots, number of edges). Each element is a 1
+            (number of shots, number of logicals). Each element is a 1
             or 0.
-        """
-        batch_size, num_observables = corrections.shape
-        logicals_xor = corrections ^ target
-        logical_parities = np.zeros(batch_size, dtype=np.int32)
-        for col in range(num_observables):
-            logical_parities += (1 << col) * logicals_xor[:, col]
-        np.add.at(self._error_distribution, logical_parities, 1)
 
-        fails = np.sum(
-            np.any(corrections != target, axis=1)
-        ).astype(np.int_)
+        bit_packed : bool, optional
+            If True, `corrections` and `target` are instead bit-packed, of shape
+            (number of shots, ceil(number of logicals / 8)), with the logicals in
+            little endian order within each byte. This is the format of
+            observable flips sampled from stim with `bit_packed=True`. By default
+            False.
+        """
+        logicals_xor = np.bitwise_xor(np.asarray(corrections, dtype=np.uint8),
+                                      np.asarray(target, dtype=np.uint8))
+        batch_size = logicals_xor.shape[0]
+        if bit_packed:
+            packed_xor = logicals_xor
+            if self._number_of_logicals % 8:
+                # Padding bits in the last byte are not logicals.
+                packed_xor[:, -1] &= (1 << (self._number_of_logicals % 8)) - 1
+            logicals_xor = np.unpackbits(packed_xor, axis=1,
+                                         count=self._number_of_logicals,
+                                         bitorder="little")
+        else:
+            packed_xor = np.packbits(logicals_xor.astype(np.bool_), axis=1,
+                                     bitorder="little")
+        byte_weights = np.left_shift(np.uint64(1), 8 * np.arange(packed_xor.shape[1],
+                                                                 dtype=np.uint64))
+        logical_parities = packed_xor.astype(np.uint64) @ byte_weights
+        counts = np.bincount(logical_parities.astype(np.intp),
+                             minlength=self._distribution_size)
+        self._error_distribution += counts.astype(np.uint64)
 
         self._shots += batch_size
-        self._fails += fails
-
-        batch_fails_per_observable = np.sum(
-            corrections != target, axis=0
-        ).astype(np.int_)
-
-        self._fails_per_logical += batch_fails_per_observable
+        self._fails += batch_size - int(counts[0])
+        self._fails_per_logical += logicals_xor.astype(np.bool_).sum(
+            axis=0, dtype=np.int64)
 
     def __add__(self,
                 other: EmpiricalDecodingErrorDistribution
@@ -133,8 +143,12 @@ class EmpiricalDecodingErrorDistribution:
         if (isinstance(other, EmpiricalDecodingErrorDistribution)
                 and self._number_of_logicals == other.number_of_logicals):
             sum_distr = EmpiricalDecodingErrorDistribution(self._number_of_logicals)
-            for event in product((False, True), repeat=self._number_of_logicals):
-                sum_distr.add_event(event, self[event] + other[event])
+            sum_distr._error_distribution = (self._error_distribution
+                                             + other._error_distribution)
+            sum_distr._shots = self._shots + other.shots
+            sum_distr._fails = self._fails + other.fails
+            sum_distr._fails_per_logical = (self._fails_per_logical
+                                            + other.fails_per_logical)
             return sum_distr
         return NotImplemented
 
@@ -246,7 +260,7 @@ class EmpiricalDecodingErrorDistribution:
         return self._fails
 
     @property
-    def fails_per_logical(self) -> npt.NDArray[np.int32]:
+    def fails_per_logical(self) -> npt.NDArray[np.int64]:
         """Numpy array of failure occurrences on each logical.
         """
         return self._fails_per_logical
@@ -0,0 +1,300 @@
+# (c) Copyright Riverlane 2020-2025.
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from statistics import NormalDist
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+from deltakit_core.decoding_graphs import HyperMultiGraph
+
+from deltakit_decode._abstract_matching_decoders import GraphDecoder
+from deltakit_decode.analysis._matching_decoder_managers import GraphDecoderManager
+from deltakit_decode.noise_sources._generic_noise_sources import (
+    MonteCarloNoise,
+    offset_seed,
+)
+
+
+@dataclass
+class ImportanceSamplingComponent:
+    """Component noise model of an importance sampling decomposition, with the
+    shots decoded under it so far.
+
+    Attributes
+    ----------
+    noise_model : MonteCarloNoise
+        Noise model of this component, such as a `FixedWeightMatchingNoise`.
+    coefficient : float
+        Probability of this component in the decomposed noise model.
+    shots : int
+        Number of shots decoded under this component.
+    fails : int
+        Number of those shots where decoding failed.
+    exhaustive : bool
+        Whether every error of this component was decoded, so that its failure
+        probability is exact.
+    """
+    noise_model: MonteCarloNoise
+    coefficient: float
+    shots: int = 0
+    fails: int = 0
+    exhaustive: bool = False
+
+    @property
+    def failure_probability(self) -> float:
+        """Fraction of decoded shots that failed, or NaN if no shots were
+        decoded."""
+        return self.fails / self.shots if self.shots else float("nan")
+
+
+@dataclass(frozen=True)
+class ImportanceSamplingEstimate:
+    """Logical error probability (LEP) estimated by importance sampling.
+
+    Attributes
+    ----------
+    lep : float
+        Estimate of the LEP, which is unbiased for the components of the
+        decomposition that were decoded.
+    stderr : float
+        Standard error of the estimate.
+    lower : float
+        Lower bound of the confidence interval of the LEP.
+    upper : float
+        Upper bound of the confidence interval of the LEP. This includes the
+        probability of components that were not decoded, as any of their errors
+        could cause a failure.
+    confidence : float
+        Confidence level of the interval.
+    untracked_probability : float
+        Probability of errors outside the decoded components, either truncated
+        from the decomposition or not yet decoded.
+    shots : int
+        Total number of shots decoded over all components.
+    components : Tuple[ImportanceSamplingComponent, ...]
+        Components of the decomposition.
+    """
+    lep: float
+    stderr: float
+    lower: float
+    upper: float
+    confidence: float
+    untracked_probability: float
+    shots: int
+    components: tuple[ImportanceSamplingComponent, ...]
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the estimate as a dictionary of values, without the components."""
+        return {
+            "lep": self.lep,
+            "lep_stderr": self.stderr,
+            "lep_lower": self.lower,
+            "lep_upper": self.upper,
+            "confidence": self.confidence,
+            "untracked_probability": self.untracked_probability,
+            "shots": self.shots,
+        }
+
+
+class ImportanceSamplingAnalysisEngine:
+    """Estimate the logical error probability (LEP) of a graph decoder by importance
+    sampling, for LEPs too low to be reached by plain Monte Carlo sampling.
+
+    The noise model is decomposed by `importance_sampling_decomposition` into
+    components, such as errors of fixed weight, each with the probability of it
+    occurring. The LEP is the sum over components of this probability times the
+    failure probability of the decoder under the component. Components with few
+    possible errors, such as low weight errors which are typically always
+    corrected, are decoded exhaustively so their failure probability is exact.
+    Other components are sampled, with shots allocated between them in proportion
+    to their probability times the standard deviation of their failure, which
+    minimises the standard error of the LEP for a given number of shots.
+
+    Parameters
+    ----------
+    noise_model : MonteCarloNoise
+        Noise model to estimate the LEP under, which must implement
+        `importance_sampling_decomposition`, such as `UniformMatchingNoise` or
+        `EdgeProbabilityMatchingNoise`.
+    decoder : GraphDecoder
+        Decoder to estimate the LEP of.
+    decoding_graph : Optional[HyperMultiGraph], optional
+        Decoding graph the noise model is defined over, by default the decoding
+        graph of the decoder.
+    coefficient_limit : float, optional
+        Components with a probability below this limit are not included in the
+        decomposition, by default 1e-20.
+    max_exhaustive_shots : int, optional
+        Components with at most this many possible errors are decoded
+        exhaustively, by default 10000.
+    pilot_shots : int, optional
+        Number of shots decoded under each sampled component before shots are
+        allocated between components, by default 100.
+    batch_size : int, optional
+        Number of shots to allocate between components at a time, by default
+        10000.
+    confidence : float, optional
+        Confidence level of the interval of the estimate, by default 0.95.
+    seed : Optional[int], optional
+        Seed for sampling the components, by default None.
+    """
+
+    def __init__(self,
+                 noise_model: MonteCarloNoise,
+                 decoder: GraphDecoder,
+                 decoding_graph: HyperMultiGraph | None = None,
+                 *,
+                 coefficient_limit: float = 1e-20,
+                 max_exhaustive_shots: int = 10000,
+                 pilot_shots: int = 100,
+                 batch_size: int = 10000,
+                 confidence: float = 0.95,
+                 seed: int | None = None):
+        if not 0 < confidence < 1:
+            msg = f"Confidence level {confidence} must be between 0 and 1."
+            raise ValueError(msg)
+        self._decoder = decoder
+        self._decoding_graph = decoding_graph or decoder.decoding_graph
+        self.max_exhaustive_shots = max_exhaustive_shots
+        self.pilot_shots = pilot_shots
+        self.batch_size = batch_size
+        self.confidence = confidence
+        self.components = [
+            ImportanceSamplingComponent(model, coefficient)
+            for model, coefficient in noise_model.importance_sampling_decomposition(
+                self._decoding_graph, coefficient_limit)]
+        self._managers = [
+            GraphDecoderManager(component.noise_model, decoder, self._decoding_graph,
+                                seed=component_seed, batch_size=batch_size)
+            for component, component_seed in zip(self.components, offset_seed(seed))]
+        self._exhaustive_done = False
+
+    @property
+    def shots(self) -> int:
+        """Total number of shots decoded over all components."""
+        return sum(component.shots for component in self.components)
+
+    @property
+    def _z_score(self) -> float:
+        return NormalDist().inv_cdf((1 + self.confidence) / 2)
+
+    def run(self, max_shots: int, target_rse: float | None = None
+            ) -> ImportanceSamplingEstimate:
+        """Decode shots until `max_shots` shots have been decoded in total over all
+        components, or the relative standard error of the LEP is at most
+        `target_rse`. Components that are decoded exhaustively and the pilot shots
+        of each sampled component are always decoded. Calling this again continues
+        from the shots already decoded.
+
+        Parameters
+        ----------
+        max_shots : int
+            Maximum number of shots to decode.
+        target_rse : Optional[float], optional
+            Relative standard error of the LEP at which to stop, by default None
+            which decodes `max_shots` shots.
+
+        Returns
+        -------
+        ImportanceSamplingEstimate
+        """
+        if not self._exhaustive_done:
+            self._run_exhaustive_components()
+        for index, component in enumerate(self.components):
+            if not component.exhaustive and component.shots < self.pilot_shots:
+                self._run_component(index, self.pilot_shots - component.shots)
+
+        while (remaining_shots := max_shots - self.shots) > 0:
+            estimate = self.estimate()
+            if (target_rse is not None and estimate.lep > 0
+                    and estimate.stderr / estimate.lep <= target_rse):
+                break
+            allocation = self._allocate(min(self.batch_size, remaining_shots))
+            if not allocation.any():
+                break
+            for index, shots in enumerate(allocation.tolist()):
+                if shots > 0:
+                    self._run_component(index, shots)
+        return self.estimate()
+
+    def _run_exhaustive_components(self):
+        for component in self.components:
+            try:
+                exhaustive_model = component.noise_model.as_exhaustive_sequential_model()
+            except NotImplementedError:
+                continue
+            if (exhaustive_model.sequence_size(self._decoding_graph)
+                    > self.max_exhaustive_shots):
+                continue
+            manager = GraphDecoderManager(exhaustive_model, self._decoder,
+                                          self._decoding_graph)
+            manager.run_batch_shots(None)
+            component.shots, component.fails = manager.shots, manager.fails
+            component.exhaustive = True
+        self._exhaustive_done = True
+
+    def _run_component(self, index: int, shots: int):
+        manager = self._managers[index]
+        manager.run_batch_shots(shots)
+        self.components[index].shots = manager.shots
+        self.components[index].fails = manager.fails
+
+    def _adjusted_failure_probabilities(self) -> npt.NDArray[np.float64]:
+        """Failure probabilities of each component with the Agresti-Coull
+        adjustment, so that components without fails still have a variance."""
+        z_squared = self._z_score ** 2
+        shots = np.array([component.shots for component in self.components], dtype=float)
+        fails = np.array([component.fails for component in self.components], dtype=float)
+        return (fails + z_squared / 2) / (shots + z_squared)
+
+    def _allocate(self, shots: int) -> npt.NDArray[np.int64]:
+        """Allocate `shots` between the sampled components, moving the shots of
+        each towards its share under Neyman allocation."""
+        sampled = np.array([not component.exhaustive for component in self.components])
+        if not sampled.any():
+            return np.zeros(len(self.components), dtype=np.int64)
+        coefficients = np.array([component.coefficient
+                                 for component in self.components])
+        component_shots = np.array([component.shots for component in self.components])
+        adjusted = self._adjusted_failure_probabilities()
+        shares = np.where(sampled, coefficients * np.sqrt(adjusted * (1 - adjusted)), 0)
+        targets = shares / shares.sum() * (component_shots[sampled].sum() + shots)
+        deficits = np.where(sampled, np.maximum(targets - component_shots, 0), 0)
+        if deficits.sum() == 0:
+            deficits = shares
+        allocation = np.floor(deficits / deficits.sum() * shots).astype(np.int64)
+        allocation[np.argmax(deficits)] += shots - allocation.sum()
+        return allocation
+
+    def estimate(self) -> ImportanceSamplingEstimate:
+        """Estimate the LEP from the shots decoded so far.
+
+        Returns
+        -------
+        ImportanceSamplingEstimate
+        """
+        coefficients = np.array([component.coefficient
+                                 for component in self.components])
+        shots = np.array([component.shots for component in self.components])
+        fails = np.array([component.fails for component in self.components])
+        exhaustive = np.array([component.exhaustive for component in self.components],
+                              dtype=np.bool_)
+        decoded = shots > 0
+        lep = float(coefficients[decoded] @ (fails[decoded] / shots[decoded]))
+        adjusted = self._adjusted_failure_probabilities()
+        variances = np.where(decoded & ~exhaustive,
+                             adjusted * (1 - adjusted) / np.maximum(shots, 1), 0)
+        stderr = float(np.sqrt(coefficients ** 2 @ variances))
+        untracked_probability = max(0.0, 1 - float(coefficients[decoded].sum()))
+        z_score = self._z_score
+        return ImportanceSamplingEstimate(
+            lep=lep,
+            stderr=stderr,
+            lower=max(0.0, lep - z_score * stderr),
+            upper=min(1.0, lep + z_score * stderr + untracked_probability),
+            confidence=self.confidence,
+            untracked_probability=untracked_probability,
+            shots=int(shots.sum()),
+            components=tuple(replace(component) for component in self.components))
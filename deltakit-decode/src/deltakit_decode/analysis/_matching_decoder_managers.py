@@ -1,35 +1,51 @@
 # (c) Copyright Riverlane 2020-2025.
 from __future__ import annotations
 
-from collections.abc import Iterable, Sequence
+from collections.abc import Sequence
 from collections.abc import Set as AbstractSet
-from itertools import islice
+from contextlib import ExitStack
+from functools import cached_property, partial
+from itertools import pairwise
 from pathlib import Path
 from typing import Any, TypeAlias
-from warnings import warn
+from uuid import UUID
 
 import numpy as np
 import numpy.typing as npt
 import stim
-from deltakit_core.data_formats import b8_to_logical_flip, b8_to_syndromes
+from deltakit_core.data_formats import (
+    b8_num_shots,
+    b8_to_logical_flip_batches,
+    b8_to_syndrome_batches,
+)
 from deltakit_core.decoding_graphs import (
     DecodingHyperEdge,
     EdgeT,
     HyperMultiGraph,
+    OrderedDecodingEdges,
     OrderedSyndrome,
+    SyndromeBatch,
 )
 
 from deltakit_decode._abstract_matching_decoders import GraphDecoder
 from deltakit_decode._base_reporter import BaseReporter
 from deltakit_decode.analysis._decoder_manager import (
     DecoderManager,
+    InvalidGlobalManagerStateError,
     NoiseModelDecoderManager,
+    ProcessResults,
+    _get_process_manager,
+)
+from deltakit_decode.analysis._empirical_decoding_error_distribution import (
+    EmpiricalDecodingErrorDistribution,
 )
+from deltakit_decode.analysis._pipeline_profiler import nbytes_of, profile_stage
 from deltakit_decode.noise_sources import SampleStimNoise
 from deltakit_decode.noise_sources._generic_noise_sources import NoiseModel
 
 StimOutput: TypeAlias = tuple[OrderedSyndrome, tuple[bool, ...]]
-StimBatchOutput: TypeAlias = tuple[npt.NDArray[np.uint8], npt.NDArray[np.uint8]]
+StimBatchOutput: TypeAlias = tuple[npt.NDArray[np.uint8] | SyndromeBatch,
+                                   npt.NDArray[np.uint8]]
 
 
 class StimDecoderManager(
@@ -92,16 +108,22 @@ class StimDecoderManager(
 
     def _decode_from_error(self, error: StimOutput) -> tuple[bool, ...]:
         syndrome, target_logical_flip = error
-        correction = self._decoder.decode_to_logical_flip(syndrome)
-        self._empirical_decoding_error_distribution.record_error(correction,
-                                                                 target_logical_flip)
+        with profile_stage(self.profiler, "decoding", 1):
+            correction = self._decoder.decode_to_logical_flip(syndrome)
+        with profile_stage(self.profiler, "analysis", 1):
+            self._empirical_decoding_error_distribution.record_error(
+                correction, target_logical_flip)
         return correction
 
     def _decode_batch_from_error(self, errors: StimBatchOutput) -> npt.NDArray[np.uint8]:
         syndrome_batch, actual_observables = errors
-        predicted_observables = self._decoder.decode_batch_to_logical_flip(syndrome_batch)
-        self._empirical_decoding_error_distribution.batch_record_errors(
-            predicted_observables, actual_observables)
+        with profile_stage(self.profiler, "decoding", len(syndrome_batch)) as timing:
+            predicted_observables = self._decoder.decode_batch_to_logical_flip(
+                syndrome_batch)
+            timing.nbytes = nbytes_of(syndrome_batch)
+        with profile_stage(self.profiler, "analysis", len(syndrome_batch)):
+            self._empirical_decoding_error_distribution.batch_record_errors(
+                predicted_observables, actual_observables)
         return predicted_observables
 
     def get_reporter_results(self) -> dict[str, Any]:
@@ -145,6 +167,245 @@ class StimDecoderManager(
         return self._empirical_decoding_error_distribution.to_dict()
 
 
+class _MultiDecoderErrorDistribution(EmpiricalDecodingErrorDistribution):
+    """Empirical decoding error distribution over which of several decoders
+    failed on each shot, along with the distribution of failures over the
+    logicals of each decoder. Corrections of the decoders are given one after
+    another and are compared with the same target, so memory grows with the
+    number of decoders rather than exponentially in their total logicals.
+
+    Parameters
+    ----------
+    number_of_logicals : int
+        The number of logicals of each decoder.
+    number_of_decoders : int
+        The number of decoders.
+    """
+
+    def __init__(self, number_of_logicals: int, number_of_decoders: int):
+        super().__init__(number_of_decoders)
+        self._decoder_number_of_logicals = number_of_logicals
+        self.decoder_distributions = [
+            EmpiricalDecodingErrorDistribution(number_of_logicals)
+            for _ in range(number_of_decoders)]
+
+    def record_error(self, correction: tuple[bool, ...], target: tuple[bool, ...]):
+        decoder_fails = []
+        for i, distribution in enumerate(self.decoder_distributions):
+            decoder_correction = correction[i * self._decoder_number_of_logicals:
+                                            (i + 1) * self._decoder_number_of_logicals]
+            distribution.record_error(decoder_correction, target)
+            decoder_fails.append(any(l_correction != l_target
+                                     for l_correction, l_target
+                                     in zip(decoder_correction, target, strict=True)))
+        self.add_event(tuple(decoder_fails))
+
+    def batch_record_errors(self, corrections: npt.NDArray[np.uint8],
+                            target: npt.NDArray[np.uint8],
+                            bit_packed: bool = False):
+        if bit_packed:
+            msg = "Corrections of several decoders cannot be bit-packed."
+            raise ValueError(msg)
+        corrections = np.asarray(corrections, dtype=np.uint8)
+        target = np.asarray(target, dtype=np.uint8)
+        decoder_fails = np.empty((len(corrections), len(self.decoder_distributions)),
+                                 dtype=np.uint8)
+        for i, distribution in enumerate(self.decoder_distributions):
+            decoder_corrections = corrections[:, i * self._decoder_number_of_logicals:
+                                              (i + 1) * self._decoder_number_of_logicals]
+            distribution.batch_record_errors(decoder_corrections, target)
+            decoder_fails[:, i] = np.any(decoder_corrections != target, axis=1)
+        super().batch_record_errors(decoder_fails, np.zeros_like(decoder_fails))
+
+    def reset(self):
+        super().reset()
+        for distribution in self.decoder_distributions:
+            distribution.reset()
+
+    def __add__(self, other: EmpiricalDecodingErrorDistribution
+                ) -> EmpiricalDecodingErrorDistribution:
+        if (isinstance(other, _MultiDecoderErrorDistribution)
+                and self._decoder_number_of_logicals
+                == other._decoder_number_of_logicals
+                and len(self.decoder_distributions)
+                == len(other.decoder_distributions)):
+            sum_distr = _MultiDecoderErrorDistribution(
+                self._decoder_number_of_logicals, len(self.decoder_distributions))
+            sum_distr._error_distribution = (self._error_distribution
+                                             + other._error_distribution)
+            sum_distr._shots = self._shots + other.shots
+            sum_distr._fails = self._fails + other.fails
+            sum_distr._fails_per_logical = (self._fails_per_logical
+                                            + other.fails_per_logical)
+            sum_distr.decoder_distributions = [
+                distribution + other_distribution
+                for distribution, other_distribution
+                in zip(self.decoder_distributions, other.decoder_distributions,
+                       strict=True)]
+            return sum_distr
+        return NotImplemented
+
+
+class StimMultiDecoderManager(
+        NoiseModelDecoderManager[StimOutput, stim.Circuit, tuple[bool, ...],
+                                 StimBatchOutput, npt.NDArray[np.uint8]]):
+    """Decoder manager to compare several decoders on the same shots of a Stim
+    circuit. Each shot is sampled once and decoded by every decoder, so the
+    comparison between decoders is paired and sampling is not repeated.
+
+    Outcomes are recorded in an empirical decoding error distribution over the
+    decoders, where position ``i`` is whether decoder ``i`` failed on any of its
+    logicals. A shot is counted as failed if any decoder fails, and the fails on
+    each position are the fails of each decoder, so loop conditions continue until
+    they are met by all decoders. The distribution of failures over the logicals
+    of each decoder is given by `decoder_error_distributions`.
+
+    Parameters
+    ----------
+    stim_noise_circuit : stim.Circuit
+        Stim circuit to use to inform how noise samples are generated.
+    decoders : Sequence[GraphDecoder]
+        Decoders to use to decode generated shots. All decoders must have the
+        same number of logicals.
+    noise_model : NoiseModel[stim.Circuit, StimOutput] | None, optional
+        Stim circuit based noise model to use, when `None` an instance of
+        `SampleStimNoise` which will just directly take samples from the
+        `stim_noise_circuit` is used.
+    reporters : Optional[Sequence[List[BaseReporter]]], optional
+        Optional list of reporters for each decoder, which are run alongside
+        that decoder only, by default None.
+    metadata : Optional[Dict[str, str]], optional
+        Metadata to associate with this experiment, by default None.
+    seed : Optional[int], optional
+        Optional seed for use with given noise sources, by default None which results in
+        random seed generation.
+    """
+
+    def __init__(
+            self,
+            stim_noise_circuit: stim.Circuit,
+            decoders: Sequence[GraphDecoder],
+            noise_model: NoiseModel[stim.Circuit, StimOutput] | None = None,
+            reporters: Sequence[list[BaseReporter]] | None = None,
+            metadata: dict[str, str] | None = None,
+            *,
+            seed: int | None = None,
+            batch_size: int = int(1e4)):
+        if len(decoders) == 0:
+            msg = "At least one decoder is required."
+            raise ValueError(msg)
+        num_logicals = {len(decoder.logicals) for decoder in decoders}
+        if len(num_logicals) != 1:
+            msg = f"All decoders must have the same number of logicals, not {num_logicals}."
+            raise ValueError(msg)
+        if reporters is None:
+            reporters = [[] for _ in decoders]
+        if len(reporters) != len(decoders):
+            msg = (f"Got {len(reporters)} lists of reporters for "
+                   f"{len(decoders)} decoders.")
+            raise ValueError(msg)
+        if noise_model is None:
+            noise_model = SampleStimNoise()
+        self._num_logicals = num_logicals.pop()
+        super().__init__(noise_model,
+                         len(decoders),
+                         [reporter for decoder_reporters in reporters
+                          for reporter in decoder_reporters],
+                         metadata,
+                         seed=seed,
+                         batch_size=batch_size)
+        self._empirical_decoding_error_distribution = _MultiDecoderErrorDistribution(
+            self._num_logicals, len(decoders))
+        self._stim_noise_circuit = stim_noise_circuit
+        self._decoders = list(decoders)
+        self._decoder_reporters = [list(decoder_reporters)
+                                   for decoder_reporters in reporters]
+
+    @property
+    def _shot_reporters(self) -> list[BaseReporter]:
+        # Reporters are entered around the decoding of their own decoder instead.
+        return []
+
+    @property
+    def decoder_error_distributions(self) -> list[EmpiricalDecodingErrorDistribution]:
+        """The empirical decoding error distribution of each decoder, in the order
+        of the decoders."""
+        return list(self._empirical_decoding_error_distribution.decoder_distributions)
+
+    def _analyse_correction(self, error: StimOutput, correction: tuple[bool, ...]
+                            ) -> bool:
+        _, target_logical_flip = error
+        return target_logical_flip * len(self._decoders) != correction
+
+    def _decode_from_error(self, error: StimOutput) -> tuple[bool, ...]:
+        syndrome, target_logical_flip = error
+        correction: tuple[bool, ...] = ()
+        with profile_stage(self.profiler, "decoding", 1):
+            for decoder, decoder_reporters in zip(self._decoders,
+                                                  self._decoder_reporters, strict=True):
+                with ExitStack() as stack:
+                    for reporter in decoder_reporters:
+                        stack.enter_context(reporter)
+                    correction += tuple(decoder.decode_to_logical_flip(syndrome))
+        with profile_stage(self.profiler, "analysis", 1):
+            self._empirical_decoding_error_distribution.record_error(
+                correction, target_logical_flip)
+        return correction
+
+    def _decode_batch_from_error(self, errors: StimBatchOutput) -> npt.NDArray[np.uint8]:
+        syndrome_batch, actual_observables = errors
+        predictions = []
+        with profile_stage(self.profiler, "decoding", len(syndrome_batch)) as timing:
+            for decoder, decoder_reporters in zip(self._decoders,
+                                                  self._decoder_reporters, strict=True):
+                with ExitStack() as stack:
+                    for reporter in decoder_reporters:
+                        stack.enter_context(reporter.batch(len(syndrome_batch)))
+                    predictions.append(
+                        decoder.decode_batch_to_logical_flip(syndrome_batch))
+            predicted_observables = np.hstack(predictions)
+            timing.nbytes = nbytes_of(syndrome_batch)
+        with profile_stage(self.profiler, "analysis", len(syndrome_batch)):
+            self._empirical_decoding_error_distribution.batch_record_errors(
+                predicted_observables, actual_observables)
+        return predicted_observables
+
+    def get_reporter_results(self) -> dict[str, Any]:
+        """Get results shared by all decoders, followed by the results of each
+        decoder with its index appended to their names. Results of each decoder
+        include the decoder, its number of fails, its fails on each logical if
+        there are several and the results of its reporters.
+        """
+        analysis_results: dict[str, Any] = {}
+        analysis_results.update(self._noise_model.field_values())
+        analysis_results.update({"shots": self.shots, "fails": self.fails})
+        analysis_results.update(self.metadata)
+        if self.profiler is not None:
+            analysis_results.update(self.profiler.get_reported_results())
+        for i, (decoder, decoder_reporters, distribution) in enumerate(zip(
+                self._decoders, self._decoder_reporters,
+                self.decoder_error_distributions, strict=True)):
+            decoder_results: dict[str, Any] = {"decoder": str(decoder),
+                                               "fails": distribution.fails}
+            if self._num_logicals > 1:
+                decoder_results.update({
+                    f"fails_log_{j}": fails
+                    for j, fails in enumerate(distribution.fails_per_logical.tolist())
+                })
+            for reporter in decoder_reporters:
+                decoder_results.update(reporter.get_reported_results())
+            analysis_results.update({f"{key}_{i}": value
+                                     for key, value in decoder_results.items()})
+        return analysis_results
+
+    def _get_code_data(self) -> stim.Circuit:
+        return self._stim_noise_circuit
+
+    def __str__(self) -> str:
+        decoders = "_".join(str(decoder) for decoder in self._decoders)
+        return f"{decoders}_{self._noise_model}"
+
+
 class B8DecoderManager(DecoderManager):
     """Decoder manager to run experiments defined by a b8 input for syndromes
     and target logical flips.
@@ -152,6 +413,11 @@ class B8DecoderManager(DecoderManager):
     The b8 data formats were proposed by Google Quantum AI and can be read
     about here: https://github.com/quantumlib/Stim/blob/main/doc/result_formats.md#b8
 
+    Shots are streamed from the inputs in order: each call to `run_batch_shots` or
+    `run_batch_shots_parallel` continues from the first shot that has not yet been
+    decoded, and `reset` rewinds to the start of the inputs. Once all shots have been
+    decoded, further calls decode nothing.
+
     Parameters
     ----------
     syndrome_b8_file : Path | bytes
@@ -163,9 +429,13 @@ class B8DecoderManager(DecoderManager):
     decoder : GraphDecoder
         Decoder to use for decoding.
     reporters : Optional[List[BaseReporter]], optional
-        Reporters are not supported by this decoder manager, by default None.
+        Reporters to run around the decoding of each batch, by default None. Only
+        reporters that support batches of shots can be used.
     metadata : Optional[Dict[str, Any]], optional
         Metadata to associate with this experiment, by default None.
+    batch_size : int, optional
+        Number of shots read from the b8 inputs and decoded at once, by default
+        10,000.
     """
 
     def __init__(
@@ -174,43 +444,176 @@ class B8DecoderManager(DecoderManager):
             logical_flip_b8_input: Path | bytes,
             decoder: GraphDecoder,
             reporters: list[BaseReporter] | None = None,
-            metadata: dict[str, Any] | None = None):
-        super().__init__(len(decoder.logicals), reporters, metadata)
-        if reporters:
-            warn("Reporters on a B8DecoderManager will not be used.", stacklevel=2)
+            metadata: dict[str, Any] | None = None,
+            *,
+            batch_size: int = int(1e4)):
+        super().__init__(len(decoder.logicals), reporters, metadata,
+                         batch_size=batch_size)
+        if not self._reporters_support_batches:
+            msg = "Reporters on a B8DecoderManager must support batches of shots."
+            raise ValueError(msg)
         self._syndrome_b8_input = syndrome_b8_input
         self._logical_flip_b8_input = logical_flip_b8_input
         self._decoder = decoder
+        self._next_shot = 0
+
+    @cached_property
+    def _detector_num(self) -> int:
+        return len(self._decoder.decoding_graph.nodes) - \
+            len(self._decoder.decoding_graph.boundaries)
+
+    @cached_property
+    def total_shots(self) -> int:
+        """Number of shots stored in the b8 inputs."""
+        syndrome_shots = b8_num_shots(self._syndrome_b8_input, self._detector_num)
+        logical_flip_shots = b8_num_shots(self._logical_flip_b8_input,
+                                          len(self._decoder.logicals))
+        if syndrome_shots != logical_flip_shots:
+            msg = (
+                f"Syndrome input has {syndrome_shots} shots but logical flip input "
+                f"has {logical_flip_shots} shots."
+            )
+            raise ValueError(msg)
+        return syndrome_shots
 
     def run_single_shot(self) -> bool:
         raise NotImplementedError()
 
-    def run_batch_shots(self, batch_limit: int | None) -> tuple[int, int]:
-        detector_num = len(self._decoder.decoding_graph.nodes) - \
-            len(self._decoder.decoding_graph.boundaries)
-        num_logicals = len(self._decoder.logicals)
-        syndrome_generator = b8_to_syndromes(self._syndrome_b8_input,
-                                             detector_num)
-        target_generator = b8_to_logical_flip(self._logical_flip_b8_input, num_logicals)
-        syndrome_and_targets: Iterable[tuple[OrderedSyndrome, tuple[bool, ...]]]
-        syndrome_and_targets = zip(syndrome_generator, target_generator)
-
+    def _decode_shot_range(self, first_shot: int, num_shots: int):
+        """Decode `num_shots` shots starting at `first_shot` in batches of at most
+        `batch_size` shots, recording results in the error distribution.
+        """
+        syndrome_batches = (
+            SyndromeBatch(packed_batch, self._detector_num, bit_packed=True)
+            for packed_batch in b8_to_syndrome_batches(self._syndrome_b8_input,
+                                                       self._detector_num,
+                                                       self.batch_size,
+                                                       bit_packed=True,
+                                                       first_shot=first_shot,
+                                                       num_shots=num_shots))
+        target_batches = b8_to_logical_flip_batches(self._logical_flip_b8_input,
+                                                    len(self._decoder.logicals),
+                                                    self.batch_size,
+                                                    first_shot=first_shot,
+                                                    num_shots=num_shots)
+        batches = zip(syndrome_batches, target_batches, strict=True)
+        while True:
+            with profile_stage(self.profiler, "reading") as timing:
+                batch = next(batches, None)
+                if batch is not None:
+                    timing.shots = len(batch[0])
+                    timing.nbytes = nbytes_of(batch)
+            if batch is None:
+                break
+            syndrome_batch, target_batch = batch
+            with (profile_stage(self.profiler, "decoding", len(syndrome_batch)),
+                  ExitStack() as stack):
+                for reporter in self.reporters:
+                    stack.enter_context(reporter.batch(len(syndrome_batch)))
+                correction_batch = self._decoder.decode_batch_to_logical_flip(
+                    syndrome_batch)
+            with profile_stage(self.profiler, "analysis", len(syndrome_batch)):
+                self._empirical_decoding_error_distribution.batch_record_errors(
+                    correction_batch, target_batch)
+
+    def _take_shot_range(self, batch_limit: int | None) -> tuple[int, int]:
+        """Claim the next `batch_limit` undecoded shots, or all remaining shots if
+        `batch_limit` is None, and return the first shot and the number of shots.
+        """
+        first_shot = self._next_shot
+        num_shots = self.total_shots - first_shot
         if batch_limit is not None:
-            syndrome_and_targets = islice(syndrome_and_targets, batch_limit)
+            num_shots = min(num_shots, int(batch_limit))
+        self._next_shot += num_shots
+        return first_shot, num_shots
 
-        for syndrome, target in syndrome_and_targets:
-            correction = self._decoder.decode_to_logical_flip(syndrome)
-            self._empirical_decoding_error_distribution.record_error(correction, target)
+    def run_batch_shots(self, batch_limit: int | None) -> tuple[int, int]:
+        self._decode_shot_range(*self._take_shot_range(batch_limit))
+        return self.shots, self.fails
 
+    def run_batch_shots_parallel(self,
+                                 batch_limit: int | None,
+                                 processes: int,
+                                 pool,
+                                 min_tasks_per_process: int = 50
+                                 ) -> tuple[int, int]:
+        first_shot, num_shots = self._take_shot_range(batch_limit)
+        processes = min((num_shots // min_tasks_per_process) + 1, processes)
+        boundaries = np.linspace(first_shot, first_shot + num_shots,
+                                 processes + 1, dtype=np.int64).tolist()
+        shot_ranges = [(start, stop - start) for start, stop in pairwise(boundaries)]
+        # Attempt to decode chunks in parallel. If the pool has caused a process to
+        # lose the decoder manager in its globals memory, then reinitialise processes
+        # with the decoder manager object and decode chunks in the same process call.
+        with profile_stage(self.profiler, "parallel_map", num_shots):
+            try:
+                results = pool.map(partial(_run_b8_process, self._mp_token,
+                                           self._process_run_state()),
+                                   shot_ranges)
+            except InvalidGlobalManagerStateError:
+                results = pool.map(self._setup_and_decode_shot_range, shot_ranges)
+
+        self._merge_process_results(results)
         return self.shots, self.fails
 
+    def _setup_and_decode_shot_range(self, shot_range: tuple[int, int]
+                                     ) -> ProcessResults:
+        """Setup process globals memory with manager and decode a range of shots.
+        """
+        self._setup_process()
+        return self._thread_worker(self._mp_token, shot_range)
+
+    def _thread_worker(self, state_token: UUID, shot_range: tuple[int, int]
+                       ) -> ProcessResults:
+        if state_token != self._mp_token:
+            msg = "Worker decoder manager global has invalid token."
+            raise InvalidGlobalManagerStateError(msg)
+        # Only this range of shots is returned to the main process, so start from
+        # empty results without rewinding the inputs as `reset` does.
+        for reporter in self.reporters:
+            reporter.reset_reporter()
+        self._empirical_decoding_error_distribution.reset()
+        if self.profiler is not None:
+            self.profiler.reset()
+        self._decode_shot_range(*shot_range)
+        return self._process_results()
+
+    def reset(self):
+        self._next_shot = 0
+        super().reset()
+
+    def restore_checkpoint(self,
+                           distribution: EmpiricalDecodingErrorDistribution,
+                           reporters: list[BaseReporter]):
+        super().restore_checkpoint(distribution, reporters)
+        # Shots are decoded in order, so those in the checkpoint are skipped.
+        self._next_shot = self.shots
+
+
+def _run_b8_process(state_token: UUID, run_state: dict[str, Any],
+                    shot_range: tuple[int, int]) -> ProcessResults:
+    """Decode a range of shots with the B8 decoder manager stored in process
+    globals memory.
+    """
+    decoder_manager = _get_process_manager(state_token, run_state)
+    if isinstance(decoder_manager, B8DecoderManager):
+        return decoder_manager._thread_worker(  # pylint: disable=protected-access
+            state_token, shot_range)
+    msg = "Process state not configured with decoder manager."
+    raise InvalidGlobalManagerStateError(msg)
+
 
 class GraphDecoderManager(NoiseModelDecoderManager[
     AbstractSet[EdgeT], HyperMultiGraph, tuple[bool, ...],
-        list[AbstractSet[EdgeT]], list[tuple[bool, ...]]]):
+        list[AbstractSet[EdgeT]] | npt.NDArray[np.bool_],
+        list[tuple[bool, ...]] | npt.NDArray[np.uint8]]):
     """Decoder manager for a graph decoder with an edge-based noise model. In
     this representation, an edge corresponds to a possible error event and
     the nodes of the edge correspond to the syndromes triggered by the error.
+
+    Noise models that generate batches of errors as boolean arrays over the edges
+    of the decoder's graph, such as `EdgeProbabilityMatchingNoise`, are decoded a
+    batch at a time through the decoder's batch API.
     """
 
     def __init__(
@@ -272,17 +675,55 @@ class GraphDecoderManager(NoiseModelDecoderManager[
         return self._empirical_decoding_error_distribution.to_dict()
 
     def _decode_from_error(self, error: AbstractSet[EdgeT]) -> tuple[bool, ...]:
-        syndrome = self._decoding_graph.error_to_syndrome(error)
-        correction = self._decoder.decode_to_logical_flip(syndrome)
-        target_logical_flip = tuple(len(error & logical) % 2 == 1
-                                    for logical in self._logicals)
-        self._empirical_decoding_error_distribution.record_error(correction,
-                                                                 target_logical_flip)
+        with profile_stage(self.profiler, "conversion", 1):
+            syndrome = self._decoding_graph.error_to_syndrome(error)
+        with profile_stage(self.profiler, "decoding", 1):
+            correction = self._decoder.decode_to_logical_flip(syndrome)
+        with profile_stage(self.profiler, "analysis", 1):
+            target_logical_flip = tuple(len(error & logical) % 2 == 1
+                                        for logical in self._logicals)
+            self._empirical_decoding_error_distribution.record_error(
+                correction, target_logical_flip)
         return correction
 
-    def _decode_batch_from_error(self, errors: list[AbstractSet[EdgeT]]
-                                 ) -> list[tuple[bool, ...]]:
-        return [self._decode_from_error(error) for error in errors]
+    @cached_property
+    def _logical_edge_indices(self) -> list[npt.NDArray[np.intp]]:
+        """Indices of the edges of the decoder's graph that are in each logical."""
+        return [np.array([index for index, edge in enumerate(self._get_code_data().edges)
+                          if edge in logical], dtype=np.intp)
+                for logical in self._logicals]
+
+    def _decode_batch_from_error(
+        self, errors: list[AbstractSet[EdgeT]] | npt.NDArray[np.bool_]
+    ) -> list[tuple[bool, ...]] | npt.NDArray[np.uint8]:
+        if not isinstance(errors, np.ndarray):
+            return [self._decode_from_error(error) for error in errors]
+        if self._decoding_graph is not self._get_code_data():
+            # Syndromes of a separate decoding graph are found from the edges of each
+            # error, as for errors generated one shot at a time.
+            edges = np.empty(len(self._get_code_data().edges), dtype=object)
+            edges[:] = self._get_code_data().edges
+            return [self._decode_from_error(
+                OrderedDecodingEdges(edges[np.flatnonzero(error)], mod_2_filter=False))
+                for error in errors]
+        # Array errors are over the edges of the decoder's graph, as sampled by the
+        # noise model, so the syndromes are found from that graph.
+        with profile_stage(self.profiler, "conversion", len(errors)) as timing:
+            syndrome_batch = self._get_code_data().compiled.errors_to_syndromes(errors)
+            timing.nbytes = nbytes_of(errors)
+        with profile_stage(self.profiler, "decoding", len(errors)) as timing:
+            predicted_observables = self._decoder.decode_batch_to_logical_flip(
+                syndrome_batch)
+            timing.nbytes = nbytes_of(syndrome_batch)
+        with profile_stage(self.profiler, "analysis", len(errors)):
+            actual_observables = np.empty((len(errors), len(self._logicals)),
+                                          dtype=np.uint8)
+            for logical_index, edge_indices in enumerate(self._logical_edge_indices):
+                actual_observables[:, logical_index] = np.count_nonzero(
+                    errors[:, edge_indices], axis=1) % 2
+            self._empirical_decoding_error_distribution.batch_record_errors(
+                predicted_observables, actual_observables)
+        return predicted_observables
 
     def get_reporter_results(self) -> dict[str, Any]:
         analysis_results = {"decoder": str(self._decoder)}
@@ -0,0 +1,232 @@
+# (c) Copyright Riverlane 2020-2025.
+from __future__ import annotations
+
+import os
+from collections.abc import Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import dataclass, field
+from time import perf_counter_ns
+from typing import Any
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+from typing_extensions import Self
+
+# Edges of the bins of shots per second, with four bins per decade from 1 to 1e9.
+# Bins are fixed so that histograms from different processes can be added.
+THROUGHPUT_BIN_EDGES: npt.NDArray[np.float64] = np.logspace(0, 9, 37)
+
+
+@dataclass
+class StageTiming:
+    """Shots and bytes processed by a single timed call of a stage, which can be
+    set inside the `PipelineProfiler.stage` block once they are known.
+    """
+    shots: int = 0
+    nbytes: int = 0
+
+
+@dataclass
+class _StageTotals:
+    calls: int = 0
+    wall_ns: int = 0
+    shots: int = 0
+    nbytes: int = 0
+    throughput_counts: npt.NDArray[np.int64] = field(
+        default_factory=lambda: np.zeros(len(THROUGHPUT_BIN_EDGES) - 1,
+                                         dtype=np.int64))
+
+    def __iadd__(self, other: _StageTotals) -> Self:
+        self.calls += other.calls
+        self.wall_ns += other.wall_ns
+        self.shots += other.shots
+        self.nbytes += other.nbytes
+        self.throughput_counts = self.throughput_counts + other.throughput_counts
+        return self
+
+
+class PipelineProfiler:
+    """Profiler of the time spent in each stage of running shots with a decoder
+    manager. Set as the `profiler` of a decoder manager to enable it.
+
+    For each stage and each process, the profiler records the number of timed calls,
+    the total wall time, the shots and bytes processed and a histogram of the shots
+    per second of each call. Stages recorded by decoder managers are:
+
+    - ``sampling``: generating errors from the noise model, which for single shots
+      also includes converting them to syndromes.
+    - ``conversion``: converting errors to syndromes, where this is done by the
+      decoder manager.
+    - ``reading``: reading recorded syndromes and logical flips from file.
+    - ``decoding``: decoding syndromes.
+    - ``analysis``: recording decoding outcomes in the error distribution.
+    - ``serialisation``: pickling the results of a worker process to send them to
+      the main process, with bytes being the size of the pickled results.
+    - ``parallel_map``: the main process waiting on all worker processes, including
+      sending tasks and results between processes.
+    - ``merge``: adding worker results to the main process decoder manager.
+
+    Profilers of worker processes are added to the profiler of the main process,
+    in the same way as reporters.
+    """
+
+    def __init__(self):
+        self._stages: dict[tuple[int, str], _StageTotals] = {}
+
+    @contextmanager
+    def stage(self, name: str, shots: int = 0, nbytes: int = 0
+              ) -> Iterator[StageTiming]:
+        """Time a call of the stage with the given name in this process.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        shots : int, optional
+            Number of shots processed by the call, by default 0.
+        nbytes : int, optional
+            Number of bytes processed by the call, by default 0.
+
+        Yields
+        ------
+        StageTiming
+            Shots and bytes processed by the call, which can be updated inside the
+            block.
+        """
+        timing = StageTiming(shots, nbytes)
+        start = perf_counter_ns()
+        yield timing
+        self.record(name, perf_counter_ns() - start, timing.shots, timing.nbytes)
+
+    def record(self, name: str, wall_ns: int, shots: int = 0, nbytes: int = 0):
+        """Record a call of the stage with the given name in this process.
+
+        Parameters
+        ----------
+        name : str
+            Name of the stage.
+        wall_ns : int
+            Wall time of the call in nanoseconds.
+        shots : int, optional
+            Number of shots processed by the call, by default 0.
+        nbytes : int, optional
+            Number of bytes processed by the call, by default 0.
+        """
+        totals = self._stages.setdefault((os.getpid(), name), _StageTotals())
+        totals.calls += 1
+        totals.wall_ns += int(wall_ns)
+        totals.shots += int(shots)
+        totals.nbytes += int(nbytes)
+        if shots > 0 and wall_ns > 0:
+            shots_per_second = shots * 1e9 / wall_ns
+            bin_index = np.searchsorted(THROUGHPUT_BIN_EDGES, shots_per_second,
+                                        side="right") - 1
+            totals.throughput_counts[
+                np.clip(bin_index, 0, len(THROUGHPUT_BIN_EDGES) - 2)] += 1
+
+    @property
+    def stages(self) -> list[str]:
+        """Names of all recorded stages, in the order they were first recorded."""
+        return list(dict.fromkeys(name for _, name in self._stages))
+
+    @property
+    def workers(self) -> list[int]:
+        """Process IDs of all processes that recorded stages."""
+        return list(dict.fromkeys(pid for pid, _ in self._stages))
+
+    def throughput_histogram(self, stage: str, worker: int | None = None
+                             ) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]:
+        """Histogram of the shots per second of the calls of a stage.
+
+        Parameters
+        ----------
+        stage : str
+            Name of the stage.
+        worker : Optional[int], optional
+            Process ID of the process to give the histogram of, by default None which
+            gives the histogram over all processes.
+
+        Returns
+        -------
+        Tuple[npt.NDArray[np.float64], npt.NDArray[np.int64]]
+            Edges of the bins of shots per second and the number of calls in each bin.
+            The first and last bins also count calls below and above the edges.
+        """
+        counts = np.zeros(len(THROUGHPUT_BIN_EDGES) - 1, dtype=np.int64)
+        for (pid, name), totals in self._stages.items():
+            if name == stage and worker in (None, pid):
+                counts += totals.throughput_counts
+        return THROUGHPUT_BIN_EDGES.copy(), counts
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """Get the totals of each stage in each process as a list of records, with
+        keys ``worker``, ``stage``, ``calls``, ``wall_ns``, ``shots``, ``nbytes``
+        and ``shots_per_second``.
+        """
+        return [{"worker": pid,
+                 "stage": name,
+                 "calls": totals.calls,
+                 "wall_ns": totals.wall_ns,
+                 "shots": totals.shots,
+                 "nbytes": totals.nbytes,
+                 "shots_per_second": _shots_per_second(totals.shots, totals.wall_ns)}
+                for (pid, name), totals in self._stages.items()]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Get the totals of each stage in each process as a dataframe, with one row
+        per record of `to_records`.
+        """
+        return pd.DataFrame(self.to_records(),
+                            columns=["worker", "stage", "calls", "wall_ns", "shots",
+                                     "nbytes", "shots_per_second"])
+
+    def get_reported_results(self) -> dict[str, Any]:
+        """Get the total wall time, bytes and shots per second of each stage over all
+        processes, with keys prefixed by the name of the stage.
+        """
+        results: dict[str, Any] = {}
+        for stage in self.stages:
+            totals = _StageTotals()
+            for (_, name), worker_totals in self._stages.items():
+                if name == stage:
+                    totals += worker_totals
+            results[f"{stage}_wall_ns"] = totals.wall_ns
+            results[f"{stage}_nbytes"] = totals.nbytes
+            results[f"{stage}_shots_per_second"] = _shots_per_second(totals.shots,
+                                                                      totals.wall_ns)
+        return results
+
+    def reset(self):
+        """Reset all recorded stages."""
+        self._stages = {}
+
+    def __iadd__(self, other: PipelineProfiler) -> Self:
+        if not isinstance(other, PipelineProfiler):
+            msg = f"Cannot add {type(other).__name__} to {type(self).__name__}."
+            raise ValueError(msg)
+        for key, totals in other._stages.items():
+            own_totals = self._stages.setdefault(key, _StageTotals())
+            own_totals += totals
+        return self
+
+
+def _shots_per_second(shots: int, wall_ns: int) -> float:
+    return shots * 1e9 / wall_ns if wall_ns > 0 else float("nan")
+
+
+def profile_stage(profiler: PipelineProfiler | None, name: str, shots: int = 0
+                  ) -> AbstractContextManager[StageTiming]:
+    """Time a stage with the profiler, or do nothing if there is no profiler."""
+    if profiler is None:
+        return nullcontext(StageTiming())
+    return profiler.stage(name, shots)
+
+
+def nbytes_of(value: Any) -> int:
+    """Number of bytes of the arrays in a value, which is either an array or a tuple
+    of arrays. Other values are counted as zero bytes.
+    """
+    if isinstance(value, tuple):
+        return sum(nbytes_of(item) for item in value)
+    return int(getattr(value, "nbytes", 0))
@@ -1,17 +1,23 @@
 # (c) Copyright Riverlane 2020-2025.
 import datetime
 import logging
-from collections.abc import Callable, Iterable
+import time
+from collections.abc import Callable, Iterable, Sized
+from itertools import chain, pairwise
 from multiprocessing.synchronize import Lock as LockBase
 from pathlib import Path
 from typing import Any
 
+import dill
 import numpy as np
 import pandas as pd
 from pathos.pools import ProcessPool
 from tqdm import tqdm
 
-from deltakit_decode.analysis._decoder_manager import DecoderManager
+from deltakit_decode.analysis._decoder_manager import (
+    MAX_CACHED_PROCESS_MANAGERS,
+    DecoderManager,
+)
 from deltakit_decode.analysis._empirical_decoding_error_distribution import (
     EmpiricalDecodingErrorDistribution,
 )
@@ -44,6 +50,34 @@ class RunAllAnalysisEngine:
         high as possible.
     max_shots : int, optional
         The maximum number of shots to run.
+    reuse_pool : bool, optional
+        If True, keep one process pool for the lifetime of this engine rather than
+        configuring and clearing it for each decoder manager. Worker state is
+        identified by a hash of its content, so decoder managers with the same
+        content as an earlier one skip re-initialising the workers, and the next
+        decoder manager's state is sent to the workers while the current one
+        decodes. Call `close` to release the pool. By default False.
+    shot_priority : Optional[Callable[EmpiricalDecodingErrorDistribution, float]]
+        If given, batches of shots are interleaved across all decoder managers
+        rather than running each to completion in turn. Each batch is given to the
+        decoder manager, of those still meeting the loop condition, whose empirical
+        decoding error distribution has the highest priority. Decoder managers stop
+        as soon as they no longer meet the loop condition. Returned results keep the
+        order of the decoder managers, while results saved to file are appended as
+        each decoder manager finishes. When running in parallel, at most
+        `MAX_CACHED_PROCESS_MANAGERS` decoder managers are interleaved at a time, so
+        that they all stay set up in the pool workers. By default None, which runs
+        decoder managers one at a time.
+    checkpoint_interval : Optional[float], optional
+        If given, save the progress of each decoder manager, that is its empirical
+        decoding error distribution and reporters, to the data directory at most
+        this many seconds apart and when it finishes. By default None, which saves
+        no checkpoints.
+    resume : bool, optional
+        If True, restore the progress of each decoder manager from checkpoints
+        saved by an earlier run with the same experiment name and data directory,
+        and only run the shots still needed. Checkpoints are matched to decoder
+        managers by position and must have the same metadata. By default False.
     """
 
     def __init__(
@@ -56,6 +90,12 @@ class RunAllAnalysisEngine:
         lvl: int = logging.NOTSET,
         batch_size: int = 10000000,
         max_shots: int = 10000000,
+        *,
+        reuse_pool: bool = False,
+        shot_priority: Callable[[EmpiricalDecodingErrorDistribution], float]
+        | None = None,
+        checkpoint_interval: float | None = None,
+        resume: bool = False,
     ):
         self.loop_condition = loop_condition
         self.num_parallel_processes = num_parallel_processes
@@ -63,8 +103,17 @@ class RunAllAnalysisEngine:
         self.experiment_name = experiment_name
         self.batch_size = batch_size
         self.max_shots = max_shots
+        self.reuse_pool = reuse_pool
+        self.shot_priority = shot_priority
+        self._pool: ProcessPool | None = None
         if data_directory is not None and not data_directory.is_dir():
             raise NotADirectoryError(data_directory)
+        if (checkpoint_interval is not None or resume) and data_directory is None:
+            msg = "Checkpoints can only be saved and resumed with a data directory."
+            raise ValueError(msg)
+        self.checkpoint_interval = checkpoint_interval
+        self.resume = resume
+        self._last_checkpoint_times: dict[int, float] = {}
 
         self.data_directory = data_directory
         self.decoder_managers = decoder_managers
@@ -105,8 +154,19 @@ class RunAllAnalysisEngine:
             )
         else:
             self._current_experiment_file_path = None
-
-        result_store = self._run_parallel() if self.parallel else self._run_serial()
+        if self.checkpoint_interval is not None:
+            checkpoint_directory = self.construct_checkpoint_directory()
+            checkpoint_directory.mkdir(exist_ok=True)
+            if not self.resume:
+                for checkpoint_path in checkpoint_directory.glob("*.pkl"):
+                    checkpoint_path.unlink()
+
+        if self.shot_priority is not None:
+            result_store = self._run_interleaved()
+        elif self.parallel:
+            result_store = self._run_parallel()
+        else:
+            result_store = self._run_serial()
 
         now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         self.log.info("Experiment finished at %(time)", extra={"time": now})
@@ -117,13 +177,88 @@ class RunAllAnalysisEngine:
         """Helper function to run the decoder managers in parallel using a
         pathos process pool. Returns the list of shot loop results.
         """
-        pool = ProcessPool(nodes=self.num_parallel_processes)
+        self._create_pool()
         # Assumes decoder managers execution is blocking.
         desc = "Evaluating codes"
         fmt = "{l_bar}{bar}{r_bar}\n" if self.log.level else "{l_bar}{bar}{r_bar}"
-        tqdm_iter = tqdm(self.decoder_managers, desc=desc, bar_format=fmt)
-        return [self._shot_loop(decoder_manager, pool=pool)
-                for decoder_manager in tqdm_iter]
+        if not self.reuse_pool:
+            tqdm_iter = tqdm(self.decoder_managers, desc=desc, bar_format=fmt)
+            return [self._shot_loop(decoder_manager, pool=self._pool, index=index)
+                    for index, decoder_manager in enumerate(tqdm_iter)]
+        # Pair each decoder manager with the next, so that the next can be set up
+        # in the pool while the current one decodes.
+        total = (len(self.decoder_managers)
+                 if isinstance(self.decoder_managers, Sized) else None)
+        tqdm_iter = tqdm(pairwise(chain(self.decoder_managers, [None])),
+                         desc=desc, bar_format=fmt, total=total)
+        return [self._shot_loop(decoder_manager, pool=self._pool,
+                                next_decoder_manager=next_decoder_manager,
+                                index=index)
+                for index, (decoder_manager, next_decoder_manager)
+                in enumerate(tqdm_iter)]
+
+    def _run_interleaved(self) -> list[dict[str, Any]]:
+        """Helper function to run batches of shots from all decoder managers,
+        interleaved in order of the shot priority. Returns the list of shot loop
+        results, in the order of the decoder managers.
+        """
+        pool = self._create_pool() if self.parallel else None
+        decoder_managers = list(self.decoder_managers)
+        results: list[dict[str, Any]] = [{} for _ in decoder_managers]
+        started: set[int] = set()
+        running = list(range(len(decoder_managers)))
+        desc = "Evaluating codes"
+        fmt = "{l_bar}{bar}{r_bar}\n" if self.log.level else "{l_bar}{bar}{r_bar}"
+        with tqdm(total=len(decoder_managers), desc=desc, bar_format=fmt) as progress:
+            while running:
+                # Only start another decoder manager in the pool once there is room
+                # for its worker state alongside those of the running ones.
+                active = [i for i in running if i in started]
+                candidates = (running if pool is None
+                              or len(active) < MAX_CACHED_PROCESS_MANAGERS else active)
+                index = max(candidates, key=lambda i: self._scheduling_key(
+                    decoder_managers[i]))
+                decoder_manager = decoder_managers[index]
+                if index not in started:
+                    started.add(index)
+                    self._start_shot_loop(index, decoder_manager, pool)
+                    continue
+                if self._needs_more_shots(decoder_manager) and self._run_next_batch(
+                        decoder_manager, pool):
+                    self._save_checkpoint(index, decoder_manager)
+                else:
+                    running.remove(index)
+                    results[index] = self._finish_shot_loop(index, decoder_manager,
+                                                            pool)
+                    progress.update()
+        return results
+
+    def _scheduling_key(self, decoder_manager: DecoderManager) -> tuple[float, int]:
+        """Key by which the decoder manager to run the next batch of shots is
+        chosen. Ties in shot priority go to the decoder manager with fewest shots.
+        """
+        assert self.shot_priority is not None
+        distribution = decoder_manager.empirical_decoding_error_distribution
+        return self.shot_priority(distribution), -int(distribution.shots)
+
+    def _create_pool(self) -> ProcessPool:
+        """Create the process pool for this run, or reuse the existing pool if the
+        engine reuses its pool.
+        """
+        if self._pool is None or not self.reuse_pool:
+            self._pool = ProcessPool(nodes=self.num_parallel_processes)
+        return self._pool
+
+    def close(self):
+        """Release the process pool kept by an engine that reuses its pool. The
+        engine can still be run afterwards, in which case a new pool is created.
+        """
+        if self._pool is not None:
+            DecoderManager.clear_pool_manager(self._pool, self.num_parallel_processes)
+            self._pool.close()
+            self._pool.join()
+            self._pool.clear()
+            self._pool = None
 
     def _run_serial(self) -> list[dict[str, Any]]:
         """Helper function to run the decoder managers in serial.
@@ -132,7 +267,8 @@ class RunAllAnalysisEngine:
         desc = "Evaluating codes"
         fmt = "{l_bar}{bar}{r_bar}\n" if self.log.level else "{l_bar}{bar}{r_bar}"
         tqdm_iter = tqdm(self.decoder_managers, desc=desc, bar_format=fmt)
-        return [self._shot_loop(decoder_manager) for decoder_manager in tqdm_iter]
+        return [self._shot_loop(decoder_manager, index=index)
+                for index, decoder_manager in enumerate(tqdm_iter)]
 
     def construct_file_path(self) -> Path:
         """Return the file path to be used for the results data."""
@@ -141,6 +277,57 @@ class RunAllAnalysisEngine:
             raise ValueError(msg)
         return self.data_directory / f"{self.experiment_name}.csv"
 
+    def construct_checkpoint_directory(self) -> Path:
+        """Return the directory to be used for checkpoints of decoder managers."""
+        if not self.data_directory:
+            msg = "Cannot construct checkpoint directory as no data directory is specified."
+            raise ValueError(msg)
+        return self.data_directory / f"{self.experiment_name}_checkpoints"
+
+    def _checkpoint_path(self, index: int) -> Path:
+        """Return the path of the checkpoint of the decoder manager at the given
+        position."""
+        return self.construct_checkpoint_directory() / f"{index}.pkl"
+
+    def _load_checkpoint(self, index: int, decoder_manager: DecoderManager):
+        """Restore the progress of the decoder manager at the given position from its
+        checkpoint, if there is one."""
+        checkpoint_path = self._checkpoint_path(index)
+        if not checkpoint_path.exists():
+            return
+        with checkpoint_path.open("rb") as checkpoint_file:
+            checkpoint = dill.load(checkpoint_file)
+        if checkpoint["metadata"] != decoder_manager.metadata:
+            msg = (f"Checkpoint {checkpoint_path} was saved for a decoder manager with "
+                   f"metadata {checkpoint['metadata']}, not "
+                   f"{decoder_manager.metadata}.")
+            raise ValueError(msg)
+        decoder_manager.restore_checkpoint(checkpoint["distribution"],
+                                           checkpoint["reporters"])
+
+    def _save_checkpoint(self, index: int, decoder_manager: DecoderManager,
+                         force: bool = False):
+        """Save the progress of the decoder manager at the given position, if
+        checkpoints are enabled and either `force` is True or the checkpoint
+        interval has passed since it was last saved."""
+        if self.checkpoint_interval is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_checkpoint_times[index] < \
+                self.checkpoint_interval:
+            return
+        distribution, reporters = decoder_manager.get_checkpoint()
+        checkpoint_path = self._checkpoint_path(index)
+        # Write to a temporary file first, so that an interruption while saving
+        # does not corrupt the previous checkpoint.
+        temporary_path = checkpoint_path.with_suffix(".tmp")
+        with temporary_path.open("wb") as checkpoint_file:
+            dill.dump({"metadata": decoder_manager.metadata,
+                       "distribution": distribution,
+                       "reporters": reporters}, checkpoint_file)
+        temporary_path.replace(checkpoint_path)
+        self._last_checkpoint_times[index] = now
+
     def save_results(self, results: list[dict], file_path: Path):
         """Save the results to file and log that the file path was used."""
         pd.DataFrame(results).to_csv(file_path, index=False)
@@ -155,11 +342,37 @@ class RunAllAnalysisEngine:
     def _shot_loop(
         self, decoder_manager: DecoderManager,
         file_save_lock: LockBase | None = None,
-        pool: ProcessPool = None
+        pool: ProcessPool = None,
+        next_decoder_manager: DecoderManager | None = None,
+        index: int = 0,
     ) -> dict[str, Any]:
         """Private helper function for performing a single loop for a given
         noise model, decoder and code. Returns an aggregation of accuracy
-        statistics.
+        statistics. If the pool is reused, the set up of `next_decoder_manager`
+        in the pool is started alongside this loop. `index` is the position of
+        the decoder manager, which identifies its checkpoint.
+        """
+        next_setup = self._start_shot_loop(index, decoder_manager, pool,
+                                           next_decoder_manager)
+        while self._needs_more_shots(decoder_manager):
+            if not self._run_next_batch(decoder_manager, pool):
+                # Finite sources, such as recorded data, can run out of shots.
+                break
+            self._save_checkpoint(index, decoder_manager)
+        if next_setup is not None:
+            next_setup.get()
+        return self._finish_shot_loop(index, decoder_manager, pool, file_save_lock)
+
+    def _start_shot_loop(
+        self, index: int,
+        decoder_manager: DecoderManager,
+        pool: ProcessPool = None,
+        next_decoder_manager: DecoderManager | None = None,
+    ):
+        """Log the start of the shot loop for a decoder manager, restore its
+        progress if resuming and configure the pool with it. If the pool is reused,
+        start setting up `next_decoder_manager` in the pool and return the result to
+        wait on.
         """
         self.log.info(
             "Starting %(decoder_manager) with metadata: %(metadata).",
@@ -168,28 +381,59 @@ class RunAllAnalysisEngine:
                 "metadada": decoder_manager.metadata,
             }
         )
+        if self.resume:
+            self._load_checkpoint(index, decoder_manager)
+        self._last_checkpoint_times[index] = time.monotonic()
         if self.parallel:
-            decoder_manager.configure_pool(pool, self.num_parallel_processes)
-
-        while (remaining_shots := int(
-            self.max_shots
-            - decoder_manager.empirical_decoding_error_distribution.shots)
-        ) > 0 and (self.loop_condition is None or self.loop_condition(
-                decoder_manager.empirical_decoding_error_distribution)):
-            procs_needed = min(self.num_parallel_processes,
-                               remaining_shots//self.batch_size)
-            if self.parallel and procs_needed > 1:
-                decoder_manager.run_batch_shots_parallel(
-                    batch_limit=self.batch_size * procs_needed,
-                    processes=procs_needed,
-                    pool=pool
-                )
-            else:
-                batch_size = min(self.batch_size, remaining_shots)
-                decoder_manager.run_batch_shots(batch_size)
-
-        if self.parallel:
-            decoder_manager.clear_pool_manager(pool, self.num_parallel_processes)
+            decoder_manager.configure_pool(pool, self.num_parallel_processes,
+                                           cache_state=self.reuse_pool)
+            if self.reuse_pool and next_decoder_manager is not None:
+                return next_decoder_manager.prepare_pool(
+                    pool, self.num_parallel_processes)
+        return None
+
+    def _needs_more_shots(self, decoder_manager: DecoderManager) -> bool:
+        """Return whether the decoder manager is below the maximum number of shots
+        and still meets the loop condition.
+        """
+        distribution = decoder_manager.empirical_decoding_error_distribution
+        return distribution.shots < self.max_shots and (
+            self.loop_condition is None or self.loop_condition(distribution))
+
+    def _run_next_batch(self, decoder_manager: DecoderManager,
+                        pool: ProcessPool = None) -> bool:
+        """Run the next batch of shots for the decoder manager, in parallel if
+        there are enough remaining shots. Return False if no shots were run.
+        """
+        shots_before = decoder_manager.empirical_decoding_error_distribution.shots
+        remaining_shots = int(self.max_shots - shots_before)
+        procs_needed = min(self.num_parallel_processes,
+                           remaining_shots//self.batch_size)
+        if self.parallel and procs_needed > 1:
+            decoder_manager.run_batch_shots_parallel(
+                batch_limit=self.batch_size * procs_needed,
+                processes=procs_needed,
+                pool=pool
+            )
+        else:
+            batch_size = min(self.batch_size, remaining_shots)
+            decoder_manager.run_batch_shots(batch_size)
+        return decoder_manager.empirical_decoding_error_distribution.shots != \
+            shots_before
+
+    def _finish_shot_loop(
+        self, index: int,
+        decoder_manager: DecoderManager,
+        pool: ProcessPool = None,
+        file_save_lock: LockBase | None = None,
+    ) -> dict[str, Any]:
+        """Checkpoint the decoder manager, remove it from the pool unless the pool
+        is reused, and log, save and return its results. Other decoder managers
+        interleaved with it are kept in the pool.
+        """
+        self._save_checkpoint(index, decoder_manager, force=True)
+        if self.parallel and not self.reuse_pool:
+            decoder_manager.remove_from_pool(pool, self.num_parallel_processes)
 
         self.log.info(
             "Finished %(decoder_manager) with metadata: %(metadata).",
@@ -244,25 +488,61 @@ class RunAllAnalysisEngine:
         """
 
         def loop_cond(empirical_decoding_error_distribution):
-            rse = 0
-            shots = empirical_decoding_error_distribution.shots
-            if shots == 0:
+            if empirical_decoding_error_distribution.shots == 0:
                 return True
+            rse, min_fails_any_observable = _max_rse_and_min_fails(
+                empirical_decoding_error_distribution)
+            return rse > target_rse or min_fails_any_observable < min_fails
 
-            fails_per_observable = (
-                empirical_decoding_error_distribution.fails_per_logical
-            )
+        return loop_cond
 
-            min_fails_any_observable = fails_per_observable[0]
-            for log_fails in fails_per_observable:
-                lep = log_fails / shots
-                min_fails_any_observable = min(min_fails_any_observable, log_fails)
+    @staticmethod
+    def priority_by_observable_rse(target_rse: float, min_fails: int):
+        """Prioritise decoder managers by how far they are from meeting the
+        stopping criteria of `loop_until_observable_rse_below_threshold`, for use
+        as the `shot_priority`. The priority is the larger of the RSE as a multiple
+        of the target RSE and `min_fails` as a multiple of the fails of the
+        observable with fewest fails, so it is above 1 until both criteria are met.
+        Decoder managers that have not run any shots have infinite priority.
 
-                if lep == 0:
-                    continue
+        Parameters
+        ----------
+        target_rse : float
+            Target Relative Standard Error (RSE) for early stopping.
+        min_fails : int
+            Minimum number of fails before starting to look at RSE.
+        """
 
-                rse_log = np.sqrt(lep * (1 - lep) / shots) / lep
-                rse = max(rse, rse_log)
-            return rse > target_rse or min_fails_any_observable < min_fails
+        def priority(empirical_decoding_error_distribution) -> float:
+            if empirical_decoding_error_distribution.shots == 0:
+                return float("inf")
+            rse, min_fails_any_observable = _max_rse_and_min_fails(
+                empirical_decoding_error_distribution)
+            return max(rse / target_rse,
+                       min_fails / max(min_fails_any_observable, 1))
 
-        return loop_cond
+        return priority
+
+
+def _max_rse_and_min_fails(
+    empirical_decoding_error_distribution: EmpiricalDecodingErrorDistribution,
+) -> tuple[float, int]:
+    """Return the largest relative standard error on the LEP of any observable, and
+    the fewest fails of any observable. Observables without fails are not included
+    in the relative standard error.
+    """
+    rse = 0
+    shots = empirical_decoding_error_distribution.shots
+    fails_per_observable = empirical_decoding_error_distribution.fails_per_logical
+
+    min_fails_any_observable = fails_per_observable[0]
+    for log_fails in fails_per_observable:
+        lep = log_fails / shots
+        min_fails_any_observable = min(min_fails_any_observable, log_fails)
+
+        if lep == 0:
+            continue
+
+        rse_log = np.sqrt(lep * (1 - lep) / shots) / lep
+        rse = max(rse, rse_log)
+    return rse, min_fails_any_observable
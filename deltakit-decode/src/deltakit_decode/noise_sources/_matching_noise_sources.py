@@ -4,15 +4,16 @@ from __future__ import annotations
 from collections import Counter, defaultdict
 from collections.abc import Callable, Iterable, Iterator, Sequence
 from decimal import Decimal
-from functools import partial
 from itertools import chain, combinations, product, repeat
 from math import comb, floor, prod
 from typing import Any, ClassVar, TypeAlias
 
 import numpy as np
+import numpy.typing as npt
 from deltakit_core.decoding_graphs import EdgeT, HyperMultiGraph, OrderedDecodingEdges
 
 from deltakit_decode.noise_sources._generic_noise_sources import (
+    BatchErrorGenerator,
     CombinedSequences,
     MonteCarloNoise,
     SequentialNoise,
@@ -27,6 +28,10 @@ def _empty_generator() -> Iterator[OrderedDecodingEdges]:
 
 EdgeFilterT: TypeAlias = Callable[[HyperMultiGraph], Sequence[EdgeT]]
 
+# Maximum number of random numbers drawn at once when sampling batches of errors, to
+# bound the memory used for large graphs and batches.
+_MAX_RANDOM_CHUNK_SIZE = 2**20
+
 
 class NoNoiseMatchingSequence(SequentialNoise[HyperMultiGraph,
                                               OrderedDecodingEdges]):
@@ -274,6 +279,10 @@ class EdgeProbabilityMatchingNoise(IndependentMatchingNoise):
     error occurs on the edge if the edge's p_err is greater than this random
     variable. Therefore edges with higher p_err have more chance of being
     selected.
+
+    Batches of errors are sampled as boolean arrays over all edges of the graph,
+    which `GraphDecoderManager` decodes without converting each shot to edge
+    objects.
     """
 
     def __init__(self, edge_filter: EdgeFilterT | None = None):
@@ -298,6 +307,38 @@ class EdgeProbabilityMatchingNoise(IndependentMatchingNoise):
             yield OrderedDecodingEdges(filtered_edges[selected_edges],
                                        mod_2_filter=False)
 
+    def build_batch_error_generator(
+        self,
+        code_data: HyperMultiGraph,
+        seed: int | None = None
+    ) -> BatchErrorGenerator[npt.NDArray[np.bool_]]:
+        """Given a decoding graph, return a generator of batches of errors on its
+        edges. Each batch is a boolean array of shape `(batch_size, len(edges))`,
+        where entry ``(i, j)`` is True if the `j`-th edge of `code_data.edges` has an
+        error in shot `i`.
+
+        The random numbers are drawn in the same order as in `error_generator`, so
+        for the same seed the batches contain the same errors as its shots.
+        """
+        rng = self.get_rng(seed)
+        edge_indices = {edge: index for index, edge in enumerate(code_data.edges)}
+        filtered = list(self.edge_filter(code_data))
+        columns = np.array([edge_indices[edge] for edge in filtered], dtype=np.intp)
+        edge_probabilities = np.array([code_data.edge_records[edge].p_err
+                                       for edge in filtered])
+        rows_per_chunk = max(1, _MAX_RANDOM_CHUNK_SIZE // max(len(columns), 1))
+
+        def generate_batch(batch_size: int) -> npt.NDArray[np.bool_]:
+            batch_size = int(batch_size)
+            errors = np.zeros((batch_size, len(edge_indices)), dtype=np.bool_)
+            for start in range(0, batch_size, rows_per_chunk):
+                stop = min(start + rows_per_chunk, batch_size)
+                errors[start:stop, columns] = (
+                    rng.random((stop - start, len(columns))) < edge_probabilities)
+            return errors
+
+        return BatchErrorGenerator(generate_batch)
+
     def importance_sampling_decomposition(
         self,
         code_data: HyperMultiGraph,
@@ -495,11 +536,15 @@ class AdditiveSequentialMatchingNoise(
         code_data: HyperMultiGraph,
         seed: int | None = None
     ) -> Iterator[OrderedDecodingEdges]:
-        error_generators = (
-            partial(model.error_generator, code_data, seed_)
-            for model, seed_ in zip(self.internal_sources, offset_seed(seed))
-        )
-        for error in CombinedSequences._lazy_product(*error_generators):
+        inner_data = list(zip(self.internal_sources, offset_seed(seed)))
+
+        def _get_gen(inner_id: int, _: int
+                     ) -> tuple[Iterator[OrderedDecodingEdges], int]:
+            model, seed_ = inner_data[inner_id]
+            return (model.error_generator(code_data, seed_),
+                    model.sequence_size(code_data))
+
+        for error in CombinedSequences._lazy_product(_get_gen, (0,) * len(inner_data)):
             yield OrderedDecodingEdges(chain.from_iterable(error))
 
     def sequence_size(self, code_data: Any) -> int:
@@ -9,7 +9,7 @@ import deltakit_circuit as sp
 import numpy as np
 import numpy.typing as npt
 import stim
-from deltakit_core.decoding_graphs import OrderedSyndrome
+from deltakit_core.decoding_graphs import OrderedSyndrome, SyndromeBatch
 
 from deltakit_decode.noise_sources._generic_noise_sources import (
     BatchErrorGenerator,
@@ -106,14 +106,25 @@ class StimNoise(MonteCarloNoise[stim.Circuit,
         self,
         code_data: stim.Circuit,
         seed: int | None = None
-    ) -> BatchErrorGenerator:
+    ) -> BatchErrorGenerator[tuple[SyndromeBatch, npt.NDArray[np.uint8]]]:
         """Given some representation of a code, return a generator of batches of errors
-        for that code.
+        for that code. Each batch is a bit-packed `SyndromeBatch` of the detectors, as
+        sampled by Stim, and an array of the observable flips of each shot.
         """
         stim_circuit = self.permute_stim_circuit(code_data)
         sampler = stim_circuit.compile_detector_sampler(seed=seed)
-        return BatchErrorGenerator(
-            lambda num_shots: sampler.sample(num_shots, separate_observables=True))
+        num_detectors = stim_circuit.num_detectors
+        num_observables = stim_circuit.num_observables
+
+        def generate_batch(num_shots: int
+                           ) -> tuple[SyndromeBatch, npt.NDArray[np.uint8]]:
+            detectors, observables = sampler.sample(
+                num_shots, separate_observables=True, bit_packed=True)
+            return (SyndromeBatch(detectors, num_detectors, bit_packed=True),
+                    np.unpackbits(observables, axis=1, count=num_observables,
+                                  bitorder="little"))
+
+        return BatchErrorGenerator(generate_batch)
 
     def __add__(self, other):
         raise NotImplementedError()
@@ -289,10 +300,9 @@ def stim_batch_to_decode_batch(
     Tuple[OrderedSyndrome, Tuple[bool, ...]]
         The syndrome and reference logicals for the given sample.
     """
-    for sample in detector_batch:
-        if num_observables:
-            detectors, observables = sample[:-num_observables], sample[-num_observables:]
-        else:
-            detectors, observables = sample, []
-        yield (OrderedSyndrome.from_bitstring(detectors),
-               tuple(bool(observable) for observable in observables))
+    detector_batch = np.asarray(detector_batch, dtype=np.uint8)
+    num_detectors = detector_batch.shape[1] - num_observables
+    syndromes = SyndromeBatch(detector_batch[:, :num_detectors])
+    observables = detector_batch[:, num_detectors:].astype(np.bool_).tolist()
+    for syndrome, observable in zip(syndromes, observables, strict=True):
+        yield syndrome, tuple(observable)
@@ -1,10 +1,17 @@
 # (c) Copyright Riverlane 2020-2025.
 """Description of ``deltakit.decode.utils`` namespace here."""
 
+from deltakit_decode.utils._build_cache import (
+                                                     BuildCache,
+                                                     get_build_cache,
+                                                     set_build_cache,
+)
 from deltakit_decode.utils._decoding_graph_visualiser import VisDecodingGraph3D
 from deltakit_decode.utils._derivation_tools import (
                                                      create_correlation_matrix,
                                                      generate_expectation_data,
+                                                     generate_expectation_data_from_b8,
+                                                     generate_expectation_data_from_batches,
 )
 from deltakit_decode.utils._derivation_tools_pij import (
                                                      calculate_pij_values,
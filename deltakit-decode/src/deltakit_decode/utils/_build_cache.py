@@ -0,0 +1,282 @@
+# (c) Copyright Riverlane 2020-2025.
+"""Content-addressed on-disk cache of the objects built from Stim circuits, such as
+detector error models, decoding graphs and matchers.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import tempfile
+import zipfile
+from collections.abc import Callable, Iterator
+from functools import cache
+from pathlib import Path
+from typing import Any, TypeVar
+
+import numpy as np
+import numpy.typing as npt
+import stim
+
+BUILD_CACHE_VARIABLE = "DELTAKIT_BUILD_CACHE"
+BUILD_CACHE_MAX_BYTES_VARIABLE = "DELTAKIT_BUILD_CACHE_MAX_BYTES"
+
+
+class BuildCache:
+    """Cache of arrays built from Stim circuits, stored on disk so that builds are
+    shared between processes and between runs. Entries are keyed by a hash of the
+    text of the Stim circuit together with the options of the builder, so a change
+    to either gives a new entry.
+
+    Each entry is a ``.npz`` file in `directory`. Entries are written to a
+    temporary file which is then atomically renamed, so pool workers can read and
+    write the cache at the same time without seeing partial entries. When the
+    entries exceed `max_bytes`, those least recently used are removed.
+
+    Parameters
+    ----------
+    directory : Union[str, Path]
+        Directory to store entries in, which is created if it does not exist.
+    max_bytes : int, optional
+        Maximum total size of the entries, by default 1 GiB.
+    """
+
+    # Changed whenever the arrays stored by the builders change, so that entries
+    # written by other versions are not read.
+    _FORMAT_VERSION = 1
+
+    def __init__(self, directory: str | Path, max_bytes: int = 2**30):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def key(cls, stim_circuit: stim.Circuit | str, **options: Any) -> str:
+        """Key of the entry built from a Stim circuit with the given builder
+        options. Options must have a deterministic `repr`.
+
+        Parameters
+        ----------
+        stim_circuit : Union[stim.Circuit, str]
+            Stim circuit that the entry is built from, or other text such as a
+            detector error model. The arguments of instructions, such as noise
+            probabilities, are hashed at full precision.
+        **options : Any
+            Options of the builder, which should include the name of the builder.
+
+        Returns
+        -------
+        str
+            Hexadecimal SHA-256 hash of the circuit and options.
+        """
+        digest = hashlib.sha256(str(stim_circuit).encode())
+        if isinstance(stim_circuit, stim.Circuit):
+            digest.update(_gate_args(stim_circuit).tobytes())
+        digest.update(repr((cls._FORMAT_VERSION, sorted(options.items()))).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        """Last use time, size and path of each entry."""
+        entries = []
+        for path in self.directory.glob("*.npz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    @property
+    def size_bytes(self) -> int:
+        """Total size of the entries in bytes."""
+        return sum(size for _, size, _ in self._entries())
+
+    def __len__(self) -> int:
+        return len(self._entries())
+
+    def __contains__(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def load(self, key: str) -> dict[str, npt.NDArray] | None:
+        """Load the arrays of an entry and mark it as recently used.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry, as given by `key`.
+
+        Returns
+        -------
+        Optional[Dict[str, npt.NDArray]]
+            Arrays of the entry, or None if there is no such entry or it can not be
+            read.
+        """
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (OSError, EOFError, ValueError, zipfile.BadZipFile):
+            return None
+        return arrays
+
+    def save(self, key: str, arrays: dict[str, npt.ArrayLike]):
+        """Store arrays as an entry, replacing any existing entry with the same
+        key, then remove the least recently used entries if the cache is too large.
+
+        Parameters
+        ----------
+        key : str
+            Key of the entry, as given by `key`.
+        arrays : Dict[str, npt.ArrayLike]
+            Arrays to store, which must not be object arrays.
+        """
+        with tempfile.NamedTemporaryFile(dir=self.directory, suffix=".tmp",
+                                         delete=False) as temp_file:
+            temp_path = Path(temp_file.name)
+            try:
+                np.savez(temp_file, **arrays)
+            except BaseException:
+                temp_file.close()
+                temp_path.unlink(missing_ok=True)
+                raise
+        temp_path.replace(self._path(key))
+        self._evict()
+
+    def _evict(self):
+        entries = self._entries()
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                path.unlink(missing_ok=True)
+            except OSError:
+                # Entries open in other processes can not be removed on Windows.
+                continue
+            total_bytes -= size
+
+    def clear(self):
+        """Remove all entries, including any partially written ones."""
+        for path in [*self.directory.glob("*.npz"), *self.directory.glob("*.tmp")]:
+            path.unlink(missing_ok=True)
+
+
+def _gate_args(circuit: stim.Circuit) -> npt.NDArray[np.float64]:
+    """Arguments of all instructions of a circuit in order, as the text of a circuit
+    only gives them to a few significant figures."""
+    return np.array([
+        arg
+        for instruction in circuit
+        for arg in (_gate_args(instruction.body_copy())
+                    if isinstance(instruction, stim.CircuitRepeatBlock)
+                    else instruction.gate_args_copy())
+    ], dtype=np.float64)
+
+
+def _with_gate_args(circuit: stim.Circuit, gate_args: Iterator[float]) -> stim.Circuit:
+    """Copy of a circuit with the arguments of its instructions taken in order from
+    `gate_args`."""
+    exact_circuit = stim.Circuit()
+    for instruction in circuit:
+        if isinstance(instruction, stim.CircuitRepeatBlock):
+            exact_circuit.append(stim.CircuitRepeatBlock(
+                instruction.repeat_count,
+                _with_gate_args(instruction.body_copy(), gate_args)))
+            continue
+        # Tags were added to instructions in Stim 1.15.
+        tag = getattr(instruction, "tag", "")
+        exact_circuit.append(stim.CircuitInstruction(
+            instruction.name,
+            instruction.targets_copy(),
+            [next(gate_args) for _ in instruction.gate_args_copy()],
+            **({"tag": tag} if tag else {})))
+    return exact_circuit
+
+
+def _circuit_to_arrays(circuit: stim.Circuit) -> dict[str, npt.NDArray]:
+    """Arrays of a Stim circuit which can be stored in a `BuildCache`."""
+    return {"circuit": _text_to_array(str(circuit)), "gate_args": _gate_args(circuit)}
+
+
+def _circuit_from_arrays(arrays: dict[str, npt.NDArray]) -> stim.Circuit:
+    """Rebuild a Stim circuit stored with `_circuit_to_arrays`."""
+    return _with_gate_args(stim.Circuit(_array_to_text(arrays["circuit"])),
+                           iter(arrays["gate_args"].tolist()))
+
+
+def _text_to_array(text: str) -> npt.NDArray[np.uint8]:
+    """Encode text as an array of bytes which can be stored in a `BuildCache`."""
+    return np.frombuffer(text.encode(), dtype=np.uint8)
+
+
+def _array_to_text(array: npt.NDArray[np.uint8]) -> str:
+    """Decode text stored with `_text_to_array`."""
+    return array.tobytes().decode()
+
+
+T = TypeVar("T")
+
+
+def _cached_build(stim_circuit: stim.Circuit,
+                  build: Callable[[], T],
+                  to_arrays: Callable[[T], dict[str, npt.ArrayLike]],
+                  from_arrays: Callable[[dict[str, npt.NDArray]], T],
+                  **options: Any) -> T:
+    """Load the result of a build from the cache given by `get_build_cache`, or
+    build it and store it there. Without a cache, this just builds the result.
+    """
+    build_cache = get_build_cache()
+    if build_cache is None:
+        return build()
+    key = build_cache.key(stim_circuit, **options)
+    if (arrays := build_cache.load(key)) is not None:
+        return from_arrays(arrays)
+    result = build()
+    build_cache.save(key, to_arrays(result))
+    return result
+
+
+def set_build_cache(cache: BuildCache | str | Path | None):
+    """Set the cache used by builders such as `parse_stim_circuit` and
+    `PyMatchingDecoder.construct_decoder_and_stim_circuit`. The cache is set in
+    the ``DELTAKIT_BUILD_CACHE`` and ``DELTAKIT_BUILD_CACHE_MAX_BYTES`` environment
+    variables, so processes started from this one, such as pool workers, use the
+    same cache.
+
+    Parameters
+    ----------
+    cache : Union[BuildCache, str, Path, None]
+        Cache, or directory of a cache with the default size, to use. None stops
+        builders from using a cache.
+    """
+    if cache is None:
+        os.environ.pop(BUILD_CACHE_VARIABLE, None)
+        os.environ.pop(BUILD_CACHE_MAX_BYTES_VARIABLE, None)
+        return
+    if not isinstance(cache, BuildCache):
+        cache = BuildCache(cache)
+    os.environ[BUILD_CACHE_VARIABLE] = str(cache.directory)
+    os.environ[BUILD_CACHE_MAX_BYTES_VARIABLE] = str(cache.max_bytes)
+
+
+@cache
+def _open_build_cache(directory: str, max_bytes: int) -> BuildCache:
+    return BuildCache(directory, max_bytes)
+
+
+def get_build_cache() -> BuildCache | None:
+    """Get the cache used by builders, as set by `set_build_cache` or by the
+    ``DELTAKIT_BUILD_CACHE`` environment variable. By default, no cache is used.
+
+    Returns
+    -------
+    Optional[BuildCache]
+    """
+    directory = os.environ.get(BUILD_CACHE_VARIABLE)
+    if not directory:
+        return None
+    max_bytes = os.environ.get(BUILD_CACHE_MAX_BYTES_VARIABLE)
+    return _open_build_cache(directory, 2**30 if max_bytes is None else int(max_bytes))
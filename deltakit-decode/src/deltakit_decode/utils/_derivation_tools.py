@@ -1,43 +1,333 @@
 # (c) Copyright Riverlane 2020-2025.
 
-import math
+from __future__ import annotations
+
 from collections import Counter, defaultdict
-from collections.abc import Collection, Generator, Iterable, Iterator, Sequence
+from collections.abc import Collection, Generator, Iterable, Iterator
+from functools import cache, partial
 from itertools import chain, combinations, islice, product
+from pathlib import Path
 from warnings import warn
 
 import numpy as np
 import numpy.typing as npt
 import pathos
-from deltakit_core.decoding_graphs import NXDecodingGraph
+from deltakit_core.data_formats import b8_num_shots, b8_to_syndrome_batches
+from deltakit_core.decoding_graphs import NXDecodingGraph, SyndromeBatch
 
 PijData = dict[frozenset[int], float]
 
+# Maximum number of elements of a detector matrix converted to floating point at
+# once for a BLAS product. As each chunk has at most this many rows, the counts of
+# each chunk are exact in single precision.
+_MAX_CHUNK_ELEMENTS = 2**24
+# Number of samples given as lists of detectors converted to a matrix at once.
+_SAMPLES_BATCH_SIZE = 10000
+
+
+@cache
+def _combination_indices(weight: int, degree: int) -> npt.NDArray[np.intp]:
+    """Indices of each combination of `degree` elements out of `weight`."""
+    return np.array(list(combinations(range(weight), degree)), dtype=np.intp)
+
+
+def _key_bits(degree: int) -> int:
+    """Number of bits given to each detector in the integer key of a combination of
+    `degree` detectors, so that keys fit in 64 bits."""
+    return 64 // degree
+
+
+def _combinations_to_keys(
+        detectors: npt.NDArray[np.intp]) -> npt.NDArray[np.uint64]:
+    """Pack the detectors along the last axis of `detectors` into integer keys, in
+    increasing order from the most significant bits. Each detector must be less
+    than ``2 ** _key_bits(degree)``."""
+    bits = np.uint64(_key_bits(detectors.shape[-1]))
+    keys = np.zeros(detectors.shape[:-1], dtype=np.uint64)
+    for column in range(detectors.shape[-1]):
+        keys <<= bits
+        keys |= detectors[..., column].astype(np.uint64)
+    return keys
+
+
+def _keys_to_combinations(keys: npt.NDArray[np.uint64],
+                          degree: int) -> npt.NDArray[np.int64]:
+    """Unpack integer keys into arrays of shape (number of keys, degree)."""
+    bits = _key_bits(degree)
+    shifts = np.arange(degree - 1, -1, -1, dtype=np.uint64) * np.uint64(bits)
+    return ((keys[:, None] >> shifts) & np.uint64(2**bits - 1)).astype(np.int64)
+
+
+class _DetectorCombinationCounts:
+    """Number of shots in which each combination of up to `max_degree` detectors
+    all fired, accumulated over batches of shots given as detector matrices.
+
+    Single detectors are counted with column sums into a dense array. Pairs are
+    counted with the product ``X.T @ X`` of the columns of each detector matrix
+    ``X`` which have fired, into a dense array over the detectors which have fired
+    in the order they first fired, so memory does not grow with the largest
+    detector index. Higher degree combinations are counted sparsely from the
+    shots with enough detection events, as sorted arrays of the integer keys of
+    observed combinations and their counts. Combinations with detectors too large
+    for their keys are counted as tuples instead.
+
+    Parameters
+    ----------
+    max_degree : int
+        Maximum degree of combinations to count.
+    num_detectors : int, optional
+        Number of detectors to allocate counts for. Counts grow to fit wider
+        batches, so this is 0 by default.
+    """
+
+    def __init__(self, max_degree: int, num_detectors: int = 0):
+        self.max_degree = max_degree
+        self.num_shots = 0
+        self.singles = np.zeros(0, dtype=np.int64)
+        # Position of each detector in the pair counts, or -1 if it has not fired,
+        # and the detector at each position.
+        self._pair_positions = np.zeros(0, dtype=np.intp)
+        self._pair_detectors = np.zeros(0, dtype=np.intp)
+        self._num_pair_detectors = 0
+        self.pairs = np.zeros((0, 0), dtype=np.int64)
+        # Unique keys and counts of higher degree combinations of parts of the
+        # shots, which are only combined when needed to amortise sorting.
+        self._higher_parts: dict[int, list[tuple[npt.NDArray[np.uint64],
+                                                 npt.NDArray[np.int64]]]] = {
+            degree: [] for degree in range(3, max_degree + 1)}
+        self._higher_overflow: dict[int, Counter[tuple[int, ...]]] = {
+            degree: Counter() for degree in range(3, max_degree + 1)}
+        self._resize(num_detectors)
+
+    def _resize(self, num_detectors: int):
+        old_num_detectors = len(self.singles)
+        if num_detectors <= old_num_detectors:
+            return
+        singles = np.zeros(num_detectors, dtype=np.int64)
+        singles[:old_num_detectors] = self.singles
+        self.singles = singles
+        pair_positions = np.full(num_detectors, -1, dtype=np.intp)
+        pair_positions[:old_num_detectors] = self._pair_positions
+        self._pair_positions = pair_positions
+
+    def _get_pair_positions(
+            self, detectors: npt.NDArray[np.intp]) -> npt.NDArray[np.intp]:
+        """Positions of the given distinct detectors in the pair counts, giving
+        positions to those which have not fired before."""
+        positions = self._pair_positions[detectors]
+        new_detectors = detectors[positions < 0]
+        if len(new_detectors) == 0:
+            return positions
+        start = self._num_pair_detectors
+        stop = start + len(new_detectors)
+        if stop > len(self._pair_detectors):
+            capacity = max(stop, 2 * len(self._pair_detectors))
+            pairs = np.zeros((capacity, capacity), dtype=np.int64)
+            pairs[:start, :start] = self.pairs[:start, :start]
+            self.pairs = pairs
+            pair_detectors = np.zeros(capacity, dtype=np.intp)
+            pair_detectors[:start] = self._pair_detectors[:start]
+            self._pair_detectors = pair_detectors
+        self._pair_detectors[start:stop] = new_detectors
+        self._pair_positions[new_detectors] = np.arange(start, stop)
+        self._num_pair_detectors = stop
+        return self._pair_positions[detectors]
+
+    def _add_pairs(self, detectors: npt.NDArray[np.intp],
+                   counts: npt.NDArray[np.int64]):
+        """Add counts of pairs of the given distinct detectors, indexed by the
+        position of each detector in `detectors`."""
+        positions = self._get_pair_positions(detectors)
+        first = positions[0]
+        if np.array_equal(positions, np.arange(first, first + len(positions))):
+            self.pairs[first:first + len(positions),
+                       first:first + len(positions)] += counts
+        else:
+            self.pairs[np.ix_(positions, positions)] += counts
+
+    def add_batch(self, batch: npt.NDArray[np.uint8],
+                  detectors: npt.NDArray[np.intp] | None = None):
+        """Count the combinations in a dense batch of shape
+        (number of shots, number of columns), where each element is a 1 or 0.
+        Columns are the given detectors, in increasing order, or all detectors
+        from 0 if none are given.
+        """
+        num_shots, num_columns = batch.shape
+        if detectors is None:
+            detectors = np.arange(num_columns, dtype=np.intp)
+        self._resize(int(detectors[-1]) + 1 if num_columns else 0)
+        self.num_shots += num_shots
+        if num_columns == 0:
+            return
+        rows_per_chunk = max(_MAX_CHUNK_ELEMENTS // num_columns, 1)
+        for offset in range(0, num_shots, rows_per_chunk):
+            chunk = batch[offset:offset + rows_per_chunk] != 0
+            column_counts = np.count_nonzero(chunk, axis=0)
+            self.singles[detectors] += column_counts
+            if self.max_degree >= 2:
+                fired_columns = np.flatnonzero(column_counts)
+                if len(fired_columns) != 0:
+                    matrix = chunk[:, fired_columns].astype(np.float32)
+                    self._add_pairs(detectors[fired_columns],
+                                    (matrix.T @ matrix).astype(np.int64))
+            if self.max_degree >= 3:
+                self._add_higher_degrees(chunk, detectors)
+
+    def _add_higher_degrees(self, chunk: npt.NDArray[np.bool_],
+                            detectors: npt.NDArray[np.intp]):
+        weights = np.count_nonzero(chunk, axis=1)
+        for weight in np.unique(weights[weights >= 3]).tolist():
+            # Detectors of each shot of this weight, in increasing order
+            fired = detectors[np.nonzero(chunk[weights == weight])[1]].reshape(
+                -1, weight)
+            for degree in range(3, min(weight, self.max_degree) + 1):
+                indices = _combination_indices(weight, degree)
+                rows_per_part = max(_MAX_CHUNK_ELEMENTS // indices.size, 1)
+                for offset in range(0, len(fired), rows_per_part):
+                    combined = fired[offset:offset + rows_per_part][:, indices]
+                    # The last detector of each combination is the largest
+                    packable = combined[..., -1] < 2**_key_bits(degree)
+                    if not packable.all():
+                        self._higher_overflow[degree].update(
+                            map(tuple, combined[~packable].tolist()))
+                        combined = combined[packable]
+                    keys = _combinations_to_keys(combined)
+                    self._add_higher_part(degree,
+                                          *np.unique(keys, return_counts=True))
+
+    def _add_higher_part(self, degree: int, keys: npt.NDArray[np.uint64],
+                         counts: npt.NDArray[np.int64]):
+        parts = self._higher_parts[degree]
+        parts.append((keys, counts))
+        if sum(len(part_keys) for part_keys, _ in parts) > _MAX_CHUNK_ELEMENTS:
+            self._combine_higher_parts(degree)
+
+    def _combine_higher_parts(
+        self, degree: int
+    ) -> tuple[npt.NDArray[np.uint64], npt.NDArray[np.int64]]:
+        parts = self._higher_parts[degree]
+        if len(parts) != 1:
+            keys, inverse = np.unique(
+                np.concatenate([keys for keys, _ in parts] or
+                               [np.zeros(0, dtype=np.uint64)]),
+                return_inverse=True)
+            counts = np.zeros(len(keys), dtype=np.int64)
+            np.add.at(counts, inverse,
+                      np.concatenate([counts for _, counts in parts] or
+                                     [np.zeros(0, dtype=np.int64)]))
+            parts[:] = [(keys, counts)]
+        return parts[0]
+
+    def merge(self, other: _DetectorCombinationCounts):
+        """Add the counts of another set of shots to these counts."""
+        num_detectors = len(other.singles)
+        self._resize(num_detectors)
+        self.num_shots += other.num_shots
+        self.singles[:num_detectors] += other.singles
+        num_pair_detectors = other._num_pair_detectors
+        if num_pair_detectors != 0:
+            self._add_pairs(other._pair_detectors[:num_pair_detectors],
+                            other.pairs[:num_pair_detectors, :num_pair_detectors])
+        for degree, parts in other._higher_parts.items():
+            for keys, counts in parts:
+                self._add_higher_part(degree, keys, counts)
+        for degree, overflow in other._higher_overflow.items():
+            self._higher_overflow[degree].update(overflow)
+
+    def to_expectation_data(self) -> PijData:
+        """Divide the counts of combinations which were observed by the number of
+        shots to give their expectation values."""
+        if self.num_shots == 0:
+            return {}
+        detectors = np.flatnonzero(self.singles)
+        num_pair_detectors = self._num_pair_detectors
+        pair_positions = np.argwhere(np.triu(
+            self.pairs[:num_pair_detectors, :num_pair_detectors], 1))
+        combinations_and_counts = [
+            (detectors[:, None], self.singles[detectors]),
+            (self._pair_detectors[pair_positions],
+             self.pairs[pair_positions[:, 0], pair_positions[:, 1]])]
+        for degree in self._higher_parts:
+            keys, counts = self._combine_higher_parts(degree)
+            combinations_and_counts.append(
+                (_keys_to_combinations(keys, degree), counts))
+        expectation_values: PijData = {}
+        for combined_detectors, counts in combinations_and_counts:
+            expectation_values.update(zip(
+                map(frozenset, combined_detectors.tolist()),
+                (counts / self.num_shots).tolist(), strict=True))
+        for overflow in self._higher_overflow.values():
+            expectation_values.update(
+                (frozenset(combination), count / self.num_shots)
+                for combination, count in overflow.items())
+        return expectation_values
+
+
+def _samples_to_batches(
+    samples: Iterable[Iterable[int]],
+) -> Iterator[tuple[npt.NDArray[np.uint8], npt.NDArray[np.intp]]]:
+    """Convert samples given as the detectors which fired in each shot to dense
+    matrices over the detectors which fired in each batch, given with those
+    detectors in increasing order."""
+    samples = iter(samples)
+    while batch := [list(sample)
+                    for sample in islice(samples, _SAMPLES_BATCH_SIZE)]:
+        sample_lengths = [len(sample) for sample in batch]
+        detectors, columns = np.unique(
+            np.fromiter(chain.from_iterable(batch), dtype=np.intp,
+                        count=sum(sample_lengths)),
+            return_inverse=True)
+        dense = np.zeros((len(batch), len(detectors)), dtype=np.uint8)
+        dense[np.repeat(np.arange(len(batch)), sample_lengths), columns] = 1
+        yield dense, detectors
+
 
 def _compute_combinations_of_detectors(
-        samples: Collection,
+        samples: Iterable[Iterable[int]],
         max_degree: int = 2,
-) -> Counter:
-    """Calculate combinations of detectors for a
+) -> _DetectorCombinationCounts:
+    """Count combinations of detectors for a
     given set of samples of detectors.
     Parameters
     ----------
-    samples : Collection[Collection[int]]
+    samples : Iterable[Iterable[int]]
         Sample data from which to calculate combinations
     max_degree : int
         Maximum degree of (hyper)edges/combinations to consider.
     Returns
     -------
-    Counter
-        Counter object containing the combinations of detectors
+    _DetectorCombinationCounts
+        Counts of the combinations of detectors
         observed in the samples.
     """
-    return Counter(
-        chain.from_iterable(
-            combinations(s, weight)
-            for s in samples for weight in range(1, max_degree + 1)
-        )
-    )
+    counts = _DetectorCombinationCounts(max_degree)
+    for batch, detectors in _samples_to_batches(samples):
+        counts.add_batch(batch, detectors)
+    return counts
+
+
+def _get_num_processes(num_processes: int) -> int:
+    if num_processes <= 0:
+        if num_processes == -1:
+            return pathos.helpers.mp.cpu_count()
+        warn("num_processes 0 or < -1, falling back to using single process.",
+             UserWarning,
+             stacklevel=4)
+        return 1
+    return num_processes
+
+
+def _get_parity(only_even: bool, only_odd: bool) -> int | None:
+    """Parity of the indices of the shots to select, or None to select all."""
+    if only_even and only_odd:
+        warn("Both only_odd and only_even are True. Selecting whole batch.",
+             stacklevel=4)
+        return None
+    if only_even:
+        return 0
+    if only_odd:
+        return 1
+    return None
 
 
 def _generate_expectation_data_multiprocess(
@@ -47,22 +337,11 @@ def _generate_expectation_data_multiprocess(
     max_degree: int = 2,
     num_processes: int = -1,
 ) -> PijData:
-    if num_processes <= 0:
-        if num_processes == -1:
-            num_processes = pathos.helpers.mp.cpu_count()
-        else:
-            warn("num_processes 0 or < -1, falling back to using single process.",
-                 UserWarning,
-                 stacklevel=3)
-            num_processes = 1
-
-    if only_even and not only_odd:
-        samples = list(islice(samples, 0, len(samples), 2))
-    if only_odd and not only_even:
-        samples = list(islice(samples, 1, len(samples), 2))
-    elif only_even and only_odd:
-        warn("Both only_odd and only_even are True. Selecting whole batch.",
-             stacklevel=3)
+    num_processes = _get_num_processes(num_processes)
+
+    parity = _get_parity(only_even, only_odd)
+    if parity is not None:
+        samples = list(islice(samples, parity, len(samples), 2))
 
     # if num_processes > samples, floor to 1
     step = max(len(samples)//num_processes, 1)+1
@@ -71,17 +350,13 @@ def _generate_expectation_data_multiprocess(
     with pathos.helpers.mp.Pool(num_processes) as p:
         results = p.starmap(_compute_combinations_of_detectors, [
             (samples, max_degree) for samples in split_samples])
-    data: Counter = Counter()
-    for c in results:
-        data.update(c)
+    counts = _DetectorCombinationCounts(max_degree)
+    for result in results:
+        counts.merge(result)
 
     # divide count values of each Xi, Xj etc by number of
     # samples to get expectation value
-    expectation_values: PijData = {frozenset(key):
-                                   data[key] / len(samples)
-                                   for key in data}
-
-    return expectation_values
+    return counts.to_expectation_data()
 
 
 def _generate_expectation_data_singleprocess(
@@ -98,27 +373,14 @@ def _generate_expectation_data_singleprocess(
         )
         raise NotImplementedError(msg)
 
-    if only_even and not only_odd:
-        samples = islice(samples, 0, None, 2)
-    if only_odd and not only_even:
-        samples = islice(samples, 1, None, 2)
-    elif only_even and only_odd:
-        warn("Both only_odd and only_even are True. Selecting whole batch.",
-             stacklevel=3)
-
-    counter: Counter[Iterable[int]] = Counter()
-    num_samples = 0
-    for s in samples:
-        counter.update(chain.from_iterable(combinations(s, weight)
-                                           for weight in range(1, max_degree + 1)))
-        num_samples += 1
+    parity = _get_parity(only_even, only_odd)
+    if parity is not None:
+        samples = islice(samples, parity, None, 2)
 
     # divide count values of each Xi, Xj etc by number of
     # samples to get expectation value
-    expectation_values: PijData = {frozenset(key):
-                                   counter[key] / num_samples
-                                   for key in counter}
-    return expectation_values
+    return _compute_combinations_of_detectors(
+        samples, max_degree).to_expectation_data()
 
 
 def generate_expectation_data(
@@ -135,6 +397,12 @@ def generate_expectation_data(
     In the case of a generator, you must set num_processes=1 as
     multiprocessing is not supported for samples of generator type.
 
+    Samples are converted to detector matrices in batches, so
+    the counts are computed with array operations. Samples that
+    are already arrays, or stored in a b8 file, should be passed
+    to `generate_expectation_data_from_batches` or
+    `generate_expectation_data_from_b8` instead.
+
     Parameters
     ----------
     samples : Iterable[Iterable[int]]
@@ -187,155 +455,180 @@ def generate_expectation_data(
     raise NotImplementedError(msg)
 
 
-def _calculate_g_value(p: float, q: float) -> float:
-    """Given a pair of probabilities, calculate g as in equation
-    (S15) in https://arxiv.org/pdf/2102.06132.pdf"""
-    return p + q - (2 * p * q)
-
-
-def _calculate_p_i_sigma(nodes: list[float]) -> list[float]:
-    """Recursively collapse list of Pij values into PiSigma value,
-    equation (S14) in https://arxiv.org/pdf/2102.06132.pdf
-
-    Parameters
-    ----------
-    nodes : List[float]
-        This begins as the initial list of probabilities for the connected edges
-        of the node we wish to adjust the probability for. Is progressively
-        reduced down to a list of length 1 as the function recursively
-        calls itself.
-
-    Returns
-    -------
-    List[float]
-        Will return a List of length 1 containing the final p_i_sigma value.
-    """
-    if len(nodes) == 1:
-        return nodes
-    if len(nodes) == 2:
-        return [_calculate_g_value(nodes[0], nodes[1])]
-    return _calculate_p_i_sigma([nodes[0], *_calculate_p_i_sigma(nodes[1:])])
-
-
-def _calculate_edge_prob_with_higher_degrees(
-    edge: frozenset[int],
-    pij_data: PijData,
-    min_prob: float,
-) -> float:
-    """Having computed the 'local' Pij.. we must then update
-    this probability, taking into account higher degree edges
-    that may cause the given edge to light up. This is only
-    needed for edges that are of degree less than max_degree.
-    Equations (S14), (S15) and (S16) from page 20
-    in Google RepCode Paper:
-    https://arxiv.org/pdf/2102.06132.pdf
-    By "local", we mean the Pij formula when considering only
-    nodes "within" the edge, vs pij formula being adjusted for
-    higher edges that can trigger the current edge.
-
-    Parameters
-    ----------
-    edge : FrozenSet[int]
-        Edge for which to recalculate the Pij.. but taking into account
-        higher degree edges.
-    pij_data : PijData
-        Pij probabilities calculated from expectation data.
-
-    Returns
-    -------
-    float
-        Probability for the given edge having taken into account
-        any higher degree edges that could light up the detectors
-        in the given edge.
-    """
-    # collect all edges our current edge is a subset of -
-    # thereby all edges that can turn on our edge
-    connected_edges = [pij_data[k]
-                       for k in pij_data if edge < k]
-    if len(connected_edges) == 0:
-        return pij_data.get(edge, 0.0)
-    pi_sigma = _calculate_p_i_sigma(connected_edges)[0]
-    if math.isclose(pi_sigma, 0.5, rel_tol=0.05):
-        warn("pi_sigma is converging to 0.5. Please consider trimming"
-             " the number of edges used in calculations.", stacklevel=3)
-        return max(min_prob, 0.0)
-    return (pij_data.get(edge, 0.0) - pi_sigma) / (1 - (2 * pi_sigma))
-
-
-def _n1_formula(
-    exp_values: PijData,
-    keys: Sequence[frozenset[int]]
-) -> float:
-    """Formula for parameter n1 in hyperedge calculations.
-
-    Parameters
-    ----------
-    exp_values : PijData
-        Expectation values for edges.
-
-    keys : Sequence[FrozenSet[int]]
-        Sequence of single nodes to use in calculation.
+def _count_batches(
+    batches: Iterable[npt.NDArray[np.uint8] | SyndromeBatch],
+    max_degree: int,
+    parity: int | None,
+    *,
+    num_detectors: int | None = None,
+    bit_packed: bool = False,
+    first_shot: int = 0,
+) -> _DetectorCombinationCounts:
+    """Count combinations of detectors over batches, selecting only the shots whose
+    index, counting from `first_shot` for the first shot of the first batch, has
+    the given parity."""
+    counts = _DetectorCombinationCounts(max_degree, num_detectors or 0)
+    shot = first_shot
+    for batch in batches:
+        if isinstance(batch, SyndromeBatch):
+            dense = batch.dense
+        elif bit_packed:
+            dense = np.unpackbits(np.asarray(batch, dtype=np.uint8), axis=1,
+                                  count=num_detectors, bitorder="little")
+        else:
+            dense = np.asarray(batch, dtype=np.uint8)
+        if parity is not None:
+            dense = dense[(parity - shot) % 2::2]
+        shot += len(batch)
+        counts.add_batch(dense)
+    return counts
 
-    Returns
-    -------
-    float
-        The value of the calculation.
-    """
-    return math.prod((1 - (2 * exp_values.get(n, 0.0))) for n in keys)
 
+def generate_expectation_data_from_batches(
+    batches: Iterable[npt.NDArray[np.uint8] | SyndromeBatch],
+    max_degree: int = 2,
+    *,
+    num_detectors: int | None = None,
+    bit_packed: bool = False,
+    only_even: bool = False,
+    only_odd: bool = False,
+) -> PijData:
+    """Generates the <Xi>, <Xj>, <Xij> etc expectation values
+    for deriving Pij probabilities from batches of detector
+    matrices, giving the same result as `generate_expectation_data`
+    for the samples of each batch in turn.
 
-def _d1_formula(
-    exp_values: PijData,
-    keys: Sequence[frozenset[int]]
-) -> float:
-    """Formula for parameter d1 in hyperedge calculations.
+    Batches are consumed one at a time, so any iterable such as a
+    generator of batches sampled from Stim may be given. Single
+    detectors and pairs are counted with BLAS matrix products,
+    using memory quadratic in the number of detectors regardless
+    of the number of shots.
 
     Parameters
     ----------
-    exp_values : PijData
-        Expectation values for edges.
-
-    keys : Sequence[FrozenSet[int]]
-        Sequence of single nodes to use in calculation.
+    batches : Iterable[Union[npt.NDArray[np.uint8], SyndromeBatch]]
+        Batches of shots, each a 2D array of shape (number of shots,
+        number of detectors) where each element is a 1 or 0, or a
+        `SyndromeBatch`.
+    max_degree : int
+        Maximum degree hyperedges to be considered.
+        Default value is 2.
+    num_detectors : Optional[int]
+        Number of detectors in each shot, which is required for
+        bit-packed arrays. Default value is None.
+    bit_packed : bool
+        Whether array batches are bit-packed in the little endian
+        order used by Stim, with shape (number of shots,
+        ceil(num_detectors / 8)). Default value is False.
+    only_even : bool
+        Boolean to specify whether only the even-indexed shots
+        should be used to generate expectation data.
+    only_odd : bool
+        Boolean to specify whether only the odd-indexed shots
+        should be used to generate expectation data.
 
     Returns
     -------
-    float
-        The value of the calculation.
+    PijData
+        Expectation values of the combinations of detectors
+        observed firing together, as returned by
+        `generate_expectation_data`.
     """
-    tuple_keys = [tuple(x) for x in keys]
-    return math.prod(1 - (2 * exp_values.get(frozenset(n[:1]), 0.0))
-                     - (2 * exp_values.get(frozenset(n[1:]), 0.0))
-                     + (4 * exp_values.get(frozenset(n), 0.0))
-                     for n in tuple_keys)
-
+    if bit_packed and num_detectors is None:
+        msg = "num_detectors must be given for bit-packed batches."
+        raise ValueError(msg)
+    parity = _get_parity(only_even, only_odd)
+    return _count_batches(batches, max_degree, parity, num_detectors=num_detectors,
+                          bit_packed=bit_packed).to_expectation_data()
+
+
+def _count_b8_shots(
+    shot_range: tuple[int, int],
+    b8_input: Path | bytes,
+    detector_num: int,
+    *,
+    max_degree: int,
+    batch_size: int,
+    parity: int | None,
+) -> _DetectorCombinationCounts:
+    """Count combinations of detectors over `num_shots` shots of b8 data from
+    `first_shot`, given as the shot range `(first_shot, num_shots)`."""
+    first_shot, num_shots = shot_range
+    batches = b8_to_syndrome_batches(b8_input, detector_num, batch_size,
+                                     bit_packed=True, first_shot=first_shot,
+                                     num_shots=num_shots)
+    return _count_batches(batches, max_degree, parity, num_detectors=detector_num,
+                          bit_packed=True, first_shot=first_shot)
+
+
+def generate_expectation_data_from_b8(
+    b8_input: Path | bytes,
+    detector_num: int,
+    max_degree: int = 2,
+    batch_size: int = 10000,
+    *,
+    only_even: bool = False,
+    only_odd: bool = False,
+    num_processes: int = 1,
+) -> PijData:
+    """Generates the <Xi>, <Xj>, <Xij> etc expectation values
+    for deriving Pij probabilities from detection events stored
+    in b8 format.
 
-def _n2_formula(exp_values: PijData,
-                key: frozenset[int],
-                keys: Sequence[frozenset[int]]
-                ) -> float:
-    """Formula for parameter n2 in hyperedge calculations.
+    The file is memory-mapped and read in bit-packed batches of
+    `batch_size` shots, so memory use does not grow with the
+    number of shots. With several processes, each process counts
+    a contiguous range of shots and the counts are summed.
 
     Parameters
     ----------
-    exp_values : PijData
-        Expectation values for edges.
-
-    key : FrozenSet[int]
-        Single weight 3 edge to be used in calculation.
-
-    keys : Sequence[FrozenSet[int]]
-        Sequence of pairs of nodes to use in calculation, a combination
-        of the nodes contained within key. E.g, collections.combinations(key, 2)
+    b8_input : Union[Path, bytes]
+        Path to the file containing b8 data or a bytes object that
+        stores b8 data.
+    detector_num : int
+        The number of detectors in each shot.
+    max_degree : int
+        Maximum degree hyperedges to be considered.
+        Default value is 2.
+    batch_size : int
+        Maximum number of shots read at once.
+        Default value is 10000.
+    only_even : bool
+        Boolean to specify whether only the even-indexed shots
+        should be used to generate expectation data.
+    only_odd : bool
+        Boolean to specify whether only the odd-indexed shots
+        should be used to generate expectation data.
+    num_processes: int
+        Number of processes across which to distribute the shots.
+        Default value is 1. Value of -1 will use all available
+        cores.
 
     Returns
     -------
-    float
-        The value of the calculation.
+    PijData
+        Expectation values of the combinations of detectors
+        observed firing together, as returned by
+        `generate_expectation_data`.
     """
-    return 1 - (2 * math.fsum(exp_values.get(frozenset((n,)), 0.0) for n in key)) \
-        + (4 * math.fsum(exp_values.get(x, 0.0) for x in keys)) \
-        - (8 * exp_values.get(key, 0.0))
+    num_processes = _get_num_processes(num_processes)
+    parity = _get_parity(only_even, only_odd)
+    total_shots = b8_num_shots(b8_input, detector_num)
+    step = -(-total_shots // num_processes) if total_shots else 1
+    shot_ranges = [(first_shot, min(step, total_shots - first_shot))
+                   for first_shot in range(0, total_shots, step)]
+    count_shots = partial(_count_b8_shots, b8_input=b8_input,
+                          detector_num=detector_num, max_degree=max_degree,
+                          batch_size=batch_size, parity=parity)
+    if len(shot_ranges) <= 1:
+        results = list(map(count_shots, shot_ranges))
+    else:
+        with pathos.helpers.mp.Pool(num_processes) as p:
+            results = p.map(count_shots, shot_ranges)
+    counts = _DetectorCombinationCounts(max_degree, detector_num)
+    for result in results:
+        counts.merge(result)
+    return counts.to_expectation_data()
 
 
 def create_correlation_matrix(
@@ -1,9 +1,12 @@
 # (c) Copyright Riverlane 2020-2025.
 
 import math
-from collections.abc import Callable
+from collections.abc import Sequence
 from itertools import combinations
+from warnings import warn
 
+import numpy as np
+import numpy.typing as npt
 import stim
 from deltakit_core.decoding_graphs import (
     DecodingEdge,
@@ -16,132 +19,182 @@ from deltakit_core.decoding_graphs import (
     dem_to_hypergraph_and_logicals,
 )
 
-from deltakit_decode.utils._derivation_tools import (
-    _calculate_edge_prob_with_higher_degrees,
-    _d1_formula,
-    _n1_formula,
-    _n2_formula,
-)
-
 PijData = dict[frozenset[int], float]
 
 
-def _calculate_pij_degree_2(
-    key: frozenset[int],
-    exp_values: PijData,
-) -> float:
-    """Calculate Pij values for degree 2 edges as per the formulae defined
-    in P19 from https://arxiv.org/pdf/2102.06132.pdf
-
-    Parameters
-    ----------
-    key : FrozenSet[int]
-        The edge we're calculating the Pij for.
-    exp_values : PijData
-        The expectation values derived from experimental data, to be
-        used to calculate the Pij value
-
-    Returns
-    -------
-    float
-        Pij value for the given key/edge.
-    """
-    xi_key, xj_key = (frozenset((x,)) for x in key)
+def _edges_to_rows(edges: Sequence[frozenset[int]],
+                   degree: int) -> npt.NDArray[np.int64]:
+    """Sorted detectors of edges of the same degree as the rows of an array."""
+    return np.array([sorted(edge) for edge in edges],
+                    dtype=np.int64).reshape(len(edges), degree)
 
-    numerator = float(_n1_formula(exp_values, [xi_key, xj_key]))
 
-    denominator = _d1_formula(exp_values, [key])
+def _rows_to_keys(rows: npt.NDArray[np.int64]) -> npt.NDArray[np.void]:
+    """View each row of an array of edges as a single value that can be sorted and
+    searched."""
+    rows = np.ascontiguousarray(rows, dtype=np.int64)
+    return rows.view(np.dtype((np.void, rows.itemsize * rows.shape[1]))).ravel()
 
-    return 0.5 - 0.5 * math.sqrt(numerator / denominator)
 
+class _EdgeIndex:
+    """Index of edges of the same degree, given as the rows of an array, which
+    finds the positions of other edges among them by binary search.
+    """
 
-def _calculate_pij_degree_3(
-    key: frozenset[int],
+    def __init__(self, rows: npt.NDArray[np.int64]):
+        keys = _rows_to_keys(rows)
+        self._order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._order]
+
+    def find(self, rows: npt.NDArray[np.int64]
+             ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.bool_]]:
+        """Positions of each of the edges given as rows in the index, and whether
+        each edge was found. Positions of edges that were not found are
+        arbitrary."""
+        if len(self._sorted_keys) == 0:
+            return np.zeros(len(rows), dtype=np.intp), np.zeros(len(rows), dtype=bool)
+        keys = _rows_to_keys(rows)
+        sorted_positions = np.minimum(np.searchsorted(self._sorted_keys, keys),
+                                      len(self._sorted_keys) - 1)
+        return (self._order[sorted_positions],
+                self._sorted_keys[sorted_positions] == keys)
+
+
+def _edge_values(values: PijData, edges: npt.NDArray[np.int64],
+                 default: float = 0.0) -> npt.NDArray[np.float64]:
+    """Values of edges, such as expectation values, for an array of edges given as
+    rows of detectors. Edges without a value are given `default`."""
+    return np.fromiter((values.get(frozenset(edge), default) for edge in edges.tolist()),
+                       dtype=np.float64, count=len(edges))
+
+
+def _calculate_pij_values_of_degree(
+    edges: npt.NDArray[np.int64],
     exp_values: PijData,
-) -> float:
-    """Calculate Pij values for degree 3 hyperedges.
+) -> npt.NDArray[np.float64]:
+    """Calculate the 'local' Pij values of edges of the same degree, given as rows
+    of sorted detectors, as per the formulae defined in P19 from
+    https://arxiv.org/pdf/2102.06132.pdf and their extension to degree 3 and 4
+    hyperedges. The value of an edge of degree 1 is its expectation value.
 
     Parameters
     ----------
-    key : FrozenSet[int]
-        The edge we're calculating the Pij for.
+    edges : npt.NDArray[np.int64]
+        Array of shape (number of edges, degree) of the edges to calculate the
+        Pij values of.
     exp_values : PijData
         The expectation values derived from experimental data, to be
-        used to calculate the Pij value
+        used to calculate the Pij values.
 
     Returns
     -------
-    float
-        Pij value for the given key/edge.
+    npt.NDArray[np.float64]
+        Pij value of each edge, or NaN where the formulae are not defined.
     """
-    key_combinations = [frozenset(x) for x in combinations(key, 2)]
-    i, j, k = (frozenset((x,)) for x in key)
-
-    n1 = _n1_formula(exp_values, [i, j, k])
-
-    n2 = _n2_formula(exp_values, key, key_combinations)
-
-    d1 = _d1_formula(exp_values, key_combinations)
-
-    inner_b = math.pow(((n1 * n2) / d1), 0.25)
-
-    return 0.5 * (1 - inner_b)
-
-
-def _calculate_pij_degree_4(
-    key: frozenset[int],
-    exp_values: PijData,
-) -> float:
-    """Calculate Pij values for degree 4 hyperedges.
+    degree = edges.shape[1]
+    if degree == 1:
+        return _edge_values(exp_values, edges)
+    # Expectation values of every combination of the detectors of each edge,
+    # keyed by the positions of the detectors in the edge.
+    x = {positions: _edge_values(exp_values, edges[:, positions])
+         for weight in range(1, degree + 1)
+         for positions in combinations(range(degree), weight)}
+    singles = list(combinations(range(degree), 1))
+    pairs = list(combinations(range(degree), 2))
+    triples = list(combinations(range(degree), 3))
+
+    def n2(triple: tuple[int, ...]) -> npt.NDArray[np.float64]:
+        return (1 - 2 * sum(x[(i,)] for i in triple)
+                + 4 * sum(x[pair] for pair in combinations(triple, 2))
+                - 8 * x[triple])
+
+    n1 = np.prod([1 - 2 * x[single] for single in singles], axis=0)
+    d1 = np.prod([1 - 2 * x[(i,)] - 2 * x[(j,)] + 4 * x[(i, j)] for i, j in pairs],
+                 axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if degree == 2:
+            return 0.5 - 0.5 * np.sqrt(n1 / d1)
+        if degree == 3:
+            return 0.5 * (1 - np.power(n1 * n2(triples[0]) / d1, 0.25))
+        d2 = (1 - 2 * sum(x[single] for single in singles)
+              + 4 * sum(x[pair] for pair in pairs)
+              - 8 * sum(x[triple] for triple in triples)
+              + 16 * x[tuple(range(degree))])
+        n2_product = np.prod([n2(triple) for triple in triples], axis=0)
+        return 0.5 * (1 - np.power(n1 * n2_product / (d1 * d2), 1 / 8))
+
+
+def _adjust_for_higher_degrees(
+    edges: npt.NDArray[np.int64],
+    pij_values: npt.NDArray[np.float64],
+    higher_degree_edges: Sequence[tuple[npt.NDArray[np.int64],
+                                        npt.NDArray[np.float64],
+                                        npt.NDArray[np.intp]]],
+    min_prob: float,
+) -> npt.NDArray[np.float64]:
+    """Having computed the 'local' Pij.. of edges of the same degree, we must then
+    update these probabilities, taking into account higher degree edges that may
+    cause each edge to light up. Equations (S14), (S15) and (S16) from page 20 in
+    Google RepCode Paper: https://arxiv.org/pdf/2102.06132.pdf
+
+    The probability pi_sigma that an odd number of the higher degree edges
+    containing an edge occur is found by combining their probabilities ``p`` and
+    ``q`` pairwise into ``p + q - 2pq``, equation (S15). Each subset of each higher
+    degree edge that is one of `edges` is a combination to make, and every edge
+    makes its next combination in each round, so pi_sigma is combined in the
+    same order as by equation (S14).
 
     Parameters
     ----------
-    key : FrozenSet[int]
-        The edge we're calculating the Pij for.
-    exp_values : PijData
-        The expectation values derived from experimental data, to be
-        used to calculate the Pij value
+    edges : npt.NDArray[np.int64]
+        Array of shape (number of edges, degree) of the edges to adjust.
+    pij_values : npt.NDArray[np.float64]
+        'Local' Pij values of the edges.
+    higher_degree_edges : Sequence[Tuple[npt.NDArray[np.int64], npt.NDArray[np.float64], npt.NDArray[np.intp]]]
+        Arrays of edges of each higher degree with their final Pij values and
+        the order in which they were given.
+    min_prob : float
+        Probability given to edges whose higher degree edges make the
+        adjustment ill-conditioned.
 
     Returns
     -------
-    float
-        Pij value for the given key/edge.
+    npt.NDArray[np.float64]
+        Pij values of the edges having taken into account any higher degree
+        edges that could light up the detectors in each edge.
     """
-    w2_nodes = [frozenset(x) for x in combinations(key, 2)]
-    w3_nodes = [frozenset(x) for x in combinations(key, 3)]
-    i, j, k, m = (frozenset((x,)) for x in key)
-
-    n1 = _n1_formula(exp_values, [i, j, k, m])
-
-    n2 = math.prod(_n2_formula(exp_values, n3, [frozenset(x)
-                                                 for x in combinations(n3, 2)])
-                    for n3 in w3_nodes)
-
-    d1 = _d1_formula(exp_values, w2_nodes)
-
-    d2 = 1\
-        - (2 * math.fsum(exp_values.get(n, 0.0) for n in [i, j, k, m])) \
-        + (4 * math.fsum(exp_values.get(n2, 0.0) for n2 in w2_nodes)) \
-        - (8 * math.fsum(exp_values.get(n3, 0.0) for n3 in w3_nodes)) \
-        + (16 * exp_values.get(key, 0.0))
-
-    inner_b = math.pow((n1 * n2) / (d1 * d2), 1 / 8)
-    return 0.5 * (1 - inner_b)
-
-
-def _get_calculate_pij_degree_callable(
-    max_degree: int
-) -> Callable[[frozenset[int], PijData], float]:
-    match max_degree:
-        case 2:
-            return _calculate_pij_degree_2
-        case 3:
-            return _calculate_pij_degree_3
-        case 4:
-            return _calculate_pij_degree_4
-        case _:
-            msg = f"{max_degree} is not a valid degree, must be between 2-4 inclusive."
-            raise NotImplementedError(msg)
+    degree = edges.shape[1]
+    index = _EdgeIndex(edges)
+    subsets, orders, probabilities = [], [], []
+    for higher_edges, higher_values, higher_orders in higher_degree_edges:
+        for positions in combinations(range(higher_edges.shape[1]), degree):
+            subset_positions, found = index.find(higher_edges[:, positions])
+            subsets.append(subset_positions[found])
+            orders.append(higher_orders[found])
+            probabilities.append(higher_values[found])
+    pi_sigma = np.zeros(len(edges))
+    if subsets:
+        subset = np.concatenate(subsets)
+        # Higher degree edges are combined into pi_sigma from the last given
+        combination_order = np.lexsort((-np.concatenate(orders), subset))
+        subset = subset[combination_order]
+        probability = np.concatenate(probabilities)[combination_order]
+        group_starts = np.flatnonzero(np.r_[True, subset[1:] != subset[:-1]])
+        rounds = np.arange(len(subset)) - np.repeat(
+            group_starts, np.diff(np.r_[group_starts, len(subset)]))
+        for combination_round in range(int(rounds.max(initial=-1)) + 1):
+            in_round = rounds == combination_round
+            p, q = probability[in_round], pi_sigma[subset[in_round]]
+            pi_sigma[subset[in_round]] = p + q - (2 * p * q)
+    # math.isclose(pi_sigma, 0.5, rel_tol=0.05)
+    converging = np.abs(pi_sigma - 0.5) <= 0.05 * np.maximum(np.abs(pi_sigma), 0.5)
+    if converging.any():
+        warn("pi_sigma is converging to 0.5. Please consider trimming"
+             " the number of edges used in calculations.", stacklevel=3)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        adjusted = (pij_values - pi_sigma) / (1 - 2 * pi_sigma)
+    return np.where(converging, max(min_prob, 0.0), adjusted)
+
 
 def calculate_pij_values(exp_values: PijData,
                          graph: NXDecodingGraph | DecodingHyperGraph | None = None,
@@ -196,7 +249,9 @@ def calculate_pij_values(exp_values: PijData,
         Values are floats describing the Pij value
         for that particular edge.
     """
-    pij_func = _get_calculate_pij_degree_callable(max_degree)
+    if not 2 <= max_degree <= 4:
+        msg = f"{max_degree} is not a valid degree, must be between 2-4 inclusive."
+        raise NotImplementedError(msg)
     noise_floor_edges: PijData = {}
 
     if noise_floor_graph:
@@ -215,39 +270,38 @@ def calculate_pij_values(exp_values: PijData,
         if isinstance(graph, NXDecodingGraph):
             boundary = graph.boundaries
             edges_to_calc = [e - boundary for e in edges_to_calc]
-
-    pij_data: PijData = {}
-    edges_for_recalc: list[frozenset[int]] = []
-    for key in edges_to_calc:
-        if len(key) < max_degree:
-            # any edges less than max degree need to be re-calculated
-            # taking into account any higher degree edges that affect them
-            edges_for_recalc.append(key)
-            if len(key) == 1:
-                pij_data[key] = exp_values[key]
-            elif len(key) == 2:
-                pij_data[key] = _calculate_pij_degree_2(
-                    key, exp_values)
-            elif len(key) == 3:
-                pij_data[key] = _calculate_pij_degree_3(
-                    key, exp_values
-                )
-            continue
-
-        pij_val = pij_func(key, exp_values)
-
-        pij_data[key] = max(noise_floor_edges.get(key, min_prob), pij_val)
+    edges_to_calc = [edge for edge in dict.fromkeys(edges_to_calc)
+                     if 0 < len(edge) <= max_degree]
 
     # calculate probs by taking into account higher degree edges
-    # we work top down, adjusting highest degree first
-    for edge in sorted(edges_for_recalc, reverse=True, key=len):
-        # turn into set for subset calculations.
-        # doing this is cheaper than the equivalent tuple checks
-        # by a factor of around 8
-        adjusted_pi = _calculate_edge_prob_with_higher_degrees(
-            edge, pij_data, min_prob)
-        pij_data[edge] = max(noise_floor_edges.get(edge, min_prob), adjusted_pi)
-    return pij_data
+    # we work top down, adjusting highest degree first, so each
+    # degree is adjusted for the final values of all higher degrees
+    calculated_degrees: list[tuple[npt.NDArray[np.int64],
+                                   npt.NDArray[np.float64],
+                                   npt.NDArray[np.intp]]] = []
+    pij_values: PijData = {}
+    for degree in range(max_degree, 0, -1):
+        edge_orders = np.array([order for order, edge in enumerate(edges_to_calc)
+                                if len(edge) == degree], dtype=np.intp)
+        edges = [edges_to_calc[order] for order in edge_orders.tolist()]
+        edge_rows = _edges_to_rows(edges, degree)
+        values = _calculate_pij_values_of_degree(edge_rows, exp_values)
+        if not np.isfinite(values).all():
+            invalid_edges = [set(edge) for edge, value in zip(edges, values, strict=True)
+                             if not math.isfinite(value)]
+            msg = (
+                f"Pij values of edges {invalid_edges} are not defined by the "
+                "expectation values."
+            )
+            raise ValueError(msg)
+        if degree < max_degree:
+            values = _adjust_for_higher_degrees(edge_rows, values,
+                                                calculated_degrees, min_prob)
+        values = np.maximum(_edge_values(noise_floor_edges, edge_rows, min_prob),
+                            values)
+        calculated_degrees.append((edge_rows, values, edge_orders))
+        pij_values.update(zip(edges, values.tolist(), strict=True))
+    return {edge: pij_values[edge] for edge in edges_to_calc}
 
 
 def create_dem_from_pij(
@@ -2,17 +2,31 @@
 """Module containing useful functions to aid in the interaction of decoding graphs and Stim circuits.
 """
 
+from itertools import pairwise
+
+import numpy as np
+import numpy.typing as npt
 import stim
 from deltakit_circuit import Circuit, trim_detectors
 from deltakit_core.decoding_graphs import (
     DecodingEdge,
     DemParser,
     DetectorCounter,
+    DetectorRecord,
+    EdgeRecord,
     FixedWidthBitstring,
     NXDecodingGraph,
     dem_to_decoding_graph_and_logicals,
 )
 
+from deltakit_decode.utils._build_cache import (
+    _array_to_text,
+    _cached_build,
+    _circuit_from_arrays,
+    _circuit_to_arrays,
+    _text_to_array,
+)
+
 
 def stim_circuit_to_graph_dem(stim_circuit: stim.Circuit,
                               approximate_disjoint_errors: bool = True
@@ -21,6 +35,8 @@ def stim_circuit_to_graph_dem(stim_circuit: stim.Circuit,
     If the non-decomposed DEM is graph-like, that will be returned. Otherwise,
     the decomposed DEM will be returned.
 
+    The DEM is stored in the cache given by `get_build_cache`, if any.
+
     Parameters
     ----------
     stim_circuit : stim.Circuit
@@ -28,19 +44,83 @@ def stim_circuit_to_graph_dem(stim_circuit: stim.Circuit,
     approximate_disjoint_errors : bool, optional
         Iff True, disjoint error approximations will be allowed.
     """
-    dem = stim_circuit.detector_error_model(
-        decompose_errors=False,
-        approximate_disjoint_errors=approximate_disjoint_errors)
-
-    detector_counter = DetectorCounter()
-    DemParser(detector_counter, lambda *_: None).parse(dem)
-
-    if detector_counter.max_num_detectors() > 2:
+    def build_dem() -> stim.DetectorErrorModel:
         dem = stim_circuit.detector_error_model(
-            decompose_errors=True,
+            decompose_errors=False,
             approximate_disjoint_errors=approximate_disjoint_errors)
 
-    return dem
+        detector_counter = DetectorCounter()
+        DemParser(detector_counter, lambda *_: None).parse(dem)
+
+        if detector_counter.max_num_detectors() > 2:
+            dem = stim_circuit.detector_error_model(
+                decompose_errors=True,
+                approximate_disjoint_errors=approximate_disjoint_errors)
+
+        return dem
+
+    return _cached_build(
+        stim_circuit,
+        build_dem,
+        lambda dem: {"dem": _text_to_array(str(dem))},
+        lambda arrays: stim.DetectorErrorModel(_array_to_text(arrays["dem"])),
+        builder="stim_circuit_to_graph_dem",
+        approximate_disjoint_errors=approximate_disjoint_errors)
+
+
+def _decoding_graph_to_arrays(graph: NXDecodingGraph,
+                              logicals: list[set[DecodingEdge]]
+                              ) -> dict[str, npt.NDArray]:
+    """Compact arrays of a decoding graph and its logicals, from which
+    `_decoding_graph_from_arrays` rebuilds the graph with the same order of nodes
+    and edges."""
+    nodes = list(graph.graph.nodes)
+    records = [DetectorRecord.from_dict(graph.graph.nodes[node]) for node in nodes]
+    width = max((len(record.spatial_coord) for record in records), default=0)
+    spatial_coords = np.full((len(nodes), width), np.nan)
+    for row, record in zip(spatial_coords, records, strict=True):
+        row[:len(record.spatial_coord)] = record.spatial_coord
+    edges = graph.edges
+    edge_indices = {edge: index for index, edge in enumerate(edges)}
+    logical_edges = [sorted(edge_indices[edge] for edge in logical)
+                     for logical in logicals]
+    return {
+        "nodes": np.array(nodes, dtype=np.int64),
+        "spatial_coords": spatial_coords,
+        "times": np.array([record.time for record in records], dtype=np.int64),
+        "boundaries": np.array(sorted(graph.boundaries), dtype=np.int64),
+        "edges": np.array([tuple(edge) for edge in edges],
+                          dtype=np.int64).reshape(-1, 2),
+        "p_err": np.array([graph.edge_records[edge].p_err for edge in edges],
+                          dtype=np.float64),
+        "logicals_indptr": np.cumsum([0, *map(len, logical_edges)], dtype=np.int64),
+        "logical_edges": np.array([index for logical in logical_edges
+                                   for index in logical], dtype=np.int64),
+    }
+
+
+def _decoding_graph_from_arrays(arrays: dict[str, npt.NDArray]
+                                ) -> tuple[NXDecodingGraph, list[set[DecodingEdge]]]:
+    """Rebuild a decoding graph and its logicals from `_decoding_graph_to_arrays`."""
+    detector_records = {
+        node: DetectorRecord(
+            tuple(coordinate for coordinate in spatial_coord
+                  if not np.isnan(coordinate)), time)
+        for node, spatial_coord, time in zip(arrays["nodes"].tolist(),
+                                             arrays["spatial_coords"].tolist(),
+                                             arrays["times"].tolist(), strict=True)
+    }
+    edges = [DecodingEdge(u, v) for u, v in arrays["edges"].tolist()]
+    graph = NXDecodingGraph.from_edge_list(
+        [(edge, EdgeRecord(p_err=p_err))
+         for edge, p_err in zip(edges, arrays["p_err"].tolist(), strict=True)],
+        detector_records,
+        arrays["boundaries"].tolist())
+    logical_edges = arrays["logical_edges"].tolist()
+    indptr = arrays["logicals_indptr"].tolist()
+    logicals = [{edges[index] for index in logical_edges[start:stop]}
+                for start, stop in pairwise(indptr)]
+    return graph, logicals
 
 
 def parse_stim_circuit(stim_circuit: stim.Circuit,
@@ -69,23 +149,41 @@ def parse_stim_circuit(stim_circuit: stim.Circuit,
         The decoding graph, the logicals, and the Stim circuit. The Stim
         circuit will be unchanged unless `trim_circuit` is set, in which case
         a copy of the Stim circuit with only the trimmed detectors is returned.
+
+    Notes
+    -----
+        The results are stored in the cache given by `get_build_cache`, if any,
+        and loaded from it when the same circuit is parsed with the same options.
     """
-    if lexical_detectors:
-        circuit = Circuit.from_stim_circuit(stim_circuit)
-        circuit.reorder_detectors()
-        stim_circuit = circuit.as_stim_circuit()
-
-    dem = stim_circuit_to_graph_dem(stim_circuit)
-    graph, logicals = dem_to_decoding_graph_and_logicals(dem)
-
-    if trim_circuit:
-        relevant_nodes = graph.get_relevant_nodes(logicals)
-        irrelevant_nodes = set(graph.nodes) - relevant_nodes
-        stim_circuit = trim_detectors(stim_circuit, irrelevant_nodes)
-        dem = stim_circuit_to_graph_dem(stim_circuit)
+    def build() -> tuple[NXDecodingGraph, list[set[DecodingEdge]], stim.Circuit]:
+        parsed_circuit = stim_circuit
+        if lexical_detectors:
+            circuit = Circuit.from_stim_circuit(parsed_circuit)
+            circuit.reorder_detectors()
+            parsed_circuit = circuit.as_stim_circuit()
+
+        dem = stim_circuit_to_graph_dem(parsed_circuit)
         graph, logicals = dem_to_decoding_graph_and_logicals(dem)
 
-    return graph, logicals, stim_circuit
+        if trim_circuit:
+            relevant_nodes = graph.get_relevant_nodes(logicals)
+            irrelevant_nodes = set(graph.nodes) - relevant_nodes
+            parsed_circuit = trim_detectors(parsed_circuit, irrelevant_nodes)
+            dem = stim_circuit_to_graph_dem(parsed_circuit)
+            graph, logicals = dem_to_decoding_graph_and_logicals(dem)
+
+        return graph, logicals, parsed_circuit
+
+    return _cached_build(
+        stim_circuit,
+        build,
+        lambda parsed: {**_decoding_graph_to_arrays(parsed[0], parsed[1]),
+                        **_circuit_to_arrays(parsed[2])},
+        lambda arrays: (*_decoding_graph_from_arrays(arrays),
+                        _circuit_from_arrays(arrays)),
+        builder="parse_stim_circuit",
+        trim_circuit=trim_circuit,
+        lexical_detectors=lexical_detectors)
 
 
 def split_measurement_bitstring(
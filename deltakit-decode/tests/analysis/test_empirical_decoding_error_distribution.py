@@ -244,6 +244,46 @@ class TestEmpiricalDecodingErrorDistribution:
         for error in range(len(distr1)):
             assert distr1[error] == distr2[error]
 
+    @pytest.mark.parametrize("num_logicals", [1, 5, 8, 13])
+    def test_batch_record_of_bit_packed_errors_equivalent_to_unpacked(
+            self, num_logicals: int):
+        rng = np.random.default_rng(1234)
+        corrections = rng.integers(0, 2, size=(1000, num_logicals), dtype=np.uint8)
+        targets = rng.integers(0, 2, size=(1000, num_logicals), dtype=np.uint8)
+        unpacked = EmpiricalDecodingErrorDistribution(num_logicals)
+        unpacked.batch_record_errors(corrections, targets)
+        packed = EmpiricalDecodingErrorDistribution(num_logicals)
+        packed.batch_record_errors(np.packbits(corrections, axis=1, bitorder="little"),
+                                   np.packbits(targets, axis=1, bitorder="little"),
+                                   bit_packed=True)
+        self._distribution_data_is_equal(packed, unpacked)
+
+    def test_batch_record_of_bit_packed_errors_ignores_padding_bits(self):
+        distr = EmpiricalDecodingErrorDistribution(3)
+        distr.batch_record_errors(np.array([[0b11110001], [0b00001000]], dtype=np.uint8),
+                                  np.zeros((2, 1), dtype=np.uint8),
+                                  bit_packed=True)
+        assert distr[(True, False, False)] == 1
+        assert distr[0] == 1
+        assert distr.fails == 1
+        assert distr.fails_per_logical.tolist() == [1, 0, 0]
+
+    def test_record_error_counts_fails_per_logical(self):
+        distr = EmpiricalDecodingErrorDistribution(3)
+        distr.record_error((True, True, False), (False, True, False))
+        distr.record_error((True, False, True), (False, True, False))
+        assert distr.fails == 2
+        assert distr.fails_per_logical.tolist() == [2, 1, 1]
+
+    def test_counts_do_not_overflow_32_bits(self):
+        distr = EmpiricalDecodingErrorDistribution(1)
+        distr.add_event((False,), 2**32 + 1)
+        distr.add_event((True,), 2**32 + 2)
+        total = distr + distr
+        assert total[0] == 2**33 + 2
+        assert total.shots == 2**34 + 6
+        assert total.fails_per_logical.tolist() == [2**33 + 4]
+
     @pytest.mark.parametrize(('expected_errors_per_logical', 'error_distribution_dict'), [
         ([1, 3, 2],
          {(True, False, False): 1,
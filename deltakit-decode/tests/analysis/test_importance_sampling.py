@@ -0,0 +1,97 @@
+# (c) Copyright Riverlane 2020-2025.
+import pytest
+import stim
+
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode.analysis import (
+    GraphDecoderManager,
+    ImportanceSamplingAnalysisEngine,
+    ImportanceSamplingEstimate,
+)
+from deltakit_decode.noise_sources import (
+    EdgeProbabilityMatchingNoise,
+    UniformMatchingNoise,
+)
+from deltakit_decode.utils import parse_stim_circuit
+
+
+@pytest.fixture(scope="module")
+def decoder() -> PyMatchingDecoder:
+    circuit = stim.Circuit.generated("repetition_code:memory",
+                                     distance=5,
+                                     rounds=3,
+                                     after_clifford_depolarization=0.01)
+    graph, logicals, _ = parse_stim_circuit(circuit)
+    return PyMatchingDecoder(graph, logicals)
+
+
+@pytest.mark.parametrize("noise_model", [
+    UniformMatchingNoise(0.03),
+    EdgeProbabilityMatchingNoise(),
+])
+def test_low_weight_components_are_decoded_exhaustively(decoder, noise_model):
+    engine = ImportanceSamplingAnalysisEngine(noise_model, decoder, seed=1234)
+    estimate = engine.run(5000)
+    low_weight_components = estimate.components[:3]
+    assert all(component.exhaustive for component in low_weight_components)
+    assert [component.shots for component in low_weight_components] == [
+        component.noise_model.as_exhaustive_sequential_model().sequence_size(
+            decoder.decoding_graph)
+        for component in low_weight_components]
+    # Distance 5 corrects every error of weight at most 2
+    assert all(component.fails == 0 for component in low_weight_components)
+
+
+def test_estimate_agrees_with_monte_carlo(decoder):
+    noise_model = UniformMatchingNoise(0.03)
+    estimate = ImportanceSamplingAnalysisEngine(
+        noise_model, decoder, seed=1234).run(20000)
+    manager = GraphDecoderManager(noise_model, decoder, seed=1234, batch_size=50000)
+    manager.run_batch_shots(100000)
+    monte_carlo_lep = manager.fails / manager.shots
+    monte_carlo_stderr = (monte_carlo_lep * (1 - monte_carlo_lep) / manager.shots) ** 0.5
+    assert estimate.stderr < monte_carlo_stderr
+    assert abs(estimate.lep - monte_carlo_lep) < \
+        4 * (estimate.stderr ** 2 + monte_carlo_stderr ** 2) ** 0.5
+    assert estimate.lower <= estimate.lep <= estimate.upper
+
+
+def test_run_stops_at_target_relative_standard_error(decoder):
+    engine = ImportanceSamplingAnalysisEngine(UniformMatchingNoise(0.03), decoder,
+                                              batch_size=500, seed=1234)
+    estimate = engine.run(100000, target_rse=0.05)
+    assert estimate.stderr / estimate.lep <= 0.05
+    assert estimate.shots < 100000
+
+
+def test_run_continues_from_decoded_shots(decoder):
+    engine = ImportanceSamplingAnalysisEngine(UniformMatchingNoise(0.03), decoder,
+                                              seed=1234)
+    first_shots = engine.run(3000).shots
+    assert first_shots == engine.shots
+    assert engine.run(6000).shots == 6000 > first_shots
+
+
+def test_truncated_components_widen_the_upper_bound(decoder):
+    engine = ImportanceSamplingAnalysisEngine(UniformMatchingNoise(0.03), decoder,
+                                              coefficient_limit=1e-3, seed=1234)
+    estimate = engine.run(5000)
+    assert estimate.untracked_probability > 0
+    assert estimate.upper >= estimate.lep + estimate.untracked_probability
+
+
+def test_to_dict_has_estimate_without_components():
+    estimate = ImportanceSamplingEstimate(lep=0.1, stderr=0.01, lower=0.08,
+                                          upper=0.12, confidence=0.95,
+                                          untracked_probability=0.0, shots=100,
+                                          components=())
+    assert estimate.to_dict() == {
+        "lep": 0.1, "lep_stderr": 0.01, "lep_lower": 0.08, "lep_upper": 0.12,
+        "confidence": 0.95, "untracked_probability": 0.0, "shots": 100}
+
+
+@pytest.mark.parametrize("confidence", [0, 1, 1.5])
+def test_confidence_outside_unit_interval_raises_value_error(decoder, confidence):
+    with pytest.raises(ValueError, match="must be between 0 and 1"):
+        ImportanceSamplingAnalysisEngine(UniformMatchingNoise(0.03), decoder,
+                                         confidence=confidence)
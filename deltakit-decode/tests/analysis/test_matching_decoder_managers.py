@@ -1,9 +1,25 @@
 # (c) Copyright Riverlane 2020-2025.
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
+import stim
+from pathos.pools import ProcessPool
 
-from deltakit_decode.analysis._matching_decoder_managers import GraphDecoderManager
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode._base_reporter import BaseReporter, TimingReporter
+from deltakit_decode.analysis import RunAllAnalysisEngine
+from deltakit_decode.analysis._matching_decoder_managers import (
+    B8DecoderManager,
+    GraphDecoderManager,
+    StimDecoderManager,
+    StimMultiDecoderManager,
+)
+from deltakit_decode.noise_sources import (
+    EdgeProbabilityMatchingNoise,
+    UniformMatchingNoise,
+)
+from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
 
 
 class TestGraphDecoderManager:
@@ -72,3 +88,402 @@ class TestGraphDecoderManager:
         decoder_manager: GraphDecoderManager = GraphDecoderManager(
             mock_noise_model, mock_graph_decoder, logicals=logicals)
         assert not decoder_manager._analyse_correction(error, expected_logical_flip)
+
+    @pytest.fixture(scope="class")
+    def pymatching_decoder(self) -> PyMatchingDecoder:
+        circuit = stim.Circuit.generated("surface_code:rotated_memory_x",
+                                         distance=3,
+                                         rounds=3,
+                                         after_clifford_depolarization=0.02)
+        graph, logicals, _ = parse_stim_circuit(circuit)
+        return PyMatchingDecoder(graph, logicals)
+
+    @pytest.mark.parametrize("noise_model", [
+        EdgeProbabilityMatchingNoise(),
+        UniformMatchingNoise(0.02),
+    ])
+    def test_batched_decoding_matches_decoding_each_shot(self, pymatching_decoder,
+                                                         noise_model):
+        batch_manager = GraphDecoderManager(noise_model, pymatching_decoder,
+                                            seed=1234, batch_size=300)
+        shot_manager = GraphDecoderManager(noise_model, pymatching_decoder,
+                                           seed=1234)
+        batch_manager.run_batch_shots(1000)
+        shot_manager._exec_shots_atomic(shot_manager.error_generator, 1000)
+        assert shot_manager.fails > 0
+        assert batch_manager.empirical_decoding_error_distribution.to_dict() == \
+            shot_manager.empirical_decoding_error_distribution.to_dict()
+
+    def test_array_errors_are_decoded_with_the_decoder_batch_api(
+            self, pymatching_decoder, mocker):
+        manager = GraphDecoderManager(EdgeProbabilityMatchingNoise(),
+                                      pymatching_decoder, seed=1234)
+        decode_to_logical_flip = mocker.spy(pymatching_decoder,
+                                            "decode_to_logical_flip")
+        decode_batch_to_logical_flip = mocker.spy(pymatching_decoder,
+                                                  "decode_batch_to_logical_flip")
+        manager.run_batch_shots(100)
+        decode_to_logical_flip.assert_not_called()
+        decode_batch_to_logical_flip.assert_called_once()
+        assert manager.shots == 100
+
+    def test_array_errors_use_syndromes_of_separate_decoding_graph(
+            self, pymatching_decoder, mocker):
+        circuit = stim.Circuit.generated("surface_code:rotated_memory_x",
+                                         distance=3,
+                                         rounds=3,
+                                         after_clifford_depolarization=0.02)
+        decoding_graph, _, _ = parse_stim_circuit(circuit)
+        batch_manager = GraphDecoderManager(EdgeProbabilityMatchingNoise(),
+                                            pymatching_decoder, decoding_graph,
+                                            seed=1234, batch_size=300)
+        shot_manager = GraphDecoderManager(EdgeProbabilityMatchingNoise(),
+                                           pymatching_decoder, decoding_graph,
+                                           seed=1234)
+        error_to_syndrome = mocker.spy(decoding_graph, "error_to_syndrome")
+        batch_manager.run_batch_shots(1000)
+        assert error_to_syndrome.call_count == 1000
+        shot_manager._exec_shots_atomic(shot_manager.error_generator, 1000)
+        assert batch_manager.empirical_decoding_error_distribution.to_dict() == \
+            shot_manager.empirical_decoding_error_distribution.to_dict()
+
+
+class ShotReporter(BaseReporter):
+    """Reporter that only supports single shots."""
+
+    def __init__(self):
+        super().__init__()
+        self.shots = 0
+
+    def reset_reporter(self):
+        self.shots = 0
+
+    def get_reported_results(self):
+        return {"reported_shots": self.shots}
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shots += 1
+
+
+class TestStimDecoderManager:
+
+    @pytest.fixture(scope="class")
+    def decoder_and_circuit(self) -> tuple[PyMatchingDecoder, stim.Circuit]:
+        circuit = stim.Circuit.generated("repetition_code:memory",
+                                         distance=5,
+                                         rounds=5,
+                                         before_round_data_depolarization=0.05)
+        graph, logicals, circuit = parse_stim_circuit(circuit)
+        return PyMatchingDecoder(graph, logicals), circuit
+
+    def test_reporters_supporting_batches_run_around_each_batch(
+            self, decoder_and_circuit, mocker):
+        decoder, circuit = decoder_and_circuit
+        reporter = TimingReporter()
+        manager = StimDecoderManager(circuit, decoder, reporters=[reporter],
+                                     seed=1234, batch_size=300)
+        exec_shots_atomic = mocker.spy(manager, "_exec_shots_atomic")
+        manager.run_batch_shots(1000)
+        exec_shots_atomic.assert_not_called()
+        assert reporter._shots == 1000
+        unreported_manager = StimDecoderManager(circuit, decoder, seed=1234,
+                                                batch_size=300)
+        unreported_manager.run_batch_shots(1000)
+        assert manager.empirical_decoding_error_distribution.to_dict() == \
+            unreported_manager.empirical_decoding_error_distribution.to_dict()
+
+    def test_reporters_not_supporting_batches_run_around_each_shot(
+            self, decoder_and_circuit, mocker):
+        decoder, circuit = decoder_and_circuit
+        reporter = ShotReporter()
+        manager = StimDecoderManager(circuit, decoder,
+                                     reporters=[TimingReporter(), reporter],
+                                     seed=1234)
+        exec_shots_batch = mocker.spy(manager, "_exec_shots_batch")
+        manager.run_batch_shots(100)
+        exec_shots_batch.assert_not_called()
+        assert manager.get_reporter_results()["reported_shots"] == 100
+
+    def test_batch_with_reporters_not_supporting_batches_raises_value_error(
+            self, decoder_and_circuit):
+        decoder, circuit = decoder_and_circuit
+        manager = StimDecoderManager(circuit, decoder, reporters=[ShotReporter()])
+        with pytest.raises(ValueError, match="do not support batches"):
+            manager._exec_shots_batch(manager.batch_error_generator, 100)
+
+
+class TestStimMultiDecoderManager:
+
+    @pytest.fixture(scope="class")
+    def circuit(self) -> stim.Circuit:
+        circuit = stim.Circuit.generated("surface_code:rotated_memory_z",
+                                         distance=3,
+                                         rounds=3,
+                                         after_clifford_depolarization=0.02)
+        return parse_stim_circuit(circuit)[2]
+
+    @pytest.fixture(scope="class")
+    def decoders(self, circuit) -> list[PyMatchingDecoder]:
+        graph, logicals, _ = parse_stim_circuit(circuit)
+        # A second decoder with the weights of a much weaker noise model.
+        weak_circuit = stim.Circuit.generated("surface_code:rotated_memory_z",
+                                              distance=3,
+                                              rounds=3,
+                                              after_clifford_depolarization=0.0001,
+                                              before_measure_flip_probability=0.1)
+        weak_graph, weak_logicals, _ = parse_stim_circuit(weak_circuit)
+        return [PyMatchingDecoder(graph, logicals),
+                PyMatchingDecoder(weak_graph, weak_logicals)]
+
+    @pytest.mark.parametrize("with_reporters", [False, True])
+    def test_each_decoder_matches_its_own_stim_decoder_manager(
+            self, circuit, decoders, with_reporters):
+        reporters = [[TimingReporter()], []] if with_reporters else None
+        manager = StimMultiDecoderManager(circuit, decoders, reporters=reporters,
+                                          seed=1234, batch_size=300)
+        manager.run_batch_shots(1000)
+        assert manager.shots == 1000
+        for decoder, distribution in zip(decoders,
+                                         manager.decoder_error_distributions,
+                                         strict=True):
+            single_manager = StimDecoderManager(circuit, decoder, seed=1234,
+                                                batch_size=300,
+                                                reporters=[TimingReporter()]
+                                                if with_reporters else None)
+            single_manager.run_batch_shots(1000)
+            assert distribution.to_dict() == \
+                single_manager.empirical_decoding_error_distribution.to_dict()
+
+    def test_shot_fails_if_any_decoder_fails(self, circuit, decoders):
+        manager = StimMultiDecoderManager(circuit, decoders, seed=1234)
+        manager.run_batch_shots(1000)
+        first, second = manager.decoder_error_distributions
+        assert max(first.fails, second.fails) <= manager.fails <= \
+            first.fails + second.fails
+        assert manager.fails > 0
+
+    def test_fails_on_each_position_are_fails_of_each_decoder(self, circuit,
+                                                              decoders):
+        manager = StimMultiDecoderManager(circuit, decoders, seed=1234)
+        manager.run_batch_shots(1000)
+        distribution = manager.empirical_decoding_error_distribution
+        assert distribution.number_of_logicals == len(decoders)
+        assert distribution.fails_per_logical.tolist() == [
+            decoder_distribution.fails
+            for decoder_distribution in manager.decoder_error_distributions]
+
+    def test_memory_does_not_grow_exponentially_in_logicals_of_all_decoders(
+            self, circuit):
+        decoders = [Mock(logicals=[set() for _ in range(16)]) for _ in range(4)]
+        manager = StimMultiDecoderManager(circuit, decoders)
+        assert len(manager.empirical_decoding_error_distribution) == 2 ** 4
+        assert [len(distribution) for distribution
+                in manager.decoder_error_distributions] == [2 ** 16] * 4
+
+    def test_reporter_results_are_given_for_each_decoder(self, circuit, decoders):
+        manager = StimMultiDecoderManager(circuit, decoders,
+                                          reporters=[[TimingReporter()], []],
+                                          metadata={"distance": 3}, seed=1234)
+        manager.run_batch_shots(100)
+        results = manager.get_reporter_results()
+        first, second = manager.decoder_error_distributions
+        assert results["shots"] == 100
+        assert results["distance"] == 3
+        assert results["decoder_0"] == str(decoders[0])
+        assert results["fails_0"] == first.fails
+        assert results["fails_1"] == second.fails
+        assert "avg_wall_ns_0" in results
+        assert "avg_wall_ns_1" not in results
+
+    def test_parallel_decoding_records_same_shots_for_each_decoder(self, circuit,
+                                                                   decoders):
+        manager = StimMultiDecoderManager(circuit, [decoders[0], decoders[0]],
+                                          seed=1234)
+        pool = ProcessPool(nodes=2)
+        try:
+            manager.configure_pool(pool, 2)
+            manager.run_batch_shots_parallel(1000, 2, pool)
+            manager.clear_pool_manager(pool, 2)
+        finally:
+            pool.clear()
+        first, second = manager.decoder_error_distributions
+        assert manager.shots == first.shots == second.shots == 1000
+        assert first.to_dict() == second.to_dict()
+        assert manager.fails == first.fails
+
+    def test_analysis_engine_runs_until_all_decoders_meet_loop_condition(
+            self, circuit, decoders):
+        manager = StimMultiDecoderManager(circuit, decoders, seed=1234)
+        engine = RunAllAnalysisEngine(
+            "multi_decoder_experiment",
+            decoder_managers=[manager],
+            loop_condition=RunAllAnalysisEngine.loop_until_observable_rse_below_threshold(
+                0.3, 20),
+            num_parallel_processes=1,
+            batch_size=100)
+        results = engine.run()
+        assert min(results["fails_0"][0], results["fails_1"][0]) >= 20
+
+    def test_decoders_with_different_numbers_of_logicals_raise_value_error(
+            self, circuit, decoders):
+        decoder = Mock(logicals=[set(), set()])
+        with pytest.raises(ValueError, match="same number of logicals"):
+            StimMultiDecoderManager(circuit, [decoders[0], decoder])
+
+    def test_wrong_number_of_reporter_lists_raises_value_error(self, circuit,
+                                                               decoders):
+        with pytest.raises(ValueError, match="1 lists of reporters for 2 decoders"):
+            StimMultiDecoderManager(circuit, decoders, reporters=[[]])
+
+
+class TestB8DecoderManager:
+
+    @pytest.fixture(scope="class")
+    def decoder_and_circuit(self) -> tuple[PyMatchingDecoder, stim.Circuit]:
+        circuit = stim.Circuit.generated("repetition_code:memory",
+                                         distance=5,
+                                         rounds=5,
+                                         before_round_data_depolarization=0.05)
+        graph, logicals, circuit = parse_stim_circuit(circuit)
+        return PyMatchingDecoder(graph, logicals), circuit
+
+    @pytest.fixture(scope="class")
+    def b8_files(self, decoder_and_circuit, tmp_path_factory):
+        _, circuit = decoder_and_circuit
+        data_dir = tmp_path_factory.mktemp("b8")
+        syndrome_file = data_dir / "detectors.b8"
+        logical_flip_file = data_dir / "observables.b8"
+        circuit.compile_detector_sampler(seed=1234).sample_write(
+            shots=1005, filepath=str(syndrome_file), format="b8",
+            obs_out_filepath=str(logical_flip_file), obs_out_format="b8")
+        return syndrome_file, logical_flip_file
+
+    @pytest.fixture(scope="class")
+    def expected_fails(self, decoder_and_circuit, b8_files):
+        decoder, circuit = decoder_and_circuit
+        syndrome_file, logical_flip_file = b8_files
+        syndromes = stim.read_shot_data_file(
+            path=str(syndrome_file), format="b8",
+            num_detectors=circuit.num_detectors).astype(np.uint8)
+        targets = stim.read_shot_data_file(
+            path=str(logical_flip_file), format="b8",
+            num_observables=circuit.num_observables).astype(np.uint8)
+        predictions = decoder.decode_batch_to_logical_flip(syndromes)
+        return np.any(predictions != targets, axis=1)
+
+    @pytest.mark.parametrize("batch_size", [1, 100, 10000])
+    def test_batched_decoding_matches_decoding_whole_file(
+            self, decoder_and_circuit, b8_files, expected_fails, batch_size):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=batch_size)
+        assert manager.run_batch_shots(None) == (1005, int(expected_fails.sum()))
+
+    def test_reporters_run_around_each_batch(self, decoder_and_circuit, b8_files,
+                                             expected_fails):
+        decoder, _ = decoder_and_circuit
+        reporter = TimingReporter()
+        manager = B8DecoderManager(*b8_files, decoder, reporters=[reporter],
+                                   batch_size=100)
+        assert manager.run_batch_shots(None) == (1005, int(expected_fails.sum()))
+        assert reporter._shots == 1005
+        assert "avg_wall_ns" in manager.get_reporter_results()
+
+    def test_parallel_reporters_count_each_shot_once(self, decoder_and_circuit,
+                                                     b8_files):
+        decoder, _ = decoder_and_circuit
+        reporter = TimingReporter()
+        manager = B8DecoderManager(*b8_files, decoder, reporters=[reporter],
+                                   batch_size=100)
+        pool = ProcessPool(nodes=2)
+        try:
+            manager.configure_pool(pool, 2)
+            manager.run_batch_shots_parallel(500, 2, pool)
+            manager.run_batch_shots_parallel(None, 2, pool)
+            manager.clear_pool_manager(pool, 2)
+        finally:
+            pool.clear()
+        assert manager.shots == 1005
+        assert manager.reporters[0]._shots == manager.shots
+
+    def test_reporters_not_supporting_batches_raise_value_error(
+            self, decoder_and_circuit, b8_files):
+        decoder, _ = decoder_and_circuit
+        with pytest.raises(ValueError, match="must support batches"):
+            B8DecoderManager(*b8_files, decoder, reporters=[ShotReporter()])
+
+    @pytest.mark.parametrize("batch_limit", [1, 99, 100, 101, 2000])
+    def test_batch_limit_caps_number_of_decoded_shots(
+            self, decoder_and_circuit, b8_files, expected_fails, batch_limit):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=100)
+        expected_shots = min(batch_limit, 1005)
+        assert manager.run_batch_shots(batch_limit) == (
+            expected_shots, int(expected_fails[:expected_shots].sum()))
+
+    def test_successive_calls_stream_through_the_inputs(
+            self, decoder_and_circuit, b8_files, expected_fails):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=100)
+        manager.run_batch_shots(250)
+        assert manager.run_batch_shots(250) == (500, int(expected_fails[:500].sum()))
+        assert manager.run_batch_shots(None) == (1005, int(expected_fails.sum()))
+        assert manager.run_batch_shots(250) == (1005, int(expected_fails.sum()))
+
+    def test_reset_rewinds_to_the_start_of_the_inputs(
+            self, decoder_and_circuit, b8_files, expected_fails):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=100)
+        manager.run_batch_shots(None)
+        manager.reset()
+        assert manager.run_batch_shots(300) == (300, int(expected_fails[:300].sum()))
+
+    def test_restored_checkpoint_skips_decoded_shots(
+            self, decoder_and_circuit, b8_files, expected_fails):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=64)
+        manager.run_batch_shots(300)
+        resumed_manager = B8DecoderManager(*b8_files, decoder, batch_size=64)
+        resumed_manager.restore_checkpoint(*manager.get_checkpoint())
+        assert resumed_manager.run_batch_shots(None) == (
+            1005, int(expected_fails.sum()))
+
+    def test_mismatched_input_lengths_raise_value_error(
+            self, decoder_and_circuit, b8_files):
+        decoder, _ = decoder_and_circuit
+        syndrome_file, logical_flip_file = b8_files
+        manager = B8DecoderManager(syndrome_file,
+                                   logical_flip_file.read_bytes()[:-1],
+                                   decoder)
+        with pytest.raises(ValueError, match="1005 shots but logical flip input"):
+            manager.run_batch_shots(None)
+
+    @pytest.mark.parametrize("batch_limit", [None, 10, 1000])
+    def test_parallel_decoding_matches_serial_decoding(
+            self, decoder_and_circuit, b8_files, expected_fails, batch_limit):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=64)
+        pool = ProcessPool(nodes=2)
+        try:
+            manager.configure_pool(pool, 2)
+            first_call_shots = 1005 if batch_limit is None else batch_limit
+            assert manager.run_batch_shots_parallel(batch_limit, 2, pool) == (
+                first_call_shots, int(expected_fails[:first_call_shots].sum()))
+            assert manager.run_batch_shots_parallel(None, 2, pool) == (
+                1005, int(expected_fails.sum()))
+            manager.clear_pool_manager(pool, 2)
+        finally:
+            pool.clear()
+
+    @pytest.mark.parametrize("num_parallel_processes", [1, 2])
+    def test_analysis_engine_stops_once_inputs_are_exhausted(
+            self, decoder_and_circuit, b8_files, expected_fails,
+            num_parallel_processes):
+        decoder, _ = decoder_and_circuit
+        manager = B8DecoderManager(*b8_files, decoder, batch_size=100)
+        engine = RunAllAnalysisEngine("b8_experiment",
+                                      decoder_managers=[manager],
+                                      num_parallel_processes=num_parallel_processes,
+                                      batch_size=200)
+        results = engine.run()
+        assert results["shots"].tolist() == [1005]
+        assert results["fails"].tolist() == [int(expected_fails.sum())]
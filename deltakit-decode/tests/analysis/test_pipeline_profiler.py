@@ -0,0 +1,155 @@
+# (c) Copyright Riverlane 2020-2025.
+import os
+from itertools import cycle
+from unittest.mock import Mock
+
+import numpy as np
+import pytest
+import stim
+from pathos.pools import ProcessPool
+
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode.analysis import PipelineProfiler, StimDecoderManager
+from deltakit_decode.analysis._pipeline_profiler import profile_stage
+from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
+
+
+@pytest.fixture
+def profiler():
+    return PipelineProfiler()
+
+
+@pytest.fixture
+def mock_perf_counter_ns(monkeypatch):
+    mock = Mock()
+    mock.side_effect = cycle([0, 1000])
+    monkeypatch.setattr("deltakit_decode.analysis._pipeline_profiler.perf_counter_ns",
+                        mock)
+
+
+@pytest.fixture(scope="module")
+def stim_manager_args():
+    circuit = stim.Circuit.generated("surface_code:rotated_memory_z",
+                                     distance=3,
+                                     rounds=3,
+                                     after_clifford_depolarization=0.01)
+    graph, logicals, circuit = parse_stim_circuit(circuit)
+    return circuit, PyMatchingDecoder(graph, logicals)
+
+
+@pytest.mark.usefixtures("mock_perf_counter_ns")
+def test_stage_records_wall_time_shots_and_bytes(profiler):
+    for _ in range(3):
+        with profiler.stage("decoding", shots=10) as timing:
+            timing.nbytes = 80
+    assert profiler.to_records() == [{
+        "worker": os.getpid(), "stage": "decoding", "calls": 3, "wall_ns": 3000,
+        "shots": 30, "nbytes": 240, "shots_per_second": 1e7}]
+
+
+def test_throughput_histogram_bins_shots_per_second_of_each_call(profiler):
+    profiler.record("decoding", 10**9, shots=1)
+    profiler.record("decoding", 10**9, shots=1000)
+    profiler.record("decoding", 10**9, shots=1001)
+    profiler.record("decoding", 1, shots=10**10)
+    edges, counts = profiler.throughput_histogram("decoding")
+    np.testing.assert_allclose(edges, np.logspace(0, 9, 37))
+    assert counts.sum() == 4
+    assert counts[0] == 1
+    assert counts[12] == 2
+    assert counts[-1] == 1
+
+
+def test_calls_without_shots_are_not_in_histogram(profiler):
+    profiler.record("merge", 100)
+    assert profiler.throughput_histogram("merge")[1].sum() == 0
+    assert profiler.get_reported_results()["merge_shots_per_second"] == 0
+
+
+def test_adding_profilers_merges_stages_by_worker(profiler):
+    other = PipelineProfiler()
+    profiler.record("sampling", 1000, shots=10, nbytes=5)
+    other.record("sampling", 3000, shots=10, nbytes=5)
+    other.record("decoding", 2000, shots=10)
+    profiler += other
+    assert profiler.stages == ["sampling", "decoding"]
+    assert profiler.get_reported_results() == {
+        "sampling_wall_ns": 4000, "sampling_nbytes": 10,
+        "sampling_shots_per_second": 5e6,
+        "decoding_wall_ns": 2000, "decoding_nbytes": 0,
+        "decoding_shots_per_second": 5e6}
+    assert profiler.throughput_histogram("sampling")[1].sum() == 2
+
+
+def test_adding_other_type_raises_value_error(profiler):
+    with pytest.raises(ValueError, match="Cannot add int to PipelineProfiler"):
+        profiler += 1
+
+
+def test_untimed_stages_do_not_share_timings():
+    with profile_stage(None, "decoding") as timing:
+        timing.nbytes = 80
+    with profile_stage(None, "decoding") as timing:
+        assert timing.nbytes == 0
+
+
+def test_reset_removes_all_stages(profiler):
+    profiler.record("decoding", 1000, shots=10)
+    profiler.reset()
+    assert profiler.to_records() == []
+    assert profiler.get_reported_results() == {}
+
+
+def test_to_dataframe_has_a_row_per_worker_and_stage(profiler):
+    profiler.record("sampling", 1000, shots=10)
+    profiler.record("decoding", 1000, shots=10)
+    dataframe = profiler.to_dataframe()
+    assert list(dataframe["stage"]) == ["sampling", "decoding"]
+    assert list(dataframe.columns) == ["worker", "stage", "calls", "wall_ns", "shots",
+                                       "nbytes", "shots_per_second"]
+
+
+@pytest.mark.parametrize(("batch_limit", "batch_size"), [(1000, 300), (1, 300)])
+def test_decoder_manager_records_each_stage_of_its_shots(stim_manager_args,
+                                                         batch_limit, batch_size):
+    manager = StimDecoderManager(*stim_manager_args, seed=1234, batch_size=batch_size)
+    manager.profiler = PipelineProfiler()
+    manager.run_batch_shots(batch_limit)
+    records = {record["stage"]: record for record in manager.profiler.to_records()}
+    assert set(records) == {"sampling", "decoding", "analysis"}
+    assert all(record["shots"] == batch_limit for record in records.values())
+    results = manager.get_reporter_results()
+    assert results["decoding_wall_ns"] == records["decoding"]["wall_ns"]
+    manager.reset()
+    assert manager.profiler.to_records() == []
+
+
+def test_profiling_does_not_change_decoding_results(stim_manager_args):
+    manager = StimDecoderManager(*stim_manager_args, seed=1234)
+    profiled_manager = StimDecoderManager(*stim_manager_args, seed=1234)
+    profiled_manager.profiler = PipelineProfiler()
+    manager.run_batch_shots(1000)
+    profiled_manager.run_batch_shots(1000)
+    assert manager.empirical_decoding_error_distribution.to_dict() == \
+        profiled_manager.empirical_decoding_error_distribution.to_dict()
+
+
+def test_parallel_decoding_merges_profiles_of_worker_processes(stim_manager_args):
+    manager = StimDecoderManager(*stim_manager_args, seed=1234)
+    manager.profiler = PipelineProfiler()
+    pool = ProcessPool(nodes=2)
+    try:
+        manager.configure_pool(pool, 2)
+        manager.run_batch_shots_parallel(1000, 2, pool)
+        manager.clear_pool_manager(pool, 2)
+    finally:
+        pool.clear()
+    records = manager.profiler.to_records()
+    main_stages = {record["stage"] for record in records
+                   if record["worker"] == os.getpid()}
+    assert main_stages == {"parallel_map", "merge"}
+    worker_records = [record for record in records if record["worker"] != os.getpid()]
+    assert sum(record["shots"] for record in worker_records
+               if record["stage"] == "decoding") == 1000
+    assert all(record["nbytes"] > 0 for record in worker_records
+               if record["stage"] == "serialisation")
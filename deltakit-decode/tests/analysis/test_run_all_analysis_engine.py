@@ -2,14 +2,23 @@
 import pathlib
 from functools import partial
 from typing import Protocol
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import numpy as np
 import pandas as pd
 import pytest
-
+import stim
+from pathos.pools import ProcessPool
+
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode.analysis import (
+    PipelineProfiler,
+    StimDecoderManager,
+    _decoder_manager,
+)
 from deltakit_decode.analysis._decoder_manager import DecoderManager
 from deltakit_decode.analysis._run_all_analysis_engine import RunAllAnalysisEngine
+from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
 
 
 @pytest.fixture(params=[0, 1, 4])
@@ -252,3 +261,426 @@ def test_data_saved_until_failure(mocker, tmp_path, failed_shot):
 
     saved_data = pd.read_csv(engine.file_paths[0])
     assert saved_data.shape[0] == failed_shot
+
+
+def rep_code_decoder_manager(distance: int, seed: int = 1234) -> StimDecoderManager:
+    circuit = stim.Circuit.generated("repetition_code:memory",
+                                     distance=distance,
+                                     rounds=distance,
+                                     after_clifford_depolarization=0.05)
+    graph, logicals, circuit = parse_stim_circuit(circuit)
+    return StimDecoderManager(circuit, PyMatchingDecoder(graph, logicals),
+                              seed=seed, metadata={"distance": distance})
+
+
+class InProcessPool:
+    """Pool that runs tasks in the calling process, so that worker state can be
+    inspected. Each task is run as if by a different worker."""
+
+    def map(self, func, iterable):
+        results = []
+        for worker, item in enumerate(iterable):
+            with patch("os.getpid", return_value=worker):
+                results.append(func(item))
+        return results
+
+    def amap(self, func, iterable):
+        return MagicMock(get=MagicMock(return_value=self.map(func, iterable)))
+
+
+@pytest.fixture
+def in_process_pool():
+    yield InProcessPool()
+    _decoder_manager.mp_dms.clear()
+
+
+def test_configure_pool_with_cached_state_skips_equal_decoder_managers(
+        mocker, in_process_pool):
+    setup_process = mocker.spy(DecoderManager, "_setup_process")
+    rep_code_decoder_manager(3).configure_pool(in_process_pool, 2, cache_state=True)
+    assert setup_process.call_count == 2
+    rep_code_decoder_manager(3).configure_pool(in_process_pool, 2, cache_state=True)
+    assert setup_process.call_count == 2
+    rep_code_decoder_manager(5).configure_pool(in_process_pool, 2, cache_state=True)
+    assert setup_process.call_count == 4
+
+
+def test_configure_pool_with_cached_state_ignores_run_state(mocker, in_process_pool):
+    setup_process = mocker.spy(DecoderManager, "_setup_process")
+    decoder_manager = rep_code_decoder_manager(3)
+    decoder_manager.profiler = PipelineProfiler()
+    decoder_manager.configure_pool(in_process_pool, 2, cache_state=True)
+    decoder_manager.run_batch_shots_parallel(100, 2, in_process_pool)
+    rep_code_decoder_manager(3, seed=1).configure_pool(in_process_pool, 2,
+                                                       cache_state=True)
+    assert setup_process.call_count == 2
+
+
+def test_configure_pool_with_cached_state_sets_up_workers_not_probed(
+        mocker, in_process_pool):
+    rep_code_decoder_manager(3).configure_pool(in_process_pool, 2, cache_state=True)
+    setup_process = mocker.spy(DecoderManager, "_setup_process")
+    with patch("os.getpid", return_value=0):
+        rep_code_decoder_manager(3).configure_pool(
+            MagicMock(map=lambda func, iterable: [func(item) for item in iterable]),
+            2, cache_state=True)
+    assert setup_process.call_count == 2
+
+
+def test_cached_worker_state_runs_with_seed_of_main_process(in_process_pool):
+    def fails_with_worker_state_of_seed(worker_seed: int) -> int:
+        _decoder_manager.mp_dms.clear()
+        rep_code_decoder_manager(3, worker_seed).configure_pool(in_process_pool, 1,
+                                                                cache_state=True)
+        decoder_manager = rep_code_decoder_manager(3, seed=2)
+        decoder_manager.configure_pool(in_process_pool, 1, cache_state=True)
+        decoder_manager.run_batch_shots_parallel(1000, 1, in_process_pool)
+        return decoder_manager.fails
+
+    assert fails_with_worker_state_of_seed(1) == fails_with_worker_state_of_seed(2)
+
+
+def test_configure_pool_without_cached_state_always_sets_up_workers(
+        mocker, in_process_pool):
+    setup_process = mocker.spy(DecoderManager, "_setup_process")
+    rep_code_decoder_manager(3).configure_pool(in_process_pool, 2)
+    rep_code_decoder_manager(3).configure_pool(in_process_pool, 2)
+    assert setup_process.call_count == 4
+
+
+def test_prepared_decoder_manager_is_not_set_up_again(mocker, in_process_pool):
+    decoder_manager = rep_code_decoder_manager(3)
+    decoder_manager.prepare_pool(in_process_pool, 2).get()
+    setup_process = mocker.spy(DecoderManager, "_setup_process")
+    decoder_manager.configure_pool(in_process_pool, 2, cache_state=True)
+    setup_process.assert_not_called()
+
+
+def test_process_managers_are_limited_to_most_recently_used(in_process_pool):
+    for seed in range(_decoder_manager.MAX_CACHED_PROCESS_MANAGERS + 2):
+        rep_code_decoder_manager(3, seed).configure_pool(in_process_pool, 1)
+    assert len(_decoder_manager.mp_dms) == _decoder_manager.MAX_CACHED_PROCESS_MANAGERS
+
+
+def test_removing_decoder_manager_from_pool_keeps_other_decoder_managers(
+        in_process_pool):
+    decoder_managers = [rep_code_decoder_manager(3, seed) for seed in range(2)]
+    for decoder_manager in decoder_managers:
+        decoder_manager.configure_pool(in_process_pool, 2)
+    decoder_managers[0].remove_from_pool(in_process_pool, 2)
+    assert list(_decoder_manager.mp_dms) == [decoder_managers[1]._mp_token]
+
+
+def test_reused_pool_gives_same_results_as_pool_per_decoder_manager():
+    results = []
+    for reuse_pool in [False, True]:
+        engine = RunAllAnalysisEngine(
+            "test_experiment",
+            decoder_managers=[rep_code_decoder_manager(distance)
+                              for distance in [3, 5, 3]],
+            num_parallel_processes=2,
+            batch_size=500,
+            max_shots=2000,
+            reuse_pool=reuse_pool,
+        )
+        try:
+            results.append(engine.run())
+        finally:
+            engine.close()
+    pd.testing.assert_frame_equal(*results)
+
+
+def test_close_releases_reused_pool():
+    engine = RunAllAnalysisEngine("test_experiment",
+                                  decoder_managers=[rep_code_decoder_manager(3)],
+                                  num_parallel_processes=2,
+                                  batch_size=500,
+                                  max_shots=1000,
+                                  reuse_pool=True)
+    engine.run()
+    assert engine._pool is not None
+    engine.close()
+    assert engine._pool is None
+
+
+def record_run_order(decoder_managers: list[DecoderManager]) -> list[int]:
+    run_order: list[int] = []
+    for index, decoder_manager in enumerate(decoder_managers):
+        run_batch_shots = decoder_manager.run_batch_shots.side_effect
+        decoder_manager.run_batch_shots.side_effect = (
+            lambda batch_size, index=index, run_batch_shots=run_batch_shots: (
+                run_order.append(index), run_batch_shots(batch_size)))
+    return run_order
+
+
+def test_shot_priority_interleaves_batches_across_decoder_managers(mocker):
+    decoder_managers = mock_decoder_managers(mocker, 3, mock_all_fails_run_batch_shots)
+    run_order = record_run_order(decoder_managers)
+    engine = RunAllAnalysisEngine(
+        "test_experiment",
+        decoder_managers=decoder_managers,
+        num_parallel_processes=1,
+        batch_size=10,
+        max_shots=30,
+        shot_priority=lambda distribution: -distribution.shots,
+    )
+    engine.run()
+    assert run_order == [0, 1, 2] * 3
+
+
+def test_shot_priority_runs_highest_priority_decoder_manager_first(mocker):
+    decoder_managers = mock_decoder_managers(mocker, 3, mock_all_fails_run_batch_shots)
+    run_order = record_run_order(decoder_managers)
+    priorities = {id(decoder_manager.empirical_decoding_error_distribution): priority
+                  for decoder_manager, priority in zip(decoder_managers, [1, 3, 2],
+                                                       strict=True)}
+    engine = RunAllAnalysisEngine(
+        "test_experiment",
+        decoder_managers=decoder_managers,
+        num_parallel_processes=1,
+        batch_size=10,
+        max_shots=20,
+        shot_priority=lambda distribution: priorities[id(distribution)],
+    )
+    engine.run()
+    assert run_order == [1, 1, 2, 2, 0, 0]
+
+
+def test_interleaved_decoder_managers_are_only_removed_from_pool_when_finished(
+        mocker):
+    decoder_managers = mock_decoder_managers(mocker, 2, mock_all_fails_run_batch_shots)
+    for decoder_manager in decoder_managers:
+        decoder_manager.run_batch_shots_parallel.side_effect = (
+            lambda batch_limit, decoder_manager=decoder_manager, **_:
+            mock_all_fails_run_batch_shots(batch_limit, decoder_manager))
+    mocker.patch.object(RunAllAnalysisEngine, "_create_pool")
+    engine = RunAllAnalysisEngine(
+        "test_experiment",
+        decoder_managers=decoder_managers,
+        num_parallel_processes=2,
+        batch_size=10,
+        max_shots=60,
+        shot_priority=lambda distribution: -distribution.shots,
+    )
+    engine.run()
+    for decoder_manager in decoder_managers:
+        decoder_manager.clear_pool_manager.assert_not_called()
+        decoder_manager.remove_from_pool.assert_called_once()
+
+
+def test_interleaved_decoder_managers_in_pool_are_limited_to_cached_managers(
+        mocker):
+    num_decoder_managers = _decoder_manager.MAX_CACHED_PROCESS_MANAGERS + 2
+    decoder_managers = mock_decoder_managers(mocker, num_decoder_managers,
+                                             mock_all_fails_run_batch_shots)
+    configured: set[int] = set()
+    events: list[tuple[str, int]] = []
+    for index, decoder_manager in enumerate(decoder_managers):
+        decoder_manager.configure_pool.side_effect = (
+            lambda *_, index=index, **__: (configured.add(index),
+                                           events.append(("configure", index))))
+        decoder_manager.remove_from_pool.side_effect = (
+            lambda *_, index=index, **__: (configured.discard(index),
+                                           events.append(("remove", index))))
+        decoder_manager.run_batch_shots_parallel.side_effect = (
+            lambda batch_limit, index=index, decoder_manager=decoder_manager, **_: (
+                events.append(("run", index)),
+                mock_all_fails_run_batch_shots(batch_limit, decoder_manager)))
+    mocker.patch.object(RunAllAnalysisEngine, "_create_pool")
+    engine = RunAllAnalysisEngine(
+        "test_experiment",
+        decoder_managers=decoder_managers,
+        num_parallel_processes=2,
+        batch_size=10,
+        max_shots=60,
+        shot_priority=lambda distribution: -distribution.shots,
+    )
+    engine.run()
+    active: set[int] = set()
+    for event, index in events:
+        if event == "configure":
+            active.add(index)
+        elif event == "remove":
+            active.discard(index)
+        assert len(active) <= _decoder_manager.MAX_CACHED_PROCESS_MANAGERS
+    assert {index for event, index in events if event == "run"} == set(
+        range(num_decoder_managers))
+
+
+def test_shot_priority_stops_decoder_managers_once_converged(half_fail_decoder_managers):
+    engine = RunAllAnalysisEngine(
+        "test_experiment",
+        decoder_managers=half_fail_decoder_managers,
+        loop_condition=RunAllAnalysisEngine.loop_until_failures(10),
+        num_parallel_processes=1,
+        batch_size=4,
+        shot_priority=RunAllAnalysisEngine.priority_by_observable_rse(0.1, 10),
+    )
+    results = engine.run()
+    for decoder_manager in half_fail_decoder_managers:
+        distribution = decoder_manager.empirical_decoding_error_distribution
+        assert distribution.fails == 10
+        assert distribution.shots == 20
+    assert len(results) == len(half_fail_decoder_managers)
+
+
+@pytest.mark.parametrize("num_parallel_processes", [1, 2])
+def test_shot_priority_gives_same_results_as_running_in_turn(tmp_path,
+                                                             num_parallel_processes):
+    results = []
+    for shot_priority in [None,
+                          RunAllAnalysisEngine.priority_by_observable_rse(0.2, 10)]:
+        engine = RunAllAnalysisEngine(
+            f"test_experiment_{shot_priority is None}",
+            decoder_managers=[rep_code_decoder_manager(distance)
+                              for distance in [3, 5, 7]],
+            loop_condition=RunAllAnalysisEngine.loop_until_observable_rse_below_threshold(
+                0.2, 10),
+            data_directory=tmp_path,
+            num_parallel_processes=num_parallel_processes,
+            batch_size=200,
+            max_shots=10000,
+            shot_priority=shot_priority,
+        )
+        results.append(engine.run())
+        saved_data = pd.read_csv(engine.file_paths[0])
+        assert sorted(saved_data["distance"]) == [3, 5, 7]
+    pd.testing.assert_frame_equal(*results)
+
+
+@pytest.mark.parametrize(("shots", "fails_per_logical", "expected_priority"), [
+    (0, [0], float("inf")),
+    (100, [0], 10.0),
+    (100, [10], 3.0),
+    (10000, [5000, 2500], np.sqrt(3) / 10),
+])
+def test_priority_by_observable_rse(shots, fails_per_logical, expected_priority):
+    distribution = MagicMock(shots=shots, fails_per_logical=fails_per_logical)
+    priority = RunAllAnalysisEngine.priority_by_observable_rse(0.1, 10)
+    assert priority(distribution) == pytest.approx(expected_priority)
+
+
+def test_checkpoints_require_data_directory():
+    with pytest.raises(ValueError, match="data directory"):
+        RunAllAnalysisEngine("test_experiment", [], checkpoint_interval=0)
+
+
+def test_checkpoint_saved_for_each_decoder_manager(tmp_path):
+    engine = RunAllAnalysisEngine("test_experiment",
+                                  decoder_managers=[rep_code_decoder_manager(distance)
+                                                    for distance in [3, 5]],
+                                  data_directory=tmp_path,
+                                  num_parallel_processes=1,
+                                  batch_size=100,
+                                  max_shots=300,
+                                  checkpoint_interval=0)
+    engine.run()
+    checkpoint_directory = engine.construct_checkpoint_directory()
+    assert sorted(path.name for path in checkpoint_directory.iterdir()) == [
+        "0.pkl", "1.pkl"]
+
+
+@pytest.mark.parametrize("shot_priority", [
+    None, RunAllAnalysisEngine.priority_by_observable_rse(0.1, 10)])
+def test_resume_runs_only_missing_shots(mocker, tmp_path, shot_priority):
+    first_run = [rep_code_decoder_manager(distance) for distance in [3, 5]]
+    engine = RunAllAnalysisEngine("test_experiment",
+                                  decoder_managers=first_run,
+                                  data_directory=tmp_path,
+                                  num_parallel_processes=1,
+                                  batch_size=100,
+                                  max_shots=300,
+                                  checkpoint_interval=0,
+                                  shot_priority=shot_priority)
+    engine.run()
+
+    second_run = [rep_code_decoder_manager(distance) for distance in [3, 5]]
+    run_batch_shots = mocker.spy(StimDecoderManager, "run_batch_shots")
+    engine = RunAllAnalysisEngine("test_experiment",
+                                  decoder_managers=second_run,
+                                  data_directory=tmp_path,
+                                  num_parallel_processes=1,
+                                  batch_size=100,
+                                  max_shots=500,
+                                  checkpoint_interval=0,
+                                  resume=True,
+                                  shot_priority=shot_priority)
+    results = engine.run()
+    assert results["shots"].tolist() == [500, 500]
+    assert run_batch_shots.call_count == 4
+    for first, second in zip(first_run, second_run, strict=True):
+        assert second.fails >= first.fails
+
+
+def test_resume_continues_from_last_checkpoint_after_interruption(mocker, tmp_path):
+    decoder_manager = rep_code_decoder_manager(3)
+    run_batch_shots = decoder_manager.run_batch_shots
+
+    def interrupted_run_batch_shots(batch_limit):
+        if decoder_manager.shots == 200:
+            raise KeyboardInterrupt
+        return run_batch_shots(batch_limit)
+
+    mocker.patch.object(decoder_manager, "run_batch_shots",
+                        side_effect=interrupted_run_batch_shots)
+    engine_kwargs = {"data_directory": tmp_path,
+                     "num_parallel_processes": 1,
+                     "batch_size": 100,
+                     "max_shots": 500,
+                     "checkpoint_interval": 0}
+    with pytest.raises(KeyboardInterrupt):
+        RunAllAnalysisEngine("test_experiment", [decoder_manager],
+                             **engine_kwargs).run()
+
+    resumed_manager = rep_code_decoder_manager(3)
+    run_batch_shots = mocker.spy(resumed_manager, "run_batch_shots")
+    results = RunAllAnalysisEngine("test_experiment", [resumed_manager], resume=True,
+                                   **engine_kwargs).run()
+    assert results["shots"].tolist() == [500]
+    assert run_batch_shots.call_count == 3
+
+
+def test_resumed_parallel_run_does_not_repeat_checkpointed_shots():
+    decoder_manager = rep_code_decoder_manager(3)
+    resumed_manager = rep_code_decoder_manager(3)
+    pool = ProcessPool(nodes=2)
+    try:
+        decoder_manager.configure_pool(pool, 2)
+        decoder_manager.run_batch_shots_parallel(1000, 2, pool)
+        resumed_manager.restore_checkpoint(*decoder_manager.get_checkpoint())
+        resumed_manager.configure_pool(pool, 2)
+        resumed_manager.run_batch_shots_parallel(1000, 2, pool)
+        resumed_manager.clear_pool_manager(pool, 2)
+    finally:
+        pool.clear()
+    assert resumed_manager.shots == 2000
+    assert resumed_manager.fails != 2 * decoder_manager.fails
+
+
+def test_resume_raises_if_checkpoint_metadata_differs(tmp_path):
+    engine_kwargs = {"data_directory": tmp_path,
+                     "num_parallel_processes": 1,
+                     "batch_size": 100,
+                     "max_shots": 100,
+                     "checkpoint_interval": 0}
+    RunAllAnalysisEngine("test_experiment", [rep_code_decoder_manager(3)],
+                         **engine_kwargs).run()
+    with pytest.raises(ValueError, match="metadata"):
+        RunAllAnalysisEngine("test_experiment", [rep_code_decoder_manager(5)],
+                             resume=True, **engine_kwargs).run()
+
+
+def test_run_without_resume_removes_previous_checkpoints(tmp_path):
+    engine_kwargs = {"data_directory": tmp_path,
+                     "num_parallel_processes": 1,
+                     "batch_size": 100,
+                     "max_shots": 100,
+                     "checkpoint_interval": 0}
+    RunAllAnalysisEngine("test_experiment",
+                         [rep_code_decoder_manager(3), rep_code_decoder_manager(5)],
+                         **engine_kwargs).run()
+    engine = RunAllAnalysisEngine("test_experiment", [rep_code_decoder_manager(5)],
+                                  **engine_kwargs)
+    engine.run()
+    assert [path.name for path in engine.construct_checkpoint_directory().iterdir()
+            ] == ["0.pkl"]
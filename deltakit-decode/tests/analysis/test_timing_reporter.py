@@ -5,7 +5,7 @@ from unittest.mock import Mock
 
 import pytest
 
-from deltakit_decode._base_reporter import TimingReporter
+from deltakit_decode._base_reporter import BaseReporter, TimingReporter
 
 
 @pytest.fixture
@@ -69,3 +69,38 @@ def test_add(timing_reporter: TimingReporter):
         stack.enter_context(timing_reporter)
     with pytest.raises(TypeError, match=r"unsupported operand type\(s\) for \+="):
         timing_reporter += 1  # type: ignore[arg-type]
+
+
+def test_batch_counts_each_shot_with_the_mean_time_of_the_batch(
+        timing_reporter: TimingReporter):
+    with timing_reporter.batch(4):
+        pass
+    with timing_reporter.batch(1):
+        pass
+    assert timing_reporter._shots == 5
+    assert timing_reporter._sum_wall_ns == 2
+    assert timing_reporter.avg_wall_ns == pytest.approx(0.4)
+    # Shots within a batch have no deviation, so only the two batches contribute.
+    assert timing_reporter._sum_of_square_deviations == pytest.approx(
+        4 * (0.25 - 0.4)**2 + (1 - 0.4)**2)
+
+
+def test_timing_reporter_supports_batches(timing_reporter: TimingReporter):
+    assert timing_reporter.supports_batches
+
+
+def test_reporter_without_batch_hooks_does_not_support_batches():
+    class ShotReporter(BaseReporter):
+        def reset_reporter(self):
+            pass
+
+        def get_reported_results(self):
+            return {}
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            pass
+
+    reporter = ShotReporter()
+    assert not reporter.supports_batches
+    with pytest.raises(NotImplementedError, match="does not support batches"):
+        reporter.enter_batch(10)
@@ -1,6 +1,7 @@
 # (c) Copyright Riverlane 2020-2025.
 
 import deltakit_circuit as sp
+import numpy as np
 import pytest
 import stim
 from deltakit_core.decoding_graphs import (
@@ -26,6 +27,9 @@ from deltakit_decode.noise_sources import (
     UniformMatchingNoise,
 )
 from deltakit_decode.noise_sources._generic_noise_sources import _NoiseModel
+from deltakit_decode.noise_sources._matching_noise_sources import (
+    AdditiveSequentialMatchingNoise,
+)
 from deltakit_decode.utils import parse_stim_circuit
 
 
@@ -183,6 +187,20 @@ class TestFixedWeightMatchingNoise:
         assert error == expected_errors
 
 
+class TestAdditiveSequentialMatchingNoise:
+
+    def test_errors_are_products_of_internal_errors(self, manual_decoding_graph):
+        internal_errors = list(
+            ExhaustiveMatchingNoise(1).error_generator(manual_decoding_graph))
+        noise_model = AdditiveSequentialMatchingNoise(
+            [ExhaustiveMatchingNoise(1), ExhaustiveMatchingNoise(1)])
+        assert noise_model.sequence_size(manual_decoding_graph) == \
+            len(internal_errors) ** 2
+        assert list(noise_model.error_generator(manual_decoding_graph)) == [
+            OrderedDecodingEdges([*first, *second])
+            for first in internal_errors for second in internal_errors]
+
+
 class TestSampleStimNoise:
 
     @pytest.mark.parametrize(("stim_circuit", "expected_sample"), [
@@ -295,6 +313,33 @@ class TestEdgeProbabilityMatchingNoise:
         noise_sample = next(noise_model.error_generator(decoding_graph, 1))
         assert noise_sample == expected_errors
 
+    @pytest.mark.parametrize("decoding_graph", [
+        lf("stim_decoding_hypergraph"),
+        lf("manual_decoding_graph"),
+    ])
+    def test_batches_match_errors_from_error_generator(
+        self, decoding_graph: HyperMultiGraph
+    ):
+        noise_model = EdgeProbabilityMatchingNoise()
+        error_generator = noise_model.error_generator(decoding_graph, 1)
+        batch_error_generator = noise_model.build_batch_error_generator(
+            decoding_graph, 1)
+        for batch_size in (1, 30, 20):
+            batch = batch_error_generator(batch_size)
+            assert batch.shape == (batch_size, len(decoding_graph.edges))
+            for errors in batch:
+                expected_errors = next(error_generator)
+                assert [decoding_graph.edges[i] for i in np.flatnonzero(errors)] \
+                    == sorted(expected_errors, key=decoding_graph.edges.index)
+
+    def test_batches_only_contain_errors_on_filtered_edges(
+        self, manual_decoding_graph: NXDecodingGraph
+    ):
+        filtered_edges = manual_decoding_graph.edges[3:6]
+        noise_model = EdgeProbabilityMatchingNoise(lambda _: filtered_edges)
+        batch = noise_model.build_batch_error_generator(manual_decoding_graph, 1)(100)
+        assert np.flatnonzero(batch.any(axis=0)).tolist() == [3, 4, 5]
+
     @pytest.mark.parametrize("rhs", [
         EdgeProbabilityMatchingNoise(),
         UniformMatchingNoise(0.1),
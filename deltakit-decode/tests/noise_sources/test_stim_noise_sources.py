@@ -1,13 +1,54 @@
 # (c) Copyright Riverlane 2020-2025.
 import deltakit_circuit as sp
+import numpy as np
 import pytest
 import stim
 from deltakit_circuit.gates._abstract_gates import (
     OneQubitMeasurementGate,
     TwoOperandGate,
 )
+from deltakit_core.decoding_graphs import OrderedSyndrome, SyndromeBatch
 
-from deltakit_decode.noise_sources import OptionedStim, StimNoise, ToyNoise
+from deltakit_decode.noise_sources import (
+    OptionedStim,
+    SampleStimNoise,
+    StimNoise,
+    ToyNoise,
+)
+from deltakit_decode.noise_sources._stim_noise_sources import (
+    stim_batch_to_decode_batch,
+)
+
+
+@pytest.fixture(scope="module")
+def noisy_stim_circuit() -> stim.Circuit:
+    return stim.Circuit.generated("surface_code:rotated_memory_z",
+                                  distance=3,
+                                  rounds=3,
+                                  after_clifford_depolarization=0.05)
+
+
+def test_batches_are_bit_packed_syndrome_batches(noisy_stim_circuit):
+    syndrome_batch, observables = SampleStimNoise().build_batch_error_generator(
+        noisy_stim_circuit, seed=1234)(100)
+    assert isinstance(syndrome_batch, SyndromeBatch)
+    assert syndrome_batch.is_bit_packed
+    expected_detectors, expected_observables = \
+        noisy_stim_circuit.compile_detector_sampler(seed=1234).sample(
+            100, separate_observables=True)
+    np.testing.assert_array_equal(syndrome_batch.dense, expected_detectors)
+    np.testing.assert_array_equal(observables, expected_observables)
+
+
+@pytest.mark.parametrize("num_observables", [0, 1, 3])
+def test_stim_batch_to_decode_batch_splits_syndromes_and_observables(num_observables):
+    detector_batch = (np.random.default_rng(1234).random((50, 20)) < 0.3
+                      ).astype(np.uint8)
+    split = 20 - num_observables
+    assert list(stim_batch_to_decode_batch(detector_batch, num_observables)) == [
+        (OrderedSyndrome.from_bitstring(sample[:split]),
+         tuple(bool(observable) for observable in sample[split:]))
+        for sample in detector_batch]
 
 
 class TestStimNoise:
@@ -0,0 +1,200 @@
+# (c) Copyright Riverlane 2020-2025.
+import pickle
+
+import numpy as np
+import pymatching
+import pytest
+import stim
+from deltakit_core.decoding_graphs import (
+    DecodingEdge,
+    EdgeRecord,
+    NXDecodingGraph,
+    OrderedDecodingEdges,
+    SyndromeBatch,
+    dem_to_decoding_graph_and_logicals,
+)
+
+from deltakit_decode._abstract_matching_decoders import GraphDecoder
+from deltakit_decode._mwpm_decoder import PyMatchingDecoder, _MatchingArrays
+
+
+@pytest.fixture(scope="module")
+def circuit() -> stim.Circuit:
+    return stim.Circuit.generated("surface_code:rotated_memory_z",
+                                  distance=3,
+                                  rounds=3,
+                                  after_clifford_depolarization=0.01)
+
+
+@pytest.fixture(scope="module")
+def syndrome_batch(circuit) -> np.ndarray:
+    return circuit.compile_detector_sampler(seed=42).sample(500).astype(np.uint8)
+
+
+@pytest.fixture
+def decoder(circuit) -> PyMatchingDecoder:
+    dem = circuit.detector_error_model(decompose_errors=True)
+    graph, logicals = dem_to_decoding_graph_and_logicals(dem)
+    return PyMatchingDecoder(graph, logicals)
+
+
+class TestMatchingArrays:
+
+    def test_round_trip_preserves_matching_graph(self, circuit):
+        matching = pymatching.Matching.from_detector_error_model(
+            circuit.detector_error_model(decompose_errors=True))
+        rebuilt = _MatchingArrays.from_matching(matching).to_matching()
+        assert rebuilt.edges() == matching.edges()
+        assert rebuilt.num_fault_ids == matching.num_fault_ids
+        assert rebuilt.boundary == matching.boundary
+
+    def test_round_trip_preserves_boundary_nodes(self):
+        matching = pymatching.Matching()
+        matching.add_edge(0, 1, fault_ids={0}, weight=2.0)
+        matching.add_edge(1, 2, fault_ids={1, 2}, weight=1.5, error_probability=0.1)
+        matching.set_boundary_nodes({2})
+        rebuilt = _MatchingArrays.from_matching(matching).to_matching()
+        assert rebuilt.edges() == matching.edges()
+        assert rebuilt.boundary == {2}
+        assert rebuilt.num_fault_ids == 3
+
+
+def networkx_matcher(decoder: PyMatchingDecoder, fault_edges) -> pymatching.Matching:
+    local_nx = decoder.decoding_graph.graph.copy()
+    for fault_id, edges in enumerate(fault_edges):
+        for edge in edges:
+            local_nx.edges[edge].setdefault("fault_ids", set()).add(fault_id)
+    for boundary in decoder.decoding_graph.boundaries:
+        local_nx.nodes[boundary]["is_boundary"] = True
+    return pymatching.Matching.from_networkx(local_nx,
+                                             min_num_fault_ids=len(decoder.logicals))
+
+
+def sorted_edges(matching: pymatching.Matching):
+    return sorted((min(u, v), max(u, v), data["weight"], sorted(data["fault_ids"]))
+                  for u, v, data in matching.edges())
+
+
+class TestPyMatchingDecoderMatchers:
+
+    def test_logical_flip_matcher_matches_networkx_matcher(self, decoder):
+        expected = networkx_matcher(decoder, decoder.logicals)
+        assert sorted_edges(decoder._logical_flip_matcher) == sorted_edges(expected)
+        assert decoder._logical_flip_matcher.boundary == expected.boundary
+        assert decoder._logical_flip_matcher.num_fault_ids == expected.num_fault_ids
+
+    def test_full_matcher_matches_networkx_matcher(self, decoder):
+        expected = networkx_matcher(
+            decoder, [[edge] for edge in decoder.decoding_graph.edges])
+        assert sorted_edges(decoder._full_matcher) == sorted_edges(expected)
+        assert decoder._full_matcher.num_fault_ids == expected.num_fault_ids
+
+    @pytest.mark.parametrize("method", ["decode_batch_to_logical_flip",
+                                        "decode_batch_to_full_correction"])
+    def test_decoder_decodes_as_networkx_matcher(self, decoder, syndrome_batch, method):
+        fault_edges = (decoder.logicals if method == "decode_batch_to_logical_flip"
+                       else [[edge] for edge in decoder.decoding_graph.edges])
+        np.testing.assert_array_equal(
+            getattr(decoder, method)(syndrome_batch),
+            networkx_matcher(decoder, fault_edges).decode_batch(syndrome_batch))
+
+    def test_matchers_share_matching_graph(self, decoder, syndrome_batch):
+        decoder.decode_batch_to_logical_flip(syndrome_batch)
+        matching_graph = decoder.__dict__["_matching_graph"]
+        decoder.decode_batch_to_full_correction(syndrome_batch)
+        assert decoder.__dict__["_matching_graph"] is matching_graph
+
+    def test_edges_with_infinite_weight_are_not_matched(self):
+        graph = NXDecodingGraph.from_edge_list([
+            (DecodingEdge(0, 1), EdgeRecord(p_err=0.0)),
+            (DecodingEdge(1, 2), EdgeRecord(p_err=0.1)),
+            (DecodingEdge(2, 3), EdgeRecord(p_err=0.1)),
+        ], boundaries=[3])
+        decoder = PyMatchingDecoder(
+            graph, (OrderedDecodingEdges([DecodingEdge(2, 3)]),))
+        with pytest.warns(UserWarning, match="1 edges have weights exceeding"):
+            correction = decoder.decode_batch_to_full_correction(
+                np.array([[0, 0, 1, 0]], dtype=np.uint8))
+        np.testing.assert_array_equal(correction, [[0, 0, 1]])
+
+
+class TestPyMatchingDecoderPickling:
+
+    @pytest.mark.parametrize("method", ["decode_batch_to_logical_flip",
+                                        "decode_batch_to_full_correction"])
+    def test_unpickled_decoder_decodes_identically(self, decoder, syndrome_batch,
+                                                   method):
+        expected = getattr(decoder, method)(syndrome_batch)
+        unpickled = pickle.loads(pickle.dumps(decoder))
+        np.testing.assert_array_equal(getattr(unpickled, method)(syndrome_batch),
+                                      expected)
+
+    def test_unpickled_decoder_does_not_rebuild_logical_flip_matcher_from_graph(
+            self, decoder, syndrome_batch, mocker):
+        unpickled = pickle.loads(pickle.dumps(decoder))
+        make_matcher = mocker.patch.object(PyMatchingDecoder, "_make_matcher_arrays")
+        unpickled.decode_batch_to_logical_flip(syndrome_batch)
+        make_matcher.assert_not_called()
+
+    def test_full_matcher_is_only_pickled_once_built(self, decoder, syndrome_batch):
+        assert "_full_matcher_arrays" not in pickle.loads(
+            pickle.dumps(decoder)).__dict__
+        decoder.decode_batch_to_full_correction(syndrome_batch)
+        assert "_full_matcher_arrays" in pickle.loads(pickle.dumps(decoder)).__dict__
+
+    def test_pickling_does_not_build_matcher_arrays_on_decoder(self, decoder):
+        pickle.dumps(decoder)
+        assert decoder._logical_flip_matcher_arrays is None
+
+    def test_decoding_graph_is_not_pickled_as_networkx_graph(self, decoder):
+        assert "decoding_graph" not in decoder.__getstate__()
+
+    def test_unpickled_decoder_has_same_decoding_graph(self, decoder):
+        unpickled = pickle.loads(pickle.dumps(decoder))
+        assert unpickled.decoding_graph.edges == decoder.decoding_graph.edges
+        assert (unpickled.decoding_graph.edge_records
+                == decoder.decoding_graph.edge_records)
+        assert (unpickled.decoding_graph.detector_records
+                == decoder.decoding_graph.detector_records)
+        assert unpickled.decoding_graph.boundaries == decoder.decoding_graph.boundaries
+
+    def test_decoding_graph_with_other_edge_attributes_is_pickled_whole(self):
+        graph = NXDecodingGraph.from_edge_list(
+            [(DecodingEdge(0, 1), EdgeRecord(0.1, label="a")),
+             (DecodingEdge(1, 2), EdgeRecord(0.2, label="b"))], boundaries=[2])
+        decoder = PyMatchingDecoder(graph, [OrderedDecodingEdges()])
+        unpickled = pickle.loads(pickle.dumps(decoder))
+        assert unpickled.decoding_graph.edge_records == graph.edge_records
+
+
+class TestPyMatchingDecoderSyndromeBatches:
+
+    @pytest.fixture(params=[False, True], ids=["dense", "bit_packed"])
+    def batch(self, request, syndrome_batch) -> SyndromeBatch:
+        if request.param:
+            return SyndromeBatch(np.packbits(syndrome_batch, axis=1, bitorder="little"),
+                                 syndrome_batch.shape[1], bit_packed=True)
+        return SyndromeBatch(syndrome_batch)
+
+    @pytest.mark.parametrize("method", ["decode_batch_to_logical_flip",
+                                        "decode_batch_to_full_correction"])
+    def test_syndrome_batches_decode_as_arrays(self, decoder, syndrome_batch, batch,
+                                               method):
+        np.testing.assert_array_equal(getattr(decoder, method)(batch),
+                                      getattr(decoder, method)(syndrome_batch))
+
+    def test_bit_packed_batches_are_not_unpacked(self, decoder, syndrome_batch,
+                                                 mocker):
+        batch = SyndromeBatch(np.packbits(syndrome_batch, axis=1, bitorder="little"),
+                              syndrome_batch.shape[1], bit_packed=True)
+        decode_batch = mocker.spy(pymatching.Matching, "decode_batch")
+        decoder.decode_batch_to_logical_flip(batch)
+        assert decode_batch.call_args.kwargs == {"bit_packed_shots": True}
+
+    @pytest.mark.parametrize("method", ["decode_batch_to_logical_flip",
+                                        "decode_batch_to_full_correction"])
+    def test_graph_decoder_decodes_each_shot_of_syndrome_batches(
+            self, decoder, syndrome_batch, batch, method):
+        np.testing.assert_array_equal(
+            getattr(GraphDecoder, method)(decoder, batch[:50]),
+            getattr(decoder, method)(syndrome_batch[:50]))
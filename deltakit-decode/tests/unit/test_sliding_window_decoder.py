@@ -0,0 +1,129 @@
+# (c) Copyright Riverlane 2020-2025.
+import numpy as np
+import pytest
+import stim
+from deltakit_core.decoding_graphs import OrderedSyndrome
+
+from deltakit_decode import PyMatchingDecoder, SlidingWindowDecoder
+from deltakit_decode.utils import parse_stim_circuit
+
+
+@pytest.fixture(scope="module")
+def memory_experiment():
+    circuit = stim.Circuit.generated("surface_code:rotated_memory_z",
+                                     distance=3,
+                                     rounds=12,
+                                     after_clifford_depolarization=0.01,
+                                     before_measure_flip_probability=0.005)
+    graph, logicals, circuit = parse_stim_circuit(circuit)
+    detectors, observables = circuit.compile_detector_sampler(seed=42).sample(
+        500, separate_observables=True)
+    syndrome_batch = np.zeros((len(detectors), max(graph.nodes) + 1), dtype=np.uint8)
+    syndrome_batch[:, :detectors.shape[1]] = detectors
+    return graph, logicals, syndrome_batch, observables.astype(np.uint8)
+
+
+@pytest.fixture
+def decoder(memory_experiment) -> SlidingWindowDecoder:
+    graph, logicals, _, _ = memory_experiment
+    return SlidingWindowDecoder(graph, logicals, commit_rounds=2, buffer_rounds=3)
+
+
+def correction_syndromes(graph, corrections):
+    incidence = np.zeros((len(graph.edges), max(graph.nodes) + 1), dtype=np.int64)
+    for index, edge in enumerate(graph.edges):
+        for node in edge:
+            if node not in graph.boundaries:
+                incidence[index, node] = 1
+    return (corrections.astype(np.int64) @ incidence) % 2
+
+
+@pytest.mark.parametrize(("commit_rounds", "buffer_rounds"), [(13, 0), (20, 2), (5, 20)])
+def test_single_window_decodes_as_its_decoder(memory_experiment, commit_rounds,
+                                              buffer_rounds):
+    graph, logicals, syndrome_batch, _ = memory_experiment
+    decoder = SlidingWindowDecoder(graph, logicals, commit_rounds, buffer_rounds)
+    assert decoder.num_rounds == 13
+    np.testing.assert_array_equal(
+        decoder.decode_batch_to_logical_flip(syndrome_batch),
+        PyMatchingDecoder(graph, logicals).decode_batch_to_logical_flip(
+            syndrome_batch))
+
+
+@pytest.mark.parametrize(("commit_rounds", "buffer_rounds"), [(1, 0), (1, 1), (2, 3)])
+def test_full_correction_gives_the_syndrome(memory_experiment, commit_rounds,
+                                            buffer_rounds):
+    graph, logicals, syndrome_batch, _ = memory_experiment
+    decoder = SlidingWindowDecoder(graph, logicals, commit_rounds, buffer_rounds)
+    corrections = decoder.decode_batch_to_full_correction(syndrome_batch)
+    np.testing.assert_array_equal(correction_syndromes(graph, corrections),
+                                  syndrome_batch)
+
+
+def test_logical_flips_match_full_correction(decoder, memory_experiment):
+    _, _, syndrome_batch, _ = memory_experiment
+    corrections = decoder.decode_batch_to_full_correction(syndrome_batch)
+    expected = np.array([[len({decoder.decoding_graph.edges[i]
+                               for i in np.nonzero(correction)[0]} & logical) % 2
+                          for logical in decoder.logicals]
+                         for correction in corrections], dtype=np.uint8)
+    np.testing.assert_array_equal(decoder.decode_batch_to_logical_flip(syndrome_batch),
+                                  expected)
+
+
+def test_buffer_recovers_global_logical_error_rate(decoder, memory_experiment):
+    graph, logicals, syndrome_batch, observables = memory_experiment
+    global_fails = np.count_nonzero(np.any(
+        PyMatchingDecoder(graph, logicals).decode_batch_to_logical_flip(
+            syndrome_batch) != observables, axis=1))
+    window_fails = np.count_nonzero(np.any(
+        decoder.decode_batch_to_logical_flip(syndrome_batch) != observables, axis=1))
+    assert window_fails <= global_fails + 3
+
+
+def test_windows_shifted_in_time_share_decoders(decoder, memory_experiment):
+    _, _, syndrome_batch, _ = memory_experiment
+    decoder.decode_batch_to_logical_flip(syndrome_batch)
+    assert len(decoder._windows) == 5
+    assert decoder.num_window_decoders == 3
+
+
+def test_stream_decodes_as_batch(decoder, memory_experiment):
+    _, _, syndrome_batch, _ = memory_experiment
+    rounds = (syndrome_batch[:, detectors] for detectors in decoder.round_detectors)
+    np.testing.assert_array_equal(
+        decoder.decode_stream_to_logical_flip(rounds),
+        decoder.decode_batch_to_logical_flip(syndrome_batch))
+
+
+def test_stream_with_missing_rounds_raises_error(decoder, memory_experiment):
+    _, _, syndrome_batch, _ = memory_experiment
+    rounds = [syndrome_batch[:, detectors]
+              for detectors in decoder.round_detectors[:-1]]
+    with pytest.raises(ValueError, match="ended after 12 rounds"):
+        decoder.decode_stream_to_logical_flip(rounds)
+
+
+def test_stream_without_windows_raises_error(decoder, mocker):
+    mocker.patch.object(decoder, "_decode_windows", return_value=iter([]))
+    with pytest.raises(ValueError, match="no windows"):
+        decoder.decode_stream_to_logical_flip([])
+
+
+def test_single_syndromes_decode_as_batches(decoder, memory_experiment):
+    _, _, syndrome_batch, _ = memory_experiment
+    logical_flips = decoder.decode_batch_to_logical_flip(syndrome_batch[:20])
+    corrections = decoder.decode_batch_to_full_correction(syndrome_batch[:20])
+    for bitstring, flips, correction in zip(syndrome_batch[:20], logical_flips,
+                                            corrections):
+        syndrome = OrderedSyndrome.from_bitstring(bitstring)
+        assert decoder.decode_to_logical_flip(syndrome) == tuple(flips.astype(bool))
+        assert set(decoder.decode_to_full_correction(syndrome)) == {
+            decoder.decoding_graph.edges[i] for i in np.nonzero(correction)[0]}
+
+
+@pytest.mark.parametrize(("commit_rounds", "buffer_rounds"), [(0, 1), (1, -1)])
+def test_invalid_rounds_raise_error(memory_experiment, commit_rounds, buffer_rounds):
+    graph, logicals, _, _ = memory_experiment
+    with pytest.raises(ValueError, match="rounds"):
+        SlidingWindowDecoder(graph, logicals, commit_rounds, buffer_rounds)
@@ -0,0 +1,166 @@
+# (c) Copyright Riverlane 2020-2025.
+import os
+
+import deltakit_circuit as sp
+import numpy as np
+import pytest
+import stim
+
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode.utils import (
+    BuildCache,
+    get_build_cache,
+    parse_stim_circuit,
+    set_build_cache,
+    stim_circuit_to_graph_dem,
+)
+from deltakit_decode.utils._build_cache import (
+    BUILD_CACHE_MAX_BYTES_VARIABLE,
+    BUILD_CACHE_VARIABLE,
+    _circuit_from_arrays,
+    _circuit_to_arrays,
+)
+
+
+@pytest.fixture
+def stim_circuit() -> stim.Circuit:
+    return stim.Circuit.generated("surface_code:rotated_memory_z",
+                                  distance=3, rounds=3,
+                                  after_clifford_depolarization=0.0123456789)
+
+
+@pytest.fixture
+def build_cache(tmp_path, monkeypatch) -> BuildCache:
+    build_cache = BuildCache(tmp_path / "cache")
+    # Set through monkeypatch so the variables are restored after each test.
+    monkeypatch.setenv(BUILD_CACHE_VARIABLE, str(build_cache.directory))
+    monkeypatch.setenv(BUILD_CACHE_MAX_BYTES_VARIABLE, str(build_cache.max_bytes))
+    set_build_cache(build_cache)
+    return build_cache
+
+
+class TestBuildCache:
+
+    def test_key_depends_on_full_precision_gate_args(self, stim_circuit):
+        other_circuit = stim.Circuit.generated("surface_code:rotated_memory_z",
+                                               distance=3, rounds=3,
+                                               after_clifford_depolarization=0.0123456788)
+        assert str(stim_circuit) == str(other_circuit)
+        assert BuildCache.key(stim_circuit) != BuildCache.key(other_circuit)
+
+    def test_key_depends_on_options(self, stim_circuit):
+        assert BuildCache.key(stim_circuit, builder="a") == \
+            BuildCache.key(stim_circuit, builder="a")
+        assert BuildCache.key(stim_circuit, builder="a") != \
+            BuildCache.key(stim_circuit, builder="b")
+        assert BuildCache.key(stim_circuit, builder="a", option=True) != \
+            BuildCache.key(stim_circuit, builder="a", option=False)
+
+    def test_saved_arrays_are_loaded(self, tmp_path):
+        build_cache = BuildCache(tmp_path)
+        arrays = {"a": np.arange(5), "b": np.array([[0.5, 1.5]])}
+        build_cache.save("key", arrays)
+        assert "key" in build_cache
+        assert len(build_cache) == 1
+        loaded = build_cache.load("key")
+        assert loaded.keys() == arrays.keys()
+        for name, array in arrays.items():
+            np.testing.assert_array_equal(loaded[name], array)
+
+    def test_missing_and_corrupt_entries_are_not_loaded(self, tmp_path):
+        build_cache = BuildCache(tmp_path)
+        (tmp_path / "corrupt.npz").write_bytes(b"not an npz file")
+        assert build_cache.load("missing") is None
+        assert build_cache.load("corrupt") is None
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        build_cache = BuildCache(tmp_path)
+        array = {"a": np.zeros(1000)}
+        for time, key in enumerate(["first", "second"]):
+            build_cache.save(key, array)
+            os.utime(build_cache._path(key), (time, time))
+        build_cache.max_bytes = build_cache.size_bytes
+        build_cache.load("first")
+        build_cache.save("third", array)
+        assert "first" in build_cache
+        assert "second" not in build_cache
+        assert "third" in build_cache
+        assert build_cache.size_bytes <= build_cache.max_bytes
+
+    def test_clear_removes_all_entries(self, tmp_path):
+        build_cache = BuildCache(tmp_path)
+        build_cache.save("key", {"a": np.zeros(3)})
+        build_cache.clear()
+        assert len(build_cache) == 0
+
+
+def test_circuits_are_stored_exactly(stim_circuit):
+    repeated_circuit = stim_circuit + stim.Circuit("""
+        REPEAT 2 {
+            X_ERROR(0.123456789) 0
+        }
+    """)
+    assert _circuit_from_arrays(_circuit_to_arrays(repeated_circuit)) == \
+        repeated_circuit
+
+
+class TestSetBuildCache:
+
+    def test_no_cache_is_used_by_default(self, monkeypatch):
+        monkeypatch.delenv(BUILD_CACHE_VARIABLE, raising=False)
+        assert get_build_cache() is None
+
+    def test_cache_is_set_in_environment_variables(self, build_cache):
+        assert os.environ[BUILD_CACHE_VARIABLE] == str(build_cache.directory)
+        assert get_build_cache().directory == build_cache.directory
+        assert get_build_cache().max_bytes == build_cache.max_bytes
+
+    @pytest.mark.usefixtures("build_cache")
+    def test_cache_can_be_set_from_directory(self, tmp_path):
+        set_build_cache(tmp_path / "other")
+        assert get_build_cache().directory == tmp_path / "other"
+
+    @pytest.mark.usefixtures("build_cache")
+    def test_none_unsets_cache(self):
+        set_build_cache(None)
+        assert get_build_cache() is None
+
+
+class TestCachedBuilds:
+
+    def test_stim_circuit_to_graph_dem_is_cached(self, build_cache, stim_circuit):
+        expected_dem = stim_circuit_to_graph_dem(stim_circuit)
+        assert len(build_cache) == 1
+        assert stim_circuit_to_graph_dem(stim_circuit) == expected_dem
+
+    def test_parse_stim_circuit_is_cached(self, build_cache, stim_circuit, monkeypatch):
+        monkeypatch.delenv(BUILD_CACHE_VARIABLE)
+        expected_graph, expected_logicals, expected_circuit = \
+            parse_stim_circuit(stim_circuit)
+        set_build_cache(build_cache)
+        parse_stim_circuit(stim_circuit)
+        num_entries = len(build_cache)
+        graph, logicals, circuit = parse_stim_circuit(stim_circuit)
+        assert len(build_cache) == num_entries
+        assert circuit == expected_circuit
+        assert logicals == expected_logicals
+        assert list(graph.graph.nodes(data=True)) == \
+            list(expected_graph.graph.nodes(data=True))
+        assert graph.edges == expected_graph.edges
+        assert graph.boundaries == expected_graph.boundaries
+        assert [graph.edge_records[edge] for edge in graph.edges] == \
+            [expected_graph.edge_records[edge] for edge in expected_graph.edges]
+
+    @pytest.mark.usefixtures("build_cache")
+    def test_cached_decoder_decodes_the_same(self):
+        circuit = sp.Circuit.from_stim_circuit(stim.Circuit.generated(
+            "surface_code:rotated_memory_z", distance=3, rounds=3,
+            after_clifford_depolarization=0.01))
+        expected_decoder, stim_circuit = \
+            PyMatchingDecoder.construct_decoder_and_stim_circuit(circuit)
+        decoder, _ = PyMatchingDecoder.construct_decoder_and_stim_circuit(circuit)
+        assert "_logical_flip_matcher" not in decoder.__dict__
+        syndromes = stim_circuit.compile_detector_sampler(seed=1234).sample(200)
+        np.testing.assert_array_equal(
+            decoder.decode_batch_to_logical_flip(syndromes),
+            expected_decoder.decode_batch_to_logical_flip(syndromes))
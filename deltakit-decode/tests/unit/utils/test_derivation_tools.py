@@ -1,18 +1,26 @@
 # (c) Copyright Riverlane 2020-2025.
 
 import warnings
+from collections import Counter
+from itertools import combinations
 from pathlib import Path
 
 import numpy as np
 import numpy.testing as npt
 import pytest
 import stim
-from deltakit_core.decoding_graphs import dem_to_decoding_graph_and_logicals
+from deltakit_core.data_formats import b8_to_syndromes
+from deltakit_core.decoding_graphs import (
+    SyndromeBatch,
+    dem_to_decoding_graph_and_logicals,
+)
 from pytest_lazy_fixtures import lf
 
 from deltakit_decode.utils._derivation_tools import (
     create_correlation_matrix,
     generate_expectation_data,
+    generate_expectation_data_from_b8,
+    generate_expectation_data_from_batches,
 )
 from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
 
@@ -636,3 +644,82 @@ class TestDerivationTools:
         with warnings.catch_warnings():
             warnings.simplefilter("error")
             generate_expectation_data([], num_processes=num_processes)
+
+    @pytest.fixture(scope="class")
+    def random_detector_matrix(self):
+        return (np.random.default_rng(1234).random((1001, 13)) < 0.3).astype(np.uint8)
+
+    @staticmethod
+    def count_combinations(detector_matrix, max_degree):
+        counts = Counter(
+            frozenset(combination)
+            for shot in detector_matrix
+            for degree in range(1, max_degree + 1)
+            for combination in combinations(np.flatnonzero(shot).tolist(), degree))
+        return {key: count / len(detector_matrix) for key, count in counts.items()}
+
+    @pytest.mark.parametrize("max_degree", [1, 2, 3, 4])
+    def test_generate_expectation_data_counts_every_combination(self, random_detector_matrix, max_degree):
+        samples = [np.flatnonzero(shot).tolist() for shot in random_detector_matrix]
+        assert generate_expectation_data(samples, max_degree=max_degree) == \
+            self.count_combinations(random_detector_matrix, max_degree)
+
+    @staticmethod
+    def count_sample_combinations(samples, max_degree):
+        counts = Counter(
+            frozenset(combination)
+            for sample in samples
+            for degree in range(1, max_degree + 1)
+            for combination in combinations(sorted(sample), degree))
+        return {key: count / len(samples) for key, count in counts.items()}
+
+    @pytest.mark.parametrize("max_degree", [5, 6, 7])
+    def test_generate_expectation_data_counts_combinations_of_high_degree(self, max_degree):
+        samples = [[1, 2, 3, 4, 5, 6], [1, 2, 3, 4, 5], [0, 7], [0, 2, 3, 4, 5, 6, 7]]
+        assert generate_expectation_data(samples, max_degree=max_degree) == \
+            pytest.approx(self.count_sample_combinations(samples, max_degree))
+
+    @pytest.mark.parametrize("max_degree", [2, 3, 4])
+    def test_generate_expectation_data_counts_combinations_of_large_detectors(self, max_degree):
+        samples = [[3, 65536, 70000, 2**21], [3, 70000, 2**21], [1, 2, 65535], [70000]]
+        assert generate_expectation_data(samples, max_degree=max_degree) == \
+            pytest.approx(self.count_sample_combinations(samples, max_degree))
+
+    @pytest.mark.parametrize("max_degree", [2, 3, 4])
+    @pytest.mark.parametrize("batch_type", ["dense", "bit_packed", "syndrome_batch"])
+    def test_generate_expectation_data_from_batches_matches_counted_combinations(
+            self, random_detector_matrix, max_degree, batch_type):
+        batches = [random_detector_matrix[start:start + 300] for start in range(0, 1001, 300)]
+        if batch_type == "bit_packed":
+            batches = [np.packbits(batch, axis=1, bitorder="little") for batch in batches]
+        elif batch_type == "syndrome_batch":
+            batches = [SyndromeBatch(batch) for batch in batches]
+        data = generate_expectation_data_from_batches(
+            iter(batches), max_degree=max_degree, num_detectors=13,
+            bit_packed=batch_type == "bit_packed")
+        assert data.keys() == self.count_combinations(random_detector_matrix, max_degree).keys()
+        for key, value in self.count_combinations(random_detector_matrix, max_degree).items():
+            assert data[key] == pytest.approx(value)
+
+    @pytest.mark.parametrize(("only_even", "only_odd", "first_row"), [(True, False, 0), (False, True, 1)])
+    def test_generate_expectation_data_from_batches_selects_shots_across_batches(
+            self, random_detector_matrix, only_even, only_odd, first_row):
+        batches = (random_detector_matrix[start:start + 7] for start in range(0, 1001, 7))
+        data = generate_expectation_data_from_batches(batches, only_even=only_even, only_odd=only_odd)
+        assert data == pytest.approx(self.count_combinations(random_detector_matrix[first_row::2], 2))
+
+    def test_generate_expectation_data_from_batches_requires_num_detectors_for_bit_packed_batches(self):
+        with pytest.raises(ValueError, match="num_detectors must be given"):
+            generate_expectation_data_from_batches([np.zeros((2, 1), dtype=np.uint8)], bit_packed=True)
+
+    @pytest.mark.parametrize("num_processes", [1, 3])
+    @pytest.mark.parametrize(("only_even", "only_odd"), [(False, False), (False, True)])
+    def test_generate_expectation_data_from_b8_matches_expectation_data_of_syndromes(
+            self, stim_circuit, detection_events, num_processes, only_even, only_odd):
+        syndromes = list(b8_to_syndromes(detection_events, stim_circuit.num_detectors))
+        data = generate_expectation_data_from_b8(
+            detection_events, stim_circuit.num_detectors, batch_size=7,
+            only_even=only_even, only_odd=only_odd, num_processes=num_processes)
+        expected_data = generate_expectation_data(syndromes, only_even=only_even, only_odd=only_odd)
+        assert data.keys() == expected_data.keys()
+        assert data == pytest.approx(expected_data)
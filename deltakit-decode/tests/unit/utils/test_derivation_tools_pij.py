@@ -1089,3 +1089,26 @@ class TestDerivationToolsPij:
         graph, _ = dem_to_hypergraph_and_logicals(noise_floor_dem)
         pij_data = calculate_pij_values(exp_data, noise_floor_graph=graph, max_degree=3)
         assert pij_data == exp_pij_values
+
+    def test_calculate_pij_values_raises_value_error_if_expectation_values_give_no_pij(self):
+        exp_data = {frozenset((0,)): 0.6, frozenset((1,)): 0.1, frozenset((0, 1)): 0.3}
+        with pytest.raises(ValueError, match=r"Pij values of edges \[\{0, 1\}\] are not defined"):
+            calculate_pij_values(exp_data)
+
+    def test_calculate_pij_values_ignores_expectation_values_above_max_degree_if_no_graph_given(self, stim_circuit, detection_events):
+        samples = list(b8_to_syndromes(detection_events, stim_circuit.num_detectors))
+        exp_data = generate_expectation_data(samples, max_degree=3)
+        pij_data = calculate_pij_values(exp_data, max_degree=2)
+        assert pij_data.keys() == {edge for edge in exp_data if len(edge) <= 2}
+
+    def test_calculate_pij_values_adjusts_edges_for_each_higher_degree_edge_containing_them(self):
+        exp_data = {frozenset(edge): 0.1 for edge in [(0,), (1,), (2,), (3,)]}
+        exp_data.update({frozenset(edge): 0.02 for edge in [(0, 1), (0, 2), (0, 3), (1, 2), (1, 3), (2, 3)]})
+        exp_data.update({frozenset(edge): 0.005 for edge in [(0, 1, 2), (0, 1, 3)]})
+        local_pij_data = calculate_pij_values(exp_data, max_degree=2)
+        pij_data = calculate_pij_values(exp_data, max_degree=3)
+        p, q = pij_data[frozenset((0, 1, 2))], pij_data[frozenset((0, 1, 3))]
+        pi_sigma = p + q - 2 * p * q
+        assert pij_data[frozenset((0, 1))] == pytest.approx(
+            (local_pij_data[frozenset((0, 1))] - pi_sigma) / (1 - 2 * pi_sigma))
+        assert pij_data[frozenset((2, 3))] == local_pij_data[frozenset((2, 3))]
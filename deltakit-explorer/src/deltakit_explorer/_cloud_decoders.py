@@ -79,6 +79,7 @@ class _CloudDecoder(DecoderProtocol):
             leakage_batch: npt.NDArray[np.uint8] | None = None,
         ):
         """The method decodes the batch of syndromes to boolean values."""
+        syndrome_batch = np.asarray(syndrome_batch)
         num_shots = syndrome_batch.shape[0]
         detectors = types.DetectionEvents(syndrome_batch)
         if self.num_observables < 1:
@@ -18,6 +18,7 @@ from deltakit_circuit import PauliX, PauliZ, Qubit
 from deltakit_circuit._qubit_identifiers import PauliGate
 from deltakit_circuit.gates import MX, MZ, RX, RZ
 from numpy.typing import NDArray
+from scipy import sparse
 
 from deltakit_explorer.codes._css._css_stage import CSSStage
 from deltakit_explorer.codes._css._stabiliser_code import StabiliserCode
@@ -28,6 +29,17 @@ from deltakit_explorer.codes._logicals import (
 from deltakit_explorer.codes._stabiliser import Stabiliser
 
 
+def _first_pair(
+    first_inds: NDArray[np.int_], second_inds: NDArray[np.int_]
+) -> tuple[int, int]:
+    """
+    Return the pair of indices which comes first when ordered by the first index, then
+    by the second index.
+    """
+    first = np.lexsort((second_inds, first_inds))[0]
+    return int(first_inds[first]), int(second_inds[first])
+
+
 class CSSCode(StabiliserCode):
     """
     Class representing a CSS code.
@@ -153,13 +165,7 @@ class CSSCode(StabiliserCode):
             self._check_ancilla_qubit_properties(
                 self._ancilla_qubits, self._data_qubits, self._stabilisers
             )
-            self._check_commutation_relations(
-                self._x_stabilisers,
-                self._z_stabilisers,
-                self.x_logical_operators,
-                self.z_logical_operators,
-                self._check_logical_operators_are_independent,
-            )
+            self._check_commutation_relations()
             if self._use_ancilla_qubits:
                 self._check_stabiliser_lengths(self._stabilisers)
                 self._check_unique_data_qubits_in_layers(self._stabilisers)
@@ -341,14 +347,7 @@ class CSSCode(StabiliserCode):
                         )
                         raise ValueError(msg)
 
-    @staticmethod
-    def _check_commutation_relations(
-        x_stabilisers: list[set[Stabiliser]],
-        z_stabilisers: list[set[Stabiliser]],
-        x_logical_operators: tuple[frozenset[PauliGate], ...],
-        z_logical_operators: tuple[frozenset[PauliGate], ...],
-        check_logical_operators_are_independent: bool,
-    ) -> None:
+    def _check_commutation_relations(self) -> None:
         """
         Check the commutation-anticommutation relations between stabilisers and logical
         operators. More precisely, check that:
@@ -359,45 +358,86 @@ class CSSCode(StabiliserCode):
 
             3. each logical operator commutes with each logical operator except one
                 (i.e. the other type of logical operator on the same logical qubit).
+
+        All relations are found at once from the product of the X-type operators with
+        the Z-type operators over GF(2), whose entries are 1 for anticommuting pairs.
         """
-        x_stabilisers_flat = [stab for sim_stabs in x_stabilisers for stab in sim_stabs]
-        z_stabilisers_flat = [stab for sim_stabs in z_stabilisers for stab in sim_stabs]
+        x_stabilisers_flat = list(itertools.chain.from_iterable(self._x_stabilisers))
+        z_stabilisers_flat = list(itertools.chain.from_iterable(self._z_stabilisers))
+        num_x_stabs, num_z_stabs = len(x_stabilisers_flat), len(z_stabilisers_flat)
+        x_logical_operators = self.x_logical_operators
+        z_logical_operators = self.z_logical_operators
+
+        hx_mat, hz_mat = self._sparse_parity_check_matrices
+        x_operators = sparse.vstack(
+            [hx_mat, self._operators_to_matrix(x_logical_operators)], format="csr"
+        )
+        z_operators = sparse.vstack(
+            [hz_mat, self._operators_to_matrix(z_logical_operators)], format="csr"
+        )
+        # uint8 entries may wrap around, which keeps their parity as 256 is even.
+        anticommutation = (x_operators @ z_operators.T).tocoo()
+        anticommutation.data %= 2
+        anticommutation.eliminate_zeros()
+        x_inds, z_inds = anticommutation.row, anticommutation.col
+        x_is_stab, z_is_stab = x_inds < num_x_stabs, z_inds < num_z_stabs
 
         # Check condition 1)
-        for x_stab, z_stab in itertools.product(x_stabilisers_flat, z_stabilisers_flat):
-            if not CSSCode.x_and_z_operators_commute(x_stab.paulis, z_stab.paulis):
-                msg = (
-                    "CSSCode object was initialised with anticommuting "
-                    "stabilisers. Namely, the X-stabiliser defined on data qubits "
-                    f"{x_stab.data_qubits} anticommutes with the Z-stabiliser "
-                    f"defined on data qubits {z_stab.data_qubits}."
-                )
-                raise ValueError(msg)
+        stabs_mask = x_is_stab & z_is_stab
+        if np.any(stabs_mask):
+            x_ind, z_ind = _first_pair(x_inds[stabs_mask], z_inds[stabs_mask])
+            msg = (
+                "CSSCode object was initialised with anticommuting "
+                "stabilisers. Namely, the X-stabiliser defined on data qubits "
+                f"{x_stabilisers_flat[x_ind].data_qubits} anticommutes with the "
+                f"Z-stabiliser defined on data qubits "
+                f"{z_stabilisers_flat[z_ind].data_qubits}."
+            )
+            raise ValueError(msg)
         # Check condition 2)
-        for x_stab, z_log in itertools.product(x_stabilisers_flat, z_logical_operators):
-            if not CSSCode.x_and_z_operators_commute(x_stab.paulis, z_log):
-                msg = (
-                    "CSSCode object was initialised with a Z-logical operator that "
-                    "anticommutes with a stabiliser. Namely, the "
-                    f"X-stabiliser defined on data qubits {x_stab.data_qubits} "
-                    f"anticommutes with the Z-logical operator {z_log}."
-                )
-                raise ValueError(msg)
-        for z_stab, x_log in itertools.product(z_stabilisers_flat, x_logical_operators):
-            if not CSSCode.x_and_z_operators_commute(z_stab.paulis, x_log):
-                msg = (
-                    "CSSCode object was initialised with an X-logical operator that "
-                    "anticommutes with a stabiliser. Namely, the "
-                    f"Z-stabiliser defined on data qubits {z_stab.data_qubits} "
-                    "anticommutes with the "
-                    f"X-logical operator {x_log} "
-                )
-                raise ValueError(msg)
+        x_stab_mask = x_is_stab & ~z_is_stab
+        if np.any(x_stab_mask):
+            x_ind, z_ind = _first_pair(
+                x_inds[x_stab_mask], z_inds[x_stab_mask] - num_z_stabs
+            )
+            msg = (
+                "CSSCode object was initialised with a Z-logical operator that "
+                "anticommutes with a stabiliser. Namely, the "
+                f"X-stabiliser defined on data qubits "
+                f"{x_stabilisers_flat[x_ind].data_qubits} "
+                f"anticommutes with the Z-logical operator {z_logical_operators[z_ind]}."
+            )
+            raise ValueError(msg)
+        z_stab_mask = ~x_is_stab & z_is_stab
+        if np.any(z_stab_mask):
+            z_ind, x_ind = _first_pair(
+                z_inds[z_stab_mask], x_inds[z_stab_mask] - num_x_stabs
+            )
+            msg = (
+                "CSSCode object was initialised with an X-logical operator that "
+                "anticommutes with a stabiliser. Namely, the "
+                f"Z-stabiliser defined on data qubits "
+                f"{z_stabilisers_flat[z_ind].data_qubits} "
+                "anticommutes with the "
+                f"X-logical operator {x_logical_operators[x_ind]} "
+            )
+            raise ValueError(msg)
         # Check condition 3)
-        for (x_ind, x_log), (z_ind, z_log) in itertools.product(
-            enumerate(x_logical_operators), enumerate(z_logical_operators)
-        ):
-            if x_ind == z_ind and CSSCode.x_and_z_operators_commute(x_log, z_log):
+        logicals_mask = ~x_is_stab & ~z_is_stab
+        logicals_anticommute = np.zeros(
+            (len(x_logical_operators), len(z_logical_operators)), dtype=bool
+        )
+        logicals_anticommute[
+            x_inds[logicals_mask] - num_x_stabs, z_inds[logicals_mask] - num_z_stabs
+        ] = True
+        expected = np.eye(*logicals_anticommute.shape, dtype=bool)
+        invalid_pairs = logicals_anticommute != expected
+        if not self._check_logical_operators_are_independent:
+            invalid_pairs &= expected
+        if np.any(invalid_pairs):
+            x_ind, z_ind = (int(ind) for ind in np.argwhere(invalid_pairs)[0])
+            x_log, z_log = x_logical_operators[x_ind], z_logical_operators[z_ind]
+            if x_ind == z_ind:
                 msg = (
                     "CSSCode object was initialised with commuting X- and Z-logical "
                     f"operators defined on the logical qubit at index {x_ind}. "
@@ -405,12 +445,7 @@ class CSSCode(StabiliserCode):
                     f"is {x_log}, and the Z-logical operator at index {z_ind} is "
                     f"{z_log}."
                 )
-                raise ValueError(msg)
-            if (
-                check_logical_operators_are_independent
-                and x_ind != z_ind
-                and not CSSCode.x_and_z_operators_commute(x_log, z_log)
-            ):
+            else:
                 msg = (
                     "CSSCode object was initialised with anticommuting X- and "
                     "Z-logical operators that act on different logical qubits at "
@@ -418,7 +453,7 @@ class CSSCode(StabiliserCode):
                     f"is {x_log}, and the Z-logical operator at index {z_ind} is "
                     f"{z_log}."
                 )
-                raise ValueError(msg)
+            raise ValueError(msg)
 
     @staticmethod
     def _check_ancilla_qubit_properties(
@@ -797,27 +832,42 @@ class CSSCode(StabiliserCode):
         Tuple[NDArray, NDArray]
             A tuple of two matrices, Hx and Hz.
         """
-        # first, assign an index to each data qubit which will be the index
-        # of the column in the matrix. qubits may have strange coordinates or be
-        # transformed, so we cannot rely on the qubit coordinates
-        all_x_stabilisers = list(itertools.chain.from_iterable(self._x_stabilisers))
-        all_z_stabilisers = list(itertools.chain.from_iterable(self._z_stabilisers))
-        x_parity_mat, z_parity_mat = np.zeros(
-            (len(all_x_stabilisers), len(self.data_qubits)), dtype=np.uint8
-        ), np.zeros((len(all_z_stabilisers), len(self.data_qubits)), dtype=np.uint8)
-
-        # turn stabilisers into rows of the matrices.
         # note that since stabilisers are kept in Sets, the order
         # in which we iterate over them is non-deterministic, and so
         # is the order of the rows of the parity check matrices
-        for matrix, stab_type in zip(
-            (x_parity_mat, z_parity_mat), (all_x_stabilisers, all_z_stabilisers)
-        ):
-            for stab_index, stab in enumerate(stab_type):
-                for pauli in (p for p in stab.paulis if p is not None):
-                    matrix[stab_index, self._data_qubit_index[pauli.qubit]] = 1
+        x_parity_mat, z_parity_mat = self._sparse_parity_check_matrices
+        return x_parity_mat.toarray(), z_parity_mat.toarray()
+
+    @cached_property
+    def _sparse_parity_check_matrices(self) -> tuple[sparse.csr_array, sparse.csr_array]:
+        """
+        Parity check matrices Hx and Hz as sparse matrices, with a column for each
+        data qubit given by its index in `_data_qubit_index`.
+        """
+        return tuple(
+            self._operators_to_matrix(
+                [stab.paulis for stab in itertools.chain.from_iterable(stabilisers)]
+            )
+            for stabilisers in (self._x_stabilisers, self._z_stabilisers)
+        )
 
-        return x_parity_mat, z_parity_mat
+    def _operators_to_matrix(
+        self, operators: Sequence[Iterable[PauliGate | None]]
+    ) -> sparse.csr_array:
+        """
+        Construct a sparse uint8 matrix over the data qubits with a row for each
+        operator, which is 1 on the data qubits the operator acts on.
+        """
+        rows, columns = [], []
+        for row, operator in enumerate(operators):
+            for pauli in operator:
+                if pauli is not None:
+                    rows.append(row)
+                    columns.append(self._data_qubit_index[pauli.qubit])
+        return sparse.csr_array(
+            (np.ones(len(rows), dtype=np.uint8), (rows, columns)),
+            shape=(len(operators), len(self._data_qubit_index)),
+        )
 
     def _calculate_logical_operators(
         self,
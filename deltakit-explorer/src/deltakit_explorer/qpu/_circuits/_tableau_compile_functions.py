@@ -969,6 +969,12 @@ def compile_circuit_to_native_gates(
     -------
     Circuit
         Compiled circuit.
+
+    Notes
+    -----
+    The single-qubit gate compilation dictionaries for each native gate set are found
+    once per process. Setting the environment variable ``DELTAKIT_COMPILATION_CACHE``
+    to a directory also saves them there, for reuse by later processes.
     """
     # get compilation dictionary and gate exchange dict
     comp_dict, gate_exchange_dict = _get_compilation_dict(
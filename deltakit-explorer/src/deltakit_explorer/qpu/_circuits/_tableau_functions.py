@@ -4,11 +4,15 @@ This module consists of functions enabling circuit compilation
 using the stim Tableau.
 """
 # pylint: disable=too-many-lines,too-many-nested-blocks,too-many-branches,too-many-statements
+import hashlib
+import json
+import os
 from collections import defaultdict
 from collections.abc import Sequence
 from dataclasses import dataclass
-from functools import reduce
+from functools import cache, reduce
 from operator import mul
+from pathlib import Path
 
 import numpy as np
 import stim
@@ -79,6 +83,13 @@ EquivalentTableauDict = dict[tuple[str, str], list[list[OneQubitCliffordGate]]]
 # being "preceding" or "succeeding" and values being the unitary block index.
 TwoQubitGateDictEntry = tuple[tuple[int, Qubit, str], dict[str, int]]
 
+# Name of an environment variable which, if set, gives a directory where the
+# dictionaries found by _get_compilation_dict are saved for use by later processes.
+COMPILATION_CACHE_VARIABLE = "DELTAKIT_COMPILATION_CACHE"
+# Changed whenever the contents of the files in the compilation cache or the search
+# for the dictionaries change, so that files written by other versions are not read.
+_COMPILATION_CACHE_FORMAT_VERSION = 1
+
 # Dictionary to look up compilation of a two qubit in terms of additional unitary
 # gates required. The key can be either a gate currently being compiled or the native
 # gate being compiled to. The values are the unitary blocks needed to do the compilation.
@@ -355,25 +366,83 @@ def _get_compilation_dict(
             A dictionary with Tableaus as keys and lists of lists of OneQubitCliffordGate
             as values, where the list expresses the gates in circuit order.
             E.g, `{("+Z", "-X"): [[H, Z], [X, H]], ...}`
+
+    Notes
+    -----
+    The search is done once per process for each set of native one-qubit gates,
+    `max_length` and `up_to_paulis`, and later calls return copies of the stored
+    dictionaries. If the environment variable named by `COMPILATION_CACHE_VARIABLE`
+    is set to a directory, the dictionaries are also saved there and loaded from
+    there by later processes. The variable is read on every call, so setting it
+    later in a process takes effect.
     """
+    compilation_dict, equiv_tableau_dict = _find_compilation_dict(
+        frozenset(str(g.stim_string) for g in native_gates.one_qubit_gates),
+        max_length,
+        up_to_paulis,
+        os.environ.get(COMPILATION_CACHE_VARIABLE) or None,
+    )
+    return dict(compilation_dict), defaultdict(
+        list,
+        {
+            tableau_key: [list(gates) for gates in equiv_gates]
+            for tableau_key, equiv_gates in equiv_tableau_dict.items()
+        },
+    )
 
+
+@cache
+def _find_compilation_dict(
+    one_q_gates: frozenset[str],
+    max_length: int | None,
+    up_to_paulis: bool,
+    cache_directory: str | None,
+) -> tuple[TableauDict, EquivalentTableauDict]:
+    """
+    Return the dictionaries of `_get_compilation_dict` for the native one-qubit gates
+    with the given stim strings, loading them from the compilation cache directory,
+    if given, when they were saved there, or searching for them and saving them
+    otherwise.
+    """
+    cache_path = _get_compilation_cache_path(
+        one_q_gates, max_length, up_to_paulis, cache_directory
+    )
+    if cache_path is not None:
+        cached_dicts = _load_compilation_dict(cache_path)
+        if cached_dicts is not None:
+            return cached_dicts
+    compilation_dicts = _search_compilation_dict(one_q_gates, max_length, up_to_paulis)
+    if cache_path is not None:
+        _save_compilation_dict(cache_path, *compilation_dicts)
+    return compilation_dicts
+
+
+def _search_compilation_dict(
+    one_q_gates: frozenset[str], max_length: int | None, up_to_paulis: bool
+) -> tuple[TableauDict, EquivalentTableauDict]:
+    """
+    Search for the dictionaries of `_get_compilation_dict` by multiplying the native
+    one-qubit gates with the given stim strings into the products found so far.
+    """
     if up_to_paulis:
         max_unique_tableau_count = 6
         identity_tableau = ("X", "Z")
-        one_q_gates_as_stim_string = {
-            str(g.stim_string)
-            for g in native_gates.one_qubit_gates
-            if str(g.stim_string) not in ["X", "Y", "Z"]
-        }
+        one_q_gates_as_stim_string = sorted(
+            g for g in one_q_gates if g not in ["X", "Y", "Z"]
+        )
     else:
         max_unique_tableau_count = 24
         identity_tableau = ("+X", "+Z")
-        one_q_gates_as_stim_string = {
-            str(g.stim_string) for g in native_gates.one_qubit_gates
-        }
+        one_q_gates_as_stim_string = sorted(one_q_gates)
+    native_gate_tableaus = {
+        g: stim.Tableau.from_named_gate(g) for g in one_q_gates_as_stim_string
+    }
 
     # Include the identity tableau, as it is always there by default
     min_weight_tableau_dict: TableauDict = {identity_tableau: ()}
+    # tableau of the gate product stored for each key of min_weight_tableau_dict, so
+    # longer products are found with a single multiplication
+    min_weight_tableaus = {identity_tableau: stim.Tableau(1)}
     equiv_tableau_dict: defaultdict[
         tuple[str, str], list[list[OneQubitCliffordGate]]
     ] = defaultdict(list)
@@ -389,17 +458,21 @@ def _get_compilation_dict(
 
         # need to make a copy since we will change the dictionary during the loop
         copy_of_dict_to_iterate_over = min_weight_tableau_dict.copy()
-        for current_gates in copy_of_dict_to_iterate_over.values():
+        for current_key, current_gates in copy_of_dict_to_iterate_over.items():
             if len(current_gates) != current_weight - 1:
                 continue
             for native_gate in one_q_gates_as_stim_string:
                 gate_product = (*current_gates, native_gate)
-                product_tableau = _get_tableau_from_sequence_of_1q_gates(gate_product)
+                # matrix order, so the gate applied last is on the left
+                product_tableau = (
+                    native_gate_tableaus[native_gate] * min_weight_tableaus[current_key]
+                )
                 tableau_key = _get_tableau_as_key(product_tableau, up_to_paulis)
 
                 # if new tableau found, add it, it will be minimum weight
                 if tableau_key not in min_weight_tableau_dict:
                     min_weight_tableau_dict[tableau_key] = gate_product
+                    min_weight_tableaus[tableau_key] = product_tableau
                     equiv_tableau_dict[tableau_key].append(
                         [ONE_QUBIT_GATE_MAPPING[g] for g in gate_product]
                     )
@@ -423,6 +496,88 @@ def _get_compilation_dict(
     return min_weight_tableau_dict, equiv_tableau_dict
 
 
+def _get_compilation_cache_path(
+    one_q_gates: frozenset[str],
+    max_length: int | None,
+    up_to_paulis: bool,
+    directory: str | None,
+) -> Path | None:
+    """
+    Path of the file in the compilation cache directory for the dictionaries of
+    `_get_compilation_dict`, or None if no compilation cache directory is given.
+    """
+    if directory is None:
+        return None
+    key = json.dumps(
+        [
+            _COMPILATION_CACHE_FORMAT_VERSION,
+            sorted(one_q_gates),
+            max_length,
+            up_to_paulis,
+        ]
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return Path(directory) / f"compilation_dict_{digest}.json"
+
+
+def _save_compilation_dict(
+    path: Path,
+    compilation_dict: TableauDict,
+    equiv_tableau_dict: EquivalentTableauDict,
+) -> None:
+    """
+    Save the dictionaries of `_get_compilation_dict` as JSON, with gates given by
+    their stim strings.
+    """
+    contents = {
+        "version": _COMPILATION_CACHE_FORMAT_VERSION,
+        "compilation": [
+            [list(tableau_key), list(gates)]
+            for tableau_key, gates in compilation_dict.items()
+        ],
+        "equivalent": [
+            [list(tableau_key), [[g.stim_string for g in gates] for gates in equiv]]
+            for tableau_key, equiv in equiv_tableau_dict.items()
+        ],
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write to a temporary file first, so other processes never read a
+        # partially written file
+        temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(contents), encoding="utf-8")
+        temp_path.replace(path)
+    except OSError:
+        # the compilation cache only saves time, so failing to write to it is fine
+        pass
+
+
+def _load_compilation_dict(
+    path: Path,
+) -> tuple[TableauDict, EquivalentTableauDict] | None:
+    """
+    Load the dictionaries of `_get_compilation_dict` saved by
+    `_save_compilation_dict`, or return None if they cannot be read or were saved
+    in another format version.
+    """
+    try:
+        contents = json.loads(path.read_text(encoding="utf-8"))
+        if contents["version"] != _COMPILATION_CACHE_FORMAT_VERSION:
+            return None
+        compilation_dict: TableauDict = {
+            tuple(tableau_key): tuple(gates)
+            for tableau_key, gates in contents["compilation"]
+        }
+        equiv_tableau_dict: EquivalentTableauDict = defaultdict(list)
+        for tableau_key, equiv in contents["equivalent"]:
+            equiv_tableau_dict[tuple(tableau_key)] = [
+                [ONE_QUBIT_GATE_MAPPING[g] for g in gates] for gates in equiv
+            ]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return compilation_dict, equiv_tableau_dict
+
+
 def _get_tableau_z_image_as_string(tableau: stim.Tableau, up_to_paulis: bool):
     return str(tableau.z_output(0))[int(up_to_paulis) :]
 
@@ -9,8 +9,10 @@ from collections.abc import Iterable
 from copy import deepcopy
 from typing import NamedTuple
 
+import numpy as np
 from deltakit_circuit import Circuit, GateLayer, NoiseLayer, Qubit
 from deltakit_circuit.gates import I
+from numpy.typing import NDArray
 
 from deltakit_explorer.qpu._circuits import (
     compile_circuit_to_native_gates,
@@ -24,9 +26,17 @@ from deltakit_explorer.qpu._noise import NoiseParameters, PhenomenologicalNoise
 
 
 class CircuitSchedule(NamedTuple):
-    active_times_list: list[dict[Qubit, float]]
-    previous_layer_times: list[float]
+    """
+    Schedule of a circuit on a QPU. For each layer of the circuit, followed by the
+    end of the circuit, `active_times` has a row of the times for which the QPU
+    qubits, in the order of `qubits`, are still busy with previous layers, and
+    `previous_layer_times` has the time taken to finish the previous layer.
+    """
 
+    qubits: list[Qubit]
+    active_times: NDArray[np.float64]
+    previous_layer_times: NDArray[np.float64]
+    execution_time: float
 
 
 class QPU:
@@ -72,75 +82,85 @@ class QPU:
             **self.native_gates_and_times.measurement_gates,
         }
 
-    def _get_circuit_schedule(self, circuit: Circuit) -> CircuitSchedule:
+    def _get_circuit_schedule(
+        self,
+        circuit: Circuit,
+        schedules: dict[int, CircuitSchedule] | None = None,
+    ) -> CircuitSchedule:
+        """
+        Compute the schedule of a circuit on the QPU. The schedules of nested circuits
+        are stored in `schedules` by their id, so that each is computed only once.
+        """
+        if schedules is None:
+            schedules = {}
+        if (schedule := schedules.get(id(circuit))) is not None:
+            return schedule
         if not circuit.qubits.issubset(self.qubits):
             qubit_ids = {q.unique_identifier for q in circuit.qubits - self.qubits}
             msg = f"Qubits {qubit_ids} in the circuit are not present on the QPU."
             raise ValueError(msg)
 
+        qubits = list(self.qubits)
+        qubit_index = {qubit: index for index, qubit in enumerate(qubits)}
         nonnative_gateset = set()
-        active_times_list, previous_layer_times = [], []
-        active_times = dict.fromkeys(self.qubits, 0.0)
+        active_times_list = np.empty((len(circuit.layers) + 1, len(qubits)))
+        previous_layer_times = np.empty(len(circuit.layers) + 1)
+        active_times = np.zeros(len(qubits))
         previous_layer_time = 0.0
+        total_time = 0.0
 
-        for layer in circuit.layers:
+        for layer_index, layer in enumerate(circuit.layers):
             if not isinstance(layer, (GateLayer, Circuit)):
                 # these numbers don't change with non-gate layers
-                previous_layer_times.append(previous_layer_time)
-                active_times_list.append(active_times.copy())
+                previous_layer_times[layer_index] = previous_layer_time
+                active_times_list[layer_index] = active_times
                 continue
             if isinstance(layer, Circuit):
                 # Finish previous layer before entering repeat block
-                previous_layer_time = max(active_times.values())
-            # Calculate previous layer time based on qubits acted upon in current layer
-            elif self._maximise_parallelism:
-                previous_layer_time = max(
-                    (
-                        time
-                        for (qubit, time) in active_times.items()
-                        if qubit in layer.qubits
-                    ),
-                    default=0,
-                )
+                previous_layer_time = active_times.max(initial=0.0)
             else:
-                previous_layer_time = max(
-                    active_times.values(),
-                    default=0,
-                )
+                gate_qubit_indices, gate_times = [], []
+                for gate in layer.gates:
+                    gate_time = self.full_native_gates_and_times.get(type(gate))
+                    # check that the gate is a native gate
+                    if gate_time is None:
+                        nonnative_gateset.add(type(gate).__name__)
+                        gate_time = 0.0
+                    for qubit in gate.qubits:
+                        gate_qubit_indices.append(qubit_index[qubit])
+                        gate_times.append(gate_time)
+                # Calculate previous layer time based on qubits acted upon in
+                # current layer
+                previous_layer_time = (
+                    active_times[gate_qubit_indices]
+                    if self._maximise_parallelism
+                    else active_times
+                ).max(initial=0.0)
 
             # here we record values for noise computation
             # noise according these values will be added
             # before the layer.
-            previous_layer_times.append(previous_layer_time)
-            active_times_list.append(active_times.copy())
+            previous_layer_times[layer_index] = previous_layer_time
+            active_times_list[layer_index] = active_times
+            total_time += previous_layer_time
 
             # Update qubit active times
-            active_times = {
-                qubit: max(0.0, time - previous_layer_time)
-                for (qubit, time) in active_times.items()
-            }
+            active_times = np.maximum(active_times - previous_layer_time, 0.0)
             if isinstance(layer, GateLayer):
                 # for a gate layer add active time to qubits
-                for gate in layer.gates:
-                    for qubit in gate.qubits:
-                        # check that the gate is a native gate
-                        if type(gate) not in self.full_native_gates_and_times:
-                            nonnative_gateset.add(type(gate).__name__)
-                        # add execution time to the gate
-                        active_times[qubit] += self.full_native_gates_and_times[
-                            type(gate)
-                        ]
-            elif isinstance(layer, Circuit):
+                np.add.at(active_times, gate_qubit_indices, gate_times)
+            else:
                 # NB: for a circuit layer add circuit time
                 # to all qpu (!) qubits
-                circuit_time = self.get_circuit_execution_time(layer)
-                for qubit in self.qubits:
-                    active_times[qubit] = circuit_time
+                active_times[:] = self._get_circuit_schedule(
+                    layer, schedules
+                ).execution_time
 
         # the final layer
-        previous_layer_time = max(active_times.values())
-        previous_layer_times.append(previous_layer_time)
-        active_times_list.append(active_times.copy())
+        previous_layer_time = active_times.max(initial=0.0)
+        previous_layer_times[-1] = previous_layer_time
+        active_times_list[-1] = active_times
+        total_time += previous_layer_time
 
         if nonnative_gateset:
             msg = (
@@ -148,9 +168,20 @@ class QPU:
                 "do not belong to the native gate set."
             )
             raise ValueError(msg)
-        return CircuitSchedule(active_times_list, previous_layer_times)
+        schedule = CircuitSchedule(
+            qubits,
+            active_times_list,
+            previous_layer_times,
+            float(total_time * circuit.iterations),
+        )
+        schedules[id(circuit)] = schedule
+        return schedule
 
-    def _apply_idle_noise(self, circuit: Circuit) -> Circuit:
+    def _apply_idle_noise(
+        self,
+        circuit: Circuit,
+        schedules: dict[int, CircuitSchedule] | None = None,
+    ) -> Circuit:
         """
         Add idle noise to the input circuit.
 
@@ -158,24 +189,30 @@ class QPU:
         ----------
         circuit : Circuit
             Circuit to which to add idle noise.
+        schedules : Optional[Dict[int, CircuitSchedule]], optional
+            Schedules of the circuit and its nested circuits already computed, by
+            their id. By default, None.
 
         Returns
         -------
         Circuit
             Circuit with idle noise added.
         """
-
-        def _get_idle_noise_channels(
-            previous_layer_time: float, active_times: dict[Qubit, float]
-        ):
-            if (
-                previous_layer_time > 0.0
-                and (idle_noise := self.noise_model.idle_noise) is not None
-            ):
+        idle_noise = self.noise_model.idle_noise
+        schedules = {} if schedules is None else schedules
+        schedule = self._get_circuit_schedule(circuit, schedules)
+
+        def _get_idle_noise_channels(layer_index: int):
+            previous_layer_time = schedule.previous_layer_times[layer_index]
+            if previous_layer_time > 0.0 and idle_noise is not None:
+                idle_times = previous_layer_time - schedule.active_times[layer_index]
+                idle_qubit_indices = np.flatnonzero(idle_times > 0.0)
                 idle_noise_channels = [
-                    idle_noise(qubit, previous_layer_time - active_times[qubit])
-                    for qubit in self.qubits
-                    if previous_layer_time - active_times[qubit] > 0.0
+                    idle_noise(schedule.qubits[index], idle_time)
+                    for index, idle_time in zip(
+                        idle_qubit_indices.tolist(),
+                        idle_times[idle_qubit_indices].tolist(),
+                    )
                 ]
             else:
                 idle_noise_channels = []
@@ -183,34 +220,26 @@ class QPU:
 
         layers_with_noise = []
         iterations = circuit.iterations
-        qubit_times, layer_times = self._get_circuit_schedule(circuit)
 
-        for layer, active_times, previous_layer_time in zip(
-            circuit.layers, qubit_times, layer_times
-        ):
+        for layer_index, layer in enumerate(circuit.layers):
             if not isinstance(layer, (GateLayer, Circuit)):
                 layers_with_noise.append(layer)
                 continue
             if isinstance(layer, Circuit):
                 # Add layers from repeat block
-                layer_to_add = self._apply_idle_noise(layer)
+                layer_to_add = self._apply_idle_noise(layer, schedules)
             else:
                 layer_to_add = GateLayer(layer.gates)
 
             # Apply idle noise associated with previous layer
-            idle_noise_channels = _get_idle_noise_channels(
-                previous_layer_time, active_times
-            )
+            idle_noise_channels = _get_idle_noise_channels(layer_index)
             if len(idle_noise_channels) > 0:
                 layers_with_noise.append(NoiseLayer(idle_noise_channels))
 
             # Append current layer and update previous layer
             layers_with_noise.append(layer_to_add)
 
-        previous_layer_time, active_times = layer_times[-1], qubit_times[-1]
-        idle_noise_channels = _get_idle_noise_channels(
-            previous_layer_time, active_times
-        )
+        idle_noise_channels = _get_idle_noise_channels(-1)
         if len(idle_noise_channels) > 0:
             layers_with_noise.append(NoiseLayer(idle_noise_channels))
 
@@ -238,17 +267,7 @@ class QPU:
             If circuit contains non-native gates for the QPU.
             If circuit uses qubits not present on the QPU.
         """
-        total_time = 0.0
-        schedule = self._get_circuit_schedule(circuit)
-        for previous_layer_time, layer in zip(
-            schedule.previous_layer_times, circuit.layers
-        ):
-            if not isinstance(layer, (GateLayer, Circuit)):
-                continue
-            total_time += previous_layer_time
-        # Apply time from final layer
-        total_time += schedule.previous_layer_times[-1]
-        return total_time * circuit.iterations
+        return self._get_circuit_schedule(circuit).execution_time
 
     def add_noise_to_circuit(self, circuit: Circuit) -> Circuit:
         """
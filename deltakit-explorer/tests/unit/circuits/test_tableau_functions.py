@@ -1,3 +1,4 @@
+import json
 import random
 import re
 from copy import deepcopy
@@ -72,6 +73,7 @@ from deltakit_explorer.codes._css._css_code_experiment_circuit import (
     css_code_memory_circuit,
 )
 from deltakit_explorer.codes._planar_code import RotatedPlanarCode, UnrotatedPlanarCode
+from deltakit_explorer.qpu._circuits import _tableau_functions
 from deltakit_explorer.qpu._circuits._tableau_compile_functions import (
     _compile_measurement_to_native_gates_plus_unitaries,
     _compile_or_exchange_unitary_block,
@@ -82,6 +84,7 @@ from deltakit_explorer.qpu._circuits._tableau_compile_functions import (
     compile_circuit_to_native_gates,
 )
 from deltakit_explorer.qpu._circuits._tableau_functions import (
+    COMPILATION_CACHE_VARIABLE,
     CZ_TO_GATE_DICT,
     CZSWAP_TO_GATE_DICT,
     GATE_TO_CZ_DICT,
@@ -970,6 +973,97 @@ class TestGetCompilationDict:
         )
 
 
+class TestCompilationDictCache:
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch):
+        monkeypatch.delenv(COMPILATION_CACHE_VARIABLE, raising=False)
+        _tableau_functions._find_compilation_dict.cache_clear()
+        yield
+        _tableau_functions._find_compilation_dict.cache_clear()
+
+    @pytest.fixture
+    def searches(self, monkeypatch):
+        searches = []
+        search_compilation_dict = _tableau_functions._search_compilation_dict
+
+        def search(*args):
+            searches.append(args)
+            return search_compilation_dict(*args)
+
+        monkeypatch.setattr(_tableau_functions, "_search_compilation_dict", search)
+        return searches
+
+    def test_search_is_done_once_per_native_gate_set(self, searches):
+        _get_compilation_dict(NativeGateSet(one_qubit_gates={H, S}))
+        _get_compilation_dict(NativeGateSet(one_qubit_gates={S, H}))
+        assert len(searches) == 1
+        _get_compilation_dict(NativeGateSet(one_qubit_gates={H, S}), up_to_paulis=True)
+        _get_compilation_dict(NativeGateSet(one_qubit_gates={H, S}), max_length=2)
+        assert len(searches) == 3
+
+    def test_returned_dicts_can_be_modified(self):
+        native_gate_set = NativeGateSet(one_qubit_gates={H, S})
+        compilation_dict, equiv_dict = _get_compilation_dict(native_gate_set)
+        expected_compilation_dict = deepcopy(compilation_dict)
+        expected_equiv_dict = deepcopy(equiv_dict)
+        compilation_dict.clear()
+        for equiv_gates in equiv_dict.values():
+            equiv_gates[0].append(H)
+        assert _get_compilation_dict(native_gate_set) == (
+            expected_compilation_dict,
+            expected_equiv_dict,
+        )
+
+    @pytest.mark.parametrize("up_to_paulis", [True, False])
+    def test_dicts_are_loaded_from_directory_in_environment_variable(
+        self, searches, monkeypatch, tmp_path, up_to_paulis
+    ):
+        monkeypatch.setenv(COMPILATION_CACHE_VARIABLE, str(tmp_path))
+        native_gate_set = NativeGateSet(one_qubit_gates={H, S, X})
+        expected_dicts = _get_compilation_dict(native_gate_set, up_to_paulis=up_to_paulis)
+        assert len(list(tmp_path.iterdir())) == 1
+        _tableau_functions._find_compilation_dict.cache_clear()
+        assert (
+            _get_compilation_dict(native_gate_set, up_to_paulis=up_to_paulis)
+            == expected_dicts
+        )
+        assert len(searches) == 1
+
+    def test_corrupt_files_in_directory_are_ignored(self, searches, monkeypatch, tmp_path):
+        monkeypatch.setenv(COMPILATION_CACHE_VARIABLE, str(tmp_path))
+        native_gate_set = NativeGateSet(one_qubit_gates={H, S})
+        expected_dicts = _get_compilation_dict(native_gate_set)
+        (cache_file,) = tmp_path.iterdir()
+        cache_file.write_text("{", encoding="utf-8")
+        _tableau_functions._find_compilation_dict.cache_clear()
+        assert _get_compilation_dict(native_gate_set) == expected_dicts
+        assert len(searches) == 2
+
+    def test_files_of_other_format_versions_are_ignored(
+        self, searches, monkeypatch, tmp_path
+    ):
+        monkeypatch.setenv(COMPILATION_CACHE_VARIABLE, str(tmp_path))
+        native_gate_set = NativeGateSet(one_qubit_gates={H, S})
+        expected_dicts = _get_compilation_dict(native_gate_set)
+        (cache_file,) = tmp_path.iterdir()
+        contents = json.loads(cache_file.read_text(encoding="utf-8"))
+        contents["version"] += 1
+        cache_file.write_text(json.dumps(contents), encoding="utf-8")
+        _tableau_functions._find_compilation_dict.cache_clear()
+        assert _get_compilation_dict(native_gate_set) == expected_dicts
+        assert len(searches) == 2
+
+    def test_environment_variable_set_after_first_call_is_used(
+        self, searches, monkeypatch, tmp_path
+    ):
+        native_gate_set = NativeGateSet(one_qubit_gates={H, S})
+        expected_dicts = _get_compilation_dict(native_gate_set)
+        monkeypatch.setenv(COMPILATION_CACHE_VARIABLE, str(tmp_path))
+        assert _get_compilation_dict(native_gate_set) == expected_dicts
+        assert len(list(tmp_path.iterdir())) == 1
+        assert len(searches) == 2
+
+
 class TestGetCompilationWithProjectors:
     def test_get_compilation_with_projectors_returns_identity_if_unitary_block_empty(
         self,
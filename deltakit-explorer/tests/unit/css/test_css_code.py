@@ -0,0 +1,63 @@
+# (c) Copyright Riverlane 2020-2025.
+import numpy as np
+import pytest
+from deltakit_circuit import PauliX, PauliZ, Qubit
+
+from deltakit_explorer.codes._css._css_code import CSSCode
+from deltakit_explorer.codes._stabiliser import Stabiliser
+
+
+def x_operator(*qubits):
+    return [PauliX(Qubit(qubit)) for qubit in qubits]
+
+
+def z_operator(*qubits):
+    return [PauliZ(Qubit(qubit)) for qubit in qubits]
+
+
+def four_qubit_code(x_logical_operators, z_logical_operators, z_stabiliser=(0, 1, 2, 3),
+                    check_logical_operators_are_independent=False):
+    return CSSCode(
+        stabilisers=[[Stabiliser(x_operator(0, 1, 2, 3)),
+                      Stabiliser(z_operator(*z_stabiliser))]],
+        x_logical_operators=[x_operator(*qubits) for qubits in x_logical_operators],
+        z_logical_operators=[z_operator(*qubits) for qubits in z_logical_operators],
+        use_ancilla_qubits=False,
+        check_logical_operators_are_independent=check_logical_operators_are_independent,
+    )
+
+
+class TestCommutationRelations:
+    @pytest.mark.parametrize("check_logical_operators_are_independent", [True, False])
+    def test_valid_code_is_accepted(self, check_logical_operators_are_independent):
+        code = four_qubit_code(
+            [(0, 1), (0, 2)], [(0, 2), (0, 1)],
+            check_logical_operators_are_independent=check_logical_operators_are_independent,
+        )
+        hx_mat, hz_mat = code.parity_check_matrices
+        np.testing.assert_array_equal(hx_mat, [[1, 1, 1, 1]])
+        np.testing.assert_array_equal(hz_mat, [[1, 1, 1, 1]])
+
+    def test_anticommuting_stabilisers_raise_error(self):
+        with pytest.raises(ValueError, match="initialised with anticommuting stabilisers"):
+            four_qubit_code([], [], z_stabiliser=(0, 1, 2))
+
+    def test_z_logical_anticommuting_with_stabiliser_raises_error(self):
+        with pytest.raises(ValueError, match="Z-logical operator that anticommutes"):
+            four_qubit_code([(0, 1)], [(0,)])
+
+    def test_x_logical_anticommuting_with_stabiliser_raises_error(self):
+        with pytest.raises(ValueError, match="X-logical operator that anticommutes"):
+            four_qubit_code([(0,)], [(0, 1, 2, 3)])
+
+    def test_commuting_logicals_at_same_index_raise_error(self):
+        with pytest.raises(ValueError, match="commuting X- and Z-logical operators "
+                                             "defined on the logical qubit at index 0"):
+            four_qubit_code([(0, 1)], [(0, 1)])
+
+    def test_dependent_logicals_are_only_accepted_without_independence_check(self):
+        four_qubit_code([(0, 1), (0, 2)], [(0, 2), (1, 2)])
+        with pytest.raises(ValueError, match=r"different logical qubits at "
+                                             r"indices \(0, 1\)"):
+            four_qubit_code([(0, 1), (0, 2)], [(0, 2), (1, 2)],
+                            check_logical_operators_are_independent=True)
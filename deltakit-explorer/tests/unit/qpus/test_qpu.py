@@ -701,3 +701,76 @@ def original_and_noise_compiled_circuits_with_qpu_time(request):
             # 1020
         ),
     ][request.param]
+
+
+@pytest.mark.parametrize(
+    ("qpu_with_times", "original_and_noise_compiled_circuits_with_qpu_time"),
+    [({"maximise_parallelism": True}, 0), ({"maximise_parallelism": False}, 0)],
+    indirect=True,
+)
+def test_execution_time_of_circuit_with_repeat_block(
+    qpu_with_times, original_and_noise_compiled_circuits_with_qpu_time
+):
+    circuit, _, expected_time, *_ = original_and_noise_compiled_circuits_with_qpu_time
+    compiled_circuit = qpu_with_times.compile_circuit(circuit)
+    assert qpu_with_times.get_circuit_execution_time(compiled_circuit) == pytest.approx(
+        expected_time
+    )
+
+
+@pytest.mark.parametrize(
+    ("qpu_with_times", "expected_idle_times"),
+    [
+        (
+            {"num_qubits": 3, "maximise_parallelism": True},
+            [{2: 200e-9}, {1: 40e-9, 2: 40e-9}, {2: 150e-9}],
+        ),
+        (
+            {"num_qubits": 3, "maximise_parallelism": False},
+            [{2: 200e-9}, {1: 40e-9, 2: 40e-9}, {2: 150e-9}],
+        ),
+    ],
+    indirect=["qpu_with_times"],
+)
+def test_idle_noise_is_added_to_idle_qubits(qpu_with_times, expected_idle_times):
+    circuit = Circuit(
+        [
+            GateLayer([RZ(0), RZ(1)]),
+            GateLayer(H(0)),
+            GateLayer([MZ(0), MZ(1)]),
+        ]
+    )
+    noise_layers = [
+        layer
+        for layer in qpu_with_times._apply_idle_noise(circuit).layers
+        if isinstance(layer, NoiseLayer)
+    ]
+    assert [
+        {
+            channel.qubit.unique_identifier: pytest.approx(channel.probability * 1e-5)
+            for channel in layer.noise_channels
+        }
+        for layer in noise_layers
+    ] == expected_idle_times
+
+
+def test_nested_circuit_schedules_are_computed_once(qpu_with_times):
+    inner_circuit = Circuit(GateLayer([H(0), H(1)]), iterations=2)
+    middle_circuit = Circuit([GateLayer(CZ(0, 1)), inner_circuit], iterations=3)
+    circuit = Circuit([GateLayer(RZ(0)), middle_circuit, middle_circuit])
+    schedules = {}
+    qpu_with_times._apply_idle_noise(circuit, schedules)
+    assert schedules.keys() == {id(circuit), id(middle_circuit), id(inner_circuit)}
+    assert schedules[id(circuit)].execution_time == pytest.approx(
+        200e-9 + 2 * 3 * (100e-9 + 2 * 40e-9)
+    )
+
+
+def test_non_native_gates_raise_error(qpu_with_times):
+    with pytest.raises(ValueError, match=r"Gate\(s\) \{'CX'\} present in the circuit"):
+        qpu_with_times.get_circuit_execution_time(Circuit(GateLayer(CX(0, 1))))
+
+
+def test_qubits_not_on_qpu_raise_error(qpu_with_times):
+    with pytest.raises(ValueError, match=r"Qubits \{6\} in the circuit are not present"):
+        qpu_with_times.get_circuit_execution_time(Circuit(GateLayer(H(6))))
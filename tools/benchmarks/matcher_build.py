@@ -0,0 +1,96 @@
+"""Benchmark building the PyMatching matchers of a ``PyMatchingDecoder``.
+
+This compares building the logical flip and full correction matchers from arrays of
+the edges of the decoding graph, read once and shared by both matchers, with the
+previous route which copied the NetworkX decoding graph for each matcher, set the
+fault ids of its edges one by one and called ``pymatching.Matching.from_networkx``.
+The time taken and the peak memory allocated through Python, including NumPy
+arrays and the NetworkX copies, are reported for each route.
+
+Usage::
+
+    python tools/benchmarks/matcher_build.py --distance 15 --rounds 15
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+
+import pymatching
+import stim
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
+
+
+def build_networkx_matcher(decoder: PyMatchingDecoder,
+                           fault_edges) -> pymatching.Matching:
+    """Build a matcher via a copy of the NetworkX decoding graph of a decoder, where
+    the edges of ``fault_edges[i]`` flip the fault ``i``."""
+    local_nx = decoder.decoding_graph.graph.copy()
+    for fault_id, edges in enumerate(fault_edges):
+        for edge in edges:
+            local_nx.edges[edge].setdefault("fault_ids", set()).add(fault_id)
+    for boundary in decoder.decoding_graph.boundaries:
+        local_nx.nodes[boundary]["is_boundary"] = True
+    return pymatching.Matching.from_networkx(
+        local_nx, min_num_fault_ids=len(decoder.logicals))
+
+
+def build_networkx_matchers(decoder: PyMatchingDecoder):
+    build_networkx_matcher(decoder, decoder.logicals)
+    build_networkx_matcher(decoder,
+                           [[edge] for edge in decoder.decoding_graph.edges])
+
+
+def build_array_matchers(decoder: PyMatchingDecoder):
+    decoder._logical_flip_matcher  # noqa: B018
+    decoder._full_matcher  # noqa: B018
+
+
+def measure(build: Callable[[PyMatchingDecoder], None], graph, logicals,
+            repeats: int) -> tuple[float, float]:
+    """Return the fastest time taken by a build over the repeats, and its peak
+    memory in MB."""
+    times = []
+    for _ in range(repeats):
+        decoder = PyMatchingDecoder(graph, logicals)
+        start = time.perf_counter()
+        build(decoder)
+        times.append(time.perf_counter() - start)
+    decoder = PyMatchingDecoder(graph, logicals)
+    tracemalloc.start()
+    build(decoder)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distance", type=int, default=11)
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    rounds = args.distance if args.rounds is None else args.rounds
+    circuit = stim.Circuit.generated(
+        "surface_code:rotated_memory_z",
+        distance=args.distance,
+        rounds=rounds,
+        after_clifford_depolarization=0.001,
+    )
+    graph, logicals, _ = parse_stim_circuit(circuit, lexical_detectors=False)
+    print(  # noqa: T201
+        f"distance={args.distance} rounds={rounds} "
+        f"nodes={len(graph.nodes)} edges={len(graph.edges)}"
+    )
+    print(f"{'route':>10} {'time (s)':>10} {'peak memory (MB)':>18}")  # noqa: T201
+    for route, build in [("networkx", build_networkx_matchers),
+                         ("arrays", build_array_matchers)]:
+        seconds, peak = measure(build, graph, logicals, args.repeats)
+        print(f"{route:>10} {seconds:>10.3f} {peak:>18.1f}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Benchmark the time taken to set up pathos worker pools for decoder managers.
+
+For each worker count, this times ``DecoderManager.configure_pool`` followed by a
+first, small call to ``run_batch_shots_parallel``. Matchers are built lazily, so the
+first call includes each worker building its matcher from the compact array form
+pickled with the decoder. For reference, the time taken to build the same matcher
+via a copy of the NetworkX decoding graph, as workers did before, is also reported.
+
+Usage::
+
+    python tools/benchmarks/pool_setup.py --distance 15 --workers 1 2 4 8
+"""
+
+import argparse
+import pickle
+import time
+
+import stim
+from deltakit_decode import PyMatchingDecoder
+from deltakit_decode._mwpm_decoder import _MatchingArrays
+from deltakit_decode.analysis import StimDecoderManager
+from deltakit_decode.utils._graph_circuit_helpers import parse_stim_circuit
+from matcher_build import build_networkx_matcher
+from pathos.pools import ProcessPool
+
+
+def time_pool_setup(
+    decoder: PyMatchingDecoder,
+    circuit: stim.Circuit,
+    workers: int,
+    shots_per_worker: int,
+) -> tuple[float, float]:
+    """Return the time taken to configure a pool with a new decoder manager, and
+    the time taken by the first parallel batch of shots."""
+    manager = StimDecoderManager(circuit, decoder, seed=1234)
+    pool = ProcessPool(nodes=workers)
+    # Start the worker processes so their start-up is not included in the timings.
+    pool.map(abs, range(workers))
+    try:
+        start = time.perf_counter()
+        manager.configure_pool(pool, workers)
+        configured = time.perf_counter()
+        manager.run_batch_shots_parallel(
+            shots_per_worker * workers, workers, pool, min_tasks_per_process=1
+        )
+        finished = time.perf_counter()
+        manager.clear_pool_manager(pool, workers)
+    finally:
+        pool.clear()
+    return configured - start, finished - configured
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distance", type=int, default=11)
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--shots-per-worker", type=int, default=100)
+    args = parser.parse_args()
+
+    rounds = args.distance if args.rounds is None else args.rounds
+    circuit = stim.Circuit.generated(
+        "surface_code:rotated_memory_z",
+        distance=args.distance,
+        rounds=rounds,
+        after_clifford_depolarization=0.001,
+    )
+    graph, logicals, circuit = parse_stim_circuit(circuit, lexical_detectors=False)
+    print(  # noqa: T201
+        f"distance={args.distance} rounds={rounds} "
+        f"nodes={len(graph.nodes)} edges={len(graph.edges)}"
+    )
+
+    decoder = PyMatchingDecoder(graph, logicals)
+    start = time.perf_counter()
+    matching = build_networkx_matcher(decoder, decoder.logicals)
+    graph_build = time.perf_counter() - start
+    arrays = _MatchingArrays.from_matching(matching)
+    start = time.perf_counter()
+    arrays.to_matching()
+    arrays_build = time.perf_counter() - start
+    print(  # noqa: T201
+        f"matcher build from graph: {graph_build:.3f} s, "
+        f"from arrays: {arrays_build:.3f} s, "
+        f"pickled decoder: {len(pickle.dumps(decoder)) / 1e6:.2f} MB"
+    )
+
+    print(  # noqa: T201
+        f"{'workers':>8} {'configure (s)':>14} {'first batch (s)':>16} {'total (s)':>10}"
+    )
+    for workers in args.workers:
+        configure, first_batch = time_pool_setup(
+            PyMatchingDecoder(graph, logicals), circuit, workers, args.shots_per_worker
+        )
+        print(  # noqa: T201
+            f"{workers:>8} {configure:>14.3f} {first_batch:>16.3f} "
+            f"{configure + first_batch:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
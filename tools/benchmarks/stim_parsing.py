@@ -0,0 +1,67 @@
+"""Benchmark parsing Stim circuits into ``deltakit_circuit`` circuits.
+
+This times ``Circuit.from_stim_circuit`` on noisy rotated surface code memory
+circuits, both as generated by Stim, where the rounds are a ``REPEAT`` block, and
+flattened, as for circuits exported from hardware where every round is written out.
+The number of top level instructions and the fastest parse time over the repeats are
+reported for each circuit.
+
+Usage::
+
+    python tools/benchmarks/stim_parsing.py --distances 5 15 25
+"""
+
+import argparse
+import time
+
+import stim
+from deltakit_circuit import Circuit
+
+
+def noisy_memory_circuit(distance: int, rounds: int) -> stim.Circuit:
+    return stim.Circuit.generated(
+        "surface_code:rotated_memory_z",
+        distance=distance,
+        rounds=rounds,
+        after_clifford_depolarization=0.001,
+        before_measure_flip_probability=0.001,
+        after_reset_flip_probability=0.001,
+        before_round_data_depolarization=0.001,
+    )
+
+
+def measure(circuit: stim.Circuit, repeats: int) -> float:
+    """Return the fastest time taken to parse a circuit over the repeats."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        Circuit.from_stim_circuit(circuit)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--distances", type=int, nargs="+", default=[5, 15, 25])
+    parser.add_argument("--rounds", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(  # noqa: T201
+        f"{'distance':>8} {'rounds':>6} {'form':>9} {'instructions':>12} "
+        f"{'time (s)':>10}"
+    )
+    for distance in args.distances:
+        rounds = distance if args.rounds is None else args.rounds
+        circuit = noisy_memory_circuit(distance, rounds)
+        for form, form_circuit in [("repeat", circuit),
+                                   ("flattened", circuit.flattened())]:
+            seconds = measure(form_circuit, args.repeats)
+            print(  # noqa: T201
+                f"{distance:>8} {rounds:>6} {form:>9} {len(form_circuit):>12} "
+                f"{seconds:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()